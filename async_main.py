@@ -0,0 +1,688 @@
+"""
+Асинхронный движок бота: AsyncTeleBot + AsyncParseHotels/AsyncTextTranslator.
+
+Диалог тот же, что и в main.py - шаги диалога общие (vtravel_bot_ui.dialog):
+    город -> месторасположение -> количество отелей -> фото.
+Запуск: python main.py --engine async [--mode webhook]
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from telebot import types
+from telebot.asyncio_helper import ApiTelegramException
+from loguru import logger
+
+from config_bot import BOT_TOKEN, REQUEST_DEADLINE
+from config_bot import (WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET,
+                        WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_WORKERS,
+                        WEBHOOK_QUEUE_SIZE)
+from vtravel_bot_parsers import AsyncParseHotels, has_search_suggestions
+from vtravel_bot_parsers import AsyncTextTranslator
+from vtravel_bot_parsers import has_cyrillic, transliterate
+from vtravel_bot_parsers import HotelSummary
+from vtravel_bot_parsers import timed
+from vtravel_bot_parsers import current_trace_id, get_tracer, traced
+from vtravel_bot_parsers import deadline, is_stale
+from vtravel_bot_parsers import get_gazetteer
+from vtravel_bot_parsers.metrics import (HANDLER_DURATION,
+                                         CONVERSATIONS_IN_FLIGHT,
+                                         UPDATE_QUEUE_DEPTH)
+from vtravel_bot_ui import (COMMANDS_AND_MODES, CallbackRouter,
+                            HELP_CALLBACK, MODE_CALLBACK,
+                            HOTEL_SEARCH_CALLBACK, HISTORY_CALLBACK,
+                            parse_mode_callback, create_command_buttons,
+                            command_all_description,
+                            parse_hotel_search_callback,
+                            parse_history_callback,
+                            collect_hotel_selection_messages, dialog)
+from vtravel_bot_services import (WebhookServer, check_webhook_settings,
+                                  ConversationState, AsyncRateLimitedTeleBot,
+                                  create_state_store, get_log_sampler,
+                                  get_file_id_cache, get_search_history)
+
+
+bot = AsyncRateLimitedTeleBot(token=BOT_TOKEN)
+log_sampler = get_log_sampler()
+
+conversation_states = create_state_store()
+file_id_cache = get_file_id_cache()
+gazetteer = get_gazetteer()
+search_history = get_search_history()
+translator = AsyncTextTranslator()
+tracer = get_tracer()
+CONVERSATIONS_IN_FLIGHT.set_function(lambda: len(conversation_states))
+
+
+STICKER_PATH = os.path.join('static', 'stickers', 'HelloAnimatedSticker.tgs')
+
+
+async def send_hello_sticker(chat_id: int) -> None:
+    """
+    Отправить стикер приветствия. Файл загружается в Telegram только
+    при первой отправке, затем стикер отправляется по file_id
+    (FileIdCache).
+
+    Args:
+        chat_id (int): Чат пользователя.
+
+    Raises:
+        FileNotFoundError: Если файла стикера нет.
+        ApiTelegramException: Если Telegram не принял стикер.
+    """
+    key = file_id_cache.file_key(STICKER_PATH)
+    file_id = file_id_cache.get(key)
+    if file_id is not None:
+        try:
+            await bot.send_sticker(chat_id, file_id)
+            return
+        except ApiTelegramException:
+            # file_id отклонен (например, сменился токен бота)
+            file_id_cache.discard(key)
+
+    with open(STICKER_PATH, mode='rb') as sticker:
+        sent_message = await bot.send_sticker(chat_id, sticker)
+    file_id_cache.put(key, sent_message.sticker.file_id)
+
+
+@bot.message_handler(commands=['start'])
+@timed(HANDLER_DURATION)
+@logger.catch
+async def start_bot(message: types.Message) -> None:
+    """Запустить бота приветствием и стикером."""
+    try:
+        await send_hello_sticker(message.chat.id)
+    except (FileNotFoundError, ApiTelegramException) as error_message:
+        logger.exception('Ошибка загрузки стикера "hello" - {0}'.format(
+                                                                error_message))
+        await bot.send_message(message.chat.id, '👋')
+
+    await bot.send_message(message.chat.id, dialog.HELLO_MESSAGE)
+    await bot.send_message(message.chat.id, dialog.CHOOSE_COMMAND,
+                           reply_markup=create_command_buttons())
+
+
+callback_router = CallbackRouter()
+
+
+@bot.callback_query_handler(func=lambda call: call.data in callback_router)
+@logger.catch
+async def route_callback(call: types.CallbackQuery) -> None:
+    """
+    Передать нажатую кнопку обработчику кода операции
+    (первого символа callback_data) - CallbackRouter - вместе
+    с состоянием диалога чата (загружается один раз на нажатие).
+    Нажатие кнопки записывается в трассу текущего диалога.
+    Запросы обработчика к API укладываются в срок REQUEST_DEADLINE.
+    """
+    try:
+        handler, payload = callback_router.resolve(call.data)
+    except ValueError as error_message:
+        logger.warning(error_message)
+        return
+    state = conversation_states.get(call.message.chat.id)
+    with tracer.span(handler.__name__,
+                     trace_id=(state.conversation_id
+                               if state is not None else None),
+                     chat_id=call.message.chat.id), \
+            deadline(REQUEST_DEADLINE):
+        await handler(call, payload, state)
+
+
+@callback_router.register(HELP_CALLBACK)
+@timed(HANDLER_DURATION)
+@logger.catch
+async def callback_send_description_of_all_commands(
+                            call: types.CallbackQuery, payload: str,
+                            state: Optional[ConversationState]) -> None:
+    """
+    Ответить на нажатие кнопки помощи (HELP_CALLBACK).
+    Отправить описание команд.
+    """
+    await bot.send_message(call.message.chat.id, command_all_description())
+
+
+@bot.message_handler(commands=['help'])
+@timed(HANDLER_DURATION)
+async def reply_to_help_command(message: types.Message) -> None:
+    """
+    Ответить на нажатие команды - /help.
+    Отправить описание команд.
+    """
+    await bot.send_message(message.chat.id, command_all_description())
+
+
+@bot.message_handler(commands=['history'])
+@timed(HANDLER_DURATION)
+@logger.catch
+async def reply_to_history_command(message: types.Message) -> None:
+    """
+    Ответить на нажатие команды - /history.
+    Отправить первую страницу истории поиска отелей.
+    """
+    await send_search_history(message.chat.id)
+
+
+@callback_router.register(HISTORY_CALLBACK, decoder=parse_history_callback)
+@timed(HANDLER_DURATION)
+@logger.catch
+async def callback_send_search_history(
+                            call: types.CallbackQuery,
+                            before: Optional[Tuple[float, int]],
+                            state: Optional[ConversationState]) -> None:
+    """
+    Ответить на нажатие кнопки истории поиска (HISTORY_CALLBACK).
+    Отправить страницу истории поиска отелей.
+    """
+    await send_search_history(call.message.chat.id, before=before)
+
+
+async def send_search_history(chat_id: int,
+                              before: Tuple[float, int] = None) -> None:
+    """
+    Отправить страницу истории поиска отелей (новые поиски первыми).
+
+    Args:
+        chat_id (int): Id чата.
+        before (Tuple[float, int]) = None: Ссылка на страницу
+            (SearchHistory.page). По умолчанию - первая страница.
+    """
+    search_records, next_page = search_history.page(chat_id, before=before)
+    for reply in dialog.history_page(search_records, next_page,
+                                     first_page=before is None):
+        await bot.send_message(chat_id, reply.text, parse_mode='HTML',
+                               reply_markup=reply.markup)
+
+
+@callback_router.register(MODE_CALLBACK, decoder=parse_mode_callback)
+@timed(HANDLER_DURATION)
+async def callback_user_selection_button(
+                            call: types.CallbackQuery, mode_for_sorting: str,
+                            state: Optional[ConversationState]) -> None:
+    """Обработать нажатие кнопок: [lowprice, highprice, bestdeal]."""
+    logger.debug('Выбор пользователя - кнопка {0}'.format(mode_for_sorting))
+    await ask_city(call.message.chat.id, mode_for_sorting)
+
+
+@bot.message_handler(commands=['lowprice', 'highprice', 'bestdeal'])
+@timed(HANDLER_DURATION)
+@logger.catch
+async def command_user_choice_command(message: types.Message) -> None:
+    """Обработать команды: [lowprice, highprice, bestdeal]"""
+    mode_for_sorting = COMMANDS_AND_MODES.get(message.text)
+    logger.debug('Выбор пользователя - команда {0}'.format(message.text))
+    await ask_city(message.chat.id, mode_for_sorting)
+
+
+async def ask_city(chat_id: int, mode_for_sorting: str) -> None:
+    """
+    Запросить у пользователя город для поиска.
+    Начать новый диалог в чате с новым id диалога.
+
+    Args:
+        chat_id (int): Id чата.
+        mode_for_sorting (str): Режим сортировки поиска отелей.
+    """
+    state, reply = dialog.ask_city(chat_id, mode_for_sorting,
+                                   conversation_id=tracer.new_trace_id())
+    with tracer.span('ask_city', trace_id=state.conversation_id,
+                     chat_id=chat_id, mode=mode_for_sorting):
+        await send_reply(state, reply)
+
+
+async def send_reply(state: ConversationState, reply: dialog.Reply,
+                     message_id: int = None) -> None:
+    """
+    Отправить ответ бота на шаг диалога и выполнить его действие:
+    сохранить или завершить диалог, найти город, отправить подборку.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        reply (dialog.Reply): Ответ бота.
+        message_id (int) = None: Сообщение, текст которого заменяется
+            ответом (например, "Ожидайте загрузки..."). По умолчанию -
+            ответ отправляется новым сообщением.
+    """
+    if reply.text is not None:
+        if message_id is None:
+            await bot.send_message(state.chat_id, reply.text,
+                                   reply_markup=reply.markup)
+        else:
+            await bot.edit_message_text(chat_id=state.chat_id,
+                                        message_id=message_id,
+                                        text=reply.text,
+                                        reply_markup=reply.markup)
+
+    if reply.action == dialog.SAVE_STATE:
+        conversation_states.save(state)
+    elif reply.action == dialog.END_DIALOG:
+        conversation_states.delete(state.chat_id)
+        tracer.finish(state.conversation_id)
+    elif reply.action == dialog.SEARCH_CITY:
+        await city_search(state)
+    elif reply.action == dialog.SEND_SELECTION:
+        await get_selection_of_hotels(
+            state, number_of_photos=reply.number_of_photos)
+
+
+@logger.catch
+@traced()
+async def translation_of_text_from_russian_into_english(city_name: str) -> str:
+    """
+    Проверить, если город буквами (ru) - меняем на (en).
+    Если ошибка в переводе, возвращаем название города на (en).
+
+    Args:
+        city_name (str): Название города.
+    """
+    if has_cyrillic(city_name):
+        logger.info(
+            'Город введен кириллицей: {0},'
+            ' выполняется перевод с (ru) -> (en)'.format(city_name))
+        try:
+            city_name = await translator.translate(text=city_name)
+        except (ConnectionError, ValueError) as error_message:
+            logger.error(error_message)
+
+    logger.info(
+        'Выбранный город пользователем для поиска: {0}'.format(city_name))
+    return city_name
+
+
+@traced()
+async def search_city(city_name: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Найти город у API. Название кириллицей сначала ищется
+    по транслитерации (без переводчика), переводчик - только если
+    по транслитерации ничего не найдено.
+    Вернуть запрос к API и результаты поиска.
+
+    Args:
+        city_name (str): Название города.
+
+    Raises:
+        ConnectionError: Если не удалось получить данные от API.
+        ValueError: Если название состоит из цифр.
+    """
+    parser = AsyncParseHotels()
+    if not has_cyrillic(city_name):
+        return city_name, await parser.get_search_results_by_city(
+                                                city_to_search=city_name)
+
+    city_to_search = transliterate(city_name)
+    logger.info('Город введен кириллицей: {0}, поиск по транслитерации'
+                ' {1}'.format(city_name, city_to_search))
+    search_results = await parser.get_search_results_by_city(
+                                            city_to_search=city_to_search)
+    if has_search_suggestions(search_results):
+        return city_to_search, search_results
+
+    translated_city = await translation_of_text_from_russian_into_english(
+                                                        city_name=city_name)
+    if not translated_city or translated_city == city_to_search:
+        return city_to_search, search_results
+    return translated_city, await parser.get_search_results_by_city(
+                                            city_to_search=translated_city)
+
+
+@logger.catch
+@traced()
+async def city_search(state: ConversationState) -> None:
+    """
+    Найти возможные направления города state.city: известный город -
+    в справочнике направлений (без перевода и запроса к API),
+    остальные - у API с пополнением справочника.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+    """
+    temporary_message = await bot.send_message(state.chat_id,
+                                               dialog.WAIT_MESSAGE)
+
+    found_destinations = gazetteer.lookup(state.city)
+    search_results = None
+    if found_destinations is None:
+        try:
+            selected_city_to_search, search_results = \
+                await search_city(state.city)
+        except ConnectionError as error_message:
+            logger.error(error_message)
+            await send_reply(state, dialog.search_failed(),
+                             temporary_message.id)
+            return
+        except ValueError as error_message:
+            logger.error(error_message)
+            await send_reply(state, dialog.city_not_found(state),
+                             temporary_message.id)
+            return
+
+        if search_results and not is_stale(search_results):
+            gazetteer.add(search_results,
+                          names=(state.city, selected_city_to_search))
+
+    await send_reply(state,
+                     dialog.destinations_found(
+                         state, search_results, found_destinations,
+                         stale=is_stale(search_results)),
+                     temporary_message.id)
+
+
+@callback_router.register(HOTEL_SEARCH_CALLBACK,
+                          decoder=parse_hotel_search_callback)
+@timed(HANDLER_DURATION)
+@logger.catch
+async def hotel_search(call: types.CallbackQuery,
+                       parameters: Dict[str, Any],
+                       previous_state: Optional[ConversationState]
+                       ) -> None:
+    """
+    Поиск отелей - запросить у пользователя количество отелей.
+
+    В callback - передаются параметры для поиска отелей
+    (hotel_search_callback_data): id месторасположения, режим
+    сортировки отелей и, в режиме bestdeal, минимальная
+    и максимальная цена. Отели запрашиваются одной страницей, когда
+    известно их количество (dialog.start_hotel_search).
+
+    Args:
+        call (types.CallbackQuery): Нажатая кнопка месторасположения.
+        parameters (Dict[str, Any]): Параметры поиска из callback_data -
+            destination_id, mode, price_min, price_max.
+        previous_state (Optional[ConversationState]): Состояние диалога
+            до нажатия кнопки (город - для истории поиска).
+    """
+    state, reply = dialog.start_hotel_search(
+        call, parameters, previous_state=previous_state,
+        conversation_id=current_trace_id() or tracer.new_trace_id())
+    await send_reply(state, reply)
+
+
+@traced()
+async def get_hotels_from_search_parameters(
+                            state: ConversationState,
+                            number_of_hotels: int) -> List[Dict[str, Any]]:
+    """
+    Получить список отелей по параметрам поиска из состояния диалога
+    (dialog.hotel_search_parameters).
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        number_of_hotels (int): Количество отелей.
+
+    Raises:
+        ConnectionError: Если не удалось получить данные от API.
+        ValueError: Если ответ API некорректен.
+    """
+    return [hotel async for hotel in AsyncParseHotels().iterate_hotels(
+        **dialog.hotel_search_parameters(state, number_of_hotels))]
+
+
+@logger.catch
+@traced()
+async def get_selection_of_hotels(state: ConversationState,
+                                  number_of_photos: int = None) -> None:
+    """
+    Получить подборку с заданным количеством отелей.
+    Диалог завершается.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        number_of_photos (int) = None: Количество загружаемых фотографий.
+    """
+    conversation_states.delete(state.chat_id)
+    tracer.finish(state.conversation_id)
+    logger.info('Получить подборку отелей (количество = {0}, фото = {1})'
+                .format(state.number_of_hotels, number_of_photos))
+    try:
+        hotels = await get_hotels_from_search_parameters(
+            state, number_of_hotels=state.number_of_hotels)
+        selection_of_hotels = dialog.collect_selection(state, hotels)
+    except ConnectionError as error_message:
+        logger.error(error_message)
+        await bot.send_message(state.chat_id, dialog.hotels_unavailable().text)
+        return
+    except Exception as error_message:
+        logger.exception(error_message)
+        await bot.send_message(state.chat_id, dialog.SEARCH_ERROR)
+        return
+
+    if not selection_of_hotels:
+        await bot.send_message(state.chat_id, dialog.NOTHING_FOUND)
+        return
+    search_history.record(dialog.search_record(state, selection_of_hotels))
+    await send_information_about_found_hotels(
+                                        state.chat_id,
+                                        selected_hotels=selection_of_hotels,
+                                        number_of_photos=number_of_photos)
+
+
+@logger.catch
+@traced()
+async def send_information_about_found_hotels(
+                                    chat_id: int,
+                                    selected_hotels: List[HotelSummary],
+                                    number_of_photos: int = None) -> None:
+    """
+    Отправить пользователю информацию о найденных отелях.
+    Без фотографий описания отелей упаковываются в как можно меньшее
+    число сообщений. Фото всех отелей запрашиваются параллельно
+    с отправкой описаний и отправляются альбомами после описания отеля.
+
+    Args:
+        chat_id (int): Id чата.
+        selected_hotels (List[HotelSummary]): Подборка отелей.
+        number_of_photos (int) = None: Количество загружаемых фотографий.
+    """
+    logger.info('Отправить пользователю информацию о найденных отелях')
+    hotels_photos = None
+    if number_of_photos:
+        hotels_photos = asyncio.ensure_future(
+            AsyncParseHotels().get_photos_of_hotels(
+                hotel_ids=[hotel.id for hotel in selected_hotels],
+                number_of_photos=number_of_photos))
+
+    if not hotels_photos:
+        for text in collect_hotel_selection_messages(selected_hotels):
+            await bot.send_message(chat_id, text, parse_mode='HTML')
+        return
+
+    descriptions = collect_hotel_selection_messages(selected_hotels,
+                                                    packed=False)
+    for number, hotel in enumerate(selected_hotels):
+        await bot.send_message(chat_id, descriptions[number],
+                               parse_mode='HTML')
+        await send_hotel_photos(chat_id, hotel,
+                                (await hotels_photos)[number])
+
+
+async def send_photo_album(chat_id: int, images_urls: List[str],
+                           caption: str) -> None:
+    """
+    Отправить фото одним альбомом (send_media_group). Фото, которые
+    уже отправлялись, отправляются по file_id (FileIdCache) - Telegram
+    не скачивает их заново; file_id новых фото сохраняются в кэш.
+
+    Args:
+        chat_id (int): Чат пользователя.
+        images_urls (List[str]): URL фото.
+        caption (str): Подпись альбома (у первого фото).
+    """
+    media = [file_id_cache.get(image_url) or image_url
+             for image_url in images_urls]
+    if len(media) == 1:
+        sent_messages = [await bot.send_photo(chat_id, media[0],
+                                              caption=caption)]
+    else:
+        album = [
+            types.InputMediaPhoto(
+                photo, caption=caption if number == 0 else None)
+            for number, photo in enumerate(media)
+        ]
+        sent_messages = await bot.send_media_group(chat_id, album)
+
+    file_id_cache.put_many(
+        (image_url, sent_message.photo[-1].file_id)
+        for image_url, sent_message in zip(images_urls, sent_messages)
+        if sent_message.photo)
+
+
+@logger.catch
+@traced()
+async def send_hotel_photos(chat_id: int, hotel: HotelSummary,
+                            hotel_photos: Union[List[Dict[str, Any]],
+                                                Exception]) -> None:
+    """
+    Отправить фото отеля одним альбомом (send_media_group).
+
+    Args:
+        chat_id (int): Id чата.
+        hotel (HotelSummary): Информация об отеле.
+        hotel_photos (Union[List[Dict[str, Any]], Exception]): Фото отеля
+            или ошибка их получения.
+    """
+    try:
+        images_urls = dialog.hotel_photo_urls(hotel, hotel_photos)
+        log_sampler.log('hotel_photos', 'INFO',
+                        'Загрузка {0} фотографий. Отель - {1}',
+                        len(images_urls), hotel.name)
+        try:
+            await send_photo_album(chat_id, images_urls, hotel.name)
+        except ApiTelegramException:
+            cached_urls = [image_url for image_url in images_urls
+                           if file_id_cache.get(image_url) is not None]
+            if not cached_urls:
+                raise
+            # file_id отклонен - отправить альбом заново по URL
+            for image_url in cached_urls:
+                file_id_cache.discard(image_url)
+            await send_photo_album(chat_id, images_urls, hotel.name)
+    except (ConnectionError, ValueError, AttributeError,
+            ApiTelegramException) as error_message:
+        log_sampler.log('hotel_photos_error', 'WARNING', str(error_message))
+        await bot.send_message(chat_id, dialog.PHOTOS_ERROR)
+
+
+@bot.message_handler(content_types=['text'])
+@timed(HANDLER_DURATION)
+@logger.catch
+async def process_conversation_step(message: types.Message) -> None:
+    """
+    Передать ответ пользователя шагу диалога (dialog.CONVERSATION_STEPS)
+    и отправить ответ бота. Если диалог ждет нажатия кнопки - напомнить
+    об этом, если диалога нет - подсказать команды. Состояние диалога
+    загружается из хранилища один раз на сообщение.
+    Шаг диалога записывается корневым интервалом трассы диалога.
+    Запросы к API укладываются в срок REQUEST_DEADLINE.
+    """
+    state = conversation_states.get(message.chat.id)
+    if state is None:
+        return await process_all_messages_from_user(message)
+
+    step = dialog.CONVERSATION_STEPS.get(state.step)
+    if step is None:
+        await bot.send_message(message.chat.id, dialog.CHOOSE_DESTINATION)
+        return
+    with tracer.span(step.__name__, trace_id=state.conversation_id,
+                     chat_id=message.chat.id, step=state.step), \
+            deadline(REQUEST_DEADLINE):
+        await send_reply(state, step(state, message.text))
+
+
+async def process_all_messages_from_user(message: types.Message) -> None:
+    """
+    Обработать сообщения от пользователя вне диалога и перенаправить
+    на "/" или "/help".
+    """
+    if message.text:
+        log_sampler.log('unknown_input', 'INFO',
+                        'Неизвестный ввод от пользователя.')
+        await bot.send_message(chat_id=message.chat.id,
+                               text=dialog.UNKNOWN_INPUT)
+
+
+async def start_polling() -> None:
+    """Принимать обновления через long polling."""
+    await bot.delete_webhook()
+    await bot.polling(non_stop=True, interval=0)
+
+
+def get_update_chat_id(update: types.Update) -> int:
+    """
+    Получить id чата обновления (сообщения или нажатой кнопки).
+    Для остальных обновлений - update_id.
+
+    Args:
+        update (types.Update): Обновление Telegram.
+    """
+    message = update.message or update.edited_message
+    if message is None and update.callback_query is not None:
+        message = update.callback_query.message
+    return message.chat.id if message is not None else update.update_id
+
+
+def start_webhook() -> None:
+    """
+    Принимать обновления через webhook.
+    Пул WebhookServer передает обновления в событийный цикл бота,
+    не дожидаясь их обработки. Обновления одного чата обрабатываются
+    в цикле по очереди (asyncio.Lock чата) - порядок шагов диалога
+    сохраняется, обновления разных чатов обрабатываются параллельно.
+
+    Raises:
+        ValueError: Если не заданы WEBHOOK_URL или WEBHOOK_SECRET.
+    """
+    check_webhook_settings(WEBHOOK_URL, WEBHOOK_SECRET)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(bot.delete_webhook())
+    loop.run_until_complete(bot.set_webhook(url=WEBHOOK_URL + WEBHOOK_PATH,
+                                            secret_token=WEBHOOK_SECRET,
+                                            max_connections=WEBHOOK_WORKERS))
+
+    # id чата -> (замок чата, количество его обновлений в цикле);
+    # меняется только в событийном цикле
+    chat_locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+
+    async def process_in_order(update: types.Update) -> None:
+        chat_id = get_update_chat_id(update)
+        lock, pending = chat_locks.get(chat_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        chat_locks[chat_id] = (lock, pending + 1)
+        try:
+            async with lock:
+                await bot.process_new_updates([update])
+        except Exception as error_message:
+            logger.exception(error_message)
+        finally:
+            lock, pending = chat_locks.pop(chat_id)
+            if pending > 1:
+                chat_locks[chat_id] = (lock, pending - 1)
+
+    def process_update(update: types.Update) -> None:
+        asyncio.run_coroutine_threadsafe(process_in_order(update), loop)
+
+    server = WebhookServer(process_update=process_update,
+                           host=WEBHOOK_HOST, port=WEBHOOK_PORT,
+                           path=WEBHOOK_PATH, secret_token=WEBHOOK_SECRET,
+                           workers=WEBHOOK_WORKERS,
+                           queue_size=WEBHOOK_QUEUE_SIZE)
+    UPDATE_QUEUE_DEPTH.set_function(lambda: server.queue_depth)
+    server.start()
+    try:
+        loop.run_forever()
+    finally:
+        server.stop()
+
+
+def run(mode: str = 'polling') -> None:
+    """
+    Запустить асинхронный движок бота.
+
+    Args:
+        mode (str): Прием обновлений - polling или webhook.
+    """
+    logger.debug('Start async bot ({0})'.format(mode))
+    if mode == 'webhook':
+        start_webhook()
+    else:
+        asyncio.run(start_polling())
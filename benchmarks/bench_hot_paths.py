@@ -0,0 +1,372 @@
+"""
+Микробенчмарки CPU-операций разбора ответов API и построения интерфейса.
+
+Операции:
+    - collect_brief_information_top20: ParseHotels.
+      collect_brief_information_about_hotels - подборка из 20 отелей
+      (функция не разбирает больше 20, размер списка не важен);
+    - hotel_summary_from_api: разбор 1000 отелей большого списка;
+    - collect_found_destinations: словарь направлений (city_search);
+    - destination_buttons: create_buttons_to_select_destination;
+    - callback_routing: выбор обработчика кнопки и разбор параметров
+      поиска отелей (hotel_search);
+    - selection_messages: сообщения с подборкой отелей
+      (send_information_about_found_hotels).
+
+Для каждой операции выводится время одного вызова (лучший и медианный
+повтор), относительное время и выделения памяти (пик и количество
+блоков, tracemalloc). Относительное время - медиана отношений времени
+операции к времени эталонной операции calibrate, измеренной в том же
+повторе непосредственно перед ней: общее замедление машины (частота
+процессора, соседние процессы) на него почти не влияет.
+
+Запуск:
+    python -m benchmarks.bench_hot_paths [--hotels 10000]
+    python -m benchmarks.bench_hot_paths --save
+    python -m benchmarks.bench_hot_paths --compare [--threshold 0.5]
+
+Время зависит от машины, поэтому базовая линия не хранится
+в репозитории: --save на исходном коммите, затем --compare после
+изменений (файл baselines/ - локальный, в .gitignore). --compare
+отказывается сравнивать с базовой линией другого окружения (Python,
+архитектура, размер списка) и завершается с кодом 1, если
+относительное время или пик памяти операции больше, чем
+baseline * (1 + threshold). Абсолютное время только выводится.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from vtravel_bot_parsers import HotelSummary, ParseHotels
+from vtravel_bot_ui import (HELP_CALLBACK, HOTEL_SEARCH_CALLBACK,
+                            MODE_CALLBACK, CallbackRouter,
+                            collect_found_destinations,
+                            collect_hotel_selection_messages,
+                            create_buttons_to_select_destination,
+                            hotel_search_callback_data, mode_callback_data,
+                            parse_hotel_search_callback, parse_mode_callback)
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'baselines', 'hot_paths.json')
+
+
+def make_hotels(number_of_hotels: int) -> List[Dict[str, Any]]:
+    """
+    Составить синтетический список отелей в формате properties/list.
+
+    Args:
+        number_of_hotels (int): Количество отелей.
+    """
+    return [{
+        'id': 1505932768 + number,
+        'name': 'Отель «Приморский» № {0}'.format(number),
+        'starRating': 4.0,
+        'address': {'streetAddress': 'Курортный проспект, {0}'.format(
+                        number % 120 + 1),
+                    'locality': 'Сочи', 'countryName': 'Россия'},
+        'landmarks': [{'label': 'Центр города',
+                       'distance': '{0},{1} км'.format(number % 15,
+                                                       number % 10)}],
+        'ratePlan': {'price': {'current': '{0:,} RUB'.format(
+                                   1800 + number * 50 % 20000),
+                               'exactCurrent': 1800.0 + number * 50 % 20000}},
+    } for number in range(number_of_hotels)]
+
+
+def make_search_results(number_of_destinations: int) -> Dict[str, Any]:
+    """
+    Составить синтетический ответ locations/v2/search.
+
+    Args:
+        number_of_destinations (int): Количество месторасположений.
+    """
+    entities = [{'destinationId': str(10873622 + number), 'type': 'CITY',
+                 'caption': 'Сочи {0}, Краснодарский край, Россия'.format(
+                     number), 'name': 'Сочи'}
+                for number in range(number_of_destinations)]
+    return {'suggestions': [{'group': 'CITY_GROUP', 'entities': entities},
+                            {'group': 'HOTEL_GROUP', 'entities': []}]}
+
+
+def make_callback_router() -> CallbackRouter:
+    """
+    Составить CallbackRouter с кодами операций обработчиков кнопок
+    из main.py (обработчики возвращают разобранные данные).
+    """
+    router = CallbackRouter()
+    for opcode, decoder in ((HELP_CALLBACK, None),
+                            (MODE_CALLBACK, parse_mode_callback),
+                            (HOTEL_SEARCH_CALLBACK,
+                             parse_hotel_search_callback)):
+        router.register(opcode, decoder)(lambda call, payload: payload)
+    return router
+
+
+def route_callback(router: CallbackRouter, data: str) -> Any:
+    """
+    Выбрать обработчик кнопки и разобрать ее данные
+    (route_callback в main.py).
+    """
+    if data not in router:
+        return None
+    handler, payload = router.resolve(data)
+    return handler(None, payload)
+
+
+_CALIBRATION_DATA = {'key {0}'.format(number): number * 1.5
+                     for number in range(200)}
+
+
+def calibrate() -> List[str]:
+    """
+    Эталонная операция: обход словаря, форматирование строк
+    и выделение списка - то же, из чего состоят измеряемые операции.
+    """
+    return ['{0}: {1:.1f}'.format(key, value)
+            for key, value in _CALIBRATION_DATA.items()]
+
+
+def build_operations(number_of_hotels: int) -> Dict[str, Callable[[], Any]]:
+    """
+    Подготовить данные и операции бенчмарка.
+
+    Args:
+        number_of_hotels (int): Размер синтетического списка отелей.
+    """
+    hotels = make_hotels(number_of_hotels)
+    search_results = make_search_results(50)
+    destinations = collect_found_destinations(make_search_results(10))
+    summaries = ParseHotels.collect_brief_information_about_hotels(20, hotels)
+    callbacks = [hotel_search_callback_data(destination_id, 'PRICE',
+                                            [1000, 5000])
+                 for destination_id in destinations.values()]
+    callbacks += [HELP_CALLBACK, mode_callback_data('PRICE'),
+                  mode_callback_data('PRICE_HIGHEST_FIRST')]
+    router = make_callback_router()
+
+    return {
+        'collect_brief_information_top20': lambda: (
+            ParseHotels.collect_brief_information_about_hotels(20, hotels)),
+        'hotel_summary_from_api': lambda: [
+            HotelSummary.from_api(hotel) for hotel in hotels[:1000]],
+        'collect_found_destinations': lambda: (
+            collect_found_destinations(search_results)),
+        'destination_buttons': lambda: create_buttons_to_select_destination(
+            destinations, 'DISTANCE_FROM_LANDMARK', [1000, 5000]),
+        'callback_routing': lambda: [route_callback(router, data)
+                                     for data in callbacks],
+        'selection_messages': lambda: (
+            collect_hotel_selection_messages(summaries)),
+        'selection_messages_with_photos': lambda: (
+            collect_hotel_selection_messages(summaries, packed=False)),
+    }
+
+
+def get_number_of_calls(operation: Callable[[], Any],
+                       min_time: float) -> int:
+    """
+    Подобрать количество вызовов операции в повторе так, чтобы повтор
+    длился не меньше min_time секунд.
+    """
+    number = 1
+    while True:
+        if time_calls(operation, number) * number >= min_time * 1e6:
+            return number
+        number *= 2
+
+
+def time_calls(operation: Callable[[], Any], number: int) -> float:
+    """Измерить время одного вызова (мкс) по number вызовам подряд."""
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def measure_time(operation: Callable[[], Any], repeat: int,
+                 min_time: float = 0.05,
+                 reference: Callable[[], Any] = calibrate
+                 ) -> Dict[str, float]:
+    """
+    Измерить время одного вызова операции в микросекундах
+    и относительное время - медиану отношений времени операции
+    к времени эталонной операции, измеренной в том же повторе
+    непосредственно перед ней.
+
+    Количество вызовов в повторе подбирается так, чтобы повтор длился
+    не меньше min_time секунд.
+
+    Args:
+        operation (Callable): Измеряемая операция.
+        repeat (int): Количество повторов.
+        min_time (float): Минимальная длительность повтора в секундах.
+        reference (Callable): Эталонная операция.
+    """
+    number = get_number_of_calls(operation, min_time)
+    reference_number = get_number_of_calls(reference, min_time)
+
+    timings = []
+    ratios = []
+    for _ in range(repeat):
+        reference_timing = time_calls(reference, reference_number)
+        timings.append(time_calls(operation, number))
+        ratios.append(timings[-1] / reference_timing)
+    return {'best_us': min(timings), 'median_us': statistics.median(timings),
+            'relative': statistics.median(ratios)}
+
+
+def measure_memory(operation: Callable[[], Any]) -> Dict[str, int]:
+    """
+    Измерить пик выделенной памяти (байт) и количество блоков,
+    выделенных одним вызовом операции и оставшихся до его конца.
+
+    Args:
+        operation (Callable): Измеряемая операция.
+    """
+    operation()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = operation()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    blocks = sum(max(stat.count_diff, 0)
+                 for stat in after.compare_to(before, 'filename'))
+    return {'peak_bytes': peak, 'blocks': blocks}
+
+
+def run(number_of_hotels: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Выполнить все операции бенчмарка.
+
+    Args:
+        number_of_hotels (int): Размер синтетического списка отелей.
+        repeat (int): Количество повторов измерения времени.
+    """
+    results = {}
+    for name, operation in build_operations(number_of_hotels).items():
+        results[name] = dict(measure_time(operation, repeat),
+                             **measure_memory(operation))
+    return results
+
+
+def report(results: Dict[str, Dict[str, float]]) -> None:
+    """Вывести время и выделения памяти операций."""
+    print('{0:<32} {1:>12} {2:>12} {3:>10} {4:>12} {5:>8}'.format(
+        'operation', 'best, us', 'median, us', 'relative', 'peak, B',
+        'blocks'))
+    for name, result in results.items():
+        print('{0:<32} {1:>12.2f} {2:>12.2f} {3:>10.3f} {4:>12} {5:>8}'
+              .format(name, result['best_us'], result['median_us'],
+                      result['relative'], result['peak_bytes'],
+                      result['blocks']))
+
+
+def get_environment(number_of_hotels: int) -> Dict[str, Any]:
+    """
+    Получить окружение измерения: результаты сравнимы, только если
+    окружение совпадает.
+
+    Args:
+        number_of_hotels (int): Размер синтетического списка отелей.
+    """
+    return {'python': platform.python_version(),
+            'machine': platform.machine(), 'hotels': number_of_hotels}
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    Сравнить результаты с базовой линией.
+    Возвращает описания регрессий.
+
+    Args:
+        results (Dict): Текущие результаты.
+        baseline (Dict): Сохраненные результаты.
+        threshold (float): Допустимое относительное ухудшение.
+    """
+    regressions = []
+    for name, result in results.items():
+        saved = baseline.get(name)
+        if saved is None:
+            print('{0:<32} нет в базовой линии'.format(name))
+            continue
+        for metric in ('relative', 'peak_bytes'):
+            if metric not in saved:
+                print('{0:<32} {1:<10} нет в базовой линии'.format(
+                    name, metric))
+                continue
+            ratio = result[metric] / saved[metric] if saved[metric] else 1.0
+            status = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+            print('{0:<32} {1:<10} {2:>12.2f} -> {3:>12.2f}  x{4:.2f}  '
+                  '{5}'.format(name, metric, saved[metric], result[metric],
+                               ratio, status))
+            if status != 'ok':
+                regressions.append('{0}.{1}: x{2:.2f}'.format(
+                    name, metric, ratio))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hotels', type=int, default=10000,
+                        help='Размер синтетического списка отелей.')
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='Файл базовой линии.')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--save', action='store_true',
+                      help='Сохранить результаты в файл базовой линии.')
+    mode.add_argument('--compare', action='store_true',
+                      help='Сравнить результаты с базовой линией.')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Допустимое ухудшение (0.5 - на 50%%).')
+    args = parser.parse_args()
+
+    results = run(args.hotels, args.repeat)
+    report(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(dict(get_environment(args.hotels), results=results),
+                      baseline_file, indent=2, sort_keys=True)
+        print('Базовая линия сохранена: {0}'.format(args.baseline))
+    elif args.compare:
+        try:
+            with open(args.baseline, encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+        except FileNotFoundError:
+            sys.exit('Нет базовой линии {0}: сохраните ее (--save) '
+                     'на исходном коммите.'.format(args.baseline))
+        environment = get_environment(args.hotels)
+        different = {key: (baseline.get(key), value)
+                     for key, value in environment.items()
+                     if baseline.get(key) != value}
+        if different:
+            sys.exit('Базовая линия снята в другом окружении {0}: '
+                     'сохраните ее (--save) на этой машине.'.format(
+                         different))
+        print('\nБазовая линия: Python {0}, {1}, hotels={2}'.format(
+            baseline['python'], baseline['machine'], baseline['hotels']))
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print('\nРегрессии: {0}'.format(', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
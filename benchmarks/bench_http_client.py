@@ -0,0 +1,76 @@
+"""
+Бенчмарк: задержка запроса без пула соединений и через HTTPClient.
+
+Запускает локальную замену API (stand_in_server) и выполняет одинаковое
+количество запросов:
+    - requests.get: новое соединение на каждый запрос;
+    - HTTPClient.get: общий пул keep-alive соединений.
+
+Запуск:
+    python -m benchmarks.bench_http_client [--requests 500] [--delay 0]
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+import requests
+
+from vtravel_bot_parsers import HTTPClient, RateLimiter
+from .stand_in_server import FaultProfile, StandInServer
+
+
+def measure(make_request: Callable[[], 'requests.Response'],
+            number_of_requests: int) -> List[float]:
+    """
+    Измерить задержку каждого запроса в миллисекундах.
+
+    Args:
+        make_request (Callable): Функция, выполняющая один запрос.
+        number_of_requests (int): Количество запросов.
+    """
+    timings = []
+    for _ in range(number_of_requests):
+        start = time.perf_counter()
+        make_request().content
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    """Вывести среднее, медиану и 95-й перцентиль задержки."""
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print('{0:<28} mean={1:7.3f}ms  p50={2:7.3f}ms  p95={3:7.3f}ms'.format(
+        name, statistics.mean(timings), statistics.median(timings), p95))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='Задержка ответа сервера в секундах.')
+    args = parser.parse_args()
+
+    server = StandInServer(profile=FaultProfile(latency=args.delay)).start()
+    url = '{0}/locations/v2/search'.format(server.url)
+
+    # без лимита частоты запросов - измеряется только транспорт
+    client = HTTPClient(rate_limiter=RateLimiter())
+    try:
+        cold = measure(lambda: requests.get(url, timeout=10), args.requests)
+        pooled = measure(
+            lambda: client.get(url, endpoint='locations/v2/search'),
+            args.requests)
+    finally:
+        client.close()
+        server.stop()
+
+    report('requests.get (no pool)', cold)
+    report('HTTPClient.get (keep-alive)', pooled)
+    print('speedup (mean): x{0:.2f}'.format(
+        statistics.mean(cold) / statistics.mean(pooled)))
+
+
+if __name__ == '__main__':
+    main()
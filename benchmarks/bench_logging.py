@@ -0,0 +1,149 @@
+"""
+Бенчмарк журнала: задержка обработчика с разными настройками журнала.
+
+Обработчик повторяет запись журнала send_information_about_found_hotels
+и send_hotel_photos: запись о начале отправки и запись о загрузке фото
+каждого отеля подборки.
+
+Настройки:
+    - off: журнал не пишется (нижняя граница);
+    - sync_text: текст, запись файла в потоке обработчика (как раньше);
+    - loguru_enqueue_text: текст, очередь loguru (enqueue=True);
+    - background_text: текст, запись файла в фоновом потоке
+      (BackgroundLogWriter);
+    - background_json: JSON, запись файла в фоновом потоке;
+    - background_json_sampled: то же, записи фото - через LogSampler.
+
+Для каждой настройки выводится задержка одного вызова обработчика
+(медиана, 99-й процентиль, среднее) и количество строк в журнале.
+
+Запуск:
+    python -m benchmarks.bench_logging [--handlers 2000] [--hotels 20]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+from vtravel_bot_services import LogSampler, configure_logging
+from vtravel_bot_services.logging_setup import TEXT_FORMAT
+
+
+def make_handler(number_of_hotels: int,
+                 log_sampler: LogSampler = None) -> Callable[[], None]:
+    """
+    Составить обработчик, который пишет журнал как отправка подборки
+    отелей с фото.
+
+    Args:
+        number_of_hotels (int): Количество отелей в подборке.
+        log_sampler (LogSampler) = None: Ограничение частоты записей
+            о фото. По умолчанию - записывается каждое фото.
+    """
+    names = ['Отель «Приморский» № {0}'.format(number)
+             for number in range(number_of_hotels)]
+
+    def handler() -> None:
+        logger.info('Отправить пользователю информацию о найденных отелях')
+        for name in names:
+            if log_sampler is not None:
+                log_sampler.log('hotel_photos', 'INFO',
+                                'Загрузка {0} фотографий. Отель - {1}',
+                                5, name)
+            else:
+                logger.info('Загрузка {0} фотографий. Отель - {1}'.format(
+                    5, name))
+
+    return handler
+
+
+def measure(handler: Callable[[], None],
+            number_of_handlers: int) -> Dict[str, float]:
+    """
+    Измерить задержку вызовов обработчика в микросекундах.
+
+    Args:
+        handler (Callable): Обработчик.
+        number_of_handlers (int): Количество вызовов.
+    """
+    timings = []
+    for _ in range(number_of_handlers):
+        started = time.perf_counter()
+        handler()
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return {'median_us': statistics.median(timings),
+            'p99_us': timings[int(len(timings) * 0.99) - 1],
+            'mean_us': statistics.mean(timings)}
+
+
+def run_configuration(directory: str, name: str, number_of_handlers: int,
+                      number_of_hotels: int) -> Dict[str, float]:
+    """
+    Измерить обработчик с одной настройкой журнала.
+
+    Args:
+        directory (str): Каталог для файлов журнала.
+        name (str): Настройка (см. описание модуля).
+        number_of_handlers (int): Количество вызовов обработчика.
+        number_of_hotels (int): Количество отелей в подборке.
+    """
+    path = os.path.join(directory, '{0}.log'.format(name))
+    handler_id: Optional[int] = None
+    log_sampler = None
+    if name == 'loguru_enqueue_text':
+        handler_id = logger.add(path, format=TEXT_FORMAT, level='DEBUG',
+                                enqueue=True)
+    elif name != 'off':
+        handler_id = configure_logging(
+            path=path, level='DEBUG',
+            log_format='json' if 'json' in name else 'text',
+            enqueue=name.startswith('background'))
+    if name.endswith('sampled'):
+        log_sampler = LogSampler(rate=1, burst=5)
+
+    handler = make_handler(number_of_hotels, log_sampler)
+    handler()
+    result = measure(handler, number_of_handlers)
+
+    if handler_id is not None:
+        # дождаться записи очереди фонового потока
+        logger.remove(handler_id)
+    lines = 0
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as log_file:
+            lines = sum(1 for _ in log_file)
+    result['lines'] = lines
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--handlers', type=int, default=2000,
+                        help='Количество вызовов обработчика.')
+    parser.add_argument('--hotels', type=int, default=20,
+                        help='Количество отелей в подборке.')
+    args = parser.parse_args()
+
+    # без вывода в stderr - измеряется только файл журнала
+    logger.remove()
+    print('{0:<24} {1:>12} {2:>12} {3:>12} {4:>8}'.format(
+        'configuration', 'median, us', 'p99, us', 'mean, us', 'lines'))
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('off', 'sync_text', 'loguru_enqueue_text',
+                     'background_text', 'background_json',
+                     'background_json_sampled'):
+            result = run_configuration(directory, name, args.handlers,
+                                       args.hotels)
+            print('{0:<24} {1:>12.1f} {2:>12.1f} {3:>12.1f} {4:>8}'.format(
+                name, result['median_us'], result['p99_us'],
+                result['mean_us'], result['lines']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,397 @@
+"""
+Локальная замена API Hotels и Deep Translate для тестов и бенчмарков.
+
+Отвечает на запросы из записанных ответов (benchmarks/fixtures):
+    - GET /locations/v2/search;
+    - GET /properties/list (постранично, с сортировкой по цене
+      и фильтром priceMin/priceMax);
+    - GET /properties/get-hotel-photos;
+    - POST /language/translate/v2, GET /language/translate/v2/languages.
+
+Задержка ответа - логнормальное распределение (медиана latency,
+разброс latency_sigma), доля ответов 500 - error_rate, доля ответов
+429 с заголовком Retry-After - throttle_rate. Параметры задаются
+для всех запросов и отдельно для endpoint.
+
+Запуск:
+    python -m benchmarks.stand_in_server [--port 8080] [--latency 0.05]
+        [--latency-sigma 0.5] [--error-rate 0] [--throttle-rate 0]
+
+Бот и бенчмарки обращаются к серверу через переменные окружения:
+    HOTELS_API_URL=http://127.0.0.1:8080
+    TRANSLATOR_API_URL=http://127.0.0.1:8080
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures')
+
+ENDPOINTS = {
+    ('GET', '/locations/v2/search'): 'locations/v2/search',
+    ('GET', '/properties/list'): 'properties/list',
+    ('GET', '/properties/get-hotel-photos'): 'properties/get-hotel-photos',
+    ('POST', '/language/translate/v2'): 'translate/v2',
+    ('GET', '/language/translate/v2/languages'): 'translate/v2/languages',
+}
+
+
+class FaultProfile:
+    """
+    Задержка и ошибки ответов локального сервера.
+
+    Методы:
+        - sample_delay: Получить задержку ответа.
+        - sample_fault: Получить код ошибки или None.
+    """
+    __slots__ = ('latency', 'latency_sigma', 'error_rate', 'throttle_rate',
+                 'retry_after')
+
+    def __init__(self, latency: float = 0.0, latency_sigma: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 1.0):
+        """
+        Args:
+            latency (float): Медиана задержки ответа в секундах.
+            latency_sigma (float): Разброс задержки (sigma логнормального
+                распределения). 0 - задержка всегда равна latency.
+            error_rate (float): Доля ответов 500.
+            throttle_rate (float): Доля ответов 429.
+            retry_after (float): Значение Retry-After в ответах 429.
+        """
+        if latency < 0 or latency_sigma < 0 or retry_after < 0:
+            raise ValueError('Задержка не может быть отрицательной.')
+        if not (0 <= error_rate <= 1 and 0 <= throttle_rate <= 1):
+            raise ValueError('Доля ошибок должна быть от 0 до 1.')
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+
+    def sample_delay(self, rng: random.Random) -> float:
+        """Получить задержку ответа в секундах."""
+        if not self.latency or not self.latency_sigma:
+            return self.latency
+        return rng.lognormvariate(math.log(self.latency), self.latency_sigma)
+
+    def sample_fault(self, rng: random.Random) -> Optional[int]:
+        """Получить код ошибки (429, 500) или None - ответить успешно."""
+        draw = rng.random()
+        if draw < self.throttle_rate:
+            return 429
+        if draw < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+
+def load_fixtures(fixtures_dir: str = FIXTURES_DIR) -> Dict[str, Any]:
+    """
+    Загрузить записанные ответы API.
+
+    Args:
+        fixtures_dir (str): Каталог с JSON-файлами ответов.
+    """
+    fixtures = {}
+    for name in ('locations_v2_search', 'properties_list', 'get_hotel_photos',
+                 'translate_v2', 'translate_v2_languages'):
+        path = os.path.join(fixtures_dir, name + '.json')
+        with open(path, encoding='utf-8') as fixture_file:
+            fixtures[name] = json.load(fixture_file)
+    return fixtures
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов локального сервера."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: '_StandInHTTPServer'
+
+    def do_GET(self) -> None:
+        self.__handle('GET')
+
+    def do_POST(self) -> None:
+        self.__handle('POST')
+
+    def __handle(self, method: str) -> None:
+        url = urlsplit(self.path)
+        endpoint = ENDPOINTS.get((method, url.path))
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if endpoint is None:
+            self.__reply(404, {'message': 'Endpoint not found'})
+            return
+
+        stand_in = self.server.stand_in
+        delay, fault = stand_in.sample(endpoint)
+        if delay:
+            time.sleep(delay)
+        if fault == 429:
+            self.__reply(429, {'message': 'Too many requests'}, headers={
+                'Retry-After': '{0:g}'.format(
+                    stand_in.profile_for(endpoint).retry_after)})
+            return
+        if fault == 500:
+            self.__reply(500, {'message': 'Internal server error'})
+            return
+
+        params = dict(parse_qsl(url.query))
+        try:
+            payload = stand_in.respond(endpoint, params, body)
+        except (ValueError, KeyError) as error_message:
+            self.__reply(400, {'message': str(error_message)})
+            return
+        self.__reply(200, payload)
+
+    def __reply(self, status: int, payload: Any,
+                headers: Dict[str, str] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stand_in.count(status)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    """HTTP-сервер со ссылкой на StandInServer."""
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int],
+                 stand_in: 'StandInServer'):
+        self.stand_in = stand_in
+        super().__init__(address, _StandInHandler)
+
+
+class StandInServer:
+    """
+    Локальный HTTP-сервер, заменяющий API Hotels и Deep Translate.
+
+    Методы:
+        - start: Запустить сервер в фоновом потоке.
+        - stop: Остановить сервер.
+        - profile_for: Получить профиль задержки и ошибок endpoint.
+        - sample: Получить задержку и ошибку очередного ответа.
+        - respond: Составить ответ endpoint из записанных ответов.
+        - count: Учесть код ответа в статистике.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 profile: FaultProfile = None,
+                 endpoint_profiles: Dict[str, FaultProfile] = None,
+                 fixtures_dir: str = FIXTURES_DIR, seed: int = None):
+        """
+        Args:
+            host (str): Адрес сервера.
+            port (int): Порт сервера. 0 - свободный порт.
+            profile (FaultProfile) = None: Задержка и ошибки всех ответов.
+                По умолчанию - без задержки и ошибок.
+            endpoint_profiles (Dict[str, FaultProfile]) = None: Профили
+                отдельных endpoint (например, 'properties/list').
+            fixtures_dir (str): Каталог с записанными ответами.
+            seed (int) = None: Зерно генератора случайных чисел
+                для воспроизводимых задержек и ошибок.
+        """
+        self.__address = (host, port)
+        self.__profile = profile or FaultProfile()
+        self.__endpoint_profiles = dict(endpoint_profiles or {})
+        self.__fixtures = load_fixtures(fixtures_dir)
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__requests = Counter()
+        self.__statuses = Counter()
+        self.__server: Optional[_StandInHTTPServer] = None
+
+    def start(self) -> 'StandInServer':
+        """Запустить сервер в фоновом потоке."""
+        self.__server = _StandInHTTPServer(self.__address, self)
+        threading.Thread(target=self.__server.serve_forever,
+                         kwargs={'poll_interval': 0.05},
+                         name='stand-in-server', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Остановить сервер."""
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """Получить базовый URL сервера (HOTELS_API_URL и
+        TRANSLATOR_API_URL)."""
+        host, port = self.__server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    @property
+    def stats(self) -> Dict[str, Dict[Any, int]]:
+        """Получить количество запросов по endpoint и ответов по кодам."""
+        with self.__lock:
+            return {'requests': dict(self.__requests),
+                    'statuses': dict(self.__statuses)}
+
+    def profile_for(self, endpoint: str) -> FaultProfile:
+        """
+        Получить профиль задержки и ошибок endpoint.
+
+        Args:
+            endpoint (str): Имя endpoint, например 'properties/list'.
+        """
+        return self.__endpoint_profiles.get(endpoint, self.__profile)
+
+    def sample(self, endpoint: str) -> Tuple[float, Optional[int]]:
+        """
+        Получить задержку и код ошибки очередного ответа endpoint.
+
+        Args:
+            endpoint (str): Имя endpoint.
+        """
+        profile = self.profile_for(endpoint)
+        with self.__lock:
+            self.__requests[endpoint] += 1
+            return (profile.sample_delay(self.__random),
+                    profile.sample_fault(self.__random))
+
+    def count(self, status: int) -> None:
+        """Учесть код ответа в статистике."""
+        with self.__lock:
+            self.__statuses[status] += 1
+
+    def respond(self, endpoint: str, params: Dict[str, str],
+                body: bytes) -> Any:
+        """
+        Составить ответ endpoint из записанных ответов.
+
+        Args:
+            endpoint (str): Имя endpoint.
+            params (Dict[str, str]): Параметры строки запроса.
+            body (bytes): Тело запроса.
+
+        Raises:
+            ValueError: Если параметры запроса некорректны.
+        """
+        if endpoint == 'locations/v2/search':
+            return self.__search(params)
+        if endpoint == 'properties/list':
+            return self.__list_of_hotels(params)
+        if endpoint == 'properties/get-hotel-photos':
+            return dict(self.__fixtures['get_hotel_photos'],
+                        hotelId=int(params.get('id', '0') or 0))
+        if endpoint == 'translate/v2':
+            return self.__translate(body)
+        return self.__fixtures['translate_v2_languages']
+
+    def __search(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Ответ locations/v2/search: неизвестный город - без результатов."""
+        query = params.get('query', '').lower()
+        response_json = self.__fixtures['locations_v2_search'].get(query)
+        if response_json is None:
+            response_json = {'term': query, 'suggestions': [
+                {'group': 'CITY_GROUP', 'entities': []}]}
+        return response_json
+
+    def __list_of_hotels(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Ответ properties/list: страница отелей с параметрами."""
+        page_number = int(params.get('pageNumber', '1'))
+        page_size = int(params.get('pageSize', '25'))
+        if page_number < 1 or not 1 <= page_size <= 25:
+            raise ValueError('Incorrect pageNumber or pageSize')
+
+        hotels = self.__fixtures['properties_list'].get(
+            params.get('destinationId', ''), [])
+        price_min = float(params.get('priceMin', '0') or 0)
+        price_max = float(params.get('priceMax', 'inf') or 'inf')
+        hotels = [
+            hotel for hotel in hotels
+            if price_min <= hotel['ratePlan']['price']['exactCurrent']
+            <= price_max]
+        sort_order = params.get('sortOrder', '')
+        if sort_order in ('PRICE', 'PRICE_HIGHEST_FIRST'):
+            hotels.sort(
+                key=lambda hotel: hotel['ratePlan']['price']['exactCurrent'],
+                reverse=sort_order == 'PRICE_HIGHEST_FIRST')
+
+        start = (page_number - 1) * page_size
+        pagination = {'currentPage': page_number,
+                      'pageGroup': 'EXPEDIA_IN_POLYGON'}
+        if start + page_size < len(hotels):
+            pagination['nextPageNumber'] = page_number + 1
+        return {'result': 'OK', 'data': {'body': {'searchResults': {
+            'totalCount': len(hotels),
+            'results': hotels[start:start + page_size],
+            'pagination': pagination}}}}
+
+    def __translate(self, body: bytes) -> Dict[str, Any]:
+        """
+        Ответ translate/v2: известный текст - записанный перевод.
+        q - список: translations - список переводов в том же порядке.
+        """
+        texts = json.loads(body or b'{}').get('q', '')
+        translations = [
+            {'translatedText': self.__fixtures['translate_v2'].get(text, text)}
+            for text in (texts if isinstance(texts, list) else [texts])]
+        if not isinstance(texts, list):
+            return {'data': {'translations': translations[0]}}
+        return {'data': {'translations': translations}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Медиана задержки ответа в секундах.')
+    parser.add_argument('--latency-sigma', type=float, default=0.0,
+                        help='Разброс задержки (логнормальное sigma).')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Доля ответов 500.')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='Доля ответов 429.')
+    parser.add_argument('--retry-after', type=float, default=1.0,
+                        help='Retry-After в ответах 429, секунды.')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    profile = FaultProfile(latency=args.latency,
+                           latency_sigma=args.latency_sigma,
+                           error_rate=args.error_rate,
+                           throttle_rate=args.throttle_rate,
+                           retry_after=args.retry_after)
+    server = StandInServer(host=args.host, port=args.port, profile=profile,
+                           seed=args.seed).start()
+    print('HOTELS_API_URL={0}\nTRANSLATOR_API_URL={0}'.format(server.url))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(server.stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,4 +6,30 @@ HEADERS_TRANSLATOR - API: Deep Translate
 https://rapidapi.com/gatzuma/api/deep-translate1/
 """
 
-from .config import BOT_TOKEN, HEADERS_BOT, HEADERS_TRANSLATOR
+from .config import BOT_TOKEN, HEADERS_BOT, HEADERS_TRANSLATOR, BOT_ENGINE
+from .config import HOTELS_API_URL, TRANSLATOR_API_URL
+from .config import HTTP_POOL_SIZE, PHOTO_FETCH_CONCURRENCY
+from .config import (TRANSLATE_BATCH_MAX_CHARS, TRANSLATE_BATCH_MAX_TEXTS,
+                     TRANSLATE_CONCURRENCY)
+from .config import (TELEGRAM_RATE, TELEGRAM_BURST, TELEGRAM_CHAT_RATE,
+                     TELEGRAM_CHAT_BURST, API_RATE, API_BURST,
+                     RATE_LIMIT_RETRIES)
+from .config import (API_RETRIES, API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY,
+                     REQUEST_DEADLINE)
+from .config import (CACHE_TTL_SEARCH, CACHE_TTL_HOTELS,
+                     CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL_NEGATIVE,
+                     CACHE_MAX_STALE)
+from .config import (CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_SLOW_CALL_SECONDS,
+                     CIRCUIT_OPEN_SECONDS)
+from .config import (TRANSLATION_MEMORY_PATH, FILE_ID_CACHE_PATH,
+                     GAZETTEER_PATH)
+from .config import (BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET,
+                     WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_WORKERS,
+                     WEBHOOK_QUEUE_SIZE)
+from .config import STATE_STORE, STATE_STORE_PATH, STATE_TTL
+from .config import (HISTORY_PATH, HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL,
+                     HISTORY_PAGE_SIZE)
+from .config import METRICS_HOST, METRICS_PORT
+from .config import TRACE_EXPORT_PATH, TRACE_MAX_TRACES
+from .config import (LOG_PATH, LOG_LEVEL, LOG_FORMAT, LOG_ENQUEUE,
+                     LOG_SAMPLE_RATE, LOG_SAMPLE_BURST)
@@ -11,3 +11,113 @@ BOT_TOKEN = os.getenv('BOT_TOKEN')
 # your headers from environment variables
 HEADERS_BOT = os.getenv('HEADERS_BOT')
 HEADERS_TRANSLATOR = os.getenv('HEADERS_TRANSLATOR')
+
+# base URLs of the APIs (local stand-in: benchmarks/stand_in_server.py)
+HOTELS_API_URL = os.getenv('HOTELS_API_URL', 'https://hotels4.p.rapidapi.com')
+TRANSLATOR_API_URL = os.getenv('TRANSLATOR_API_URL',
+                               'https://deep-translate1.p.rapidapi.com')
+
+# size of the shared HTTP connection pool (per host)
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+# in-process API response cache: TTL in seconds per endpoint and size limits
+CACHE_TTL_SEARCH = float(os.getenv('CACHE_TTL_SEARCH', '86400'))
+CACHE_TTL_HOTELS = float(os.getenv('CACHE_TTL_HOTELS', '1800'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '512'))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+# TTL in seconds of empty results (no suggestions for a city, no hotels)
+CACHE_TTL_NEGATIVE = float(os.getenv('CACHE_TTL_NEGATIVE', '60'))
+# seconds past TTL an expired response may still be served while the API
+# endpoint is unavailable
+CACHE_MAX_STALE = float(os.getenv('CACHE_MAX_STALE', '86400'))
+
+# circuit breaker per API endpoint: consecutive failures (errors, 5xx or
+# calls slower than CIRCUIT_SLOW_CALL_SECONDS, 0 - off) before opening
+# and seconds before a trial request
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', '5'))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+
+# disk-backed translation memory (SQLite)
+TRANSLATION_MEMORY_PATH = os.getenv('TRANSLATION_MEMORY_PATH',
+                                    'data/translations.sqlite3')
+
+# disk-backed gazetteer of destinations grown from city search responses
+GAZETTEER_PATH = os.getenv('GAZETTEER_PATH', 'data/gazetteer.sqlite3')
+
+# disk-backed cache of Telegram file_id (sticker, hotel photos)
+FILE_ID_CACHE_PATH = os.getenv('FILE_ID_CACHE_PATH',
+                               'data/file_ids.sqlite3')
+
+# maximum number of concurrent hotel photo requests
+PHOTO_FETCH_CONCURRENCY = int(os.getenv('PHOTO_FETCH_CONCURRENCY', '5'))
+
+# batch translation: maximum characters and texts in one request
+# and number of concurrent requests
+TRANSLATE_BATCH_MAX_CHARS = int(os.getenv('TRANSLATE_BATCH_MAX_CHARS', '5000'))
+TRANSLATE_BATCH_MAX_TEXTS = int(os.getenv('TRANSLATE_BATCH_MAX_TEXTS', '128'))
+TRANSLATE_CONCURRENCY = int(os.getenv('TRANSLATE_CONCURRENCY', '4'))
+
+# outbound rate limits: requests per second and burst size
+# Telegram - all chats and one chat, RapidAPI - per API host
+TELEGRAM_RATE = float(os.getenv('TELEGRAM_RATE', '30'))
+TELEGRAM_BURST = int(os.getenv('TELEGRAM_BURST', '30'))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', '3'))
+API_RATE = float(os.getenv('API_RATE', '5'))
+API_BURST = int(os.getenv('API_BURST', '5'))
+# retries of a Telegram request rejected with 429 (after waiting retry_after)
+RATE_LIMIT_RETRIES = int(os.getenv('RATE_LIMIT_RETRIES', '3'))
+
+# retries of API requests (429, 5xx, connection errors): count, exponential
+# backoff with full jitter - base and maximum delay in seconds
+API_RETRIES = int(os.getenv('API_RETRIES', '3'))
+API_RETRY_BASE_DELAY = float(os.getenv('API_RETRY_BASE_DELAY', '0.2'))
+API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '5'))
+# time budget in seconds of all API requests of one bot update (0 - none)
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', '25'))
+
+# bot engine: sync (telebot.TeleBot) or async (AsyncTeleBot)
+BOT_ENGINE = os.getenv('BOT_ENGINE', 'sync')
+
+# update ingestion: polling or webhook (webhook requires WEBHOOK_URL and
+# WEBHOOK_SECRET)
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram-webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', '4'))
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+
+# local Prometheus-style metrics endpoint (/metrics), port 0 - disabled
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9464'))
+
+# bot log: file, minimum level, format (text or json), writing in a
+# background thread (1 - on, 0 - off)
+LOG_PATH = os.getenv('LOG_PATH', 'logs/bot.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_ENQUEUE = os.getenv('LOG_ENQUEUE', '1') != '0'
+# frequent log events (photos of each hotel, 429...): records per second
+# and burst size per event
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1'))
+LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', '5'))
+
+# conversation traces: JSON Lines file ('' - disabled), unfinished traces kept
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', 'logs/traces.jsonl')
+TRACE_MAX_TRACES = int(os.getenv('TRACE_MAX_TRACES', '1000'))
+
+# conversation state store: memory or sqlite, TTL of unfinished dialogs
+STATE_STORE = os.getenv('STATE_STORE', 'memory')
+STATE_STORE_PATH = os.getenv('STATE_STORE_PATH', 'data/conversations.sqlite3')
+STATE_TTL = float(os.getenv('STATE_TTL', '3600'))
+
+# search history: SQLite file, records per write batch, seconds between
+# background writes, records per /history page
+HISTORY_PATH = os.getenv('HISTORY_PATH', 'data/history.sqlite3')
+HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', '100'))
+HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', '1'))
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '5'))
@@ -1,275 +1,273 @@
+import argparse
 import os
-import string
-from typing import Dict, List, Any
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import telebot
 from telebot import types
+from telebot.apihelper import ApiTelegramException
 from loguru import logger
 
-from config_bot import BOT_TOKEN
-from vtravel_bot_parsers import ParseHotels
+from config_bot import BOT_TOKEN, BOT_ENGINE, BOT_MODE
+from config_bot import (WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET,
+                        WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_WORKERS,
+                        WEBHOOK_QUEUE_SIZE)
+from config_bot import METRICS_HOST, METRICS_PORT
+from config_bot import REQUEST_DEADLINE
+from vtravel_bot_parsers import ParseHotels, has_search_suggestions
 from vtravel_bot_parsers import TextTranslator
-
-
-logger.add(
-    'logs/bot.log',
-    format="{time:YYYY-MM-DD at HH:mm:ss} {file} (line -{line})  {level}  {message} <- {function}",
-    level='DEBUG',
-    rotation='1 week',
-    retention=4,
-    compression='zip'
-)
+from vtravel_bot_parsers import has_cyrillic, transliterate
+from vtravel_bot_parsers import HotelSummary
+from vtravel_bot_parsers import timed
+from vtravel_bot_parsers import current_trace_id, get_tracer, traced
+from vtravel_bot_parsers import deadline, is_stale
+from vtravel_bot_parsers import get_gazetteer
+from vtravel_bot_parsers.metrics import (HANDLER_DURATION,
+                                         CONVERSATIONS_IN_FLIGHT,
+                                         UPDATE_QUEUE_DEPTH)
+from vtravel_bot_ui import (COMMANDS_AND_MODES, CallbackRouter,
+                            HELP_CALLBACK, MODE_CALLBACK,
+                            HOTEL_SEARCH_CALLBACK, HISTORY_CALLBACK,
+                            parse_mode_callback, create_command_buttons,
+                            command_all_description,
+                            parse_hotel_search_callback,
+                            parse_history_callback,
+                            collect_hotel_selection_messages, dialog)
+from vtravel_bot_services import (WebhookServer, check_webhook_settings,
+                                  ConversationState, RateLimitedTeleBot,
+                                  create_state_store, MetricsServer,
+                                  configure_logging, get_log_sampler,
+                                  get_file_id_cache, get_search_history)
+
+
+configure_logging()
+log_sampler = get_log_sampler()
 
 bot = None
 try:
-    bot = telebot.TeleBot(token=BOT_TOKEN)
+    bot = RateLimitedTeleBot(token=BOT_TOKEN)
 except Exception as bot_error:
     logger.exception(bot_error)
 
+conversation_states = create_state_store()
+file_id_cache = get_file_id_cache()
+gazetteer = get_gazetteer()
+search_history = get_search_history()
+translator = TextTranslator()
+tracer = get_tracer()
+CONVERSATIONS_IN_FLIGHT.set_function(lambda: len(conversation_states))
+
+
+STICKER_PATH = os.path.join('static', 'stickers', 'HelloAnimatedSticker.tgs')
+
+
+def send_hello_sticker(chat_id: int) -> None:
+    """
+    Отправить стикер приветствия. Файл загружается в Telegram только
+    при первой отправке, затем стикер отправляется по file_id
+    (FileIdCache).
+
+    Args:
+        chat_id (int): Чат пользователя.
+
+    Raises:
+        FileNotFoundError: Если файла стикера нет.
+        ApiTelegramException: Если Telegram не принял стикер.
+    """
+    key = file_id_cache.file_key(STICKER_PATH)
+    file_id = file_id_cache.get(key)
+    if file_id is not None:
+        try:
+            bot.send_sticker(chat_id, file_id)
+            return
+        except ApiTelegramException:
+            # file_id отклонен (например, сменился токен бота)
+            file_id_cache.discard(key)
+
+    with open(STICKER_PATH, mode='rb') as sticker:
+        sent_message = bot.send_sticker(chat_id, sticker)
+    file_id_cache.put(key, sent_message.sticker.file_id)
+
 
 @bot.message_handler(commands=['start'])
+@timed(HANDLER_DURATION)
 @logger.catch
 def start_bot(message: types.Message) -> None:
     """Запустить бота приветствием и стикером."""
     try:
-        path_to_sticker = os.path.abspath(
-            os.path.join('', 'static/stickers/HelloAnimatedSticker.tgs'))
-        sticker = open(path_to_sticker, mode='rb')
-    except FileNotFoundError:
-        sticker = '👋'
-    hello_messages = 'Привет!\nЯ бот турагенства.\n' \
-                     'Помогу подобрать самые лучшие отели для вас!\n\n'
-
-    try:
-        bot.send_sticker(message.chat.id, sticker)
-    except Exception as error_message:
+        send_hello_sticker(message.chat.id)
+    except (FileNotFoundError, ApiTelegramException) as error_message:
         logger.exception('Ошибка загрузки стикера "hello" - {0}'.format(
                                                                 error_message))
-        bot.send_message(message.chat.id, sticker)
+        bot.send_message(message.chat.id, '👋')
+
+    bot.send_message(message.chat.id, dialog.HELLO_MESSAGE)
+    bot.send_message(message.chat.id, dialog.CHOOSE_COMMAND,
+                     reply_markup=create_command_buttons())
 
-    bot.send_message(message.chat.id, hello_messages)
 
-    markup = create_command_buttons()
-    buttons_message = 'Нажмите на более предпочтительный выбор'
-    bot.send_message(message.chat.id, buttons_message, reply_markup=markup)
+callback_router = CallbackRouter()
 
 
+@bot.callback_query_handler(func=lambda call: call.data in callback_router)
 @logger.catch
-def create_command_buttons() -> 'types.InlineKeyboardMarkup':
+def route_callback(call: types.CallbackQuery) -> None:
     """
-    Создать кнопки для команд:
-        [lowprice, highprice, bestdeal, history, help]
+    Передать нажатую кнопку обработчику кода операции
+    (первого символа callback_data) - CallbackRouter - вместе
+    с состоянием диалога чата (загружается один раз на нажатие).
+    Нажатие кнопки записывается в трассу текущего диалога.
+    Запросы обработчика к API укладываются в срок REQUEST_DEADLINE.
     """
-    markup = types.InlineKeyboardMarkup(row_width=1)
-
-    lowprice_button = types.InlineKeyboardButton(
-                                            'Топ дешёвых отелей',
-                                            callback_data='lowprice_button')
-    high_button = types.InlineKeyboardButton('Топ дорогих отелей',
-                                             callback_data='high_button')
-    bestdeal_button = types.InlineKeyboardButton(
-                                            'Топ отелей, подходящих по цене',
-                                            callback_data='bestdeal_button')
-    # history_button = types.InlineKeyboardButton(
-    #                                     'История поиска отелей',
-    #                                     callback_data='history_button')
-    help_button = types.InlineKeyboardButton(
-                                            'Помощь по командам',
-                                            callback_data='help_button')
-
-    markup.add(lowprice_button, high_button, bestdeal_button, help_button)
-    return markup
-
-
-@bot.callback_query_handler(func=lambda call: call.data == 'help_button')
+    try:
+        handler, payload = callback_router.resolve(call.data)
+    except ValueError as error_message:
+        logger.warning(error_message)
+        return
+    state = conversation_states.get(call.message.chat.id)
+    with tracer.span(handler.__name__,
+                     trace_id=(state.conversation_id
+                               if state is not None else None),
+                     chat_id=call.message.chat.id), \
+            deadline(REQUEST_DEADLINE):
+        handler(call, payload, state)
+
+
+@callback_router.register(HELP_CALLBACK)
+@timed(HANDLER_DURATION)
 @logger.catch()
 def callback_send_description_of_all_commands(
-                                            call: types.CallbackQuery) -> None:
+                            call: types.CallbackQuery, payload: str,
+                            state: Optional[ConversationState]) -> None:
     """
-    Ответить на нажатие кнопки help_button.
+    Ответить на нажатие кнопки помощи (HELP_CALLBACK).
     Отправить описание команд.
     """
-    command_description = command_all_description()
-    bot.send_message(call.message.chat.id, command_description)
+    bot.send_message(call.message.chat.id, command_all_description())
 
 
 @bot.message_handler(commands=['help'])
+@timed(HANDLER_DURATION)
 def reply_to_help_command(message: types.Message) -> None:
     """
     Ответить на нажатие команды - /help.
     Отправить описание команд.
     """
-    command_description = command_all_description()
-    bot.send_message(message.chat.id, command_description)
+    bot.send_message(message.chat.id, command_all_description())
 
 
-def command_all_description() -> str:
+@bot.message_handler(commands=['history'])
+@timed(HANDLER_DURATION)
+@logger.catch
+def reply_to_history_command(message: types.Message) -> None:
     """
-    Отправить описание команд:
-        [lowprice, highprice, bestdeal, history]
+    Ответить на нажатие команды - /history.
+    Отправить первую страницу истории поиска отелей.
     """
-    command_description = (
-        "/lowprice - Узнать топ самых дешёвых отелей в городе\n"
-        "/highprice - Узнать топ самых дорогих отелей в городе\n"
-        "/bestdeal - Узнать топ отелей, наиболее подходящих по цене"
-        " и расположению от центра\n"
-        "/history - Узнать историю поиска отелей\n"
-    )
-    return command_description
+    send_search_history(message.chat.id)
 
 
-@bot.callback_query_handler(
-    func=lambda call: call.data in (
-                        'lowprice_button', 'high_button', 'bestdeal_button'))
-def callback_user_selection_button(call: types.CallbackQuery) -> None:
+@callback_router.register(HISTORY_CALLBACK, decoder=parse_history_callback)
+@timed(HANDLER_DURATION)
+@logger.catch
+def callback_send_search_history(call: types.CallbackQuery,
+                                 before: Optional[Tuple[float, int]],
+                                 state: Optional[ConversationState]
+                                 ) -> None:
+    """
+    Ответить на нажатие кнопки истории поиска (HISTORY_CALLBACK).
+    Отправить страницу истории поиска отелей.
+    """
+    send_search_history(call.message.chat.id, before=before)
+
+
+def send_search_history(chat_id: int,
+                        before: Tuple[float, int] = None) -> None:
+    """
+    Отправить страницу истории поиска отелей (новые поиски первыми).
+
+    Args:
+        chat_id (int): Id чата.
+        before (Tuple[float, int]) = None: Ссылка на страницу
+            (SearchHistory.page). По умолчанию - первая страница.
+    """
+    search_records, next_page = search_history.page(chat_id, before=before)
+    for reply in dialog.history_page(search_records, next_page,
+                                     first_page=before is None):
+        bot.send_message(chat_id, reply.text, parse_mode='HTML',
+                         reply_markup=reply.markup)
+
+
+@callback_router.register(MODE_CALLBACK, decoder=parse_mode_callback)
+@timed(HANDLER_DURATION)
+def callback_user_selection_button(
+                            call: types.CallbackQuery, mode_for_sorting: str,
+                            state: Optional[ConversationState]) -> None:
     """Обработать нажатие кнопок: [lowprice, highprice, bestdeal]."""
-    buttons_and_modes = {
-        'lowprice_button': 'PRICE',
-        'high_button': 'PRICE_HIGHEST_FIRST',
-        'bestdeal_button': 'DISTANCE_FROM_LANDMARK'
-    }
-    mode_for_sorting = buttons_and_modes.get(call.data)
-    logger.debug('Выбор пользователя - кнопка {0}'.format(call.data))
-    city_selection = bot.send_message(call.message.chat.id,
-                                      'Введите город для поиска:')
-
-    if mode_for_sorting == 'DISTANCE_FROM_LANDMARK':
-        bot.register_next_step_handler(city_selection,
-                                       get_lowest_hotel_price,
-                                       mode_for_sorting)
-    else:
-        bot.register_next_step_handler(city_selection,
-                                       city_search,
-                                       mode_for_sorting)
+    logger.debug('Выбор пользователя - кнопка {0}'.format(mode_for_sorting))
+    ask_city(call.message.chat.id, mode_for_sorting)
 
 
 @bot.message_handler(commands=['lowprice', 'highprice', 'bestdeal'])
+@timed(HANDLER_DURATION)
 @logger.catch
 def command_user_choice_command(message: types.Message) -> None:
     """Обработать команды: [lowprice, highprice, bestdeal]"""
-    commands_and_modes = {
-        '/lowprice': 'PRICE',
-        '/highprice': 'PRICE_HIGHEST_FIRST',
-        '/bestdeal': 'DISTANCE_FROM_LANDMARK'
-    }
-    mode_for_sorting = commands_and_modes.get(message.text)
+    mode_for_sorting = COMMANDS_AND_MODES.get(message.text)
     logger.debug('Выбор пользователя - команда {0}'.format(message.text))
-    city_selection = bot.send_message(message.chat.id,
-                                      'Введите город для поиска:')
-
-    if mode_for_sorting == 'DISTANCE_FROM_LANDMARK':
-        bot.register_next_step_handler(city_selection,
-                                       get_lowest_hotel_price,
-                                       mode_for_sorting)
-    else:
-        bot.register_next_step_handler(city_selection,
-                                       city_search,
-                                       mode_for_sorting)
-
-
-@logger.catch
-def get_lowest_hotel_price(message: types.Message,
-                           mode_for_sorting: str) -> None:
-    """
-    Получить от пользователя минимальную цену за отель.
-
-    Args:
-        message (types.Message): Ответ от пользователя - город для поиска.
-        mode_for_sorting (str): Режим сортировки поиска отелей.
-    """
-    search_city = message
-    minimum_price = bot.send_message(message.chat.id,
-                                     'Введите цифрами минимальную цену отеля:')
-    bot.register_next_step_handler(minimum_price,
-                                   get_highest_hotel_price,
-                                   search_city,
-                                   mode_for_sorting)
+    ask_city(message.chat.id, mode_for_sorting)
 
 
-@logger.catch
-def get_highest_hotel_price(message: types.Message,
-                            search_city: types.Message,
-                            mode_for_sorting: str) -> None:
+def ask_city(chat_id: int, mode_for_sorting: str) -> None:
     """
-    Получить от пользователя максимальную цену за отель.
+    Запросить у пользователя город для поиска.
+    Начать новый диалог в чате с новым id диалога.
 
     Args:
-        message (types.Message): Ответ от пользователя - минимальная цена.
-        search_city (types.Message): Ответ от пользователя - город для поиска.
+        chat_id (int): Id чата.
         mode_for_sorting (str): Режим сортировки поиска отелей.
     """
-    minimum_price = None
-    logger.info(
-        'Минимальная цена за отель, выбранная пользователем {0}'.format(
-                                                                message.text))
-    try:
-        minimum_price = int(message.text)
-    except Exception as error_message:
-        logger.warning(
-            'Ошибка ввода пользователем: {0}'
-            'Введенная пользователем минимальная цена: {1}'.format(
-                                                error_message, message.text)
-        )
-        price = bot.send_message(message.chat.id,
-                                 'Введите минимальную цену - цифрами:')
-        bot.register_next_step_handler(price,
-                                       get_highest_hotel_price,
-                                       search_city,
-                                       mode_for_sorting)
-
-    if minimum_price:
-        maximum_price = bot.send_message(
-                                    message.chat.id,
-                                    'Введите цифрами максимальную цену отеля:')
-        bot.register_next_step_handler(maximum_price,
-                                       get_complete_information_on_bestdeal,
-                                       search_city,
-                                       mode_for_sorting,
-                                       minimum_price)
+    state, reply = dialog.ask_city(chat_id, mode_for_sorting,
+                                   conversation_id=tracer.new_trace_id())
+    with tracer.span('ask_city', trace_id=state.conversation_id,
+                     chat_id=chat_id, mode=mode_for_sorting):
+        send_reply(state, reply)
 
 
-@logger.catch
-def get_complete_information_on_bestdeal(message: types.Message,
-                                         search_city: types.Message,
-                                         mode_for_sorting: str,
-                                         minimum_price: int) -> None:
+def send_reply(state: ConversationState, reply: dialog.Reply,
+               message_id: int = None) -> None:
     """
-    Получить полную информацию по поиску отелей в режиме bestdeal.
+    Отправить ответ бота на шаг диалога и выполнить его действие:
+    сохранить или завершить диалог, найти город, отправить подборку.
 
     Args:
-        message (types.Message): Ответ от пользователя - максимальная цена.
-        search_city (types.Message): Ответ от пользователя - город для поиска.
-        mode_for_sorting (str): Режим сортировки поиска отелей.
-        minimum_price (int): Минимальная цена для поиска отелей.
-    """
-    maximum_price = None
-    logger.info(
-        'Максимальная цена за отель, выбранная пользователем {0}'.format(
-                                                                message.text))
-    try:
-        maximum_price = int(message.text)
-    except Exception as error_message:
-        logger.warning(
-            'Ошибка ввода пользователем: {0}'
-            'Введенная пользователем максимальная цена: {1}'.format(
-                                                error_message, message.text)
-        )
-        price = bot.send_message(message.chat.id,
-                                 'Введите максимальную цену - цифрами:')
-        bot.register_next_step_handler(price,
-                                       get_complete_information_on_bestdeal,
-                                       search_city,
-                                       mode_for_sorting,
-                                       minimum_price)
-
-    if maximum_price:
-        bestdeal = [minimum_price, maximum_price]
-        city_search(search_city,
-                    mode_for_sorting,
-                    bestdeal)
+        state (ConversationState): Состояние диалога.
+        reply (dialog.Reply): Ответ бота.
+        message_id (int) = None: Сообщение, текст которого заменяется
+            ответом (например, "Ожидайте загрузки..."). По умолчанию -
+            ответ отправляется новым сообщением.
+    """
+    if reply.text is not None:
+        if message_id is None:
+            bot.send_message(state.chat_id, reply.text,
+                             reply_markup=reply.markup)
+        else:
+            bot.edit_message_text(chat_id=state.chat_id,
+                                  message_id=message_id, text=reply.text,
+                                  reply_markup=reply.markup)
+
+    if reply.action == dialog.SAVE_STATE:
+        conversation_states.save(state)
+    elif reply.action == dialog.END_DIALOG:
+        conversation_states.delete(state.chat_id)
+        tracer.finish(state.conversation_id)
+    elif reply.action == dialog.SEARCH_CITY:
+        city_search(state)
+    elif reply.action == dialog.SEND_SELECTION:
+        get_selection_of_hotels(state,
+                                number_of_photos=reply.number_of_photos)
 
 
 @logger.catch
+@traced()
 def translation_of_text_from_russian_into_english(city_name: str) -> str:
     """
     Проверить, если город буквами (ru) - меняем на (en).
@@ -278,9 +276,7 @@ def translation_of_text_from_russian_into_english(city_name: str) -> str:
     Args:
         city_name (str): Название города.
     """
-    if any(map(
-            lambda letter: letter not in string.ascii_letters, city_name)):
-        translator = TextTranslator()
+    if has_cyrillic(city_name):
         logger.info(
             'Город введен кириллицей: {0},'
             ' выполняется перевод с (ru) -> (en)'.format(city_name))
@@ -294,399 +290,364 @@ def translation_of_text_from_russian_into_english(city_name: str) -> str:
     return city_name
 
 
-@logger.catch
-def city_search(message: types.Message, mode_for_sorting: str,
-                bestdeal_mode: List[int] = None) -> None:
+@traced()
+def search_city(city_name: str) -> Tuple[str, Dict[str, Any]]:
     """
-    Поиск отелей по выбранному городу от пользователя.
-    Найти возможные направления города.
+    Найти город у API. Название кириллицей сначала ищется
+    по транслитерации (без переводчика), переводчик - только если
+    по транслитерации ничего не найдено.
+    Вернуть запрос к API и результаты поиска.
 
     Args:
-        message: types.Message
-        mode_for_sorting (str): Режим сортировки поиска отелей.
-        bestdeal_mode (List[int]) = None: Если задан данный параметр
-            в списке передается [минимальная цена отеля,
-                                максимальная цена отеля]
-    """
-    temporary_message = bot.send_message(message.chat.id,
-                                         'Ожидайте загрузки...')
-
-    selected_city_to_search = translation_of_text_from_russian_into_english(
-        city_name=message.text
-    )
-    search_results = None
-    try:
-        parser = ParseHotels()
-        search_results = parser.get_search_results_by_city(
-                                        city_to_search=selected_city_to_search)
-    except ConnectionError as error_message:
-        logger.error(error_message)
-        bot.edit_message_text(
-                        chat_id=message.chat.id,
-                        message_id=temporary_message.id,
-                        text='Ошибка поиска, попробуйте пожалуйста еще раз')
-    except ValueError as error_message:
-        logger.error(error_message)
-        city = bot.edit_message_text(
-                        chat_id=message.chat.id,
-                        message_id=temporary_message.id,
-                        text='Введите город буквами')
-        bot.register_next_step_handler(city, city_search, mode_for_sorting)
-
-    if search_results:
-        try:
-            destinations = search_results.get('suggestions')[0].get('entities')
-            found_destinations = {
-                destination.get('caption'): destination.get('destinationId')
-                for destination in destinations
-                }
-
-            if not bestdeal_mode:
-                markup = create_buttons_to_select_destination(
-                                                        found_destinations,
-                                                        mode_for_sorting)
-            else:
-                markup = create_buttons_to_select_destination(
-                                                        found_destinations,
-                                                        mode_for_sorting,
-                                                        bestdeal_mode
-                )
-
-            bot.edit_message_text(
-                        chat_id=message.chat.id,
-                        message_id=temporary_message.id,
-                        text='Выберите месторасположение для поиска отелей',
-                        reply_markup=markup)
-        except Exception as error_message:
-            logger.exception(error_message)
-            bot.edit_message_text(
-                        chat_id=message.chat.id,
-                        message_id=temporary_message.id,
-                        text='Ошибка поиска, попробуйте пожалуйста еще раз')
-
+        city_name (str): Название города.
 
-@logger.catch
-def create_buttons_to_select_destination(
-            destinations: Dict[str, str],
-            mode_for_sorting: str,
-            bestdeal_mode: List[int] = None) -> 'types.InlineKeyboardMarkup':
+    Raises:
+        ConnectionError: Если не удалось получить данные от API.
+        ValueError: Если название состоит из цифр.
     """
-    Создать кнопки для выбора пункта назначения поиска отелей.
-
-    callback_data - состоит из 3-х частей, если bestdeal_mode = None:
-        - слово: destinationId
-        - id: id месторасположения
-        - режим сортировки отелей
+    parser = ParseHotels()
+    if not has_cyrillic(city_name):
+        return city_name, parser.get_search_results_by_city(
+                                                city_to_search=city_name)
+
+    city_to_search = transliterate(city_name)
+    logger.info('Город введен кириллицей: {0}, поиск по транслитерации'
+                ' {1}'.format(city_name, city_to_search))
+    search_results = parser.get_search_results_by_city(
+                                            city_to_search=city_to_search)
+    if has_search_suggestions(search_results):
+        return city_to_search, search_results
+
+    translated_city = translation_of_text_from_russian_into_english(
+                                                        city_name=city_name)
+    if not translated_city or translated_city == city_to_search:
+        return city_to_search, search_results
+    return translated_city, parser.get_search_results_by_city(
+                                            city_to_search=translated_city)
 
-    callback_data - состоит из 5-ти частей, если bestdeal_mode:
-        Добавляется к первым 3 частям:
-            - минимальная цена отеля
-            - максимальная цена отеля
 
-    Args:
-       destinations (Dict[str, str]): Найденные направления.
-       mode_for_sorting (str): Режим сортировки поиска отелей.
-       bestdeal_mode (List[int]) = None: Если задан данный параметр
-            в списке передается [минимальная цена отеля,
-                                максимальная цена отеля]
-    """
-    markup = types.InlineKeyboardMarkup()
-
-    for destination_name, destination_id in destinations.items():
-        callback_data = f'destinationId-{destination_id}-{mode_for_sorting}'
-        if bestdeal_mode:
-            callback_data = f'destinationId-{destination_id}-' \
-                            f'{mode_for_sorting}-{bestdeal_mode[0]}-' \
-                            f'{bestdeal_mode[1]}'
-        button = types.InlineKeyboardButton(
-            destination_name,
-            callback_data=callback_data
-        )
-        markup.add(button)
-
-    return markup
-
-
-@bot.callback_query_handler(
-    func=lambda call: call.data.split('-')[0] == 'destinationId')
 @logger.catch
-def hotel_search(call: types.CallbackQuery):
+@traced()
+def city_search(state: ConversationState) -> None:
     """
-    Поиск отелей.
-
-    В callback - передается строка с параметрами для поиска отелей:
-        Вид строки:
-            'destinationId-{destination_id}-{mode_for_sorting}'
-        или
-            'destinationId-{destination_id}-{mode_for_sorting}-{min price}-{max price}'
+    Найти возможные направления города state.city: известный город -
+    в справочнике направлений (без перевода и запроса к API),
+    остальные - у API с пополнением справочника.
 
     Args:
-        call (types.CallbackQuery):
-            Содержит информацию:
-                строка destinationId - id для поиска - режим сортировки отелей
-                - минимальная цена - максимальная цена
+        state (ConversationState): Состояние диалога.
     """
-    temporary_message = bot.send_message(
-        call.message.chat.id, 'Ожидайте загрузки...')
-
-    information_about_hotel_search = call.data.split('-')
-    destination_search_id = information_about_hotel_search[1]
-    hotel_search_mode = information_about_hotel_search[2]
+    temporary_message = bot.send_message(state.chat_id, dialog.WAIT_MESSAGE)
 
+    found_destinations = gazetteer.lookup(state.city)
     search_results = None
-    try:
-        parser = ParseHotels()
-        if len(information_about_hotel_search) == 3:
-            search_results = parser.get_list_of_hotels_with_parameters(
-                destination_id=destination_search_id,
-                sort_mode=hotel_search_mode
-            )
-        else:
-            distance_label = 'City center'
-            search_results = parser.get_list_of_hotels_with_parameters(
-                destination_id=destination_search_id,
-                sort_mode=hotel_search_mode,
-                price_min=information_about_hotel_search[3],
-                price_max=information_about_hotel_search[4],
-                distance_label=distance_label
-            )
-    except ConnectionError as error_message:
-        logger.error(error_message)
-        bot.edit_message_text(
-                    chat_id=call.message.chat.id,
-                    message_id=temporary_message.id,
-                    text='Не удалось получить результаты поиска по заданным '
-                         'параметрам\nПопробуйте пожалуйста еще раз')
-    except ValueError as error_message:
-        logger.error(error_message)
-        bot.edit_message_text(
-                    chat_id=call.message.chat.id,
-                    message_id=temporary_message.id,
-                    text='Ошибка поиска, попробуйте пожалуйста еще раз')
-
-    if search_results:
-        hotels = None
+    if found_destinations is None:
         try:
-            hotels = search_results.get('data').get('body').get(
-                'searchResults').get('results')
-        except Exception as error_message:
-            logger.exception(error_message)
-            bot.send_message(call.message.chat.id,
-                             'Ошибка поиска, попробуйте пожалуйста еще раз')
-
-        if hotels:
-            number_of_hotels = bot.edit_message_text(
-                message_id=temporary_message.id,
-                chat_id=call.message.chat.id,
-                text='Введите количество отелей для вывода результатов\n'
-                'От 1 до 20 (включительно)')
-            bot.register_next_step_handler(number_of_hotels,
-                                           get_number_of_hotels_from_user,
-                                           hotels)
+            selected_city_to_search, search_results = search_city(state.city)
+        except ConnectionError as error_message:
+            logger.error(error_message)
+            send_reply(state, dialog.search_failed(), temporary_message.id)
+            return
+        except ValueError as error_message:
+            logger.error(error_message)
+            send_reply(state, dialog.city_not_found(state),
+                       temporary_message.id)
+            return
+
+        if search_results and not is_stale(search_results):
+            gazetteer.add(search_results,
+                          names=(state.city, selected_city_to_search))
+
+    send_reply(state,
+               dialog.destinations_found(state, search_results,
+                                         found_destinations,
+                                         stale=is_stale(search_results)),
+               temporary_message.id)
 
 
+@callback_router.register(HOTEL_SEARCH_CALLBACK,
+                          decoder=parse_hotel_search_callback)
+@timed(HANDLER_DURATION)
 @logger.catch
-def get_number_of_hotels_from_user(message: types.Message,
-                                   hotels: List[Dict[str, Any]]) -> None:
+def hotel_search(call: types.CallbackQuery,
+                 parameters: Dict[str, Any],
+                 previous_state: Optional[ConversationState]
+                 ) -> None:
     """
-    Получить от пользователя количество отелей.
+    Поиск отелей - запросить у пользователя количество отелей.
+
+    В callback - передаются параметры для поиска отелей
+    (hotel_search_callback_data): id месторасположения, режим
+    сортировки отелей и, в режиме bestdeal, минимальная
+    и максимальная цена. Отели запрашиваются одной страницей, когда
+    известно их количество (dialog.start_hotel_search).
 
     Args:
-        message: types.Message
-        hotels (List[Dict[str, Any]]): Список отелей с информацией о них.
+        call (types.CallbackQuery): Нажатая кнопка месторасположения.
+        parameters (Dict[str, Any]): Параметры поиска из callback_data -
+            destination_id, mode, price_min, price_max.
+        previous_state (Optional[ConversationState]): Состояние диалога
+            до нажатия кнопки (город - для истории поиска).
     """
-    number_of_hotels = None
-    logger.info('Введенное количество отелей от пользователя = {0}'.format(
-                                                                message.text))
-    try:
-        number_of_hotels = int(message.text)
-    except ValueError as error_message:
-        logger.exception('Ошибка ввода от пользователя - {0}'.format(
-                                                                error_message))
-        chat_message = bot.send_message(
-                                message.chat.id,
-                                'Введите пожалуйста цифрами.')
-        bot.register_next_step_handler(chat_message,
-                                       get_number_of_hotels_from_user)
-
-    if number_of_hotels:
-        if number_of_hotels < 1:
-            logger.warning(
-                'Пользователь ввел количество ожидаемых'
-                ' результатов {0} < 1'.format(number_of_hotels)
-            )
-            chat_message = bot.send_message(
-                                message.chat.id,
-                                'Введите количество от 1 до 20 (включительно)')
-            bot.register_next_step_handler(chat_message,
-                                           get_number_of_hotels_from_user)
-        else:
-            photo = bot.send_message(
-                message.chat.id,
-                'Необходимо ли загрузить фотографии отеля (да/нет) ?')
-            bot.register_next_step_handler(photo,
-                                           photo_upload,
-                                           number_of_hotels,
-                                           hotels)
+    state, reply = dialog.start_hotel_search(
+        call, parameters, previous_state=previous_state,
+        conversation_id=current_trace_id() or tracer.new_trace_id())
+    send_reply(state, reply)
 
 
-@logger.catch
-def photo_upload(message: types.Message, number_of_hotels: int,
-                 hotels: List[Dict[str, Any]]) -> None:
+@traced()
+def get_hotels_from_search_parameters(
+                            state: ConversationState,
+                            number_of_hotels: int) -> List[Dict[str, Any]]:
     """
-    Получить от пользователя ответ - необходимо ли загружать фото отеля.
-        Если да - необходимое количество фотографий.
+    Получить список отелей по параметрам поиска из состояния диалога
+    (dialog.hotel_search_parameters).
 
     Args:
-        message: types.Message
-        number_of_hotels (int): Количество отелей для подборки результатов.
-        hotels (List[Dict[str, Any]]): Список отелей с информацией о них.
-    """
-    photo = True if message.text.lower() == 'да' else False
-
-    if photo:
-        number_photos = bot.send_message(
-            message.chat.id,
-            'Введите цифрами количество фотографий от 1 до 5 (включительно)')
-        bot.register_next_step_handler(
-            number_photos,
-            get_selection_of_hotels,
-            number_of_hotels,
-            hotels
-        )
-    else:
-        logger.info('Выбрана загрузка отелей без фото')
-        get_selection_of_hotels(message,
-                                number_of_hotels=number_of_hotels,
-                                hotels=hotels)
+        state (ConversationState): Состояние диалога.
+        number_of_hotels (int): Количество отелей.
+
+    Raises:
+        ConnectionError: Если не удалось получить данные от API.
+        ValueError: Если ответ API некорректен.
+    """
+    return list(ParseHotels().iterate_hotels(
+        **dialog.hotel_search_parameters(state, number_of_hotels)))
 
 
 @logger.catch
-def get_selection_of_hotels(message: types.Message, number_of_hotels: int,
-                            hotels: List[Dict[str, Any]]) -> None:
+@traced()
+def get_selection_of_hotels(state: ConversationState,
+                            number_of_photos: int = None) -> None:
     """
-    Получить подборку подборку с заданным количеством отелей.
+    Получить подборку с заданным количеством отелей.
+    Диалог завершается.
 
     Args:
-        message: types.Message
-        number_of_hotels (int): Количество отелей для подборки результатов.
-        hotels (List[Dict[str, Any]]): Список отелей с информацией о них.
+        state (ConversationState): Состояние диалога.
+        number_of_photos (int) = None: Количество загружаемых фотографий.
     """
+    conversation_states.delete(state.chat_id)
+    tracer.finish(state.conversation_id)
+    logger.info('Получить подборку отелей (количество = {0}, фото = {1})'
+                .format(state.number_of_hotels, number_of_photos))
     try:
-        number_of_photos = int(message.text)
-    except Exception as error_message:
+        hotels = get_hotels_from_search_parameters(
+            state, number_of_hotels=state.number_of_hotels)
+        selection_of_hotels = dialog.collect_selection(state, hotels)
+    except ConnectionError as error_message:
         logger.error(error_message)
-        logger.warning(
-            'Необходимое количество фотографий '
-            'от пользователя = {0}'.format(message.text)
-        )
-        number_of_photos = 5
-    logger.info(
-        'Количество фото от пользователя для загрузки = {0}'.format(
-                                                        number_of_photos))
-
-    logger.info('Получить подборку отелей (количество = {0})'.format(
-                                                            number_of_hotels))
-    parser = ParseHotels()
-    selection_of_hotels = None
-    try:
-        selection_of_hotels = parser.collect_brief_information_about_hotels(
-                                            number_of_hotels=number_of_hotels,
-                                            hotels=hotels)
+        bot.send_message(state.chat_id, dialog.hotels_unavailable().text)
+        return
     except Exception as error_message:
         logger.exception(error_message)
-        bot.send_message(message.chat.id,
-                         'Ошибка поиска, попробуйте пожалуйста еще раз')
-
-    if number_of_photos and selection_of_hotels:
-        if number_of_photos not in range(1, 5):
-            number_of_photos = 5
-        send_information_about_found_hotels(
-                                        message,
+        bot.send_message(state.chat_id, dialog.SEARCH_ERROR)
+        return
+
+    if not selection_of_hotels:
+        bot.send_message(state.chat_id, dialog.NOTHING_FOUND)
+        return
+    search_history.record(dialog.search_record(state, selection_of_hotels))
+    send_information_about_found_hotels(state.chat_id,
                                         selected_hotels=selection_of_hotels,
                                         number_of_photos=number_of_photos)
-    else:
-        send_information_about_found_hotels(
-                                        message,
-                                        selected_hotels=selection_of_hotels)
 
 
 @logger.catch
-def send_information_about_found_hotels(message: types.Message,
-                                        selected_hotels: List[Dict[str, str]],
+@traced()
+def send_information_about_found_hotels(chat_id: int,
+                                        selected_hotels: List[HotelSummary],
                                         number_of_photos: int = None) -> None:
     """
     Отправить пользователю информацию о найденных отелях.
-    Если пользователь выбрал загрузку фотографий - вывести необходимое
-        количество фотографий отеля.
+    Без фотографий описания отелей упаковываются в как можно меньшее
+        число сообщений.
+    Если пользователь выбрал загрузку фотографий - после описания отеля
+        вывести необходимое количество фотографий отеля одним альбомом.
+    Фото всех отелей запрашиваются параллельно, пока отправляются описания.
 
     Args:
-        message: types.Message
-        selected_hotels (List[Dict[str, str]]): Подборка отелей.
+        chat_id (int): Id чата.
+        selected_hotels (List[HotelSummary]): Подборка отелей.
         number_of_photos (int) = None: Количество загружаемых фотографий.
     """
     logger.info('Отправить пользователю информацию о найденных отелях')
-    parser = ParseHotels()
-    bot.send_message(message.chat.id, 'Подборка отелей:')
-    for hotel in selected_hotels:
-        short_description = (
-            '🏨\n'
-            'Название отеля: {name}\n'
-            'Адрес отеля: {address}\n'
-            'Расположение от центра: {landmarks}\n'
-            'Цена: {price}'.format(
-                name=hotel.get('name'),
-                address=hotel.get('address'),
-                landmarks=hotel.get('landmarks'),
-                price=hotel.get('price')
-            )
-        )
-        bot.send_message(message.chat.id, short_description)
-
-        if number_of_photos:
-            temporary_message = bot.send_message(message.chat.id,
-                                                 'Загрузка фото...')
-            try:
-                hotel_photos = parser.get_hotel_photo(
-                                        hotel_id=hotel.get('id'),
-                                        number_of_photos=number_of_photos)
-                for number, photo in enumerate(hotel_photos, 1):
-                    logger.info('Загрузка {0} фотографии. Отель - {1}'.format(
-                        number,
-                        hotel.get('name')
-                    ))
-                    image_url = photo.get('baseUrl').format(size='y')
-                    bot.send_photo(message.chat.id, image_url)
-                bot.edit_message_text(
-                        chat_id=message.chat.id,
-                        message_id=temporary_message.id,
-                        text='Фото отеля:')
-            except (ConnectionError, ValueError) as error_message:
-                logger.warning(error_message)
-                bot.edit_message_text(
-                    chat_id=message.chat.id,
-                    message_id=temporary_message.id,
-                    text='Не удалось загрузить фото отеля'
-                )
+    hotels_photos = None
+    if number_of_photos:
+        parser = ParseHotels()
+        hotels_photos = parser.get_photos_of_hotels(
+                    hotel_ids=[hotel.id for hotel in selected_hotels],
+                    number_of_photos=number_of_photos)
+
+    if not hotels_photos:
+        for text in collect_hotel_selection_messages(selected_hotels):
+            bot.send_message(chat_id, text, parse_mode='HTML')
+        return
+
+    descriptions = collect_hotel_selection_messages(selected_hotels,
+                                                    packed=False)
+    for hotel, short_description in zip(selected_hotels, descriptions):
+        bot.send_message(chat_id, short_description, parse_mode='HTML')
+        send_hotel_photos(chat_id, hotel, next(hotels_photos))
+
+
+def send_photo_album(chat_id: int, images_urls: List[str],
+                     caption: str) -> None:
+    """
+    Отправить фото одним альбомом (send_media_group). Фото, которые
+    уже отправлялись, отправляются по file_id (FileIdCache) - Telegram
+    не скачивает их заново; file_id новых фото сохраняются в кэш.
+
+    Args:
+        chat_id (int): Чат пользователя.
+        images_urls (List[str]): URL фото.
+        caption (str): Подпись альбома (у первого фото).
+    """
+    media = [file_id_cache.get(image_url) or image_url
+             for image_url in images_urls]
+    if len(media) == 1:
+        sent_messages = [bot.send_photo(chat_id, media[0],
+                                        caption=caption)]
+    else:
+        album = [
+            types.InputMediaPhoto(
+                photo, caption=caption if number == 0 else None)
+            for number, photo in enumerate(media)
+        ]
+        sent_messages = bot.send_media_group(chat_id, album)
+
+    file_id_cache.put_many(
+        (image_url, sent_message.photo[-1].file_id)
+        for image_url, sent_message in zip(images_urls, sent_messages)
+        if sent_message.photo)
+
+
+@logger.catch
+@traced()
+def send_hotel_photos(chat_id: int, hotel: HotelSummary,
+                      hotel_photos: Union[List[Dict[str, Any]],
+                                          Exception]) -> None:
+    """
+    Отправить фото отеля одним альбомом (send_media_group).
+
+    Args:
+        chat_id (int): Id чата.
+        hotel (HotelSummary): Информация об отеле.
+        hotel_photos (Union[List[Dict[str, Any]], Exception]): Фото отеля
+            или ошибка их получения.
+    """
+    try:
+        images_urls = dialog.hotel_photo_urls(hotel, hotel_photos)
+        log_sampler.log('hotel_photos', 'INFO',
+                        'Загрузка {0} фотографий. Отель - {1}',
+                        len(images_urls), hotel.name)
+        try:
+            send_photo_album(chat_id, images_urls, hotel.name)
+        except ApiTelegramException:
+            cached_urls = [image_url for image_url in images_urls
+                           if file_id_cache.get(image_url) is not None]
+            if not cached_urls:
+                raise
+            # file_id отклонен - отправить альбом заново по URL
+            for image_url in cached_urls:
+                file_id_cache.discard(image_url)
+            send_photo_album(chat_id, images_urls, hotel.name)
+    except (ConnectionError, ValueError, AttributeError,
+            ApiTelegramException) as error_message:
+        log_sampler.log('hotel_photos_error', 'WARNING', str(error_message))
+        bot.send_message(chat_id, dialog.PHOTOS_ERROR)
 
 
 @bot.message_handler(content_types=['text'])
+@timed(HANDLER_DURATION)
 @logger.catch
+def process_conversation_step(message: types.Message) -> None:
+    """
+    Передать ответ пользователя шагу диалога (dialog.CONVERSATION_STEPS)
+    и отправить ответ бота. Если диалог ждет нажатия кнопки - напомнить
+    об этом, если диалога нет - подсказать команды. Состояние диалога
+    загружается из хранилища один раз на сообщение.
+    Шаг диалога записывается корневым интервалом трассы диалога.
+    Запросы к API укладываются в срок REQUEST_DEADLINE.
+    """
+    state = conversation_states.get(message.chat.id)
+    if state is None:
+        return process_all_messages_from_user(message)
+
+    step = dialog.CONVERSATION_STEPS.get(state.step)
+    if step is None:
+        bot.send_message(message.chat.id, dialog.CHOOSE_DESTINATION)
+        return
+    with tracer.span(step.__name__, trace_id=state.conversation_id,
+                     chat_id=message.chat.id, step=state.step), \
+            deadline(REQUEST_DEADLINE):
+        send_reply(state, step(state, message.text))
+
+
 def process_all_messages_from_user(message: types.Message) -> None:
     """
-    Обработать сообщения от пользователя и перенаправить на "/" или "/help".
+    Обработать сообщения от пользователя вне диалога и перенаправить
+    на "/" или "/help".
     """
     if message.text:
-        logger.info('Неизвестный ввод от пользователя.')
-        bot.send_message(
-                        chat_id=message.chat.id,
-                        text='Введите символ - "/" или "/help" для просмотра '
-                             'всех команд.')
+        log_sampler.log('unknown_input', 'INFO',
+                        'Неизвестный ввод от пользователя.')
+        bot.send_message(chat_id=message.chat.id, text=dialog.UNKNOWN_INPUT)
+
+
+def start_webhook() -> None:
+    """
+    Принимать обновления через webhook.
+    Обработчики выполняются в пуле WebhookServer, а не в пуле потоков бота.
+
+    Raises:
+        ValueError: Если не заданы WEBHOOK_URL или WEBHOOK_SECRET.
+    """
+    check_webhook_settings(WEBHOOK_URL, WEBHOOK_SECRET)
+    bot.threaded = False
+    bot.remove_webhook()
+    bot.set_webhook(url=WEBHOOK_URL + WEBHOOK_PATH,
+                    secret_token=WEBHOOK_SECRET,
+                    max_connections=WEBHOOK_WORKERS)
+    server = WebhookServer(
+        process_update=lambda update: bot.process_new_updates([update]),
+        host=WEBHOOK_HOST, port=WEBHOOK_PORT, path=WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET, workers=WEBHOOK_WORKERS,
+        queue_size=WEBHOOK_QUEUE_SIZE)
+    UPDATE_QUEUE_DEPTH.set_function(lambda: server.queue_depth)
+    server.serve_forever()
 
 
 if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description='VTravelBot')
+    argument_parser.add_argument(
+        '--engine', choices=('sync', 'async'), default=BOT_ENGINE,
+        help='sync - telebot.TeleBot, async - AsyncTeleBot')
+    argument_parser.add_argument(
+        '--mode', choices=('polling', 'webhook'), default=BOT_MODE,
+        help='Прием обновлений: long polling или webhook')
+    arguments = argument_parser.parse_args()
+    if arguments.mode == 'webhook':
+        try:
+            check_webhook_settings(WEBHOOK_URL, WEBHOOK_SECRET)
+        except ValueError as settings_error:
+            argument_parser.error(str(settings_error))
+
     try:
-        logger.debug('Start bot')
-        bot.polling(none_stop=True, interval=0)
+        if METRICS_PORT:
+            MetricsServer(METRICS_HOST, METRICS_PORT).start()
+        if arguments.engine == 'async':
+            import async_main
+            async_main.run(mode=arguments.mode)
+        elif arguments.mode == 'webhook':
+            logger.debug('Start bot (webhook)')
+            start_webhook()
+        else:
+            logger.debug('Start bot')
+            bot.remove_webhook()
+            if bot.threaded:
+                UPDATE_QUEUE_DEPTH.set_function(
+                    lambda: bot.worker_pool.tasks.qsize())
+            bot.polling(none_stop=True, interval=0)
     except Exception as error:
         logger.exception(error)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from vtravel_bot_parsers import (AsyncParseHotels, AsyncResponse,
+                                 AsyncSingleFlight, MAX_PAGE_SIZE,
+                                 ResponseCache)
+
+
+class _FakeAsyncClient:
+    """Асинхронный HTTP-клиент, считающий одновременные запросы."""
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def get(self, url, endpoint=None, params=None, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return AsyncResponse(200, {}, self.payload)
+
+
+class _PagedAsyncClient:
+    """Асинхронный HTTP-клиент, отдающий список отелей постранично."""
+    def __init__(self, number_of_hotels):
+        self.hotels = [{'id': number} for number in range(number_of_hotels)]
+        self.pages = []
+
+    async def get(self, url, endpoint=None, params=None, **kwargs):
+        page_number = int(params['pageNumber'])
+        page_size = int(params['pageSize'])
+        self.pages.append((page_number, page_size))
+        start = (page_number - 1) * page_size
+        pagination = {'currentPage': page_number}
+        if start + page_size < len(self.hotels):
+            pagination['nextPageNumber'] = page_number + 1
+        payload = {'data': {'body': {'searchResults': {
+            'results': self.hotels[start:start + page_size],
+            'pagination': pagination}}}}
+        return AsyncResponse(200, {}, json.dumps(payload).encode())
+
+
+@mock.patch('vtravel_bot_parsers.async_parse_hotels.HEADERS_BOT', '{}')
+class TestAsyncParseHotels(unittest.IsolatedAsyncioTestCase):
+    """
+    Проверить асинхронный парсер отелей.
+    """
+    async def test_search_results_are_cached(self):
+        """Проверить - повторный поиск города не обращается к API."""
+        client = _FakeAsyncClient(b'{"suggestions": [{"entities": []}]}')
+        parser = AsyncParseHotels(client=client, cache=ResponseCache())
+        first = await parser.get_search_results_by_city('Sochi')
+        second = await parser.get_search_results_by_city('sochi')
+        self.assertEqual(first, second)
+        self.assertEqual(client.calls, 1)
+
+    async def test_photos_of_hotels(self):
+        """Проверить - фото запрашиваются параллельно, но ограниченно."""
+        client = _FakeAsyncClient(b'{"hotelImages": [{"baseUrl": "u"}]}')
+        parser = AsyncParseHotels(client=client)
+        result = await parser.get_photos_of_hotels(
+            hotel_ids=[str(number) for number in range(10)],
+            number_of_photos=1, max_workers=3)
+        self.assertEqual(result, [[{'baseUrl': 'u'}]] * 10)
+        self.assertEqual(client.max_active, 3)
+
+    async def test_incorrect_sort_mode(self):
+        """Проверить - некорректный режим сортировки."""
+        parser = AsyncParseHotels(client=_FakeAsyncClient(b'{}'))
+        with self.assertRaises(ValueError):
+            await parser.get_list_of_hotels_with_parameters('1', 'NAME')
+
+
+    async def test_iterate_hotels(self):
+        """Проверить - перебор отелей по страницам до limit."""
+        client = _PagedAsyncClient(100)
+        parser = AsyncParseHotels(client=client, cache=ResponseCache(),
+                                  flights=AsyncSingleFlight())
+        hotels = [hotel async for hotel in parser.iterate_hotels(
+            '123', 'PRICE', limit=30)]
+        self.assertEqual([hotel['id'] for hotel in hotels], list(range(30)))
+        self.assertEqual(client.pages, [(1, 25), (2, 25)])
+
+    async def test_same_page_size_shares_response(self):
+        """Проверить - разные limit и один page_size - один запрос."""
+        client = _PagedAsyncClient(100)
+        parser = AsyncParseHotels(client=client, cache=ResponseCache(),
+                                  flights=AsyncSingleFlight())
+        for limit in (1, 20):
+            hotels = [hotel async for hotel in parser.iterate_hotels(
+                '123', 'PRICE', limit=limit, page_size=MAX_PAGE_SIZE)]
+            self.assertEqual(len(hotels), limit)
+        self.assertEqual(client.pages, [(1, MAX_PAGE_SIZE)])
+
+    async def test_next_page_is_prefetched(self):
+        """Проверить - следующая страница запрашивается заранее."""
+        client = _PagedAsyncClient(50)
+        parser = AsyncParseHotels(client=client, cache=ResponseCache(),
+                                  flights=AsyncSingleFlight())
+        hotels = parser.iterate_hotels('123', 'PRICE', prefetch_threshold=5)
+        for _ in range(21):
+            await hotels.__anext__()
+        await asyncio.sleep(0.01)
+        self.assertEqual(client.pages, [(1, 25), (2, 25)])
+        await hotels.aclose()
+
+
+if __name__ == '__main__':
+    unittest.main()
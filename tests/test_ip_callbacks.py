@@ -0,0 +1,125 @@
+import unittest
+
+from vtravel_bot_ui import (CALLBACK_DATA_MAX_BYTES, HELP_CALLBACK,
+                            CallbackRouter, history_callback_data,
+                            hotel_search_callback_data,
+                            mode_callback_data, parse_history_callback,
+                            parse_hotel_search_callback,
+                            parse_mode_callback)
+from vtravel_bot_ui.callbacks import from_base36, to_base36
+
+
+class TestHotelSearchCallback(unittest.TestCase):
+    """
+    Проверить данные кнопок месторасположения.
+    """
+    def test_round_trip(self):
+        """Проверить - параметры поиска восстанавливаются из кнопки."""
+        data = hotel_search_callback_data('10873622', 'PRICE')
+        self.assertEqual(data, 'dl6h252')
+        self.assertEqual(parse_hotel_search_callback(data[1:]),
+                         {'destination_id': '10873622', 'mode': 'PRICE',
+                          'price_min': None, 'price_max': None})
+
+    def test_bestdeal(self):
+        """Проверить - кнопка режима bestdeal содержит цены."""
+        data = hotel_search_callback_data(
+            '10873622', 'DISTANCE_FROM_LANDMARK', [1000, 5000])
+        self.assertEqual(data, 'db6h252.rs.3uw')
+        parameters = parse_hotel_search_callback(data[1:])
+        self.assertEqual((parameters['price_min'], parameters['price_max']),
+                         (1000, 5000))
+
+    def test_long_ids_and_prices(self):
+        """Проверить - длинные id и цены помещаются в 64 байта."""
+        data = hotel_search_callback_data(
+            str(2 ** 64 - 1), 'DISTANCE_FROM_LANDMARK', [10 ** 18, 10 ** 19])
+        self.assertLessEqual(len(data.encode()), CALLBACK_DATA_MAX_BYTES)
+        self.assertEqual(parse_hotel_search_callback(data[1:])['price_max'],
+                         10 ** 19)
+
+    def test_incorrect_data(self):
+        """Проверить - некорректные данные кнопки - ValueError."""
+        for payload in ('', 'x6h252', 'l', 'l6h252.rs', 'l6H252',
+                        'l 6h2', 'l-6h2', 'l6h_252', 'b6h252.rs.3uw.1',
+                        'b6h252.3uw.rs'):
+            with self.subTest(payload=payload):
+                with self.assertRaises(ValueError):
+                    parse_hotel_search_callback(payload)
+
+    def test_incorrect_parameters(self):
+        """Проверить - отрицательная цена и нечисловой id - ValueError."""
+        with self.assertRaises(ValueError):
+            hotel_search_callback_data('10873622', 'PRICE', [-1, 5000])
+        with self.assertRaises(ValueError):
+            hotel_search_callback_data('abc', 'PRICE')
+
+    def test_base36(self):
+        """Проверить - запись чисел по основанию 36."""
+        for number in (0, 35, 36, 10873622, 36 ** 13 - 1):
+            self.assertEqual(from_base36(to_base36(number)), number)
+        with self.assertRaises(ValueError):
+            to_base36(36 ** 13)
+
+
+class TestHistoryCallback(unittest.TestCase):
+    """
+    Проверить данные кнопок истории поиска.
+    """
+    def test_first_page(self):
+        """Проверить - первая страница - только код операции."""
+        self.assertEqual(history_callback_data(), 'y')
+        self.assertIsNone(parse_history_callback(''))
+
+    def test_round_trip(self):
+        """Проверить - ссылка на страницу восстанавливается точно."""
+        for before in ((1792223400.123, 1), (1792223400.0, 10 ** 9),
+                       (0.001, 36)):
+            data = history_callback_data(before)
+            self.assertLessEqual(len(data.encode()), CALLBACK_DATA_MAX_BYTES)
+            self.assertEqual(parse_history_callback(data[1:]), before)
+
+    def test_incorrect_data(self):
+        """Проверить - некорректные данные кнопки - ValueError."""
+        for payload in ('-1.1', 'nb8z7a8', 'nb8z7a8.1.1'):
+            with self.assertRaises(ValueError):
+                parse_history_callback(payload)
+
+
+class TestCallbackRouter(unittest.TestCase):
+    """
+    Проверить выбор обработчика кнопки по коду операции.
+    """
+    def setUp(self):
+        self.router = CallbackRouter()
+        self.router.register(HELP_CALLBACK)(lambda call, payload: 'help')
+        self.router.register('m', decoder=parse_mode_callback)(
+            lambda call, mode: mode)
+
+    def test_resolve(self):
+        """Проверить - обработчик и разобранные данные кнопки."""
+        handler, mode = self.router.resolve(mode_callback_data('PRICE'))
+        self.assertEqual(handler(None, mode), 'PRICE')
+        handler, payload = self.router.resolve(HELP_CALLBACK)
+        self.assertEqual((handler(None, payload), payload), ('help', ''))
+
+    def test_unknown_opcode(self):
+        """Проверить - неизвестный код операции - нет обработчика."""
+        self.assertNotIn('destinationId-1-PRICE', self.router)
+        self.assertIsNone(self.router.resolve('x'))
+        self.assertIsNone(self.router.resolve(''))
+
+    def test_invalid_payload(self):
+        """Проверить - некорректные данные операции - ValueError."""
+        self.assertIn('mz', self.router)
+        with self.assertRaises(ValueError):
+            self.router.resolve('mz')
+
+    def test_opcode_is_taken(self):
+        """Проверить - код операции регистрируется один раз."""
+        with self.assertRaises(ValueError):
+            self.router.register(HELP_CALLBACK)
+
+
+if __name__ == '__main__':
+    unittest.main()
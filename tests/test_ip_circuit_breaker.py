@@ -0,0 +1,247 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from vtravel_bot_parsers import (AsyncParseHotels, AsyncResponse,
+                                 CircuitBreaker, CircuitOpenError, HTTPClient,
+                                 ParseHotels, RateLimiter, ResponseCache,
+                                 RetryPolicy, is_stale)
+from vtravel_bot_parsers.circuit_breaker import (AsyncRevalidator,
+                                                 Revalidator)
+
+
+SUGGESTIONS = {'suggestions': [{'entities': [{'caption': 'Sochi'}]}]}
+
+
+class _ServerErrorHandler(BaseHTTPRequestHandler):
+    """Обработчик, всегда отвечающий 500."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    requests = 0
+
+    def do_GET(self):
+        _ServerErrorHandler.requests += 1
+        self.send_response(500)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _Response:
+    """Ответ API с заданным JSON."""
+    ok = True
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class _FlakyClient:
+    """HTTP-клиент, который отвечает или поднимает ConnectionError."""
+    def __init__(self):
+        self.failing = False
+        self.calls = 0
+
+    def get(self, url, endpoint=None, **kwargs):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError('API недоступно')
+        return _Response(SUGGESTIONS)
+
+
+class _FlakyAsyncClient:
+    """Асинхронный HTTP-клиент, который отвечает или поднимает ошибку."""
+    def __init__(self):
+        self.failing = False
+        self.calls = 0
+
+    async def get(self, url, endpoint=None, **kwargs):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError('API недоступно')
+        return AsyncResponse(200, {}, json.dumps(SUGGESTIONS).encode())
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """
+    Проверить выключатель эндпоинта API.
+    """
+    def test_opens_after_consecutive_failures(self):
+        """Проверить - размыкается после порога ошибок подряд."""
+        breaker = CircuitBreaker(failure_threshold=3, open_seconds=60)
+        for _ in range(2):
+            breaker.record('properties/list', success=False)
+        breaker.record('properties/list', success=True)
+        for _ in range(2):
+            breaker.record('properties/list', success=False)
+        self.assertEqual(breaker.state('properties/list'), 'closed')
+
+        breaker.record('properties/list', success=False)
+        self.assertEqual(breaker.state('properties/list'), 'open')
+        self.assertFalse(breaker.allow('properties/list'))
+        self.assertTrue(breaker.allow('locations/v2/search'))
+        with self.assertRaises(CircuitOpenError):
+            breaker.check('properties/list')
+        self.assertEqual(breaker.stats['rejected'], 2)
+
+    def test_slow_calls_are_failures(self):
+        """Проверить - медленный ответ считается ошибкой."""
+        breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=1,
+                                 open_seconds=60)
+        breaker.record('properties/list', success=True, duration=1.5)
+        breaker.record('properties/list', success=True, duration=2)
+        self.assertEqual(breaker.state('properties/list'), 'open')
+
+    def test_half_open_probe(self):
+        """Проверить - после паузы один пробный запрос."""
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.05)
+        breaker.record('properties/list', success=False)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow('properties/list'))
+        self.assertEqual(breaker.state('properties/list'), 'half_open')
+        self.assertFalse(breaker.allow('properties/list'))
+
+        breaker.record('properties/list', success=False)
+        self.assertEqual(breaker.state('properties/list'), 'open')
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow('properties/list'))
+        breaker.record('properties/list', success=True)
+        self.assertEqual(breaker.state('properties/list'), 'closed')
+
+    def test_incorrect_threshold(self):
+        """Проверить - порог ошибок должен быть больше 0."""
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+
+
+class TestHTTPClientCircuitBreaker(unittest.TestCase):
+    """
+    Проверить - HTTP-клиент не ждет API при разомкнутом выключателе.
+    """
+    def setUp(self):
+        _ServerErrorHandler.requests = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          _ServerErrorHandler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = 'http://127.0.0.1:{0}/'.format(
+            self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fail_fast(self):
+        """Проверить - после ошибок 500 запросы не отправляются."""
+        breaker = CircuitBreaker(failure_threshold=2, open_seconds=60)
+        client = HTTPClient(rate_limiter=RateLimiter(),
+                            retry_policy=RetryPolicy(max_retries=0),
+                            circuit_breaker=breaker)
+        for _ in range(2):
+            self.assertEqual(
+                client.get(self.url, endpoint='properties/list').status_code,
+                500)
+        with self.assertRaises(CircuitOpenError):
+            client.get(self.url, endpoint='properties/list')
+        client.close()
+        self.assertEqual(_ServerErrorHandler.requests, 2)
+
+
+@mock.patch('vtravel_bot_parsers.parse_hotels.HEADERS_BOT', '{}')
+class TestStaleWhileRevalidate(unittest.TestCase):
+    """
+    Проверить ответ из кэша, пока API недоступно.
+    """
+    def setUp(self):
+        self.client = _FlakyClient()
+        self.cache = ResponseCache(max_stale=60)
+        self.cache.set_ttl('locations/v2/search', 0.01)
+        self.breaker = CircuitBreaker(failure_threshold=1, open_seconds=60)
+        self.revalidator = Revalidator()
+
+    def create_parser(self):
+        return ParseHotels(client=self.client, cache=self.cache,
+                           circuit_breaker=self.breaker,
+                           revalidator=self.revalidator)
+
+    def test_stale_on_error(self):
+        """Проверить - при ошибке API - последний успешный ответ."""
+        parser = self.create_parser()
+        self.assertFalse(is_stale(parser.get_search_results_by_city('Sochi')))
+        time.sleep(0.02)
+
+        self.client.failing = True
+        response_json = parser.get_search_results_by_city('Sochi')
+        self.assertTrue(is_stale(response_json))
+        self.assertEqual(response_json['suggestions'],
+                         SUGGESTIONS['suggestions'])
+
+    def test_error_without_cached_response(self):
+        """Проверить - без ответа в кэше - ConnectionError."""
+        self.client.failing = True
+        with self.assertRaises(ConnectionError):
+            self.create_parser().get_search_results_by_city('Sochi')
+
+    def test_open_circuit_revalidates_in_background(self):
+        """Проверить - выключатель разомкнут: кэш и обновление в фоне."""
+        parser = self.create_parser()
+        parser.get_search_results_by_city('Sochi')
+        time.sleep(0.02)
+        self.cache.set_ttl('locations/v2/search', 60)
+        self.breaker.record('locations/v2/search', success=False)
+
+        self.assertTrue(is_stale(parser.get_search_results_by_city('Sochi')))
+        for _ in range(100):
+            if self.revalidator.stats['succeeded']:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.revalidator.stats['succeeded'], 1)
+        self.assertEqual(self.client.calls, 2)
+        self.assertFalse(is_stale(parser.get_search_results_by_city('Sochi')))
+
+
+@mock.patch('vtravel_bot_parsers.async_parse_hotels.HEADERS_BOT', '{}')
+class TestAsyncStaleWhileRevalidate(unittest.IsolatedAsyncioTestCase):
+    """
+    Проверить ответ из кэша в асинхронном парсере, пока API недоступно.
+    """
+    async def test_open_circuit_revalidates_in_background(self):
+        """Проверить - выключатель разомкнут: кэш и обновление в фоне."""
+        client = _FlakyAsyncClient()
+        cache = ResponseCache(max_stale=60)
+        cache.set_ttl('locations/v2/search', 0.01)
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=60)
+        revalidator = AsyncRevalidator()
+        parser = AsyncParseHotels(client=client, cache=cache,
+                                  circuit_breaker=breaker,
+                                  revalidator=revalidator)
+        await parser.get_search_results_by_city('Sochi')
+        time.sleep(0.02)
+        cache.set_ttl('locations/v2/search', 60)
+
+        client.failing = True
+        self.assertTrue(is_stale(
+            await parser.get_search_results_by_city('Sochi')))
+
+        breaker.record('locations/v2/search', success=False)
+        client.failing = False
+        self.assertTrue(is_stale(
+            await parser.get_search_results_by_city('Sochi')))
+        self.assertEqual(revalidator.stats['pending'], 1)
+        while revalidator.stats['pending']:
+            await asyncio.sleep(0.01)
+        self.assertEqual(revalidator.stats['succeeded'], 1)
+        self.assertFalse(is_stale(
+            await parser.get_search_results_by_city('Sochi')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from vtravel_bot_services import (ConversationState, InMemoryStateStore,
+                                  SQLiteStateStore, StateStore)
+
+
+class TestInMemoryStateStore(unittest.TestCase):
+    """
+    Проверить хранилище состояния диалогов в памяти процесса.
+    """
+    def setUp(self):
+        self.store = InMemoryStateStore(ttl=60)
+
+    def test_save_and_delete(self):
+        """Проверить - сохранение, получение и удаление состояния."""
+        self.store.save(ConversationState(chat_id=1, step='city',
+                                          mode='PRICE'))
+        self.assertEqual(self.store.get(1).step, 'city')
+        self.assertIsNone(self.store.get(2))
+        self.store.delete(1)
+        self.assertIsNone(self.store.get(1))
+
+    def test_stale_dialogs_expire(self):
+        """Проверить - устаревшие диалоги удаляются."""
+        store = InMemoryStateStore(ttl=0.05)
+        for chat_id in range(100):
+            store.save(ConversationState(chat_id=chat_id, step='city'))
+        time.sleep(0.06)
+        self.assertIsNone(store.get(0))
+        self.assertEqual(store.purge_expired(), 99)
+        self.assertEqual(len(store), 0)
+
+    def test_incorrect_ttl(self):
+        """Проверить - TTL должен быть больше 0."""
+        with self.assertRaises(ValueError):
+            InMemoryStateStore(ttl=0)
+
+    def test_incomplete_store(self):
+        """Проверить - хранилище без всех методов не создается."""
+        class IncompleteStateStore(StateStore):
+            def get(self, chat_id):
+                return None
+
+        with self.assertRaises(TypeError):
+            IncompleteStateStore()
+
+
+class TestSQLiteStateStore(unittest.TestCase):
+    """
+    Проверить хранилище состояния диалогов в SQLite.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'conversations.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_dialog_survives_restart(self):
+        """Проверить - незавершенный диалог доступен после перезапуска."""
+        state = ConversationState(chat_id=1, step='hotels_count',
+                                  mode='DISTANCE_FROM_LANDMARK',
+                                  destination_id='10873622',
+                                  price_min=100, price_max=5000,
+                                  conversation_id='5f0c9a3e8b7d4c21')
+        store = SQLiteStateStore(self.path, ttl=60)
+        store.save(state)
+        store.close()
+
+        store = SQLiteStateStore(self.path, ttl=60)
+        self.assertEqual(store.get(1), state)
+        self.assertEqual(len(store), 1)
+        store.close()
+
+    def test_database_without_conversation_id(self):
+        """Проверить - в прежнюю базу добавляются новые столбцы."""
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            'CREATE TABLE conversation_state (chat_id INTEGER PRIMARY KEY,'
+            ' step TEXT NOT NULL, mode TEXT, city TEXT,'
+            ' destination_id TEXT, price_min INTEGER, price_max INTEGER,'
+            ' number_of_hotels INTEGER, updated_at REAL NOT NULL)')
+        connection.execute('INSERT INTO conversation_state (chat_id, step,'
+                           ' updated_at) VALUES (1, ?, ?)',
+                           ('city', time.time()))
+        connection.commit()
+        connection.close()
+
+        store = SQLiteStateStore(self.path, ttl=60)
+        self.assertIsNone(store.get(1).conversation_id)
+        self.assertIsNone(store.get(1).destination)
+        store.save(ConversationState(chat_id=1, step='city',
+                                     conversation_id='5f0c9a3e8b7d4c21'))
+        self.assertEqual(store.get(1).conversation_id, '5f0c9a3e8b7d4c21')
+        store.close()
+
+    def test_stale_dialogs_expire(self):
+        """Проверить - устаревшие диалоги удаляются."""
+        store = SQLiteStateStore(self.path, ttl=0.05)
+        store.save(ConversationState(chat_id=1, step='city'))
+        store.save(ConversationState(chat_id=2, step='city'))
+        time.sleep(0.06)
+        self.assertIsNone(store.get(1))
+        self.assertEqual(store.purge_expired(), 1)
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+
+from telebot import types
+
+from vtravel_bot_parsers import HotelSummary
+from vtravel_bot_services import ConversationState
+from vtravel_bot_ui import dialog
+
+
+def _state(step: str, **fields) -> ConversationState:
+    return ConversationState(chat_id=1, step=step, conversation_id='c1',
+                             **fields)
+
+
+class TestDialogSteps(unittest.TestCase):
+    """
+    Проверить шаги диалога поиска отелей (без ввода-вывода).
+    """
+    def test_ask_city(self):
+        """Проверить - новый диалог ждет город."""
+        state, reply = dialog.ask_city(1, 'PRICE', conversation_id='c1')
+        self.assertEqual((state.step, state.mode), ('city', 'PRICE'))
+        self.assertEqual(reply.action, dialog.SAVE_STATE)
+
+    def test_receive_city(self):
+        """Проверить - город ищется сразу, в режиме bestdeal - цены."""
+        state = _state('city', mode='PRICE')
+        reply = dialog.receive_city(state, 'Сочи')
+        self.assertEqual((reply.action, state.city),
+                         (dialog.SEARCH_CITY, 'Сочи'))
+
+        state = _state('city', mode='DISTANCE_FROM_LANDMARK')
+        reply = dialog.receive_city(state, 'Сочи')
+        self.assertEqual((reply.action, state.step),
+                         (dialog.SAVE_STATE, 'price_min'))
+
+    def test_prices(self):
+        """Проверить - цены вводятся цифрами, затем ищется город."""
+        state = _state('price_min', mode='DISTANCE_FROM_LANDMARK',
+                       city='Сочи')
+        self.assertEqual(dialog.receive_price_min(state, 'abc').action,
+                         dialog.ASK_AGAIN)
+        self.assertEqual(state.step, 'price_min')
+        self.assertEqual(dialog.receive_price_min(state, '0').action,
+                         dialog.SAVE_STATE)
+        self.assertEqual((state.step, state.price_min), ('price_max', 0))
+        self.assertEqual(dialog.receive_price_max(state, '5000').action,
+                         dialog.SEARCH_CITY)
+        self.assertEqual(state.price_max, 5000)
+
+    def test_price_range(self):
+        """Проверить - отрицательная цена и максимум меньше минимума."""
+        state = _state('price_min', mode='DISTANCE_FROM_LANDMARK',
+                       city='Сочи')
+        self.assertEqual(dialog.receive_price_min(state, '-5').action,
+                         dialog.ASK_AGAIN)
+        self.assertIsNone(state.price_min)
+        dialog.receive_price_min(state, '100')
+        for text in ('-5', '99'):
+            with self.subTest(text=text):
+                self.assertEqual(dialog.receive_price_max(state, text).action,
+                                 dialog.ASK_AGAIN)
+                self.assertIsNone(state.price_max)
+        self.assertEqual(dialog.receive_price_max(state, '100').action,
+                         dialog.SEARCH_CITY)
+
+    def test_destination_buttons(self):
+        """Проверить - месторасположение без данных кнопки пропускается."""
+        state = _state('price_max', mode='DISTANCE_FROM_LANDMARK',
+                       city='Сочи', price_min=0, price_max=5000)
+        reply = dialog.destinations_found(
+            state, None, found_destinations={'Sochi': '123', 'X': 'abc'})
+        self.assertEqual([row[0].callback_data
+                          for row in reply.markup.keyboard], ['db3f.0.3uw'])
+
+        state = _state('city', mode='PRICE', city='Сочи')
+        reply = dialog.destinations_found(
+            state, None, found_destinations={'X': 'abc'})
+        self.assertEqual((reply.text, reply.action),
+                         (dialog.SEARCH_ERROR, dialog.END_DIALOG))
+        self.assertEqual(state.step, 'city')
+
+    def test_destinations_found(self):
+        """Проверить - месторасположения предлагаются кнопками."""
+        state = _state('city', mode='PRICE', city='Сочи')
+        search_results = {'suggestions': [{'entities': [
+            {'caption': 'Sochi', 'destinationId': '123'}]}]}
+        reply = dialog.destinations_found(state, search_results)
+        self.assertEqual((reply.action, state.step),
+                         (dialog.SAVE_STATE, 'destination'))
+        self.assertEqual(reply.markup.keyboard[0][0].text, 'Sochi')
+
+        reply = dialog.destinations_found(state, {}, stale=True)
+        self.assertEqual((reply.text, reply.action),
+                         (dialog.SEARCH_ERROR, dialog.ASK_AGAIN))
+
+    def test_start_hotel_search(self):
+        """Проверить - состояние по кнопке месторасположения."""
+        markup = types.InlineKeyboardMarkup()
+        markup.add(types.InlineKeyboardButton('Sochi',
+                                              callback_data='dl3f'))
+        call = types.CallbackQuery.de_json({
+            'id': '1', 'chat_instance': '1', 'data': 'dl3f',
+            'from': {'id': 1, 'is_bot': False, 'first_name': 'u'},
+            'message': {'message_id': 1, 'date': 0,
+                        'chat': {'id': 1, 'type': 'private'}}})
+        call.message.reply_markup = markup
+        state, reply = dialog.start_hotel_search(
+            call, {'destination_id': '123', 'mode': 'PRICE',
+                   'price_min': None, 'price_max': None},
+            previous_state=_state('destination', city='Сочи'),
+            conversation_id='c1')
+        self.assertEqual((state.step, state.city, state.destination),
+                         ('hotels_count', 'Сочи', 'Sochi'))
+        self.assertEqual(reply.action, dialog.SAVE_STATE)
+
+    def test_hotel_search_parameters(self):
+        """Проверить - страница подборки размера количества отелей."""
+        state = _state('photos_answer', mode='DISTANCE_FROM_LANDMARK',
+                       destination_id='123', price_min=0, price_max=5000)
+        parameters = dialog.hotel_search_parameters(state, 3)
+        self.assertEqual(parameters['limit'], 3)
+        self.assertNotIn('page_size', parameters)
+        self.assertEqual((parameters['price_min'], parameters['price_max']),
+                         (0, 5000))
+
+    def test_number_of_hotels(self):
+        """Проверить - количество отелей от 1, затем вопрос о фото."""
+        state = _state('hotels_count')
+        for text in ('abc', '0'):
+            with self.subTest(text=text):
+                self.assertEqual(
+                    dialog.receive_number_of_hotels(state, text).action,
+                    dialog.ASK_AGAIN)
+        self.assertEqual(dialog.receive_number_of_hotels(state, '3').action,
+                         dialog.SAVE_STATE)
+        self.assertEqual((state.step, state.number_of_hotels),
+                         ('photos_answer', 3))
+
+    def test_photos(self):
+        """Проверить - подборка с фото (по умолчанию 5) и без фото."""
+        state = _state('photos_answer', number_of_hotels=3)
+        reply = dialog.receive_photos_answer(state, 'нет')
+        self.assertEqual((reply.action, reply.number_of_photos),
+                         (dialog.SEND_SELECTION, None))
+        self.assertEqual(dialog.receive_photos_answer(state, 'Да').action,
+                         dialog.SAVE_STATE)
+        for text, number_of_photos in (('2', 2), ('9', 5), ('x', 5)):
+            with self.subTest(text=text):
+                reply = dialog.receive_number_of_photos(state, text)
+                self.assertEqual(reply.number_of_photos, number_of_photos)
+
+    def test_search_record(self):
+        """Проверить - запись истории поиска по завершенному диалогу."""
+        state = _state('photos_answer', mode='PRICE_HIGHEST_FIRST',
+                       city='Сочи', destination_id='123')
+        record = dialog.search_record(state, [HotelSummary(
+            id='1', name='Hotel', address='', landmarks='', price='')])
+        self.assertEqual((record.command, record.hotels),
+                         ('/highprice', ('Hotel',)))
+
+    def test_hotel_photo_urls(self):
+        """Проверить - URL фото отеля и ошибки получения фото."""
+        hotel = HotelSummary(id='1', name='Hotel', address='',
+                             landmarks='', price='')
+        self.assertEqual(dialog.hotel_photo_urls(
+            hotel, [{'baseUrl': 'http://x/{size}.jpg'}]), ['http://x/y.jpg'])
+        with self.assertRaises(ValueError):
+            dialog.hotel_photo_urls(hotel, [])
+        with self.assertRaises(ConnectionError):
+            dialog.hotel_photo_urls(hotel, ConnectionError('API'))
+
+
+if __name__ == '__main__':
+    unittest.main()
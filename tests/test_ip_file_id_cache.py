@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import unittest
+
+from vtravel_bot_services import FileIdCache
+
+
+class TestFileIdCache(unittest.TestCase):
+    """
+    Проверить кэш file_id Telegram.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'data',
+                                 'file_ids.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_and_get(self):
+        """Проверить - сохраненный file_id возвращается по URL."""
+        cache = FileIdCache(path=self.path)
+        self.assertIsNone(cache.get('http://x/1.jpg'))
+        cache.put('http://x/1.jpg', 'AgACAgIAAxkBAAI')
+        self.assertEqual(cache.get('http://x/1.jpg'), 'AgACAgIAAxkBAAI')
+        self.assertEqual(len(cache), 1)
+        cache.close()
+
+    def test_persistent(self):
+        """Проверить - file_id сохраняются на диске между запусками."""
+        cache = FileIdCache(path=self.path)
+        cache.put_many([('http://x/1.jpg', 'id-1'),
+                        ('http://x/2.jpg', 'id-2')])
+        cache.close()
+
+        cache = FileIdCache(path=self.path)
+        self.assertEqual(cache.get('http://x/2.jpg'), 'id-2')
+        self.assertEqual(len(cache), 2)
+        cache.close()
+
+    def test_discard(self):
+        """Проверить - отклоненный file_id удаляется и с диска."""
+        cache = FileIdCache(path=self.path)
+        cache.put('http://x/1.jpg', 'id-1')
+        cache.discard('http://x/1.jpg')
+        cache.discard('http://x/unknown.jpg')
+        cache.close()
+
+        cache = FileIdCache(path=self.path)
+        self.assertIsNone(cache.get('http://x/1.jpg'))
+        cache.close()
+
+    def test_file_key_changes_with_file(self):
+        """Проверить - после изменения файла ключ другой."""
+        sticker_path = os.path.join(self.directory.name, 'sticker.tgs')
+        with open(sticker_path, 'wb') as sticker:
+            sticker.write(b'first')
+        key = FileIdCache.file_key(sticker_path)
+        self.assertEqual(FileIdCache.file_key(sticker_path), key)
+
+        time.sleep(0.01)
+        with open(sticker_path, 'wb') as sticker:
+            sticker.write(b'second version')
+        self.assertNotEqual(FileIdCache.file_key(sticker_path), key)
+
+    def test_file_key_missing_file(self):
+        """Проверить - ключ отсутствующего файла - FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            FileIdCache.file_key(os.path.join(self.directory.name, 'no.tgs'))
+
+
+if __name__ == '__main__':
+    unittest.main()
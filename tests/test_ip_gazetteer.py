@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from vtravel_bot_parsers import Gazetteer
+
+
+SOCHI = {'suggestions': [
+    {'group': 'CITY_GROUP', 'entities': [
+        {'destinationId': '10873622', 'name': 'Сочи',
+         'caption': 'Сочи, Краснодарский край, Россия'},
+        {'destinationId': '1663498', 'name': 'Адлер',
+         'caption': 'Адлер, Сочи, Краснодарский край, Россия'}]},
+    {'group': 'HOTEL_GROUP', 'entities': []}]}
+MOSCOW = {'suggestions': [
+    {'group': 'CITY_GROUP', 'entities': [
+        {'destinationId': '1153093', 'name': 'Москва',
+         'caption': 'Москва, Россия'}]}]}
+NOT_FOUND = {'suggestions': [{'group': 'CITY_GROUP', 'entities': []}]}
+
+
+class TestGazetteer(unittest.TestCase):
+    """
+    Проверить справочник направлений.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'data',
+                                 'gazetteer.sqlite3')
+        self.gazetteer = Gazetteer(path=self.path)
+        self.gazetteer.add(SOCHI, names=('Сочи', 'Sochi'))
+
+    def tearDown(self):
+        self.gazetteer.close()
+        self.directory.cleanup()
+
+    def test_lookup_by_search_names(self):
+        """Проверить - ввод пользователя и запрос к API - все направления."""
+        destinations = {'Сочи, Краснодарский край, Россия': '10873622',
+                        'Адлер, Сочи, Краснодарский край, Россия': '1663498'}
+        self.assertEqual(self.gazetteer.lookup('сочи'), destinations)
+        self.assertEqual(self.gazetteer.lookup(' SOCHI '), destinations)
+
+    def test_lookup_by_destination_name(self):
+        """Проверить - название направления - само направление."""
+        self.assertEqual(self.gazetteer.lookup('Адлер'),
+                         {'Адлер, Сочи, Краснодарский край, Россия':
+                          '1663498'})
+
+    def test_fuzzy_lookup(self):
+        """Проверить - опечатки на латинице и кириллице."""
+        self.gazetteer.add(MOSCOW, names=('Moscow',))
+        self.assertEqual(self.gazetteer.lookup('Moskow'),
+                         {'Москва, Россия': '1153093'})
+        self.assertEqual(self.gazetteer.lookup('Масква'),
+                         {'Москва, Россия': '1153093'})
+        self.assertEqual(self.gazetteer.lookup('Адлерр'),
+                         {'Адлер, Сочи, Краснодарский край, Россия':
+                          '1663498'})
+        self.assertIsNone(self.gazetteer.lookup('Мааасква'))
+
+    def test_short_names_without_typos(self):
+        """Проверить - короткое название - только точное совпадение."""
+        self.assertIsNone(self.gazetteer.lookup('Сочу'))
+
+    def test_ambiguous_typo(self):
+        """Проверить - опечатка ближе к нескольким городам - None."""
+        self.gazetteer.add(MOSCOW, names=('Москван',))
+        self.gazetteer.add(SOCHI, names=('Москвин',))
+        self.assertIsNone(self.gazetteer.lookup('Москвон'))
+
+    def test_normalize(self):
+        """Проверить - регистр, ё и знаки препинания не важны."""
+        self.assertEqual(Gazetteer.normalize(' Орёл-на-Оке,  '),
+                         'орел на оке')
+
+    def test_not_found_response_is_not_added(self):
+        """Проверить - ответ без направлений не добавляется."""
+        self.assertEqual(self.gazetteer.add(NOT_FOUND, names=('Xyzzy',)), 0)
+        self.assertIsNone(self.gazetteer.lookup('Xyzzy'))
+        self.assertEqual(self.gazetteer.add(SOCHI, names=('Sochi',)), 0)
+
+    def test_complete(self):
+        """Проверить - ключи по префиксу."""
+        self.gazetteer.add(MOSCOW, names=('Moscow',))
+        self.assertEqual(self.gazetteer.complete('Со'), ['сочи'])
+        self.assertEqual(self.gazetteer.complete(''),
+                         ['moscow', 'sochi', 'адлер', 'москва', 'сочи'])
+        self.assertEqual(self.gazetteer.complete('', limit=2),
+                         ['moscow', 'sochi'])
+        self.assertEqual(self.gazetteer.complete('Париж'), [])
+
+    def test_persistent(self):
+        """Проверить - справочник сохраняется на диске между запусками."""
+        self.gazetteer.close()
+        self.gazetteer = Gazetteer(path=self.path)
+        self.assertEqual(len(self.gazetteer), 3)
+        self.assertEqual(self.gazetteer.lookup('Sochy'),
+                         self.gazetteer.lookup('Сочи'))
+
+
+if __name__ == '__main__':
+    unittest.main()
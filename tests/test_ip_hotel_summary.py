@@ -0,0 +1,88 @@
+import unittest
+
+from vtravel_bot_parsers import HotelSummary, ParseHotels
+from vtravel_bot_parsers.hotel_summary import parse_number
+
+
+class TestHotelSummary(unittest.TestCase):
+    """
+    Проверить краткую информацию об отеле.
+    """
+    def setUp(self):
+        self.hotel_info = {
+            'id': 1505932768,
+            'name': 'Sochi Hotel',
+            'address': {'streetAddress': 'Kurortny prospect, 1'},
+            'landmarks': [{'label': 'City center', 'distance': '0,8 km'}],
+            'ratePlan': {'price': {'current': '12,345 RUB'}}
+        }
+
+    def test_parse_number(self):
+        """Проверить - разбор цены и расстояния из строк API."""
+        self.assertEqual(parse_number('1,234 RUB'), 1234)
+        self.assertEqual(parse_number('$1,234.50'), 1234.5)
+        self.assertEqual(parse_number('0,8 km'), 0.8)
+        self.assertEqual(parse_number('12 345 ₽'), 12345)
+        self.assertIsNone(parse_number('no price'))
+        self.assertIsNone(parse_number(None))
+
+    def test_from_api(self):
+        """Проверить - числовые поля разобраны при создании."""
+        hotel = HotelSummary.from_api(self.hotel_info)
+        self.assertEqual(hotel.id, '1505932768')
+        self.assertEqual(hotel.address, 'Kurortny prospect, 1')
+        self.assertEqual(hotel.price, '12,345 RUB')
+        self.assertEqual(hotel.price_value, 12345)
+        self.assertEqual(hotel.distance_value, 0.8)
+        self.assertFalse(hasattr(hotel, '__dict__'))
+
+    def test_missing_fields(self):
+        """Проверить - отсутствующие поля не ломают разбор."""
+        hotel = HotelSummary.from_api({'id': 1, 'name': 'No price'})
+        self.assertEqual(hotel.price, 'no price')
+        self.assertIsNone(hotel.price_value)
+        self.assertIsNone(hotel.distance_value)
+
+    def test_collect_brief_information_about_hotels(self):
+        """Проверить - подборка ограничена 20 отелями."""
+        hotels = ParseHotels.collect_brief_information_about_hotels(
+            number_of_hotels=30, hotels=[self.hotel_info] * 25)
+        self.assertEqual(len(hotels), 20)
+        self.assertEqual(hotels[0], HotelSummary.from_api(self.hotel_info))
+
+    def test_bestdeal_selection(self):
+        """
+        Проверить - в режиме bestdeal отели вне диапазона цен
+        пропускаются, подборка - по расстоянию до центра.
+        """
+        hotels = []
+        for number, (price, distance) in enumerate((
+                ('1,500 RUB', '3,2 km'), ('9,000 RUB', '0,1 km'),
+                ('2,000 RUB', '0,5 km'), ('no price', 'no distance'),
+                ('500 RUB', '1 km'), ('4,000 RUB', '1,5 km'))):
+            hotels.append({'id': number, 'name': 'Hotel {0}'.format(number),
+                           'landmarks': [{'distance': distance}],
+                           'ratePlan': {'price': {'current': price}}})
+
+        selection = ParseHotels.collect_brief_information_about_hotels(
+            number_of_hotels=3, hotels=hotels, price_min=1000,
+            price_max=5000)
+        self.assertEqual([hotel.name for hotel in selection],
+                         ['Hotel 2', 'Hotel 0', 'Hotel 3'])
+        selection = ParseHotels.collect_brief_information_about_hotels(
+            number_of_hotels=3, hotels=hotels)
+        self.assertEqual([hotel.name for hotel in selection],
+                         ['Hotel 0', 'Hotel 1', 'Hotel 2'])
+
+    def test_is_price_in_range(self):
+        """Проверить - цена в диапазоне, неизвестная цена не отбрасывается."""
+        hotel = HotelSummary.from_api(self.hotel_info)
+        self.assertTrue(hotel.is_price_in_range(10000, 15000))
+        self.assertTrue(hotel.is_price_in_range(price_max=12345))
+        self.assertFalse(hotel.is_price_in_range(13000, 15000))
+        self.assertFalse(hotel.is_price_in_range(price_max=10000))
+        self.assertTrue(HotelSummary.from_api({}).is_price_in_range(1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
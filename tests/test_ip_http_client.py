@@ -0,0 +1,65 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vtravel_bot_parsers import HTTPClient, get_http_client
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Обработчик, запоминающий порты клиентских соединений."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    client_ports = set()
+
+    def do_GET(self):
+        self.client_ports.add(self.client_address[1])
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPClient(unittest.TestCase):
+    """
+    Проверить общий HTTP-клиент с пулом соединений.
+    """
+    def setUp(self):
+        _KeepAliveHandler.client_ports = set()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{0}/'.format(self.server.server_address[1])
+        self.client = HTTPClient(pool_size=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_reused(self):
+        """Проверить - последовательные запросы идут по одному соединению."""
+        for _ in range(5):
+            self.assertTrue(self.client.get(self.url).ok)
+        self.assertEqual(len(_KeepAliveHandler.client_ports), 1)
+
+    def test_endpoint_timeouts(self):
+        """Проверить - таймаут выбирается по имени эндпоинта."""
+        self.client.set_timeout('properties/list', 1.5)
+        self.assertEqual(self.client.timeout_for('properties/list'), 1.5)
+        self.assertEqual(self.client.timeout_for('unknown'), (3.05, 10))
+
+    def test_incorrect_pool_size(self):
+        """Проверить - пул без соединений не создается."""
+        with self.assertRaises(ValueError):
+            HTTPClient(pool_size=0)
+
+    def test_shared_client(self):
+        """Проверить - общий клиент один на процесс."""
+        self.assertIs(get_http_client(), get_http_client())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from loguru import logger
+
+from vtravel_bot_parsers import Tracer
+from vtravel_bot_services import LogSampler, configure_logging
+from vtravel_bot_services.logging_setup import BackgroundLogWriter
+
+
+class TestLogSampler(unittest.TestCase):
+    """
+    Проверить ограничение частоты однотипных записей журнала.
+    """
+    def setUp(self):
+        self.messages = []
+        self.handler_id = logger.add(self.messages.append,
+                                     format='{message}')
+
+    def tearDown(self):
+        logger.remove(self.handler_id)
+
+    def test_burst_then_suppressed(self):
+        """Проверить - сверх лимита записи пропускаются."""
+        sampler = LogSampler(rate=0.001, burst=3)
+        for number in range(10):
+            sampler.log('hotel_photos', 'INFO', 'Отель - {0}', number)
+        self.assertEqual([message.strip() for message in self.messages],
+                         ['Отель - 0', 'Отель - 1', 'Отель - 2'])
+
+    def test_suppressed_count(self):
+        """Проверить - количество пропущенных - в следующей записи."""
+        sampler = LogSampler(rate=100, burst=1)
+        for _ in range(3):
+            sampler.log('telegram_429', 'WARNING', '429')
+        time.sleep(0.02)
+        sampler.log('telegram_429', 'WARNING', '429')
+        self.assertEqual(len(self.messages), 2)
+        self.assertEqual(self.messages[-1].strip(),
+                         '429 (пропущено похожих записей: 2)')
+
+    def test_events_are_independent(self):
+        """Проверить - у каждого события свой лимит."""
+        sampler = LogSampler(rate=0.001, burst=1)
+        self.assertTrue(sampler.allow('hotel_photos'))
+        self.assertFalse(sampler.allow('hotel_photos'))
+        self.assertTrue(sampler.allow('unknown_input'))
+
+    def test_incorrect_rate(self):
+        """Проверить - лимит должен быть больше 0."""
+        with self.assertRaises(ValueError):
+            LogSampler(rate=0)
+
+
+class TestConfigureLogging(unittest.TestCase):
+    """
+    Проверить запись журнала в файл.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'logs', 'bot.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_lines(self):
+        with open(self.path, encoding='utf-8') as log_file:
+            return log_file.read().splitlines()
+
+    def test_background_writer(self):
+        """Проверить - все записи очереди попадают в файл."""
+        handler_id = configure_logging(path=self.path, level='DEBUG',
+                                       log_format='text', enqueue=True)
+        for number in range(1000):
+            logger.debug('Запись {0}', number)
+        logger.remove(handler_id)
+
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 1000)
+        self.assertTrue(lines[-1].endswith('Запись 999 <- '
+                                           'test_background_writer'))
+
+    def test_json(self):
+        """Проверить - строка JSON с id диалога."""
+        handler_id = configure_logging(path=self.path, level='DEBUG',
+                                       log_format='json', enqueue=False)
+        tracer = Tracer(export_path='')
+        with tracer.span('receive_city', trace_id='5f0c9a3e8b7d4c21'):
+            logger.info('Город: "Сочи"')
+        logger.info('Вне диалога')
+        logger.remove(handler_id)
+
+        entries = [json.loads(line) for line in self.read_lines()]
+        self.assertEqual(entries[0]['message'], 'Город: "Сочи"')
+        self.assertEqual(entries[0]['level'], 'INFO')
+        self.assertEqual(entries[0]['conversation_id'], '5f0c9a3e8b7d4c21')
+        self.assertEqual(entries[1]['conversation_id'], '-')
+
+    def test_unknown_format(self):
+        """Проверить - неизвестный формат журнала - ValueError."""
+        with self.assertRaises(ValueError):
+            configure_logging(path=self.path, log_format='xml')
+
+    def test_writer_stop(self):
+        """Проверить - stop записывает очередь и закрывает файл."""
+        writer = BackgroundLogWriter(self.path)
+        writer.write('первая\n')
+        writer.write('вторая\n')
+        writer.stop()
+        self.assertEqual(self.read_lines(), ['первая', 'вторая'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+
+from vtravel_bot_parsers import HotelSummary
+from vtravel_bot_services import SearchRecord
+from vtravel_bot_ui import (MESSAGE_MAX_LENGTH, collect_history_messages,
+                            collect_hotel_selection_messages,
+                            hotel_short_description, pack_messages,
+                            search_record_description)
+
+
+def _hotel(number: int, name: str = None) -> HotelSummary:
+    return HotelSummary(id=str(number),
+                        name=name or 'Hotel {0}'.format(number),
+                        address='Street, {0}'.format(number),
+                        landmarks='1,5 km', price='1,000 RUB')
+
+
+class TestPackMessages(unittest.TestCase):
+    """
+    Проверить упаковку частей текста в сообщения.
+    """
+    def test_parts_are_joined(self):
+        """Проверить - части объединяются в одно сообщение."""
+        self.assertEqual(pack_messages(['a', 'b', 'c']), ['a\n\nb\n\nc'])
+
+    def test_max_length(self):
+        """Проверить - сообщения не длиннее max_length, части целые."""
+        parts = ['x' * 40 for _ in range(10)]
+        messages = pack_messages(parts, max_length=100)
+        self.assertEqual(len(messages), 5)
+        self.assertTrue(all(len(text) <= 100 for text in messages))
+        self.assertEqual('\n\n'.join(messages), '\n\n'.join(parts))
+
+    def test_long_part_is_split(self):
+        """Проверить - часть длиннее max_length режется на куски."""
+        messages = pack_messages(['a', 'y' * 250], max_length=100)
+        self.assertEqual(messages, ['a', 'y' * 100, 'y' * 100, 'y' * 50])
+
+    def test_empty(self):
+        """Проверить - нет частей - нет сообщений."""
+        self.assertEqual(pack_messages([]), [])
+
+
+class TestHotelSelectionMessages(unittest.TestCase):
+    """
+    Проверить сообщения с подборкой отелей.
+    """
+    def test_description_is_escaped(self):
+        """Проверить - данные отеля экранируются для HTML."""
+        description = hotel_short_description(_hotel(1, name='A & <B>'))
+        self.assertIn('<b>A &amp; &lt;B&gt;</b>', description)
+
+    def test_twenty_hotels_in_one_message(self):
+        """Проверить - 20 отелей и заголовок - одно сообщение."""
+        hotels = [_hotel(number) for number in range(20)]
+        messages = collect_hotel_selection_messages(hotels)
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(messages[0].startswith('<b>Подборка отелей:</b>'))
+        self.assertIn('Hotel 19', messages[0])
+
+    def test_long_selection_is_chunked(self):
+        """Проверить - длинная подборка делится по границам отелей."""
+        hotels = [_hotel(number, name='N' * 500) for number in range(20)]
+        messages = collect_hotel_selection_messages(hotels)
+        self.assertGreater(len(messages), 1)
+        self.assertTrue(all(len(text) <= MESSAGE_MAX_LENGTH
+                            for text in messages))
+        self.assertEqual(sum(text.count('🏨') for text in messages), 20)
+
+    def test_not_packed(self):
+        """Проверить - с фото - сообщение на отель, заголовок в первом."""
+        hotels = [_hotel(number) for number in range(3)]
+        messages = collect_hotel_selection_messages(hotels, packed=False)
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(messages[0].startswith('<b>Подборка отелей:</b>'))
+        self.assertTrue(messages[1].startswith('🏨'))
+
+
+class TestHistoryMessages(unittest.TestCase):
+    """
+    Проверить сообщения истории поиска.
+    """
+    def test_description(self):
+        """Проверить - описание поиска с ценами, HTML экранируется."""
+        description = search_record_description(SearchRecord(
+            chat_id=1, command='/bestdeal', city='Сочи',
+            destination='Сочи, Краснодарский край, Россия',
+            price_min=1000, price_max=5000, hotels=('A & B', 'C')))
+        self.assertTrue(description.startswith('🔎 <b>/bestdeal</b>'))
+        self.assertIn('Город: Сочи', description)
+        self.assertIn('Цена: от 1000 до 5000', description)
+        self.assertIn('Отели: A &amp; B, C', description)
+
+    def test_without_prices(self):
+        """Проверить - без диапазона цен строки цены нет."""
+        description = search_record_description(SearchRecord(
+            chat_id=1, command='/lowprice', hotels=('A',)))
+        self.assertNotIn('Цена', description)
+        self.assertNotIn('Город', description)
+
+    def test_pages(self):
+        """Проверить - заголовок только на первой странице."""
+        records = [SearchRecord(chat_id=1, command='/lowprice',
+                                hotels=('A',))] * 3
+        first_page = collect_history_messages(records)
+        self.assertEqual(len(first_page), 1)
+        self.assertTrue(first_page[0].startswith(
+            '<b>История поиска отелей:</b>'))
+        self.assertTrue(collect_history_messages(
+            records, header=False)[0].startswith('🔎'))
+
+    def test_empty(self):
+        """Проверить - пустая история."""
+        self.assertEqual(collect_history_messages([]),
+                         ['История поиска пуста'])
+        self.assertEqual(collect_history_messages([], header=False), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
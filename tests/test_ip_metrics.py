@@ -0,0 +1,166 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import requests
+
+from benchmarks.stand_in_server import StandInServer
+from vtravel_bot_parsers import (HTTPClient, MetricsRegistry, ParseHotels,
+                                 RateLimiter, ResponseCache, SingleFlight,
+                                 timed)
+from vtravel_bot_parsers.metrics import (API_CALL_DURATION,
+                                         HTTP_REQUEST_DURATION)
+from vtravel_bot_services import MetricsServer
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """
+    Проверить запись метрик в формате Prometheus.
+    """
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        """Проверить - счетчик с метками."""
+        counter = self.registry.counter('errors_total', 'Ошибки.',
+                                        ('call', 'error'))
+        counter.inc('translate', 'ConnectionError')
+        counter.inc('translate', 'ConnectionError', amount=2)
+        rendered = self.registry.render()
+        self.assertIn('# TYPE errors_total counter', rendered)
+        self.assertIn('errors_total{call="translate",'
+                      'error="ConnectionError"} 3', rendered)
+
+    def test_histogram(self):
+        """Проверить - корзины гистограммы накапливаются, +Inf, сумма."""
+        histogram = self.registry.histogram('duration_seconds',
+                                            'Длительность.', ('call',),
+                                            buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, 'search')
+        rendered = self.registry.render()
+        self.assertIn('duration_seconds_bucket{call="search",le="0.1"} 1',
+                      rendered)
+        self.assertIn('duration_seconds_bucket{call="search",le="1"} 2',
+                      rendered)
+        self.assertIn('duration_seconds_bucket{call="search",le="+Inf"} 3',
+                      rendered)
+        self.assertIn('duration_seconds_sum{call="search"} 5.55', rendered)
+        self.assertIn('duration_seconds_count{call="search"} 3', rendered)
+
+    def test_gauge(self):
+        """Проверить - значение вычисляется при записи метрик."""
+        states = {1: 'city', 2: 'photos'}
+        self.registry.gauge('conversations', 'Диалоги.',
+                            lambda: len(states))
+        self.assertIn('conversations 2', self.registry.render())
+
+    def test_labels_are_escaped(self):
+        """Проверить - кавычки в метках экранируются."""
+        counter = self.registry.counter('calls_total', 'Вызовы.', ('call',))
+        counter.inc('say "hi"')
+        self.assertIn('calls_total{call="say \\"hi\\""} 1',
+                      self.registry.render())
+
+    def test_duplicate_and_incorrect_labels(self):
+        """Проверить - повторное имя и неверные метки - ValueError."""
+        counter = self.registry.counter('calls_total', 'Вызовы.', ('call',))
+        with self.assertRaises(ValueError):
+            self.registry.counter('calls_total', 'Вызовы.')
+        with self.assertRaises(ValueError):
+            counter.inc()
+
+
+class TestTimed(unittest.TestCase):
+    """
+    Проверить декоратор timed для функций и корутин.
+    """
+    def setUp(self):
+        registry = MetricsRegistry()
+        self.histogram = registry.histogram('duration_seconds', '',
+                                            ('call',))
+        self.errors = registry.counter('errors_total', '',
+                                       ('call', 'error'))
+
+    def test_function(self):
+        """Проверить - вызов и исключение функции учитываются."""
+        @timed(self.histogram, self.errors, label='search')
+        def search(city):
+            if not city:
+                raise ValueError(city)
+            return city
+
+        self.assertEqual(search('Sochi'), 'Sochi')
+        with self.assertRaises(ValueError):
+            search('')
+        self.assertEqual(self.histogram.count('search'), 2)
+        self.assertEqual(self.errors.value('search', 'ValueError'), 1)
+
+    def test_coroutine(self):
+        """Проверить - корутина остается корутиной и учитывается."""
+        @timed(self.histogram, self.errors)
+        async def translate(text):
+            await asyncio.sleep(0)
+            return text
+
+        self.assertTrue(asyncio.iscoroutinefunction(translate))
+        self.assertEqual(asyncio.run(translate('Сочи')), 'Сочи')
+        self.assertEqual(self.histogram.count(translate.__qualname__), 1)
+
+
+class TestMetricsServer(unittest.TestCase):
+    """
+    Проверить HTTP-сервер метрик.
+    """
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter('calls_total', 'Вызовы.').inc()
+        self.server = MetricsServer('127.0.0.1', 0, self.registry).start()
+        self.url = 'http://127.0.0.1:{0}'.format(
+            self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_metrics(self):
+        """Проверить - GET /metrics возвращает метрики."""
+        response = requests.get(self.url + '/metrics', timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['Content-Type'].startswith(
+            'text/plain; version=0.0.4'))
+        self.assertIn('calls_total 1', response.text)
+
+    def test_unknown_path(self):
+        """Проверить - другой адрес - 404."""
+        response = requests.get(self.url + '/', timeout=5)
+        self.assertEqual(response.status_code, 404)
+
+
+@mock.patch('vtravel_bot_parsers.parse_hotels.HEADERS_BOT', '{}')
+class TestApiCallMetrics(unittest.TestCase):
+    """
+    Проверить метрики запросов парсера отелей к локальной замене API.
+    """
+    def test_search_is_recorded(self):
+        """Проверить - учтены вызов метода и HTTP-запрос эндпоинта."""
+        call = 'ParseHotels.get_search_results_by_city'
+        calls = API_CALL_DURATION.count(call)
+        requests_made = HTTP_REQUEST_DURATION.count('locations/v2/search',
+                                                    '200')
+        with StandInServer(seed=13) as server:
+            client = HTTPClient(rate_limiter=RateLimiter())
+            try:
+                ParseHotels(client=client, cache=ResponseCache(),
+                            flights=SingleFlight(),
+                            base_url=server.url).get_search_results_by_city(
+                    'Sochi')
+            finally:
+                client.close()
+        self.assertEqual(API_CALL_DURATION.count(call), calls + 1)
+        self.assertEqual(HTTP_REQUEST_DURATION.count('locations/v2/search',
+                                                     '200'),
+                         requests_made + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
+import threading
 import time
 import unittest
+from concurrent.futures import Future
+from unittest import mock
 
 import requests
 
 from config_bot import HEADERS_BOT
+from vtravel_bot_parsers import (MAX_PAGE_SIZE, ParseHotels, ResponseCache,
+                                 SingleFlight)
 
 
 @unittest.skip('Пропуск тестов, которые затрагивают реальный API-Hotels.')
@@ -117,5 +122,181 @@ class TestAPIHotels(unittest.TestCase):
         self.assertTrue(result)
 
 
+class _SlowPhotoResponse:
+    """Ответ API с фото отеля."""
+    def __init__(self, hotel_id):
+        self.hotel_id = hotel_id
+
+    def json(self):
+        if self.hotel_id == 'broken':
+            return {}
+        return {'hotelImages': [{'baseUrl': self.hotel_id + '_{size}'}] * 3}
+
+
+class _SlowPhotoClient:
+    """HTTP-клиент с задержкой, считающий одновременные запросы."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def get(self, url, endpoint=None, params=None, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        return _SlowPhotoResponse(params['id'])
+
+
+@mock.patch('vtravel_bot_parsers.parse_hotels.HEADERS_BOT', '{}')
+class TestPhotosOfHotels(unittest.TestCase):
+    """
+    Проверить параллельное получение фото отелей.
+    """
+    def test_order_and_errors(self):
+        """Проверить - порядок отелей сохраняется, ошибки возвращаются."""
+        parser = ParseHotels(client=_SlowPhotoClient())
+        result = list(parser.get_photos_of_hotels(
+            hotel_ids=['1', 'broken', '3'], number_of_photos=2))
+        self.assertEqual(result[0], [{'baseUrl': '1_{size}'}] * 2)
+        self.assertIsInstance(result[1], ValueError)
+        self.assertEqual(result[2], [{'baseUrl': '3_{size}'}] * 2)
+
+    def test_bounded_concurrency(self):
+        """Проверить - одновременных запросов не больше max_workers."""
+        client = _SlowPhotoClient()
+        parser = ParseHotels(client=client)
+        list(parser.get_photos_of_hotels(
+            hotel_ids=[str(number) for number in range(12)],
+            number_of_photos=1, max_workers=4))
+        self.assertGreater(client.max_active, 1)
+        self.assertLessEqual(client.max_active, 4)
+
+
+class _PagedResponse:
+    """Ответ properties/list."""
+    ok = True
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class _PagedHotelsClient:
+    """HTTP-клиент, отдающий список отелей постранично."""
+    def __init__(self, number_of_hotels):
+        self.hotels = [{'id': number} for number in range(number_of_hotels)]
+        self.lock = threading.Lock()
+        self.pages = []
+
+    def get(self, url, endpoint=None, params=None, **kwargs):
+        page_number = int(params['pageNumber'])
+        page_size = int(params['pageSize'])
+        with self.lock:
+            self.pages.append((page_number, page_size))
+        start = (page_number - 1) * page_size
+        hotels = self.hotels[start:start + page_size]
+        pagination = {'currentPage': page_number}
+        if start + page_size < len(self.hotels):
+            pagination['nextPageNumber'] = page_number + 1
+        return _PagedResponse({'data': {'body': {'searchResults': {
+            'results': hotels, 'pagination': pagination}}}})
+
+
+@mock.patch('vtravel_bot_parsers.parse_hotels.HEADERS_BOT', '{}')
+class TestIterateHotels(unittest.TestCase):
+    """
+    Проверить постраничный перебор отелей.
+    """
+    def create_parser(self, client):
+        return ParseHotels(client=client, cache=ResponseCache(),
+                           flights=SingleFlight())
+
+    def test_first_page_sized_to_limit(self):
+        """Проверить - для 3 отелей запрашивается страница из 3."""
+        client = _PagedHotelsClient(100)
+        hotels = list(self.create_parser(client).iterate_hotels(
+            '123', 'PRICE', limit=3))
+        self.assertEqual([hotel['id'] for hotel in hotels], [0, 1, 2])
+        self.assertEqual(client.pages, [(1, 3)])
+
+    def test_all_pages(self):
+        """Проверить - без limit перебираются все страницы."""
+        client = _PagedHotelsClient(60)
+        hotels = list(self.create_parser(client).iterate_hotels(
+            '123', 'PRICE'))
+        self.assertEqual([hotel['id'] for hotel in hotels], list(range(60)))
+        self.assertEqual(client.pages, [(1, 25), (2, 25), (3, 25)])
+
+    def test_limit_across_pages(self):
+        """Проверить - limit больше страницы, лишних страниц нет."""
+        client = _PagedHotelsClient(100)
+        hotels = list(self.create_parser(client).iterate_hotels(
+            '123', 'PRICE', limit=30))
+        self.assertEqual(len(hotels), 30)
+        self.assertEqual(client.pages, [(1, 25), (2, 25)])
+
+    def test_next_page_is_prefetched(self):
+        """Проверить - следующая страница запрашивается заранее."""
+        client = _PagedHotelsClient(50)
+        hotels = self.create_parser(client).iterate_hotels(
+            '123', 'PRICE', prefetch_threshold=5)
+        for _ in range(20):
+            next(hotels)
+        time.sleep(0.05)
+        self.assertEqual(client.pages, [(1, 25)])
+        next(hotels)
+        time.sleep(0.05)
+        self.assertEqual(client.pages, [(1, 25), (2, 25)])
+        hotels.close()
+
+    def test_same_page_size_shares_response(self):
+        """
+        Проверить - перебор с разными limit и одним page_size -
+        один запрос properties/list, второй перебор - из кэша.
+        """
+        client = _PagedHotelsClient(100)
+        parser = self.create_parser(client)
+        self.assertEqual(len(list(parser.iterate_hotels(
+            '123', 'PRICE', limit=1, page_size=MAX_PAGE_SIZE))), 1)
+        time.sleep(0.05)
+        hotels = list(parser.iterate_hotels(
+            '123', 'PRICE', limit=20, page_size=MAX_PAGE_SIZE))
+        self.assertEqual([hotel['id'] for hotel in hotels], list(range(20)))
+        self.assertEqual(client.pages, [(1, MAX_PAGE_SIZE)])
+
+    def test_prefetch_is_cancelled(self):
+        """Проверить - перебор остановлен - ожидающая страница отменена."""
+        client = _PagedHotelsClient(50)
+        next_page = Future()
+        executor = mock.Mock()
+        executor.submit.return_value = next_page
+        with mock.patch('vtravel_bot_parsers.parse_hotels.ThreadPoolExecutor',
+                        return_value=executor):
+            hotels = self.create_parser(client).iterate_hotels(
+                '123', 'PRICE', prefetch_threshold=25)
+            next(hotels)
+            hotels.close()
+        self.assertTrue(next_page.cancelled())
+        executor.shutdown.assert_called_once_with(wait=False)
+
+    def test_is_lazy(self):
+        """Проверить - запросов нет, пока отели не перебираются."""
+        client = _PagedHotelsClient(10)
+        self.create_parser(client).iterate_hotels('123', 'PRICE')
+        self.assertEqual(client.pages, [])
+
+    def test_incorrect_response(self):
+        """Проверить - некорректный ответ API - ValueError."""
+        client = _PagedHotelsClient(0)
+        client.get = lambda *args, **kwargs: _PagedResponse({'data': {}})
+        with self.assertRaises(ValueError):
+            list(self.create_parser(client).iterate_hotels('123', 'PRICE'))
+
+
 if __name__ == '__main__':
     unittest.main()
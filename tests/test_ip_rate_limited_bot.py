@@ -0,0 +1,127 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from telebot import apihelper, asyncio_helper, types
+
+from vtravel_bot_parsers import RateLimiter
+from vtravel_bot_services import AsyncRateLimitedTeleBot, RateLimitedTeleBot
+from vtravel_bot_services.rate_limited_bot import (get_message_cost,
+                                                   get_retry_after)
+
+
+TOKEN = '123456:TEST'
+MESSAGE = {'message_id': 1, 'date': 0,
+           'chat': {'id': 42, 'type': 'private'}, 'text': 'ok'}
+TOO_MANY_REQUESTS = {'ok': False, 'error_code': 429,
+                     'description': 'Too Many Requests: retry after 0.1',
+                     'parameters': {'retry_after': 0.1}}
+
+
+class TestRateLimitedTeleBot(unittest.TestCase):
+    """
+    Проверить ограничение частоты сообщений синхронного бота.
+    """
+    def test_chat_limit(self):
+        """Проверить - сообщения одного чата ждут своей очереди."""
+        bot = RateLimitedTeleBot(
+            TOKEN, rate_limiter=RateLimiter(key_rate=20, key_burst=1))
+        with mock.patch.object(apihelper, '_make_request',
+                               return_value=MESSAGE) as make_request:
+            started = time.monotonic()
+            for _ in range(3):
+                bot.send_message(42, 'text')
+            bot.edit_message_text('text', chat_id=42, message_id=1)
+        self.assertEqual(make_request.call_count, 4)
+        self.assertAlmostEqual(time.monotonic() - started, 0.15, delta=0.05)
+
+    def test_media_group_cost(self):
+        """
+        Проверить - альбом стоит по сообщению на файл в общей корзине
+        и одну отправку в корзине чата.
+        """
+        media = [types.InputMediaPhoto('https://example.com/{0}.jpg'.format(
+            number)) for number in range(3)]
+        make_request = mock.patch.object(
+            apihelper, '_make_request',
+            side_effect=lambda token, method_name, *args, **kwargs: (
+                [MESSAGE] * 3 if method_name == 'sendMediaGroup'
+                else MESSAGE))
+        for rate_limiter, duration in (
+                (RateLimiter(rate=20, burst=1), 0.15),
+                (RateLimiter(key_rate=20, key_burst=1), 0.05)):
+            bot = RateLimitedTeleBot(TOKEN, rate_limiter=rate_limiter)
+            with make_request:
+                started = time.monotonic()
+                bot.send_media_group(42, media)
+                bot.send_message(42, 'text')
+            self.assertAlmostEqual(time.monotonic() - started, duration,
+                                   delta=0.04)
+        self.assertEqual(get_message_cost({'media': media}), 3)
+        self.assertEqual(get_message_cost({'text': 'text'}), 1)
+
+    def test_retry_after_429(self):
+        """Проверить - после 429 сообщение отправляется повторно."""
+        bot = RateLimitedTeleBot(TOKEN, rate_limiter=RateLimiter(
+            key_rate=100, key_burst=10))
+        error = apihelper.ApiTelegramException('sendMessage', None,
+                                               TOO_MANY_REQUESTS)
+        with mock.patch.object(apihelper, '_make_request',
+                               side_effect=[error, MESSAGE]) as make_request:
+            started = time.monotonic()
+            message = bot.send_message(42, 'text')
+        self.assertEqual(message.message_id, 1)
+        self.assertEqual(make_request.call_count, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+    def test_other_errors_are_raised(self):
+        """Проверить - ошибки, кроме 429, не повторяются."""
+        bot = RateLimitedTeleBot(TOKEN, rate_limiter=RateLimiter())
+        error = apihelper.ApiTelegramException(
+            'sendMessage', None,
+            {'ok': False, 'error_code': 400, 'description': 'Bad Request'})
+        with mock.patch.object(apihelper, '_make_request',
+                               side_effect=error) as make_request:
+            with self.assertRaises(apihelper.ApiTelegramException):
+                bot.send_message(42, 'text')
+        self.assertEqual(make_request.call_count, 1)
+
+    def test_get_retry_after(self):
+        """Проверить - пауза берется из parameters.retry_after."""
+        error = apihelper.ApiTelegramException('sendMessage', None,
+                                               TOO_MANY_REQUESTS)
+        self.assertEqual(get_retry_after(error), 0.1)
+        self.assertIsNone(get_retry_after(ValueError()))
+
+
+class TestAsyncRateLimitedTeleBot(unittest.IsolatedAsyncioTestCase):
+    """
+    Проверить ограничение частоты сообщений асинхронного бота.
+    """
+    async def test_retry_after_429(self):
+        """Проверить - после 429 сообщение отправляется повторно."""
+        bot = AsyncRateLimitedTeleBot(TOKEN, rate_limiter=RateLimiter(
+            key_rate=100, key_burst=10))
+        error = asyncio_helper.ApiTelegramException('sendMessage', None,
+                                                    TOO_MANY_REQUESTS)
+        with mock.patch.object(asyncio_helper, '_process_request',
+                               side_effect=[error, MESSAGE]) as request:
+            message = await bot.send_message(42, 'text')
+        self.assertEqual(message.message_id, 1)
+        self.assertEqual(request.call_count, 2)
+
+    async def test_chats_are_independent(self):
+        """Проверить - лимит одного чата не задерживает другие чаты."""
+        bot = AsyncRateLimitedTeleBot(TOKEN, rate_limiter=RateLimiter(
+            key_rate=1, key_burst=1))
+        with mock.patch.object(asyncio_helper, '_process_request',
+                               return_value=MESSAGE):
+            started = time.monotonic()
+            await asyncio.gather(*(bot.send_message(chat_id, 'text')
+                                   for chat_id in range(10)))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
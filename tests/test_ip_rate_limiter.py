@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vtravel_bot_parsers import (HTTPClient, RateLimiter, RetryPolicy,
+                                 TokenBucket)
+from vtravel_bot_parsers.rate_limiter import parse_retry_after
+
+
+class _TooManyRequestsHandler(BaseHTTPRequestHandler):
+    """Обработчик, отвечающий 429 на первые запросы."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    rejections = 0
+    requests = 0
+
+    def do_GET(self):
+        _TooManyRequestsHandler.requests += 1
+        if _TooManyRequestsHandler.rejections > 0:
+            _TooManyRequestsHandler.rejections -= 1
+            status, body = 429, b''
+        else:
+            status, body = 200, b'{}'
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0.1')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTokenBucket(unittest.TestCase):
+    """
+    Проверить корзину токенов.
+    """
+    def test_burst_then_rate(self):
+        """Проверить - всплеск без ожидания, затем - по одному в 1/rate."""
+        bucket = TokenBucket(rate=10, burst=3)
+        send_times = [bucket.reserve(now=100.0) for _ in range(5)]
+        self.assertEqual(send_times[:3], [100.0] * 3)
+        self.assertAlmostEqual(send_times[3], 100.1)
+        self.assertAlmostEqual(send_times[4], 100.2)
+
+    def test_refill(self):
+        """Проверить - корзина наполняется со временем."""
+        bucket = TokenBucket(rate=10, burst=2)
+        bucket.reserve(now=100.0)
+        bucket.reserve(now=100.0)
+        self.assertEqual(bucket.reserve(now=100.5), 100.5)
+
+    def test_take(self):
+        """Проверить - без токена отказ, и ничего не списывается."""
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual([bucket.take(now=100.0) for _ in range(3)],
+                         [True, True, False])
+        self.assertFalse(bucket.take(now=100.05))
+        self.assertTrue(bucket.take(now=100.1))
+
+    def test_pause(self):
+        """Проверить - после паузы запросы идут без всплеска."""
+        bucket = TokenBucket(rate=10, burst=5)
+        bucket.pause(now=100.0, seconds=2)
+        self.assertAlmostEqual(bucket.reserve(now=100.0), 102.0)
+        self.assertAlmostEqual(bucket.reserve(now=100.0), 102.1)
+
+    def test_incorrect_rate(self):
+        """Проверить - лимит должен быть больше 0."""
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """
+    Проверить лимит частоты запросов.
+    """
+    def test_key_limit(self):
+        """Проверить - лимит ключа не задерживает другие ключи."""
+        limiter = RateLimiter(rate=100, burst=10, key_rate=10, key_burst=2)
+        delays = [limiter.acquire('chat') for _ in range(3)]
+        self.assertEqual(delays[:2], [0, 0])
+        self.assertAlmostEqual(delays[2], 0.1, places=2)
+        self.assertEqual(limiter.acquire('other'), 0)
+        self.assertEqual(limiter.stats['delayed'], 1)
+
+    def test_global_limit(self):
+        """Проверить - общий лимит действует для всех ключей."""
+        limiter = RateLimiter(rate=10, burst=2, key_rate=100, key_burst=10)
+        delays = [limiter.acquire(chat_id) for chat_id in range(3)]
+        self.assertEqual(delays[:2], [0, 0])
+        self.assertAlmostEqual(delays[2], 0.1, places=2)
+
+    def test_key_cost(self):
+        """Проверить - стоимость запроса в корзине ключа задается отдельно."""
+        limiter = RateLimiter(rate=100, burst=10, key_rate=10, key_burst=1)
+        self.assertEqual(limiter.acquire('chat', cost=5, key_cost=1), 0)
+        self.assertAlmostEqual(limiter.acquire('chat'), 0.1, places=2)
+
+    def test_throughput_at_ceiling(self):
+        """Проверить - очередь пропускает запросы с заданной частотой."""
+        limiter = RateLimiter(rate=50, burst=1)
+        started = time.monotonic()
+        for _ in range(11):
+            limiter.acquire()
+        self.assertAlmostEqual(time.monotonic() - started, 0.2, delta=0.05)
+
+    def test_pause_only_key(self):
+        """Проверить - пауза ключа не задерживает другие ключи."""
+        limiter = RateLimiter(key_rate=10, key_burst=1)
+        limiter.pause(0.1, key='chat')
+        self.assertEqual(limiter.acquire('other'), 0)
+        self.assertAlmostEqual(limiter.acquire('chat'), 0.1, places=2)
+
+    def test_unlimited(self):
+        """Проверить - без лимитов запросы не ждут."""
+        limiter = RateLimiter()
+        self.assertEqual(sum(limiter.acquire('key') for _ in range(100)), 0)
+
+    def test_acquire_async(self):
+        """Проверить - асинхронное ожидание очереди."""
+        limiter = RateLimiter(key_rate=20, key_burst=1)
+
+        async def send_all():
+            return await asyncio.gather(
+                *(limiter.acquire_async('chat') for _ in range(3)))
+
+        delays = asyncio.run(send_all())
+        self.assertAlmostEqual(max(delays), 0.1, places=2)
+
+    def test_parse_retry_after(self):
+        """Проверить - разбор заголовка Retry-After."""
+        self.assertEqual(parse_retry_after('3'), 3)
+        self.assertEqual(parse_retry_after(None, default=2), 2)
+        self.assertEqual(parse_retry_after('garbage', default=2), 2)
+        self.assertEqual(
+            parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+
+
+class TestHTTPClientRateLimit(unittest.TestCase):
+    """
+    Проверить ожидание очереди и повтор запроса после 429.
+    """
+    def setUp(self):
+        _TooManyRequestsHandler.rejections = 0
+        _TooManyRequestsHandler.requests = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          _TooManyRequestsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{0}/'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_retry_after_429(self):
+        """Проверить - после 429 запрос повторяется через Retry-After."""
+        _TooManyRequestsHandler.rejections = 1
+        client = HTTPClient(rate_limiter=RateLimiter(key_rate=100,
+                                                     key_burst=10))
+        started = time.monotonic()
+        response = client.get(self.url)
+        client.close()
+        self.assertTrue(response.ok)
+        self.assertEqual(_TooManyRequestsHandler.requests, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+    def test_retries_are_limited(self):
+        """Проверить - количество повторов ограничено."""
+        _TooManyRequestsHandler.rejections = 10
+        client = HTTPClient(rate_limiter=RateLimiter(key_rate=100),
+                            retry_policy=RetryPolicy(max_retries=1))
+        response = client.get(self.url)
+        client.close()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(_TooManyRequestsHandler.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import time
+import unittest
+from unittest import mock
+
+from vtravel_bot_parsers import (ParseHotels, ResponseCache, is_stale,
+                                 mark_stale)
+
+
+class _FakeResponse:
+    """Ответ API с заданным JSON."""
+    ok = True
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class _FakeClient:
+    """HTTP-клиент, считающий запросы к API."""
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def get(self, url, endpoint=None, **kwargs):
+        self.calls += 1
+        return _FakeResponse(self.payload)
+
+
+class TestResponseCache(unittest.TestCase):
+    """
+    Проверить TTL + LRU кэш ответов API.
+    """
+    def setUp(self):
+        self.cache = ResponseCache(max_entries=2, max_bytes=1024)
+
+    def test_hit_and_miss(self):
+        """Проверить - счетчики попаданий и промахов."""
+        key = self.cache.make_key('sochi', 'ru_RU', 'RUB')
+        self.assertIsNone(self.cache.get('locations/v2/search', key))
+        self.cache.put('locations/v2/search', key, {'suggestions': []})
+        self.assertEqual(self.cache.get('locations/v2/search', key),
+                         {'suggestions': []})
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_key_is_normalized(self):
+        """Проверить - регистр и пробелы не влияют на ключ."""
+        self.assertEqual(self.cache.make_key('  New  York ', 'ru_RU', None),
+                         self.cache.make_key('new york', 'RU_ru', ''))
+
+    def test_ttl_expiration(self):
+        """Проверить - устаревшая запись не возвращается."""
+        self.cache.set_ttl('properties/list', 0.01)
+        self.cache.put('properties/list', ('1',), {'data': {}})
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('properties/list', ('1',)))
+        self.assertEqual(self.cache.stats['expirations'], 1)
+
+    def test_get_stale(self):
+        """Проверить - устаревшая запись доступна до max_stale."""
+        cache = ResponseCache(max_stale=0.05)
+        cache.set_ttl('properties/list', 0.01)
+        cache.put('properties/list', ('1',), {'data': {}})
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('properties/list', ('1',)))
+        self.assertEqual(cache.get_stale('properties/list', ('1',)),
+                         {'data': {}})
+        time.sleep(0.05)
+        self.assertIsNone(cache.get_stale('properties/list', ('1',)))
+
+    def test_expiration_is_counted_once(self):
+        """
+        Проверить - устаревание записи, доступной через get_stale,
+        считается один раз.
+        """
+        cache = ResponseCache(max_stale=60)
+        cache.set_ttl('properties/list', 0.01)
+        cache.put('properties/list', ('1',), {'data': {}})
+        time.sleep(0.02)
+        for _ in range(3):
+            self.assertIsNone(cache.get('properties/list', ('1',)))
+        self.assertEqual(cache.stats['expirations'], 1)
+        self.assertEqual(cache.stats['misses'], 3)
+
+    def test_negative_entry_is_not_stale(self):
+        """Проверить - устаревший отрицательный ответ не отдается."""
+        cache = ResponseCache(max_stale=60)
+        cache.put('properties/list', ('1',), {'data': {}}, ttl=0.01,
+                  negative=True)
+        self.assertEqual(cache.get_stale('properties/list', ('1',)),
+                         {'data': {}})
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('properties/list', ('1',)))
+        self.assertIsNone(cache.get_stale('properties/list', ('1',)))
+        self.assertEqual(len(cache), 0)
+
+    def test_mark_stale(self):
+        """Проверить - отметка устаревшего ответа не меняет запись."""
+        response_json = {'suggestions': []}
+        stale_json = mark_stale(response_json)
+        self.assertTrue(is_stale(stale_json))
+        self.assertFalse(is_stale(response_json))
+        self.assertEqual(stale_json['suggestions'], [])
+
+    def test_lru_eviction_by_entries(self):
+        """Проверить - вытесняется давно неиспользуемая запись."""
+        self.cache.put('properties/list', ('1',), 1)
+        self.cache.put('properties/list', ('2',), 2)
+        self.cache.get('properties/list', ('1',))
+        self.cache.put('properties/list', ('3',), 3)
+        self.assertIsNone(self.cache.get('properties/list', ('2',)))
+        self.assertEqual(self.cache.get('properties/list', ('1',)), 1)
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        """Проверить - суммарный размер записей не превышает лимит."""
+        self.cache.put('properties/list', ('1',), 'a' * 600)
+        self.cache.put('properties/list', ('2',), 'b' * 600)
+        self.assertEqual(len(self.cache), 1)
+        self.assertLessEqual(self.cache.stats['bytes'], 1024)
+
+    @mock.patch('vtravel_bot_parsers.parse_hotels.HEADERS_BOT', '{}')
+    def test_parse_hotels_uses_cache(self):
+        """Проверить - повторный поиск города не обращается к API."""
+        client = _FakeClient({'suggestions': [{'entities': []}]})
+        parser = ParseHotels(client=client, cache=ResponseCache())
+        parser.get_search_results_by_city('Sochi')
+        parser.get_search_results_by_city(' sochi ')
+        self.assertEqual(client.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vtravel_bot_parsers import (CircuitBreaker, DeadlineExceeded, HTTPClient,
+                                 RateLimiter, RetryPolicy, deadline)
+from vtravel_bot_parsers.deadline import check_deadline, remaining_time
+from vtravel_bot_parsers.http_client import limit_timeout
+
+
+class _UnavailableHandler(BaseHTTPRequestHandler):
+    """Обработчик, отвечающий 503 первые failures запросов."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    failures = 0
+    requests = 0
+    delay = 0
+
+    def do_GET(self):
+        _UnavailableHandler.requests += 1
+        time.sleep(_UnavailableHandler.delay)
+        status = 503 if _UnavailableHandler.requests <= \
+            _UnavailableHandler.failures else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """
+    Проверить политику повторов запросов к API.
+    """
+    def test_full_jitter_bounds(self):
+        """Проверить - пауза от 0 до min(max_delay, base * 2 ** attempt)."""
+        policy = RetryPolicy(max_retries=10, base_delay=0.1, max_delay=1,
+                             seed=7)
+        for attempt in range(10):
+            delay = policy.next_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(1, 0.1 * 2 ** attempt))
+
+    def test_jitter_is_random(self):
+        """Проверить - паузы повторов разные."""
+        policy = RetryPolicy(max_retries=1, base_delay=1, seed=7)
+        self.assertGreater(len({policy.next_delay(0) for _ in range(10)}), 1)
+
+    def test_retries_are_limited(self):
+        """Проверить - после max_retries повторов - None."""
+        policy = RetryPolicy(max_retries=2)
+        self.assertIsNotNone(policy.next_delay(1))
+        self.assertIsNone(policy.next_delay(2))
+
+    def test_retry_after(self):
+        """Проверить - пауза из заголовка Retry-After."""
+        policy = RetryPolicy(max_retries=1, max_delay=0.1)
+        self.assertEqual(policy.next_delay(0, '2'), 2)
+
+    def test_retry_statuses(self):
+        """Проверить - повторяются 429 и 5xx, но не 4xx."""
+        policy = RetryPolicy()
+        for status_code in (429, 500, 502, 503, 504):
+            self.assertTrue(policy.should_retry(status_code))
+        for status_code in (200, 400, 404, 501):
+            self.assertFalse(policy.should_retry(status_code))
+
+    def test_no_retry_after_deadline(self):
+        """Проверить - повтор, не успевающий до срока, не выполняется."""
+        policy = RetryPolicy(max_retries=1)
+        with deadline(1):
+            self.assertIsNone(policy.next_delay(0, '2'))
+            self.assertEqual(policy.next_delay(0, '0.5'), 0.5)
+
+    def test_incorrect_parameters(self):
+        """Проверить - параметры не могут быть отрицательными."""
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_retries=-1)
+
+
+class TestDeadline(unittest.TestCase):
+    """
+    Проверить срок запроса пользователя.
+    """
+    def test_without_deadline(self):
+        """Проверить - без срока время не ограничено."""
+        self.assertIsNone(remaining_time())
+        with deadline(None):
+            self.assertIsNone(check_deadline())
+
+    def test_nested_deadline(self):
+        """Проверить - вложенный срок не продлевает внешний."""
+        with deadline(1):
+            with deadline(10):
+                self.assertLessEqual(remaining_time(), 1)
+            with deadline(0.5):
+                self.assertLessEqual(remaining_time(), 0.5)
+            self.assertGreater(remaining_time(), 0.5)
+        self.assertIsNone(remaining_time())
+
+    def test_deadline_exceeded(self):
+        """Проверить - после срока - DeadlineExceeded."""
+        with deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(DeadlineExceeded):
+                check_deadline()
+
+    def test_limit_timeout(self):
+        """Проверить - таймаут сокращается до времени до срока."""
+        self.assertEqual(limit_timeout((3.05, 10), None), (3.05, 10))
+        self.assertEqual(limit_timeout((3.05, 10), 5), (3.05, 5))
+        self.assertEqual(limit_timeout(10, 5), 5)
+        self.assertEqual(limit_timeout(None, 5), 5)
+
+
+class TestHTTPClientRetries(unittest.TestCase):
+    """
+    Проверить повторы запросов HTTP-клиента.
+    """
+    def setUp(self):
+        _UnavailableHandler.requests = 0
+        _UnavailableHandler.failures = 0
+        _UnavailableHandler.delay = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          _UnavailableHandler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = 'http://127.0.0.1:{0}/'.format(
+            self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def create_client(self, max_retries):
+        return HTTPClient(rate_limiter=RateLimiter(),
+                          circuit_breaker=CircuitBreaker(),
+                          retry_policy=RetryPolicy(max_retries=max_retries,
+                                                   base_delay=0.01))
+
+    def test_retry_server_errors(self):
+        """Проверить - ответы 503 повторяются до успешного."""
+        _UnavailableHandler.failures = 2
+        client = self.create_client(3)
+        response = client.get(self.url, endpoint='properties/list')
+        client.close()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_UnavailableHandler.requests, 3)
+
+    def test_retries_are_limited(self):
+        """Проверить - после повторов - последний ответ 503."""
+        _UnavailableHandler.failures = 10
+        client = self.create_client(2)
+        response = client.get(self.url, endpoint='properties/list')
+        client.close()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(_UnavailableHandler.requests, 3)
+
+    def test_deadline_limits_timeout(self):
+        """Проверить - запрос не ждет ответа дольше срока."""
+        _UnavailableHandler.delay = 0.5
+        client = self.create_client(3)
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            with deadline(0.2):
+                client.get(self.url, endpoint='properties/list')
+        client.close()
+        self.assertLess(time.monotonic() - started, 0.45)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from vtravel_bot_services import SearchHistory, SearchRecord
+
+
+def _record(chat_id: int, number: int,
+            created_at: float = None) -> SearchRecord:
+    if created_at is None:
+        created_at = 1792223400 + number / 10
+    return SearchRecord(chat_id=chat_id, command='/lowprice', city='Сочи',
+                        destination='Сочи, Краснодарский край, Россия',
+                        destination_id='10873622',
+                        hotels=('Hotel {0}'.format(number), 'Отель'),
+                        created_at=created_at)
+
+
+def _hotels(records):
+    return [record.hotels[0] for record in records]
+
+
+class TestSearchHistory(unittest.TestCase):
+    """
+    Проверить историю поиска отелей.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'data',
+                                 'history.sqlite3')
+        self.history = SearchHistory(path=self.path, flush_interval=60)
+
+    def tearDown(self):
+        self.history.close()
+        self.directory.cleanup()
+
+    def test_wal(self):
+        """Проверить - база в режиме WAL с индексом (chat_id, created_at)."""
+        connection = sqlite3.connect(self.path)
+        self.assertEqual(connection.execute(
+            'PRAGMA journal_mode').fetchone()[0], 'wal')
+        indexes = {row[1] for row in connection.execute(
+            'PRAGMA index_list(search_history)')}
+        self.assertIn('search_history_chat_id_created_at', indexes)
+        connection.close()
+
+    def test_record_does_not_wait_for_disk(self):
+        """Проверить - запись ставится в очередь, на диск - пачкой."""
+        self.history.record(_record(1, 0))
+        connection = sqlite3.connect(self.path)
+        count = 'SELECT COUNT(*) FROM search_history'
+        self.assertEqual(connection.execute(count).fetchone()[0], 0)
+        self.assertTrue(self.history.flush(timeout=5))
+        self.assertEqual(connection.execute(count).fetchone()[0], 1)
+        connection.close()
+
+    def test_page_does_not_wait_for_disk(self):
+        """Проверить - записи из очереди читаются без записи на диск."""
+        self.history.record(_record(1, 0))
+        records, next_page = self.history.page(1)
+        self.assertEqual(_hotels(records), ['Hotel 0'])
+        self.assertIsNone(next_page)
+        connection = sqlite3.connect(self.path)
+        self.assertEqual(connection.execute(
+            'SELECT COUNT(*) FROM search_history').fetchone()[0], 0)
+        connection.close()
+
+    def test_batch_size(self):
+        """Проверить - полная пачка записывается без ожидания."""
+        self.history.close()
+        self.history = SearchHistory(path=self.path, batch_size=2,
+                                     flush_interval=60)
+        self.history.record(_record(1, 0))
+        self.history.record(_record(1, 1))
+        connection = sqlite3.connect(self.path)
+        for _ in range(100):
+            count = connection.execute(
+                'SELECT COUNT(*) FROM search_history').fetchone()[0]
+            if count:
+                break
+            time.sleep(0.01)
+        self.assertEqual(count, 2)
+        connection.close()
+
+    def test_pages(self):
+        """Проверить - страницы истории чата, новые записи первыми."""
+        for number in range(7):
+            self.history.record(_record(1, number))
+        self.history.record(_record(2, 100))
+
+        records, next_page = self.history.page(1, page_size=3)
+        self.assertEqual(_hotels(records), ['Hotel 6', 'Hotel 5', 'Hotel 4'])
+        self.assertEqual(next_page,
+                         (records[-1].created_at, records[-1].record_id))
+        records, next_page = self.history.page(1, before=next_page,
+                                               page_size=3)
+        self.assertEqual(_hotels(records), ['Hotel 3', 'Hotel 2', 'Hotel 1'])
+        records, next_page = self.history.page(1, before=next_page,
+                                               page_size=3)
+        self.assertEqual(_hotels(records), ['Hotel 0'])
+        self.assertIsNone(next_page)
+
+    def test_pending_and_written(self):
+        """
+        Проверить - записи из очереди и с диска - на одних страницах
+        без повторов.
+        """
+        for number in range(4):
+            self.history.record(_record(1, number))
+        self.assertTrue(self.history.flush(timeout=5))
+        for number in range(4, 7):
+            self.history.record(_record(1, number))
+
+        pages = []
+        next_page = None
+        while True:
+            records, next_page = self.history.page(1, before=next_page,
+                                                   page_size=2)
+            pages.append(_hotels(records))
+            if next_page is None:
+                break
+        self.assertEqual(pages, [['Hotel 6', 'Hotel 5'],
+                                 ['Hotel 4', 'Hotel 3'],
+                                 ['Hotel 2', 'Hotel 1'], ['Hotel 0']])
+
+    def test_tied_timestamps(self):
+        """
+        Проверить - записи с одинаковым временем на границе страниц
+        не теряются и не повторяются.
+        """
+        for number in range(5):
+            self.history.record(_record(1, number, created_at=1792223400))
+        self.history.record(_record(1, 5))
+        self.assertTrue(self.history.flush(timeout=5))
+
+        hotels = []
+        next_page = None
+        while True:
+            records, next_page = self.history.page(1, before=next_page,
+                                                   page_size=2)
+            hotels.extend(_hotels(records))
+            if next_page is None:
+                break
+        self.assertEqual(hotels, ['Hotel 5', 'Hotel 4', 'Hotel 3',
+                                  'Hotel 2', 'Hotel 1', 'Hotel 0'])
+
+    def test_exact_page(self):
+        """Проверить - полная последняя страница - без следующей."""
+        for number in range(3):
+            self.history.record(_record(1, number))
+        records, next_page = self.history.page(1, page_size=3)
+        self.assertEqual(len(records), 3)
+        self.assertIsNone(next_page)
+
+    def test_empty(self):
+        """Проверить - пустая история."""
+        self.assertEqual(self.history.page(1), ([], None))
+
+    def test_persistent(self):
+        """
+        Проверить - очередь записывается при закрытии, id новых записей
+        продолжают записанные.
+        """
+        record = _record(1, 0)
+        self.history.record(record)
+        self.history.close()
+        self.history = SearchHistory(path=self.path)
+        self.assertEqual(self.history.page(1), ([record], None))
+        self.history.record(_record(1, 1))
+        records, _ = self.history.page(1)
+        self.assertEqual([record.record_id for record in records], [2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
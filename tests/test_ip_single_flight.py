@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+from vtravel_bot_parsers import (AsyncParseHotels, AsyncResponse,
+                                 AsyncSingleFlight, ParseHotels,
+                                 ResponseCache, SingleFlight)
+
+
+class _Response:
+    """Ответ API."""
+    ok = True
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class _SlowClient:
+    """Медленный HTTP-клиент, считающий запросы."""
+    def __init__(self, payload):
+        self.payload = payload
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def get(self, url, endpoint=None, params=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.05)
+        return _Response(self.payload)
+
+
+class _SlowAsyncClient:
+    """Медленный асинхронный HTTP-клиент, считающий запросы."""
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    async def get(self, url, endpoint=None, params=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return AsyncResponse(200, {}, self.payload)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Проверить объединение одинаковых одновременных запросов.
+    """
+    def test_concurrent_calls_share_result(self):
+        """Проверить - одновременные вызовы выполняются один раз."""
+        flights = SingleFlight()
+        calls = []
+        results = []
+        started = threading.Event()
+
+        def request():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return {'answer': 42}
+
+        def call():
+            results.append(flights.do('key', request))
+
+        threads = [threading.Thread(target=call) for _ in range(10)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'answer': 42}] * 10)
+        self.assertEqual(flights.stats, {'executed': 1, 'shared': 9,
+                                         'in_flight': 0})
+
+    def test_error_is_shared_and_not_kept(self):
+        """Проверить - ошибка передается ожидающим и не запоминается."""
+        flights = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def request():
+            started.set()
+            time.sleep(0.05)
+            raise ConnectionError('нет соединения')
+
+        def call():
+            try:
+                flights.do('key', request)
+            except ConnectionError as error_message:
+                errors.append(error_message)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(flights.do('key', lambda: 'ok'), 'ok')
+
+    def test_different_keys(self):
+        """Проверить - разные ключи не объединяются."""
+        flights = SingleFlight()
+        self.assertEqual(flights.do('a', lambda: 1), 1)
+        self.assertEqual(flights.do('b', lambda: 2), 2)
+        self.assertEqual(flights.stats['executed'], 2)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """
+    Проверить асинхронное объединение одинаковых запросов.
+    """
+    async def test_concurrent_calls_share_result(self):
+        """Проверить - одновременные корутины выполняются один раз."""
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def request():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        results = await asyncio.gather(
+            *(flights.do('key', request) for _ in range(10)))
+        self.assertEqual(results, ['result'] * 10)
+        self.assertEqual(len(calls), 1)
+
+    async def test_error_is_shared(self):
+        """Проверить - ошибка передается всем ожидающим."""
+        flights = AsyncSingleFlight()
+
+        async def request():
+            await asyncio.sleep(0.01)
+            raise ConnectionError('нет соединения')
+
+        results = await asyncio.gather(
+            *(flights.do('key', request) for _ in range(3)),
+            return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ConnectionError)
+                            for result in results))
+        self.assertEqual(flights.stats['in_flight'], 0)
+
+
+@mock.patch('vtravel_bot_parsers.parse_hotels.HEADERS_BOT', '{}')
+class TestParseHotelsSingleFlight(unittest.TestCase):
+    """
+    Проверить объединение запросов и кэширование пустых ответов парсера.
+    """
+    def test_concurrent_city_search(self):
+        """Проверить - одновременный поиск города - один запрос к API."""
+        client = _SlowClient(
+            {'suggestions': [{'entities': [{'name': 'Сочи'}]}]})
+        parser = ParseHotels(client=client, cache=ResponseCache(),
+                             flights=SingleFlight())
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(
+                parser.get_search_results_by_city('Сочи')))
+            for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(len(results), 20)
+
+    def test_empty_result_is_cached_briefly(self):
+        """Проверить - пустой ответ кэшируется на CACHE_TTL_NEGATIVE."""
+        client = _SlowClient({'suggestions': [{'entities': []}]})
+        parser = ParseHotels(client=client, cache=ResponseCache(),
+                             flights=SingleFlight())
+        with mock.patch(
+                'vtravel_bot_parsers.parse_hotels.CACHE_TTL_NEGATIVE', 0.05):
+            parser.get_search_results_by_city('Абырвалг')
+            parser.get_search_results_by_city('абырвалг')
+            self.assertEqual(client.calls, 1)
+            time.sleep(0.06)
+            parser.get_search_results_by_city('Абырвалг')
+        self.assertEqual(client.calls, 2)
+
+
+@mock.patch('vtravel_bot_parsers.async_parse_hotels.HEADERS_BOT', '{}')
+class TestAsyncParseHotelsSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """
+    Проверить объединение запросов асинхронного парсера.
+    """
+    async def test_concurrent_list_of_hotels(self):
+        """Проверить - одинаковые запросы списка отелей - один запрос."""
+        client = _SlowAsyncClient(
+            b'{"data": {"body": {"searchResults": {"results": [{"id": 1}]}}}}')
+        parser = AsyncParseHotels(client=client, cache=ResponseCache(),
+                                  flights=AsyncSingleFlight())
+        results = await asyncio.gather(
+            *(parser.get_list_of_hotels_with_parameters('123', 'PRICE')
+              for _ in range(20)))
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(len(set(map(str, results))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
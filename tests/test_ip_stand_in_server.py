@@ -0,0 +1,154 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.stand_in_server import FaultProfile, StandInServer
+from vtravel_bot_parsers import (AsyncHTTPClient, AsyncParseHotels,
+                                 AsyncSingleFlight, CircuitBreaker,
+                                 HTTPClient, ParseHotels, RateLimiter,
+                                 ResponseCache, RetryPolicy, SingleFlight,
+                                 TextTranslator, TranslationMemory)
+
+
+@mock.patch('vtravel_bot_parsers.parse_hotels.HEADERS_BOT', '{}')
+@mock.patch('vtravel_bot_parsers.text_translator.HEADERS_TRANSLATOR', '{}')
+class TestStandInServer(unittest.TestCase):
+    """
+    Проверить парсер отелей и переводчик на локальной замене API.
+    """
+    def setUp(self):
+        self.server = StandInServer(seed=13).start()
+        self.client = HTTPClient(rate_limiter=RateLimiter())
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def create_parser(self):
+        return ParseHotels(client=self.client, cache=ResponseCache(),
+                           flights=SingleFlight(), base_url=self.server.url)
+
+    def test_city_search(self):
+        """Проверить - поиск города возвращает записанный ответ."""
+        response_json = self.create_parser().get_search_results_by_city(
+            'Sochi')
+        destinations = response_json['suggestions'][0]['entities']
+        self.assertEqual(destinations[0]['destinationId'], '10873622')
+
+    def test_unknown_city(self):
+        """Проверить - неизвестный город - пустой результат поиска."""
+        response_json = self.create_parser().get_search_results_by_city(
+            'Atlantis')
+        self.assertEqual(response_json['suggestions'][0]['entities'], [])
+
+    def test_hotels_are_sorted_and_paginated(self):
+        """Проверить - отели по возрастанию цены, все страницы."""
+        hotels = list(self.create_parser().iterate_hotels('10873622',
+                                                          'PRICE'))
+        prices = [hotel['ratePlan']['price']['exactCurrent']
+                  for hotel in hotels]
+        self.assertEqual(len(hotels), 60)
+        self.assertEqual(prices, sorted(prices))
+        self.assertEqual(self.server.stats['requests']['properties/list'], 3)
+
+    def test_price_filter(self):
+        """Проверить - фильтр priceMin/priceMax."""
+        hotels = list(self.create_parser().iterate_hotels(
+            '10873622', 'PRICE', price_min='5000', price_max='10000'))
+        self.assertTrue(hotels)
+        self.assertTrue(all(
+            5000 <= hotel['ratePlan']['price']['exactCurrent'] <= 10000
+            for hotel in hotels))
+
+    def test_hotel_photo(self):
+        """Проверить - фото отеля."""
+        photos = self.create_parser().get_hotel_photo('1505932768', 3)
+        self.assertEqual(len(photos), 3)
+        self.assertIn('{size}', photos[0]['baseUrl'])
+
+    def test_translate(self):
+        """Проверить - перевод записанного текста."""
+        translator = TextTranslator(client=self.client,
+                                    memory=TranslationMemory(':memory:'),
+                                    base_url=self.server.url)
+        self.assertEqual(translator.translate('Сочи'), 'Sochi')
+        self.assertTrue(translator.supported_languages()['languages'])
+
+    def test_translate_many(self):
+        """Проверить - перевод нескольких текстов пакетами."""
+        translator = TextTranslator(client=self.client,
+                                    memory=TranslationMemory(':memory:'),
+                                    base_url=self.server.url)
+        self.assertEqual(
+            translator.translate_many(['Москва', 'Адлер', 'Казань']),
+            ['Moscow', 'Adler', 'Kazan'])
+        self.assertEqual(self.server.stats['requests'], {'translate/v2': 1})
+
+    def test_latency(self):
+        """Проверить - задержка ответа."""
+        self.server.stop()
+        self.server = StandInServer(
+            profile=FaultProfile(latency=0.05)).start()
+        started = time.monotonic()
+        self.create_parser().get_search_results_by_city('Sochi')
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    def test_429_is_retried(self):
+        """Проверить - после 429 клиент повторяет запрос."""
+        self.server.stop()
+        self.server = StandInServer(endpoint_profiles={
+            'properties/get-hotel-photos': FaultProfile(
+                throttle_rate=0.5, retry_after=0.01)}, seed=1).start()
+        parser = self.create_parser()
+        for hotel_id in range(10):
+            self.assertTrue(parser.get_hotel_photo(str(hotel_id), 1))
+        statuses = self.server.stats['statuses']
+        self.assertEqual(statuses[200], 10)
+        self.assertGreater(statuses[429], 0)
+
+    def test_server_errors(self):
+        """Проверить - ответы 500 с заданной долей повторяются."""
+        self.server.stop()
+        self.server = StandInServer(
+            profile=FaultProfile(error_rate=1)).start()
+        self.client.close()
+        self.client = HTTPClient(
+            rate_limiter=RateLimiter(), circuit_breaker=CircuitBreaker(),
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0))
+        with self.assertRaises(ValueError):
+            self.create_parser().get_hotel_photo('1505932768', 1)
+        self.assertEqual(self.server.stats['statuses'], {500: 3})
+
+    def test_incorrect_profile(self):
+        """Проверить - доля ошибок от 0 до 1."""
+        with self.assertRaises(ValueError):
+            FaultProfile(error_rate=2)
+
+
+@mock.patch('vtravel_bot_parsers.async_parse_hotels.HEADERS_BOT', '{}')
+class TestAsyncStandInServer(unittest.IsolatedAsyncioTestCase):
+    """
+    Проверить асинхронный парсер отелей на локальной замене API.
+    """
+    async def test_iterate_hotels(self):
+        """Проверить - перебор отелей по страницам до limit."""
+        with StandInServer() as server:
+            client = AsyncHTTPClient(rate_limiter=RateLimiter())
+            parser = AsyncParseHotels(client=client, cache=ResponseCache(),
+                                      flights=AsyncSingleFlight(),
+                                      base_url=server.url)
+            try:
+                hotels = [hotel async for hotel in parser.iterate_hotels(
+                    '10873622', 'PRICE_HIGHEST_FIRST', limit=30)]
+            finally:
+                await client.close()
+                await asyncio.sleep(0)
+        prices = [hotel['ratePlan']['price']['exactCurrent']
+                  for hotel in hotels]
+        self.assertEqual(len(hotels), 30)
+        self.assertEqual(prices, sorted(prices, reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
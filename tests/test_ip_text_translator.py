@@ -1,10 +1,56 @@
 import unittest
 import json
+import threading
 import time
+from unittest import mock
 
 import requests
 
 from config_bot import HEADERS_TRANSLATOR
+from vtravel_bot_parsers import (AsyncResponse, AsyncTextTranslator,
+                                 TextTranslator, TranslationMemory)
+from vtravel_bot_parsers.text_translator import split_into_batches
+
+
+def _translations_json(payload):
+    """Ответ API перевода: перевод - текст в верхнем регистре."""
+    texts = json.loads(payload)['q']
+    if not isinstance(texts, list):
+        return {'data': {'translations': {'translatedText': texts.upper()}}}
+    return {'data': {'translations': [{'translatedText': text.upper()}
+                                      for text in texts]}}
+
+
+class _FakeResponse:
+    """Ответ API перевода."""
+    def __init__(self, response_json):
+        self.response_json = response_json
+
+    def json(self):
+        return self.response_json
+
+
+class _BatchClient:
+    """HTTP-клиент, записывающий тексты запросов к API перевода."""
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def post(self, url, endpoint=None, data=None, **kwargs):
+        with self.lock:
+            self.batches.append(json.loads(data)['q'])
+        return _FakeResponse(_translations_json(data))
+
+
+class _AsyncBatchClient:
+    """Асинхронный HTTP-клиент, записывающий тексты запросов."""
+    def __init__(self):
+        self.batches = []
+
+    async def post(self, url, endpoint=None, data=None, **kwargs):
+        self.batches.append(json.loads(data)['q'])
+        return AsyncResponse(200, {}, json.dumps(
+            _translations_json(data)).encode())
 
 
 @unittest.skip('Пропуск тестов, которые затрагивают реальный API-Translator.')
@@ -49,5 +95,98 @@ class TestTextTranslator(unittest.TestCase):
         self.assertTrue(translated_text)
 
 
+class TestSplitIntoBatches(unittest.TestCase):
+    """
+    Проверить разбиение текстов на пакеты перевода.
+    """
+    def test_max_chars(self):
+        """Проверить - длина текстов пакета ограничена."""
+        self.assertEqual(
+            split_into_batches(['aaa', 'bb', 'cccc', 'd'], max_chars=5),
+            [['aaa', 'bb'], ['cccc', 'd']])
+
+    def test_long_text(self):
+        """Проверить - текст длиннее ограничения - отдельный пакет."""
+        self.assertEqual(
+            split_into_batches(['a', 'bbbbbbb', 'c'], max_chars=5),
+            [['a'], ['bbbbbbb'], ['c']])
+
+    def test_max_texts(self):
+        """Проверить - количество текстов пакета ограничено."""
+        self.assertEqual(
+            split_into_batches(list('abcde'), max_texts=2),
+            [['a', 'b'], ['c', 'd'], ['e']])
+        self.assertEqual(split_into_batches([]), [])
+
+
+@mock.patch('vtravel_bot_parsers.text_translator.HEADERS_TRANSLATOR', '{}')
+class TestTranslateMany(unittest.TestCase):
+    """
+    Проверить перевод нескольких текстов пакетами.
+    """
+    def test_order_and_duplicates(self):
+        """Проверить - порядок текстов, повторы переводятся один раз."""
+        client = _BatchClient()
+        translator = TextTranslator(client=client,
+                                    memory=TranslationMemory(':memory:'))
+        self.assertEqual(
+            translator.translate_many(['Сочи', 'Адлер', 'СОЧИ ', 'Сочи']),
+            ['СОЧИ', 'АДЛЕР', 'СОЧИ', 'СОЧИ'])
+        self.assertEqual(client.batches, [['Сочи', 'Адлер']])
+
+    def test_memory_first(self):
+        """Проверить - переводы из памяти без запроса к API."""
+        client = _BatchClient()
+        memory = TranslationMemory(':memory:')
+        memory.put('ru', 'en', 'Сочи', 'Sochi')
+        translator = TextTranslator(client=client, memory=memory)
+        self.assertEqual(translator.translate_many(['Сочи', 'Адлер']),
+                         ['Sochi', 'АДЛЕР'])
+        self.assertEqual(client.batches, ['Адлер'])
+        self.assertEqual(translator.translate_many(['Адлер', 'Сочи']),
+                         ['АДЛЕР', 'Sochi'])
+        self.assertEqual(len(client.batches), 1)
+
+    def test_batches(self):
+        """Проверить - длинные тексты - несколько пакетов."""
+        client = _BatchClient()
+        translator = TextTranslator(client=client,
+                                    memory=TranslationMemory(':memory:'))
+        texts = [str(number) * 2000 for number in range(5)]
+        self.assertEqual(translator.translate_many(texts, max_workers=3),
+                         [text.upper() for text in texts])
+        self.assertEqual(sorted(map(str, client.batches)), sorted(
+            map(str, [texts[:2], texts[2:4], texts[4]])))
+
+    def test_wrong_number_of_translations(self):
+        """Проверить - переводов меньше текстов - ValueError."""
+        client = _BatchClient()
+        client.post = lambda url, **kwargs: _FakeResponse(
+            {'data': {'translations': [{'translatedText': 'A'}]}})
+        translator = TextTranslator(client=client,
+                                    memory=TranslationMemory(':memory:'))
+        with self.assertRaises(ValueError):
+            translator.translate_many(['а', 'б'])
+
+
+@mock.patch('vtravel_bot_parsers.async_text_translator.HEADERS_TRANSLATOR',
+            '{}')
+class TestAsyncTranslateMany(unittest.IsolatedAsyncioTestCase):
+    """
+    Проверить асинхронный перевод нескольких текстов пакетами.
+    """
+    async def test_order_and_duplicates(self):
+        """Проверить - порядок текстов, повторы переводятся один раз."""
+        client = _AsyncBatchClient()
+        translator = AsyncTextTranslator(
+            client=client, memory=TranslationMemory(':memory:'))
+        self.assertEqual(
+            await translator.translate_many(['Сочи', 'Адлер', 'сочи']),
+            ['СОЧИ', 'АДЛЕР', 'СОЧИ'])
+        self.assertEqual(client.batches, [['Сочи', 'Адлер']])
+        self.assertEqual(await translator.translate('Адлер'), 'АДЛЕР')
+        self.assertEqual(len(client.batches), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from vtravel_bot_parsers import (Tracer, current_trace_id, propagate_context,
+                                 traced)
+
+
+class TestTracer(unittest.TestCase):
+    """
+    Проверить трассировку шагов диалога.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'traces.jsonl')
+        self.tracer = Tracer(export_path=self.path, max_traces=2)
+
+    def tearDown(self):
+        self.tracer.close()
+        self.directory.cleanup()
+
+    def read_traces(self):
+        self.assertTrue(self.tracer.flush(timeout=5))
+        with open(self.path, encoding='utf-8') as export_file:
+            return [json.loads(line) for line in export_file]
+
+    def test_nested_spans(self):
+        """Проверить - вложенные вызовы - дочерние интервалы трассы."""
+        @traced(tracer=self.tracer)
+        def city_search():
+            return current_trace_id()
+
+        trace_id = self.tracer.new_trace_id()
+        with self.tracer.span('receive_city', trace_id=trace_id,
+                              step='city'):
+            self.assertEqual(city_search(), trace_id)
+
+        spans = {span['name']: span
+                 for span in self.tracer.export(trace_id)['spans']}
+        self.assertIsNone(spans['receive_city']['parent_id'])
+        self.assertEqual(spans['receive_city']['attributes'],
+                         {'step': 'city'})
+        self.assertEqual(spans[city_search.__qualname__]['parent_id'],
+                         spans['receive_city']['span_id'])
+
+    def test_outside_trace(self):
+        """Проверить - вне трассы интервалы не записываются."""
+        @traced(tracer=self.tracer)
+        def translate(text):
+            return text
+
+        self.assertEqual(translate('Сочи'), 'Сочи')
+        with self.tracer.span('help') as span:
+            self.assertIsNone(span)
+        self.assertEqual(len(self.tracer), 0)
+
+    def test_steps_share_trace(self):
+        """Проверить - шаги диалога в разных обновлениях - одна трасса."""
+        trace_id = self.tracer.new_trace_id()
+        for step in ('ask_city', 'receive_city', 'hotel_search'):
+            with self.tracer.span(step, trace_id=trace_id):
+                pass
+        self.assertEqual(
+            [span['name'] for span in self.tracer.export(trace_id)['spans']],
+            ['ask_city', 'receive_city', 'hotel_search'])
+
+    def test_finish_inside_root_span(self):
+        """Проверить - трасса записывается после корневого интервала."""
+        trace_id = self.tracer.new_trace_id()
+        with self.tracer.span('get_number_of_photos_from_user',
+                              trace_id=trace_id):
+            with self.tracer.span('get_selection_of_hotels'):
+                self.tracer.finish(trace_id)
+            self.assertFalse(os.path.exists(self.path))
+
+        trace, = self.read_traces()
+        self.assertEqual(trace['conversation_id'], trace_id)
+        self.assertTrue(trace['complete'])
+        self.assertEqual(len(trace['spans']), 2)
+        self.assertIsNone(self.tracer.export(trace_id))
+
+    def test_export_in_background(self):
+        """Проверить - файл трасс пишет фоновый поток, а не обработчик."""
+        writers = []
+
+        def recording_open(*args, **kwargs):
+            writers.append(threading.current_thread().name)
+            return open(*args, **kwargs)
+
+        trace_id = self.tracer.new_trace_id()
+        with mock.patch('vtravel_bot_parsers.tracing.open', recording_open,
+                        create=True):
+            with self.tracer.span('get_selection_of_hotels',
+                                  trace_id=trace_id):
+                self.tracer.finish(trace_id)
+            self.assertTrue(self.tracer.flush(timeout=5))
+        self.assertEqual(writers, ['trace-writer'])
+        self.assertEqual(len(self.read_traces()), 1)
+
+    def test_error_is_recorded(self):
+        """Проверить - исключение записывается в интервал."""
+        trace_id = self.tracer.new_trace_id()
+        with self.assertRaises(ConnectionError):
+            with self.tracer.span('city_search', trace_id=trace_id):
+                raise ConnectionError
+        span, = self.tracer.export(trace_id)['spans']
+        self.assertEqual(span['error'], 'ConnectionError')
+
+    def test_oldest_trace_is_evicted(self):
+        """Проверить - лишняя трасса записывается как незавершенная."""
+        trace_ids = [self.tracer.new_trace_id() for _ in range(3)]
+        for trace_id in trace_ids:
+            with self.tracer.span('ask_city', trace_id=trace_id):
+                pass
+        trace, = self.read_traces()
+        self.assertEqual(trace['conversation_id'], trace_ids[0])
+        self.assertFalse(trace['complete'])
+        self.assertEqual(len(self.tracer), 2)
+
+    def test_thread_pool(self):
+        """Проверить - трасса передается в пул потоков."""
+        @traced(tracer=self.tracer)
+        def get_hotel_photo(hotel_id):
+            return current_trace_id()
+
+        trace_id = self.tracer.new_trace_id()
+        with self.tracer.span('send_information', trace_id=trace_id):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                trace_ids = list(executor.map(
+                    propagate_context(get_hotel_photo), range(4)))
+        self.assertEqual(trace_ids, [trace_id] * 4)
+        self.assertEqual(len(self.tracer.export(trace_id)['spans']), 5)
+
+    def test_coroutine(self):
+        """Проверить - трасса сохраняется в корутинах и задачах."""
+        @traced(tracer=self.tracer)
+        async def get_hotel_photo(hotel_id):
+            await asyncio.sleep(0)
+            return current_trace_id()
+
+        trace_id = self.tracer.new_trace_id()
+
+        async def send_information():
+            with self.tracer.span('send_information', trace_id=trace_id):
+                return await asyncio.gather(
+                    *(get_hotel_photo(hotel_id) for hotel_id in range(3)))
+
+        self.assertEqual(asyncio.run(send_information()), [trace_id] * 3)
+        spans = self.tracer.export(trace_id)['spans']
+        self.assertEqual(len(spans), 4)
+        self.assertEqual({span['parent_id'] for span in spans[1:]},
+                         {spans[0]['span_id']})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from vtravel_bot_parsers import TextTranslator, TranslationMemory
+
+
+class _FakeResponse:
+    """Ответ API перевода."""
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return {'data': {'translations': {'translatedText': self.text}}}
+
+
+class _FakeClient:
+    """HTTP-клиент, считающий запросы к API перевода."""
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, url, endpoint=None, **kwargs):
+        self.calls += 1
+        return _FakeResponse('Sochi')
+
+
+class TestTranslationMemory(unittest.TestCase):
+    """
+    Проверить память переводов на диске.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'translations.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_translation_survives_restart(self):
+        """Проверить - перевод доступен после повторного открытия базы."""
+        memory = TranslationMemory(self.path)
+        memory.put('ru', 'en', 'Москва', 'Moscow')
+        memory.close()
+
+        memory = TranslationMemory(self.path)
+        self.assertEqual(memory.get('ru', 'en', '  москва '), 'Moscow')
+        self.assertIsNone(memory.get('ru', 'de', 'Москва'))
+        memory.close()
+
+    @mock.patch('vtravel_bot_parsers.text_translator.HEADERS_TRANSLATOR', '{}')
+    def test_translator_consults_memory_first(self):
+        """Проверить - повторный перевод не обращается к API."""
+        client = _FakeClient()
+        memory = TranslationMemory(self.path)
+        translator = TextTranslator(client=client, memory=memory)
+        self.assertEqual(translator.translate('Сочи'), 'Sochi')
+        self.assertEqual(translator.translate('СОЧИ'), 'Sochi')
+        self.assertEqual(client.calls, 1)
+        memory.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
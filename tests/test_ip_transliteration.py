@@ -0,0 +1,48 @@
+import unittest
+
+from vtravel_bot_parsers import has_cyrillic, transliterate
+
+
+class TestTransliteration(unittest.TestCase):
+    """
+    Проверить транслитерацию названий городов.
+    """
+    def test_transliterate(self):
+        """Проверить - транслитерация по таблице."""
+        self.assertEqual(transliterate('Сочи'), 'Sochi')
+        self.assertEqual(transliterate('Казань'), 'Kazan')
+        self.assertEqual(transliterate('Ярославль'), 'Yaroslavl')
+        self.assertEqual(transliterate('Хабаровск'), 'Khabarovsk')
+        self.assertEqual(transliterate('Череповец'), 'Cherepovets')
+        self.assertEqual(transliterate('Щёлково'), 'Shchyolkovo')
+
+    def test_keep_separators_and_case(self):
+        """Проверить - дефисы, пробелы и регистр сохраняются."""
+        self.assertEqual(transliterate('Старый  Оскол'), 'Staryy Oskol')
+        self.assertEqual(transliterate('Комсомольск-на-Амуре'),
+                         'Komsomolsk-na-Amure')
+        self.assertEqual(transliterate('УФА'), 'UFA')
+        self.assertEqual(transliterate('ЧИТА'), 'CHITA')
+
+    def test_exceptions(self):
+        """Проверить - известные города - принятые названия."""
+        self.assertEqual(transliterate('москва'), 'Moscow')
+        self.assertEqual(transliterate('Санкт-Петербург'), 'Saint Petersburg')
+        self.assertEqual(transliterate('Ростов на Дону'), 'Rostov-on-Don')
+        self.assertEqual(transliterate('Нью-Йорк'), 'New York')
+        self.assertEqual(transliterate('Париж'), 'Paris')
+
+    def test_latin_is_unchanged(self):
+        """Проверить - латиница не меняется."""
+        self.assertEqual(transliterate('New York'), 'New York')
+
+    def test_has_cyrillic(self):
+        """Проверить - пробелы, дефисы и цифры - не кириллица."""
+        self.assertTrue(has_cyrillic('Сочи'))
+        self.assertTrue(has_cyrillic('Ёлкино'))
+        self.assertFalse(has_cyrillic('Rostov-on-Don'))
+        self.assertFalse(has_cyrillic('New York 2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
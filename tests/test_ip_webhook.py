@@ -0,0 +1,110 @@
+import threading
+import unittest
+
+import requests
+
+from vtravel_bot_services import WebhookServer, check_webhook_settings
+from vtravel_bot_services.webhook import (MAX_UPDATE_BYTES,
+                                         SECRET_TOKEN_HEADER, get_chat_id)
+
+
+def _message_update(update_id, chat_id, text):
+    """Составить обновление Telegram с текстовым сообщением."""
+    return {'update_id': update_id,
+            'message': {'message_id': update_id, 'date': 0, 'text': text,
+                        'chat': {'id': chat_id, 'type': 'private'},
+                        'from': {'id': chat_id, 'is_bot': False,
+                                 'first_name': 'user'}}}
+
+
+class TestWebhookServer(unittest.TestCase):
+    """
+    Проверить прием обновлений через webhook.
+    """
+    def setUp(self):
+        self.processed = []
+        self.all_processed = threading.Event()
+        self.server = WebhookServer(process_update=self.process_update,
+                                    host='127.0.0.1', port=0,
+                                    path='/telegram-webhook',
+                                    secret_token='secret', workers=3,
+                                    queue_size=30)
+        self.server.start()
+        self.url = 'http://127.0.0.1:{0}/telegram-webhook'.format(
+            self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.stop()
+
+    def process_update(self, update):
+        self.processed.append((update.message.chat.id, update.message.text))
+        if len(self.processed) == 10:
+            self.all_processed.set()
+
+    def test_updates_of_chat_are_processed_in_order(self):
+        """Проверить - обновления одного чата обрабатываются по порядку."""
+        for number in range(10):
+            response = requests.post(
+                self.url, json=_message_update(number, 1 + number % 2,
+                                               str(number)),
+                headers={SECRET_TOKEN_HEADER: 'secret'})
+            self.assertEqual(response.status_code, 200)
+
+        self.assertTrue(self.all_processed.wait(timeout=5))
+        for chat_id in (1, 2):
+            texts = [int(text) for chat, text in self.processed
+                     if chat == chat_id]
+            self.assertEqual(texts, sorted(texts))
+
+    def test_wrong_secret_token(self):
+        """Проверить - обновление с неверным токеном отклоняется."""
+        response = requests.post(self.url, json=_message_update(1, 1, 'hi'),
+                                 headers={SECRET_TOKEN_HEADER: 'wrong'})
+        self.assertEqual(response.status_code, 403)
+        response = requests.post(self.url, json=_message_update(1, 1, 'hi'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_secret_token_is_required(self):
+        """Проверить - без секретного токена webhook не запускается."""
+        with self.assertRaises(ValueError):
+            WebhookServer(process_update=self.process_update,
+                          host='127.0.0.1', port=0, path='/telegram-webhook',
+                          secret_token=None)
+        for url, secret_token in ((None, 'secret'),
+                                  ('https://example.com', None),
+                                  ('https://example.com', '')):
+            with self.assertRaises(ValueError):
+                check_webhook_settings(url, secret_token)
+        check_webhook_settings('https://example.com', 'secret')
+
+    def test_body_is_not_read_before_checks(self):
+        """Проверить - путь, токен и размер проверяются до чтения тела."""
+        headers = {'Content-Length': str(MAX_UPDATE_BYTES * 100)}
+        for url, token, status in ((self.url + '-other', 'secret', 404),
+                                   (self.url, 'wrong', 403),
+                                   (self.url, 'secret', 413)):
+            headers[SECRET_TOKEN_HEADER] = token
+            # тело не отправляется: сервер отвечает, не дожидаясь его
+            response = requests.post(url, headers=headers, timeout=5)
+            self.assertEqual(response.status_code, status)
+
+    def test_malformed_update(self):
+        """Проверить - некорректное обновление отклоняется (400)."""
+        for update in ([1, 2], {'update_id': 'x', 'message': 'hi'}):
+            response = requests.post(self.url, json=update,
+                                     headers={SECRET_TOKEN_HEADER: 'secret'},
+                                     timeout=5)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.server.queue_depth, 0)
+
+    def test_get_chat_id(self):
+        """Проверить - id чата из сообщения и нажатия кнопки."""
+        self.assertEqual(get_chat_id(_message_update(1, 42, 'hi')), 42)
+        callback = {'update_id': 2,
+                    'callback_query': {'id': '1', 'from': {'id': 7},
+                                       'message': {'chat': {'id': 42}}}}
+        self.assertEqual(get_chat_id(callback), 42)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,24 @@
-from .parse_hotels import ParseHotels
+from .hotel_summary import HotelSummary
+from .parse_hotels import (ParseHotels, has_search_suggestions,
+                           MAX_PAGE_SIZE)
 from .text_translator import TextTranslator
+from .transliteration import has_cyrillic, transliterate
+from .http_client import HTTPClient, get_http_client
+from .metrics import MetricsRegistry, get_metrics_registry, timed
+from .rate_limiter import RateLimiter, TokenBucket, get_api_rate_limiter
+from .circuit_breaker import (CircuitBreaker, CircuitOpenError,
+                              get_circuit_breaker)
+from .deadline import DeadlineExceeded, deadline
+from .retry_policy import RetryPolicy, get_retry_policy
+from .response_cache import (ResponseCache, get_response_cache, is_stale,
+                             mark_stale)
+from .single_flight import (SingleFlight, AsyncSingleFlight,
+                            get_single_flight, get_async_single_flight)
+from .tracing import (Tracer, current_trace_id, get_tracer,
+                      propagate_context, traced)
+from .translation_memory import TranslationMemory, get_translation_memory
+from .gazetteer import Gazetteer, get_gazetteer
+from .async_http_client import (AsyncHTTPClient, AsyncResponse,
+                                get_async_http_client)
+from .async_parse_hotels import AsyncParseHotels
+from .async_text_translator import AsyncTextTranslator
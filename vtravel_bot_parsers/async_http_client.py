@@ -0,0 +1,268 @@
+"""
+Асинхронный HTTP-клиент для запросов к API (aiohttp).
+
+Один пул keep-alive соединений на событийный цикл. Таймауты
+эндпоинтов общие с синхронным HTTPClient.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config_bot import HTTP_POOL_SIZE
+from .http_client import (DEFAULT_TIMEOUT, ENDPOINT_TIMEOUTS, Timeout,
+                          limit_timeout)
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .deadline import check_deadline
+from .metrics import HTTP_REQUEST_DURATION
+from .rate_limiter import RateLimiter, get_api_rate_limiter
+from .retry_policy import RetryPolicy, get_retry_policy
+
+
+# ошибки соединения, после которых запрос повторяется
+ASYNC_RETRY_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+class AsyncResponse:
+    """
+    Прочитанный ответ API.
+    Повторяет используемую часть интерфейса requests.Response.
+    """
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code: int, headers: Mapping[str, str],
+                 content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        """Успешный ли ответ (код меньше 400)."""
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        """Разобрать тело ответа как JSON."""
+        return json.loads(self.content)
+
+
+class AsyncHTTPClient:
+    """
+    Асинхронный HTTP-клиент с пулом keep-alive соединений.
+
+    Методы:
+        - get: Выполнить GET-запрос.
+        - post: Выполнить POST-запрос.
+        - timeout_for: Получить таймаут для эндпоинта.
+        - set_timeout: Установить таймаут для эндпоинта.
+        - close: Закрыть все соединения пула.
+    """
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE,
+                 endpoint_timeouts: Dict[str, Timeout] = None,
+                 default_timeout: Timeout = DEFAULT_TIMEOUT,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None):
+        """
+        Args:
+            pool_size (int): Количество соединений, удерживаемых
+                в пуле для одного хоста.
+            endpoint_timeouts (Dict[str, Timeout]) = None: Таймауты
+                по эндпоинтам, дополняют ENDPOINT_TIMEOUTS.
+            default_timeout (Timeout): Таймаут для неизвестных эндпоинтов.
+            rate_limiter (RateLimiter) = None: Лимит частоты запросов
+                (ключ - хост). По умолчанию - общий лимит запросов к API,
+                общий с синхронным HTTPClient.
+            retry_policy (RetryPolicy) = None: Политика повторов
+                запроса. По умолчанию - общая для процесса.
+            circuit_breaker (CircuitBreaker) = None: Выключатели
+                эндпоинтов. По умолчанию - общие для процесса.
+        """
+        if pool_size < 1:
+            raise ValueError('Размер пула соединений должен быть больше 0.')
+
+        self.__pool_size = pool_size
+        self.__rate_limiter = rate_limiter if rate_limiter is not None \
+            else get_api_rate_limiter()
+        self.__retry_policy = retry_policy if retry_policy is not None \
+            else get_retry_policy()
+        self.__circuit_breaker = circuit_breaker \
+            if circuit_breaker is not None else get_circuit_breaker()
+        self.__default_timeout = default_timeout
+        self.__timeouts = dict(ENDPOINT_TIMEOUTS)
+        if endpoint_timeouts:
+            self.__timeouts.update(endpoint_timeouts)
+        self.__session: Optional[aiohttp.ClientSession] = None
+
+    async def get(self, url: str, endpoint: str = None,
+                  **kwargs) -> AsyncResponse:
+        """
+        Выполнить GET-запрос.
+
+        Args:
+            url (str): Адрес запроса.
+            endpoint (str) = None: Имя эндпоинта для выбора таймаута.
+            **kwargs: Параметры aiohttp (headers, params, timeout ...).
+        """
+        return await self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    async def post(self, url: str, endpoint: str = None,
+                   **kwargs) -> AsyncResponse:
+        """
+        Выполнить POST-запрос.
+
+        Args:
+            url (str): Адрес запроса.
+            endpoint (str) = None: Имя эндпоинта для выбора таймаута.
+            **kwargs: Параметры aiohttp (headers, data, timeout ...).
+        """
+        return await self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    async def request(self, method: str, url: str, endpoint: str = None,
+                      **kwargs) -> AsyncResponse:
+        """
+        Выполнить запрос через общий пул соединений и прочитать ответ.
+
+        Если timeout не передан явно - используется таймаут эндпоинта.
+        Общее время запроса ограничено временем, оставшимся до срока
+        запроса пользователя (deadline).
+        Запрос ждет своей очереди в лимите частоты запросов к хосту.
+        Ответы 429, 5xx и ошибки соединения повторяются по политике
+        повторов (RetryPolicy); после 429 запросы к хосту
+        приостанавливаются на паузу перед повтором.
+        Результат запроса к эндпоинту записывается в его выключатель
+        (CircuitBreaker); пока выключатель разомкнут, запрос
+        не выполняется.
+
+        Args:
+            method (str): HTTP-метод.
+            url (str): Адрес запроса.
+            endpoint (str) = None: Имя эндпоинта для выбора таймаута.
+
+        Raises:
+            CircuitOpenError: Если выключатель эндпоинта разомкнут.
+            DeadlineExceeded: Если срок запроса пользователя истек.
+            aiohttp.ClientError, asyncio.TimeoutError: Если не удалось
+                выполнить запрос.
+        """
+        timeout = kwargs.pop('timeout', None) or self.timeout_for(endpoint)
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if endpoint is not None:
+                self.__circuit_breaker.check(endpoint)
+            await self.__rate_limiter.acquire_async(host)
+            kwargs['timeout'] = self.__client_timeout(timeout,
+                                                      check_deadline())
+            started = time.perf_counter()
+            status = 'error'
+            error: Optional[Exception] = None
+            try:
+                async with self.__get_session().request(
+                        method, url, **kwargs) as response:
+                    content = await response.read()
+                    result = AsyncResponse(response.status, response.headers,
+                                           content)
+                status = str(result.status_code)
+            except ASYNC_RETRY_ERRORS as request_error:
+                error = request_error
+            finally:
+                duration = time.perf_counter() - started
+                HTTP_REQUEST_DURATION.observe(duration, endpoint or 'other',
+                                              status)
+                # 429 - лимит частоты, а не отказ API
+                if endpoint is not None and status != '429':
+                    self.__circuit_breaker.record(
+                        endpoint, status.isdigit() and int(status) < 500,
+                        duration)
+
+            if error is None and not self.__retry_policy.should_retry(
+                    result.status_code):
+                return result
+            delay = self.__retry_policy.next_delay(
+                attempt, None if error is not None
+                else result.headers.get('Retry-After'))
+            if delay is None:
+                if error is not None:
+                    # таймаут, сокращенный до срока, - DeadlineExceeded
+                    check_deadline()
+                    raise error
+                return result
+
+            if status == '429':
+                self.__rate_limiter.pause(delay, host)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    def timeout_for(self, endpoint: Optional[str]) -> Timeout:
+        """
+        Получить таймаут для эндпоинта.
+
+        Args:
+            endpoint (Optional[str]): Имя эндпоинта.
+        """
+        return self.__timeouts.get(endpoint, self.__default_timeout)
+
+    def set_timeout(self, endpoint: str, timeout: Timeout) -> None:
+        """
+        Установить таймаут для эндпоинта.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            timeout (Timeout): Таймаут в секундах или пара
+                (таймаут соединения, таймаут чтения).
+        """
+        self.__timeouts[endpoint] = timeout
+
+    @property
+    def pool_size(self) -> int:
+        """Получить размер пула соединений."""
+        return self.__pool_size
+
+    async def close(self) -> None:
+        """Закрыть все соединения пула."""
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        """Создать сессию в работающем событийном цикле при первом запросе."""
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.__pool_size)
+            self.__session = aiohttp.ClientSession(connector=connector)
+        return self.__session
+
+    @staticmethod
+    def __client_timeout(
+            timeout: Timeout,
+            remaining: Optional[float]) -> aiohttp.ClientTimeout:
+        """
+        Преобразовать таймаут в формате requests в aiohttp.ClientTimeout.
+        Общее время запроса - не больше remaining (времени до срока).
+        """
+        if isinstance(timeout, aiohttp.ClientTimeout):
+            return timeout
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(total=remaining,
+                                         sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=limit_timeout(timeout, remaining))
+
+
+_async_http_client = None
+
+
+def get_async_http_client() -> AsyncHTTPClient:
+    """
+    Получить общий асинхронный HTTP-клиент.
+    Сессия создается в событийном цикле, где выполнен первый запрос.
+    """
+    global _async_http_client
+    if _async_http_client is None:
+        _async_http_client = AsyncHTTPClient()
+    return _async_http_client
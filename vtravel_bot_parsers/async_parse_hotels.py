@@ -0,0 +1,441 @@
+"""
+API: Hotels (асинхронный парсер)
+https://rapidapi.com/apidojo/api/hotels4/
+"""
+
+import asyncio
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, List,
+                    Optional, Tuple, Union)
+
+from config_bot import (CACHE_TTL_NEGATIVE, HEADERS_BOT, HOTELS_API_URL,
+                        PHOTO_FETCH_CONCURRENCY)
+from .async_http_client import AsyncHTTPClient, get_async_http_client
+from .circuit_breaker import (CLOSED, AsyncRevalidator, CircuitBreaker,
+                              get_async_revalidator, get_circuit_breaker)
+from .metrics import (API_CALL_DURATION, API_CALL_ERRORS, STALE_RESPONSES,
+                      timed)
+from .parse_hotels import (MAX_PAGE_SIZE, ParseHotels, get_hotels_page,
+                           has_hotels, has_search_suggestions)
+from .response_cache import ResponseCache, get_response_cache, mark_stale
+from .single_flight import AsyncSingleFlight, get_async_single_flight
+from .tracing import current_span, traced
+
+
+class AsyncParseHotels:
+    """
+    Асинхронный парсер отелей.
+    APi: Hotels.
+
+    Интерфейс совпадает с ParseHotels, сетевые методы - корутины.
+
+    Методы:
+        - get_search_results_by_city: Получить результаты поиска по городу.
+        - get_list_of_hotels_with_parameters: Получить список отелей
+            с параметрами.
+        - iterate_hotels: Получать отели с параметрами постранично
+            по мере перебора (асинхронный итератор).
+        - get_hotel_photo: Получить фото отеля.
+        - get_photos_of_hotels: Получить фото нескольких отелей параллельно.
+        - collect_brief_information_about_hotels: Составить краткую информацию
+            из полученных данных отелей.
+    """
+    collect_brief_information_about_hotels = \
+        ParseHotels.collect_brief_information_about_hotels
+
+    def __init__(self, client: AsyncHTTPClient = None,
+                 cache: ResponseCache = None,
+                 flights: AsyncSingleFlight = None,
+                 base_url: str = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 revalidator: AsyncRevalidator = None):
+        """
+        Args:
+            client (AsyncHTTPClient) = None: HTTP-клиент для запросов к API.
+                По умолчанию - общий асинхронный пул соединений.
+            cache (ResponseCache) = None: Кэш ответов API.
+                По умолчанию - общий для процесса кэш.
+            flights (AsyncSingleFlight) = None: Объединение одинаковых
+                одновременных запросов. По умолчанию - общее для движка.
+            base_url (str) = None: Базовый URL API.
+                По умолчанию - HOTELS_API_URL.
+            circuit_breaker (CircuitBreaker) = None: Выключатели
+                эндпоинтов API (те же, что у HTTP-клиента).
+                По умолчанию - общие для процесса.
+            revalidator (AsyncRevalidator) = None: Фоновое обновление
+                устаревших ответов. По умолчанию - общее для движка.
+        """
+        self.__client = client or get_async_http_client()
+        self.__cache = cache if cache is not None else get_response_cache()
+        self.__flights = flights if flights is not None \
+            else get_async_single_flight()
+        self.__circuit_breaker = circuit_breaker \
+            if circuit_breaker is not None else get_circuit_breaker()
+        self.__revalidator = revalidator if revalidator is not None \
+            else get_async_revalidator()
+        self.__base_url = (base_url or HOTELS_API_URL).rstrip('/')
+        self.__headers = eval(HEADERS_BOT)
+        self.__currency = 'RUB'
+        self.__locale = 'ru_RU'
+
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
+    async def get_search_results_by_city(
+                    self, city_to_search: str) -> Dict[str, Any]:
+        """
+        Получить результаты поиска по городу.
+        Успешный ответ сохраняется в кэш ответов API (пустой - на
+        CACHE_TTL_NEGATIVE секунд). Одинаковые одновременные запросы
+        выполняются один раз. Если API недоступно - возвращается
+        последний успешный ответ, отмеченный mark_stale.
+
+        Args:
+            city_to_search (str): Город для поиска.
+        """
+        if city_to_search.isdigit():
+            raise ValueError('Введенные данные состоят из цифр.')
+
+        cache_key = self.__cache.make_key(city_to_search, self.__locale,
+                                          self.__currency)
+        response_json = self.__cache.get('locations/v2/search', cache_key)
+        if response_json is not None:
+            return response_json
+
+        return await self.__fetch(
+            'locations/v2/search', cache_key,
+            lambda: self.__request_search_results(city_to_search, cache_key))
+
+    async def __fetch(
+            self, endpoint: str, cache_key: Tuple[str, ...],
+            request: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Запросить ответ у API (одинаковые одновременные запросы -
+        один раз). Если API недоступно - вернуть последний успешный
+        ответ из кэша (mark_stale): пока выключатель эндпоинта
+        не замкнут - не обращаясь к API, с обновлением ответа в фоне.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            cache_key (Tuple[str, ...]): Ключ запроса в кэше.
+            request (Callable[[], Awaitable[Dict[str, Any]]]): Запрос к API.
+
+        Raises:
+            ConnectionError: Если API недоступно и ответа в кэше нет.
+        """
+        flight_key = (endpoint, cache_key)
+        if self.__circuit_breaker.state(endpoint) != CLOSED:
+            response_json = self.__get_stale(endpoint, cache_key)
+            if response_json is not None:
+                self.__revalidator.submit(
+                    flight_key,
+                    lambda: self.__flights.do(flight_key, request))
+                return response_json
+
+        try:
+            return await self.__flights.do(flight_key, request)
+        except ConnectionError:
+            response_json = self.__get_stale(endpoint, cache_key)
+            if response_json is None:
+                raise
+            return response_json
+
+    def __get_stale(self, endpoint: str,
+                    cache_key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """Получить из кэша последний ответ, отмеченный mark_stale."""
+        response_json = self.__cache.get_stale(endpoint, cache_key)
+        if response_json is None:
+            return None
+        STALE_RESPONSES.inc(endpoint)
+        span = current_span()
+        if span is not None:
+            span.attributes['stale'] = True
+        return mark_stale(response_json)
+
+    async def __request_search_results(
+            self, city_to_search: str,
+            cache_key: Tuple[str, ...]) -> Dict[str, Any]:
+        """Запросить результаты поиска по городу у API."""
+        url = '{0}/locations/v2/search'.format(self.__base_url)
+        querystring = {'query': city_to_search,
+                       'locale': self.__locale,
+                       'currency': self.__currency}
+        try:
+            response = await self.__client.get(url=url,
+                                               endpoint='locations/v2/search',
+                                               headers=self.__headers,
+                                               params=querystring)
+            response_json = response.json()
+        except Exception:
+            raise ConnectionError(
+                'Не удалось получить результаты поиска по городу - {0}'.format(
+                    city_to_search))
+
+        if not response.ok:
+            raise ConnectionError(
+                'API поиска по городу вернуло ошибку {0}'.format(
+                    response.status_code))
+        negative = not has_search_suggestions(response_json)
+        self.__cache.put('locations/v2/search', cache_key, response_json,
+                         ttl=CACHE_TTL_NEGATIVE if negative else None,
+                         negative=negative)
+        return response_json
+
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
+    async def get_list_of_hotels_with_parameters(
+                            self, destination_id: str,
+                            sort_mode: str,
+                            price_min: str = None,
+                            price_max: str = None,
+                            distance_label: str = None,
+                            page_number: int = 1,
+                            page_size: int = MAX_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Получить список отелей с параметрами (одну страницу).
+        Параметры - как у ParseHotels.get_list_of_hotels_with_parameters.
+        Успешный ответ сохраняется в кэш ответов API (пустой - на
+        CACHE_TTL_NEGATIVE секунд). Одинаковые одновременные запросы
+        выполняются один раз. Если API недоступно - возвращается
+        последний успешный ответ, отмеченный mark_stale.
+
+        Args:
+            destination_id (str): id месторасположения отелей для поиска.
+            sort_mode (str): Сортировка отелей:
+             sort_mode in [PRICE, PRICE_HIGHEST_FIRST, DISTANCE_FROM_LANDMARK]
+            price_min (str) = None: Минимальная цена для выборки отелей.
+            price_max (str) = None: Максимальная цена для выборки отелей.
+            distance_label (str) = None: Метка выбора локации.
+            page_number (int): Номер страницы (с 1).
+            page_size (int): Размер страницы (не больше MAX_PAGE_SIZE).
+        """
+        correct_modes_for_sorting = ('PRICE', 'PRICE_HIGHEST_FIRST',
+                                     'DISTANCE_FROM_LANDMARK')
+        if sort_mode not in correct_modes_for_sorting:
+            raise ValueError(
+                'Некорректный режим для сортировки отелей.'
+            )
+
+        if not 1 <= page_size <= MAX_PAGE_SIZE or page_number < 1:
+            raise ValueError(
+                'Некорректная страница списка отелей.'
+            )
+
+        cache_key = self.__cache.make_key(destination_id, sort_mode,
+                                          price_min, price_max,
+                                          distance_label, self.__locale,
+                                          self.__currency, page_number,
+                                          page_size)
+        response_json = self.__cache.get('properties/list', cache_key)
+        if response_json is not None:
+            return response_json
+
+        return await self.__fetch(
+            'properties/list', cache_key,
+            lambda: self.__request_list_of_hotels(
+                destination_id, sort_mode, price_min, price_max,
+                distance_label, page_number, page_size, cache_key))
+
+    async def iterate_hotels(self, destination_id: str, sort_mode: str,
+                             price_min: str = None, price_max: str = None,
+                             distance_label: str = None, limit: int = None,
+                             prefetch_threshold: int = 5,
+                             page_size: int = None
+                             ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Получать отели с параметрами постранично по мере перебора
+        (async for). Параметры - как у ParseHotels.iterate_hotels.
+
+        Размер страницы - page_size, по умолчанию - limit (не больше
+        MAX_PAGE_SIZE). Когда до конца страницы остается
+        prefetch_threshold отелей, а limit еще не набран, следующая
+        страница запрашивается в фоновой задаче.
+
+        Raises:
+            ConnectionError: Если не удалось получить данные от API.
+            ValueError: Если ответ API некорректен.
+        """
+        if limit is not None and limit < 1:
+            return
+        if page_size is None:
+            page_size = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+
+        async def get_page(
+                number: int) -> Tuple[List[Dict[str, Any]], bool]:
+            response_json = await self.get_list_of_hotels_with_parameters(
+                destination_id=destination_id, sort_mode=sort_mode,
+                price_min=price_min, price_max=price_max,
+                distance_label=distance_label, page_number=number,
+                page_size=page_size)
+            return get_hotels_page(response_json, page_size)
+
+        next_page: Optional['asyncio.Future'] = None
+        try:
+            page_number = 1
+            returned = 0
+            hotels, has_next_page = await get_page(page_number)
+            while True:
+                need_next_page = has_next_page and (
+                    limit is None or returned + len(hotels) < limit)
+                next_page = None
+                for index, hotel in enumerate(hotels):
+                    if returned == limit:
+                        return
+                    if (need_next_page and next_page is None
+                            and len(hotels) - index <= prefetch_threshold):
+                        next_page = asyncio.ensure_future(
+                            get_page(page_number + 1))
+                    yield hotel
+                    returned += 1
+
+                if next_page is None:
+                    return
+                page_number += 1
+                hotels, has_next_page = await next_page
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    async def __request_list_of_hotels(
+            self, destination_id: str, sort_mode: str, price_min: str,
+            price_max: str, distance_label: str, page_number: int,
+            page_size: int, cache_key: Tuple[str, ...]) -> Dict[str, Any]:
+        """Запросить список отелей с параметрами у API."""
+        url = '{0}/properties/list'.format(self.__base_url)
+        querystring = {"destinationId": str(destination_id),
+                       "pageNumber": str(page_number),
+                       "pageSize": str(page_size), "checkIn": "2020-01-08",
+                       "checkOut": "2020-01-15", "adults1": "1",
+                       "sortOrder": sort_mode,
+                       "locale": self.__locale,
+                       "currency": self.__currency}
+        if price_min:
+            querystring['priceMin'] = f'{price_min}'
+        if price_max:
+            querystring['priceMax'] = f'{price_max}'
+        if distance_label:
+            querystring['landmarkIds'] = f'{distance_label}'
+
+        try:
+            response = await self.__client.get(url=url,
+                                               endpoint='properties/list',
+                                               headers=self.__headers,
+                                               params=querystring)
+            response_json = response.json()
+        except Exception:
+            raise ConnectionError(
+                'Не удалось получить результаты поиска по заданным параметрам')
+
+        if not response.ok:
+            raise ConnectionError(
+                'API списка отелей вернуло ошибку {0}'.format(
+                    response.status_code))
+        negative = not has_hotels(response_json)
+        self.__cache.put('properties/list', cache_key, response_json,
+                         ttl=CACHE_TTL_NEGATIVE if negative else None,
+                         negative=negative)
+        return response_json
+
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
+    async def get_hotel_photo(self, hotel_id: str,
+                              number_of_photos: int) -> List[Dict[str, Any]]:
+        """
+        Получить фото отеля.
+
+        Args:
+            hotel_id (int): Id отеля.
+            number_of_photos (int): Необходимое количество фотографий.
+        """
+        url = '{0}/properties/get-hotel-photos'.format(self.__base_url)
+        querystring = {'id': f'{hotel_id}'}
+
+        try:
+            response = await self.__client.get(
+                                    url=url,
+                                    endpoint='properties/get-hotel-photos',
+                                    headers=self.__headers,
+                                    params=querystring)
+            response_json = response.json()
+        except Exception:
+            raise ConnectionError('Не удалось получить фото отеля')
+
+        try:
+            result = response_json.get('hotelImages')[:number_of_photos]
+        except Exception:
+            raise ValueError('Ошибка поиска фотографий по ключу "hotelImages"')
+        return result
+
+    async def get_photos_of_hotels(
+            self, hotel_ids: List[str], number_of_photos: int,
+            max_workers: int = PHOTO_FETCH_CONCURRENCY
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """
+        Получить фото нескольких отелей параллельно
+        (не более max_workers запросов одновременно).
+
+        Результаты - в порядке hotel_ids. Если фото отеля получить
+        не удалось - вместо списка фото возвращается исключение
+        (ConnectionError или ValueError).
+
+        Args:
+            hotel_ids (List[str]): Id отелей.
+            number_of_photos (int): Необходимое количество фотографий.
+            max_workers (int): Максимальное количество одновременных
+                запросов к API.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def get_photo_or_error(
+                hotel_id: str) -> Union[List[Dict[str, Any]], Exception]:
+            async with semaphore:
+                try:
+                    return await self.get_hotel_photo(
+                        hotel_id=hotel_id, number_of_photos=number_of_photos)
+                except (ConnectionError, ValueError) as error_message:
+                    return error_message
+
+        return list(await asyncio.gather(
+            *(get_photo_or_error(hotel_id) for hotel_id in hotel_ids)))
+
+    @property
+    def currency(self) -> str:
+        """Получить используемую валюту."""
+        return self.__currency
+
+    @currency.setter
+    def currency(self, value: str) -> None:
+        """
+        Установить валюту.
+        Поддерживаемое значение - (USD, RUB).
+
+        Args:
+            value (str): Устанавливаемая валюта.
+        """
+        supported_value = ('USD', 'RUB')
+        if value not in supported_value:
+            raise ValueError(
+                        'Неподдерживаемая валюта.\n'
+                        'Доступно для установки - {0}'.format(supported_value))
+        self.__currency = value
+
+    @property
+    def language_code(self) -> str:
+        """Получить код языка."""
+        return self.__locale
+
+    @language_code.setter
+    def language_code(self, code: str) -> None:
+        """
+        Установить код языка.
+
+        Args:
+            code (str): Устанавливаемый код языка.
+            Поддерживаемое значение - (en_US, ru_RU).
+        """
+        supported_value = ('en_US', 'ru_RU')
+        if code not in supported_value:
+            raise ValueError(
+                'Неподдерживаемый код языка.\n'
+                'Доступно для установки - {0}'.format(supported_value)
+            )
+        self.__locale = code
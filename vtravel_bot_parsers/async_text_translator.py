@@ -0,0 +1,181 @@
+"""
+API: Deep Translate (асинхронный переводчик)
+https://rapidapi.com/gatzuma/api/deep-translate1/
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List
+
+from config_bot import (HEADERS_TRANSLATOR, TRANSLATE_CONCURRENCY,
+                        TRANSLATOR_API_URL)
+from .async_http_client import AsyncHTTPClient, get_async_http_client
+from .metrics import API_CALL_DURATION, API_CALL_ERRORS, timed
+from .text_translator import get_translated_texts, split_into_batches
+from .tracing import traced
+from .translation_memory import TranslationMemory, get_translation_memory
+
+
+class AsyncTextTranslator:
+    """
+    Асинхронный переводчик текста.
+
+    Интерфейс совпадает с TextTranslator, сетевые методы - корутины.
+
+    Методы:
+        - supported_languages: Получить поддерживаемые языки.
+        - translate: Перевести заданный текст.
+        - translate_many: Перевести несколько текстов пакетами.
+    """
+    def __init__(self, client: AsyncHTTPClient = None,
+                 memory: TranslationMemory = None,
+                 base_url: str = None):
+        """
+        Args:
+            client (AsyncHTTPClient) = None: HTTP-клиент для запросов к API.
+                По умолчанию - общий асинхронный пул соединений.
+            memory (TranslationMemory) = None: Память переводов.
+                По умолчанию - общая для процесса память на диске.
+            base_url (str) = None: Базовый URL API.
+                По умолчанию - TRANSLATOR_API_URL.
+        """
+        self.__client = client or get_async_http_client()
+        self.__memory = memory if memory is not None \
+            else get_translation_memory()
+        self.__base_url = (base_url or TRANSLATOR_API_URL).rstrip('/')
+        self.__headers = eval(HEADERS_TRANSLATOR)
+        self.__text_language = 'ru'
+        self.__target_language = 'en'
+
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
+    async def supported_languages(self) -> Any:
+        """Узнать о поддерживаемых языках."""
+        url = '{0}/language/translate/v2/languages'.format(self.__base_url)
+
+        try:
+            response = await self.__client.get(
+                                url,
+                                endpoint='translate/v2/languages',
+                                headers=self.__headers)
+            response_json = response.json()
+        except Exception as error_message:
+            raise ConnectionError('Не удалось получить данные.\n{0}'.format(
+                error_message
+            ))
+        return response_json
+
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
+    async def translate(self, text: str) -> str:
+        """
+        Перевести текст.
+        Сначала искать перевод в памяти переводов, затем - запрос к API.
+
+        Args:
+            text (str): Текст для перевода.
+
+        Raises:
+            ConnectionError: Если не удалось получить данные от API.
+            ValueError: Если не удалось получить переводимый текст по ключам.
+        """
+        translated_text = self.__memory.get(self.__text_language,
+                                            self.__target_language, text)
+        if translated_text is not None:
+            return translated_text
+
+        translated_text = (await self.__request_translations([text]))[0]
+        self.__memory.put(self.__text_language, self.__target_language,
+                          text, translated_text)
+        return translated_text
+
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
+    async def translate_many(
+            self, texts: Iterable[str],
+            max_workers: int = TRANSLATE_CONCURRENCY) -> List[str]:
+        """
+        Перевести несколько текстов (см. TextTranslator.translate_many):
+        одинаковые - один раз, сначала память переводов, остальные -
+        пакетами, не более max_workers запросов одновременно.
+        Переводы возвращаются в порядке texts.
+
+        Args:
+            texts (Iterable[str]): Тексты для перевода.
+            max_workers (int): Максимальное количество одновременных
+                запросов к API.
+
+        Raises:
+            ConnectionError: Если не удалось получить данные от API.
+            ValueError: Если не удалось получить переводимый текст по ключам.
+        """
+        texts = list(texts)
+        translations: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        for text in texts:
+            key = self.__memory.normalize(text)
+            if key in translations or key in missing:
+                continue
+            translated_text = self.__memory.get(
+                self.__text_language, self.__target_language, text)
+            if translated_text is not None:
+                translations[key] = translated_text
+            else:
+                missing[key] = text
+
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def translate_batch(batch: List[str]) -> None:
+            async with semaphore:
+                translated_texts = await self.__request_translations(batch)
+            self.__memory.put_many(self.__text_language,
+                                   self.__target_language,
+                                   zip(batch, translated_texts))
+            translations.update(zip(map(self.__memory.normalize, batch),
+                                    translated_texts))
+
+        await asyncio.gather(*(
+            translate_batch(batch)
+            for batch in split_into_batches(list(missing.values()))))
+        return [translations[self.__memory.normalize(text)]
+                for text in texts]
+
+    async def __request_translations(self, texts: List[str]) -> List[str]:
+        """Запросить переводы текстов у API одним запросом."""
+        url = '{0}/language/translate/v2'.format(self.__base_url)
+        payload = json.dumps({
+            'q': texts[0] if len(texts) == 1 else texts,
+            'source': self.__text_language,
+            'target': self.__target_language
+        })
+        try:
+            response = await self.__client.post(url,
+                                                endpoint='translate/v2',
+                                                data=payload,
+                                                headers=self.__headers)
+            response_json = response.json()
+        except Exception as error_message:
+            raise ConnectionError('Не удалось получить данные.\n{0}'.format(
+                error_message
+            ))
+        return get_translated_texts(response_json, len(texts))
+
+    @property
+    def text_language(self) -> str:
+        """Получить язык переводимого текста."""
+        return self.__text_language
+
+    @text_language.setter
+    def text_language(self, language: str) -> None:
+        """Установить язык переводимого текста."""
+        self.__text_language = language
+
+    @property
+    def target_language(self) -> str:
+        """Получить язык перевода."""
+        return self.__target_language
+
+    @target_language.setter
+    def target_language(self, language: str) -> None:
+        """Установить язык перевода."""
+        self.__target_language = language
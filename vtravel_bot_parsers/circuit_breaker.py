@@ -0,0 +1,327 @@
+"""
+Автоматический выключатель (circuit breaker) для эндпоинтов API.
+
+Выключатель эндпоинта размыкается после CIRCUIT_FAILURE_THRESHOLD
+неудачных вызовов подряд (ошибка соединения, таймаут, ответ 5xx
+или ответ дольше CIRCUIT_SLOW_CALL_SECONDS). Пока он разомкнут,
+запросы к эндпоинту не выполняются - HTTP-клиент сразу поднимает
+CircuitOpenError, и обработчик не ждет таймаут API. Через
+CIRCUIT_OPEN_SECONDS выключатель пропускает один пробный запрос:
+успех замыкает его, ошибка - снова размыкает.
+
+Пока выключатель не замкнут, парсер отвечает последним успешным
+ответом из кэша (возможно устаревшим) и обновляет его в фоне
+(Revalidator, AsyncRevalidator) - фоновый запрос и становится
+пробным, когда API снова доступно.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set
+
+from config_bot import (CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS,
+                        CIRCUIT_SLOW_CALL_SECONDS)
+from .metrics import CIRCUIT_STATE_CHANGES
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(ConnectionError):
+    """Выключатель эндпоинта разомкнут - запрос к API не выполнялся."""
+
+
+class _Circuit:
+    """Состояние выключателя одного эндпоинта."""
+    __slots__ = ('state', 'failures', 'opened_at', 'probe_started_at')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+
+
+class CircuitBreaker:
+    """
+    Выключатели эндпоинтов API.
+
+    Методы:
+        - allow: Проверить, можно ли выполнить запрос к эндпоинту.
+        - check: То же, но с исключением CircuitOpenError.
+        - record: Записать результат запроса к эндпоинту.
+        - state: Получить состояние выключателя эндпоинта.
+        - stats: Счетчики размыканий и отклоненных запросов.
+    """
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 slow_call_seconds: float = CIRCUIT_SLOW_CALL_SECONDS,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS):
+        """
+        Args:
+            failure_threshold (int): Неудачных запросов подряд
+                до размыкания.
+            slow_call_seconds (float): Запрос не быстрее этого времени
+                считается неудачным. 0 - не учитывать длительность.
+            open_seconds (float): Время до пробного запроса
+                после размыкания.
+        """
+        if failure_threshold < 1:
+            raise ValueError('Порог ошибок должен быть больше 0.')
+        if open_seconds <= 0:
+            raise ValueError('Время размыкания должно быть больше 0.')
+
+        self.__failure_threshold = failure_threshold
+        self.__slow_call_seconds = slow_call_seconds
+        self.__open_seconds = open_seconds
+        self.__circuits: Dict[str, _Circuit] = {}
+        self.__lock = threading.Lock()
+        self.__opened = 0
+        self.__rejected = 0
+
+    def allow(self, endpoint: str) -> bool:
+        """
+        Проверить, можно ли выполнить запрос к эндпоинту.
+        После CIRCUIT_OPEN_SECONDS разомкнутый выключатель пропускает
+        один пробный запрос (следующий - если пробный не завершился
+        за то же время).
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+        """
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if circuit is None or circuit.state == CLOSED:
+                return True
+
+            now = time.monotonic()
+            if circuit.state == OPEN:
+                if now - circuit.opened_at >= self.__open_seconds:
+                    self.__set_state(endpoint, circuit, HALF_OPEN)
+                    circuit.probe_started_at = now
+                    return True
+            elif now - circuit.probe_started_at >= self.__open_seconds:
+                circuit.probe_started_at = now
+                return True
+            self.__rejected += 1
+            return False
+
+    def check(self, endpoint: str) -> None:
+        """
+        Проверить, можно ли выполнить запрос к эндпоинту.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+
+        Raises:
+            CircuitOpenError: Если выключатель эндпоинта разомкнут.
+        """
+        if not self.allow(endpoint):
+            raise CircuitOpenError(
+                'API временно недоступно - {0}'.format(endpoint))
+
+    def record(self, endpoint: str, success: bool,
+               duration: float = 0) -> None:
+        """
+        Записать результат запроса к эндпоинту.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            success (bool): Получен ли ответ (не 5xx).
+            duration (float): Длительность запроса в секундах.
+        """
+        if (self.__slow_call_seconds
+                and duration >= self.__slow_call_seconds):
+            success = False
+
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if circuit is None:
+                if success:
+                    return
+                circuit = self.__circuits[endpoint] = _Circuit()
+
+            if success:
+                circuit.failures = 0
+                if circuit.state != CLOSED:
+                    self.__set_state(endpoint, circuit, CLOSED)
+                return
+
+            circuit.failures += 1
+            if (circuit.state == HALF_OPEN
+                    or circuit.failures >= self.__failure_threshold):
+                if circuit.state != OPEN:
+                    self.__set_state(endpoint, circuit, OPEN)
+                    self.__opened += 1
+                circuit.opened_at = time.monotonic()
+
+    def state(self, endpoint: str) -> str:
+        """
+        Получить состояние выключателя эндпоинта
+        (closed, open, half_open).
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+        """
+        circuit = self.__circuits.get(endpoint)
+        return CLOSED if circuit is None else circuit.state
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Получить счетчики размыканий и отклоненных запросов."""
+        with self.__lock:
+            return {'opened': self.__opened,
+                    'rejected': self.__rejected,
+                    'open_circuits': sum(
+                        circuit.state != CLOSED
+                        for circuit in self.__circuits.values())}
+
+    @staticmethod
+    def __set_state(endpoint: str, circuit: _Circuit, state: str) -> None:
+        circuit.state = state
+        CIRCUIT_STATE_CHANGES.inc(endpoint, state)
+
+
+class Revalidator:
+    """
+    Фоновое обновление устаревших ответов API (потоки).
+    Одинаковые обновления, ожидающие выполнения, не дублируются.
+
+    Методы:
+        - submit: Запустить обновление в фоне.
+        - stats: Счетчики обновлений.
+    """
+    def __init__(self, max_workers: int = 1):
+        """
+        Args:
+            max_workers (int): Количество фоновых потоков.
+        """
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='revalidate')
+        self.__pending: Set[Hashable] = set()
+        self.__lock = threading.Lock()
+        self.__succeeded = 0
+        self.__failed = 0
+
+    def submit(self, key: Hashable, function: Callable[[], Any]) -> bool:
+        """
+        Запустить обновление в фоне. Вернуть False, если обновление
+        с таким ключом уже ожидает выполнения.
+
+        Args:
+            key (Hashable): Ключ запроса.
+            function (Callable[[], Any]): Запрос к API (ответ сохраняет
+                в кэш сама функция).
+        """
+        with self.__lock:
+            if key in self.__pending:
+                return False
+            self.__pending.add(key)
+        self.__executor.submit(self.__run, key, function)
+        return True
+
+    def __run(self, key: Hashable, function: Callable[[], Any]) -> None:
+        try:
+            function()
+            succeeded = True
+        except (ConnectionError, ValueError):
+            succeeded = False
+        with self.__lock:
+            self.__pending.discard(key)
+            if succeeded:
+                self.__succeeded += 1
+            else:
+                self.__failed += 1
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Получить счетчики обновлений."""
+        with self.__lock:
+            return {'succeeded': self.__succeeded,
+                    'failed': self.__failed,
+                    'pending': len(self.__pending)}
+
+
+class AsyncRevalidator:
+    """
+    Фоновое обновление устаревших ответов API (задачи asyncio).
+    Интерфейс совпадает с Revalidator, function - корутина.
+
+    Методы:
+        - submit: Запустить обновление в фоновой задаче.
+        - stats: Счетчики обновлений.
+    """
+    def __init__(self):
+        self.__tasks: Dict[Hashable, 'asyncio.Task[None]'] = {}
+        self.__succeeded = 0
+        self.__failed = 0
+
+    def submit(self, key: Hashable,
+               function: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Запустить обновление в фоновой задаче. Вернуть False,
+        если обновление с таким ключом уже выполняется.
+
+        Args:
+            key (Hashable): Ключ запроса.
+            function (Callable[[], Awaitable[Any]]): Запрос к API.
+        """
+        if key in self.__tasks:
+            return False
+        self.__tasks[key] = asyncio.get_running_loop().create_task(
+            self.__run(key, function))
+        return True
+
+    async def __run(self, key: Hashable,
+                    function: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await function()
+            self.__succeeded += 1
+        except (ConnectionError, ValueError):
+            self.__failed += 1
+        finally:
+            del self.__tasks[key]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Получить счетчики обновлений."""
+        return {'succeeded': self.__succeeded,
+                'failed': self.__failed,
+                'pending': len(self.__tasks)}
+
+
+_circuit_breaker = None
+_revalidator = None
+_async_revalidator = None
+_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Получить общие для процесса выключатели эндпоинтов API."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        with _lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+
+def get_revalidator() -> Revalidator:
+    """Получить общее для процесса фоновое обновление ответов API."""
+    global _revalidator
+    if _revalidator is None:
+        with _lock:
+            if _revalidator is None:
+                _revalidator = Revalidator()
+    return _revalidator
+
+
+def get_async_revalidator() -> AsyncRevalidator:
+    """Получить фоновое обновление ответов API асинхронного движка."""
+    global _async_revalidator
+    if _async_revalidator is None:
+        _async_revalidator = AsyncRevalidator()
+    return _async_revalidator
@@ -0,0 +1,74 @@
+"""
+Срок запроса пользователя (deadline) для запросов к API.
+
+Обработчик обновления бота задает срок (with deadline(...)), и все
+запросы к API внутри него - перевод, поиск города, отелей, фото -
+укладываются в оставшееся время: таймаут запроса сокращается
+до остатка срока, повтор, не успевающий до срока, не выполняется,
+а после срока запрос не отправляется (DeadlineExceeded). Срок хранится
+в contextvars, поэтому действует и в потоках (propagate_context),
+и в задачах asyncio, созданных обработчиком.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+# момент (time.monotonic) истечения срока текущего запроса пользователя
+_expires_at: ContextVar[Optional[float]] = ContextVar('deadline',
+                                                      default=None)
+
+
+class DeadlineExceeded(ConnectionError):
+    """Срок запроса пользователя истек - запрос к API не выполнялся."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Задать срок для запросов к API внутри блока with.
+    Вложенный срок не продлевает внешний.
+
+    Args:
+        seconds (Optional[float]): Срок в секундах. None или 0 -
+            без срока.
+    """
+    if not seconds:
+        yield
+        return
+
+    expires_at = time.monotonic() + seconds
+    current = _expires_at.get()
+    if current is not None:
+        expires_at = min(expires_at, current)
+    token = _expires_at.set(expires_at)
+    try:
+        yield
+    finally:
+        _expires_at.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Получить время до срока в секундах (может быть отрицательным).
+    None - срок не задан.
+    """
+    expires_at = _expires_at.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def check_deadline() -> Optional[float]:
+    """
+    Получить время до срока в секундах (None - срок не задан).
+
+    Raises:
+        DeadlineExceeded: Если срок истек.
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded('Истек срок запроса к API.')
+    return remaining
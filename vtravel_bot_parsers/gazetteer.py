@@ -0,0 +1,275 @@
+"""
+Справочник направлений на диске (SQLite).
+
+Справочник пополняется из каждого успешного ответа locations/v2/search:
+название, которое ввел пользователь, запрос к API (перевод на английский)
+и названия найденных направлений (name) становятся ключами, по которым
+находятся направления {caption: destinationId}. Ключи загружаются
+в префиксное дерево при старте, поэтому известный город находится
+без перевода и запроса к API, в том числе с опечаткой - поиском
+в дереве с расстоянием Левенштейна (латиница и кириллица).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config_bot import GAZETTEER_PATH
+from .metrics import GAZETTEER_LOOKUPS
+from .tracing import current_span
+
+
+Destinations = Tuple[Tuple[str, str], ...]
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def max_distance(length: int) -> int:
+    """
+    Получить допустимое количество опечаток для названия длины length:
+    короткие названия - только без опечаток.
+    """
+    if length < 5:
+        return 0
+    if length < 9:
+        return 1
+    return 2
+
+
+def get_destinations(response_json: Any) -> List[Dict[str, str]]:
+    """
+    Получить направления первой группы ответа locations/v2/search
+    (те же, что показываются кнопками).
+
+    Args:
+        response_json (Any): Ответ API.
+    """
+    try:
+        entities = response_json['suggestions'][0]['entities']
+        return [entity for entity in entities
+                if entity.get('caption') and entity.get('destinationId')]
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return []
+
+
+class _TrieNode:
+    """Узел префиксного дерева ключей."""
+    __slots__ = ('children', 'key')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.key: Optional[str] = None
+
+
+class Gazetteer:
+    """
+    Справочник направлений.
+
+    Методы:
+        - normalize: Нормализовать название для ключа.
+        - lookup: Найти направления по названию (с опечатками).
+        - complete: Получить ключи, начинающиеся с префикса.
+        - add: Пополнить справочник из ответа locations/v2/search.
+        - close: Закрыть базу данных.
+    """
+    def __init__(self, path: str = GAZETTEER_PATH):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite.
+                ':memory:' - хранить только в памяти процесса.
+        """
+        directory = os.path.dirname(path)
+        if directory and path != ':memory:':
+            os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS aliases ('
+            ' alias TEXT PRIMARY KEY,'
+            ' destinations TEXT NOT NULL)')
+        self.__connection.commit()
+
+        self.__index: Dict[str, Destinations] = {}
+        self.__root = _TrieNode()
+        for alias, destinations in self.__connection.execute(
+                'SELECT alias, destinations FROM aliases'):
+            self.__insert(alias, tuple(
+                tuple(destination)
+                for destination in json.loads(destinations)))
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """
+        Нормализовать название: нижний регистр, ё -> е, знаки препинания
+        и лишние пробелы - один пробел.
+        """
+        return _SEPARATORS.sub(
+            ' ', name.casefold().replace('ё', 'е')).strip()
+
+    def lookup(self, name: str) -> Optional[Dict[str, str]]:
+        """
+        Найти направления {caption: destinationId} по названию.
+        Если точного совпадения нет - ближайший ключ с допустимым
+        количеством опечаток (max_distance). Возвращает None,
+        если название неизвестно или ближайших ключей несколько
+        с разными направлениями.
+
+        Args:
+            name (str): Название города.
+        """
+        key = self.normalize(name)
+        with self.__lock:
+            destinations = self.__index.get(key)
+            result = 'exact'
+            if destinations is None:
+                destinations = self.__find_closest(key)
+                result = 'fuzzy' if destinations is not None else 'miss'
+
+        GAZETTEER_LOOKUPS.inc(result)
+        span = current_span()
+        if span is not None:
+            span.attributes['gazetteer'] = result
+        if destinations is None:
+            return None
+        return dict(destinations)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Получить ключи справочника, начинающиеся с префикса
+        (по алфавиту).
+
+        Args:
+            prefix (str): Начало названия.
+            limit (int): Максимальное количество ключей.
+        """
+        prefix = self.normalize(prefix)
+        keys: List[str] = []
+        with self.__lock:
+            node = self.__root
+            for char in prefix:
+                node = node.children.get(char)
+                if node is None:
+                    return keys
+            stack = [node]
+            while stack and len(keys) < limit:
+                node = stack.pop()
+                if node.key is not None:
+                    keys.append(node.key)
+                stack.extend(node.children[char]
+                             for char in sorted(node.children, reverse=True))
+        return keys
+
+    def add(self, response_json: Any, names: Iterable[str] = ()) -> int:
+        """
+        Пополнить справочник из ответа locations/v2/search.
+        Названия names (ввод пользователя, запрос к API) указывают
+        на все найденные направления, название направления (name) -
+        на само направление, если такого ключа еще нет.
+        Вернуть количество добавленных или измененных ключей.
+
+        Args:
+            response_json (Any): Ответ API.
+            names (Iterable[str]): Названия, по которым искали.
+        """
+        entities = get_destinations(response_json)
+        if not entities:
+            return 0
+
+        found: Destinations = tuple(
+            (entity['caption'], entity['destinationId'])
+            for entity in entities)
+        name_keys = {self.normalize(name) for name in names} - {''}
+        with self.__lock:
+            aliases: Dict[str, Destinations] = {}
+            for entity in entities:
+                key = self.normalize(entity.get('name') or '')
+                if key and key not in self.__index:
+                    aliases.setdefault(key, ((entity['caption'],
+                                              entity['destinationId']),))
+            aliases.update(dict.fromkeys(name_keys, found))
+
+            changed = {alias: destinations
+                       for alias, destinations in aliases.items()
+                       if self.__index.get(alias) != destinations}
+            for alias, destinations in changed.items():
+                self.__insert(alias, destinations)
+            if changed:
+                with self.__connection:
+                    self.__connection.executemany(
+                        'INSERT OR REPLACE INTO aliases'
+                        ' (alias, destinations) VALUES (?, ?)',
+                        [(alias, json.dumps(destinations, ensure_ascii=False))
+                         for alias, destinations in changed.items()])
+        return len(changed)
+
+    def close(self) -> None:
+        """Закрыть базу данных."""
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def __insert(self, key: str, destinations: Destinations) -> None:
+        """Добавить ключ в словарь и префиксное дерево."""
+        self.__index[key] = destinations
+        node = self.__root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.key = key
+
+    def __find_closest(self, key: str) -> Optional[Destinations]:
+        """
+        Найти направления ближайшего ключа в префиксном дереве
+        (расстояние Левенштейна не больше max_distance). Общие префиксы
+        ключей проходятся один раз, ветви дальше допустимого
+        расстояния отсекаются.
+        """
+        limit = max_distance(len(key))
+        if not limit:
+            return None
+
+        best_distance = limit + 1
+        best: List[str] = []
+        stack = [(char, child, list(range(len(key) + 1)))
+                 for char, child in self.__root.children.items()]
+        while stack:
+            char, node, previous_row = stack.pop()
+            row = [previous_row[0] + 1]
+            for column in range(1, len(key) + 1):
+                row.append(min(
+                    row[column - 1] + 1,
+                    previous_row[column] + 1,
+                    previous_row[column - 1] + (key[column - 1] != char)))
+
+            if node.key is not None and row[-1] <= best_distance:
+                if row[-1] < best_distance:
+                    best_distance = row[-1]
+                    best = []
+                best.append(node.key)
+            if min(row) <= limit:
+                stack.extend((child_char, child, row)
+                             for child_char, child in node.children.items())
+
+        found = {self.__index[alias] for alias in best}
+        if len(found) != 1:
+            return None
+        return found.pop()
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Получить общий для процесса справочник направлений."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,126 @@
+"""
+Краткая информация об отеле.
+
+Компактная запись (__slots__), которая строится один раз при разборе
+ответа properties/list. Цена и расстояние до центра уже разобраны
+в числа для отбора по цене и сортировки по расстоянию (bestdeal).
+"""
+
+import re
+from typing import Any, Dict, Optional, Tuple
+
+
+_NUMBER = re.compile(r'\d[\d\s,. ]*')
+
+
+def parse_number(text: Optional[str]) -> Optional[float]:
+    """
+    Получить число из строки API: '1,234 RUB', '$1,234.50', '0,8 км'.
+    Возвращает None, если числа в строке нет.
+
+    Запятая считается разделителем тысяч, если после нее ровно три
+    цифры, иначе - десятичным разделителем.
+
+    Args:
+        text (Optional[str]): Строка с ценой или расстоянием.
+    """
+    if not isinstance(text, str):
+        return float(text) if isinstance(text, (int, float)) else None
+
+    match = _NUMBER.search(text)
+    if match is None:
+        return None
+
+    number = re.sub(r'[\s ]', '', match.group()).rstrip(',.')
+    if ',' in number and '.' not in number:
+        integer, _, fraction = number.rpartition(',')
+        if len(fraction) != 3:
+            number = integer.replace(',', '') + '.' + fraction
+    number = number.replace(',', '')
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+class HotelSummary:
+    """
+    Краткая информация об отеле.
+
+    Атрибуты:
+        - id: Id отеля.
+        - name: Название отеля.
+        - address: Адрес отеля.
+        - landmarks: Расположение от центра (как в ответе API).
+        - price: Цена (как в ответе API).
+        - distance_value: Расстояние до центра числом (None - неизвестно).
+        - price_value: Цена числом (None - неизвестна).
+
+    Методы:
+        - from_api: Составить краткую информацию из данных отеля.
+        - is_price_in_range: Проверить, что цена в заданном диапазоне.
+        - distance_sort_key: Ключ сортировки по расстоянию до центра.
+    """
+    __slots__ = ('id', 'name', 'address', 'landmarks', 'price',
+                 'distance_value', 'price_value')
+
+    def __init__(self, id: str, name: str, address: str, landmarks: str,
+                 price: str):
+        self.id = id
+        self.name = name
+        self.address = address
+        self.landmarks = landmarks
+        self.price = price
+        self.distance_value = parse_number(landmarks)
+        self.price_value = parse_number(price)
+
+    @classmethod
+    def from_api(cls, hotel_info: Dict[str, Any]) -> 'HotelSummary':
+        """
+        Составить краткую информацию из данных отеля properties/list.
+
+        Args:
+            hotel_info (Dict[str, Any]): Данные отеля из ответа API.
+        """
+        address = hotel_info.get('address') or {}
+        landmarks = hotel_info.get('landmarks') or [{}]
+        price = ((hotel_info.get('ratePlan') or {}).get('price') or {})
+        return cls(id=str(hotel_info.get('id', 'no id')),
+                   name=hotel_info.get('name', 'no name'),
+                   address=address.get('streetAddress', 'no address'),
+                   landmarks=landmarks[0].get('distance', 'no distance'),
+                   price=price.get('current', 'no price'))
+
+    def is_price_in_range(self, price_min: float = None,
+                          price_max: float = None) -> bool:
+        """
+        Проверить, что цена отеля в диапазоне. Отель с неизвестной
+        ценой не отбрасывается - цену уже отобрал API.
+
+        Args:
+            price_min (float) = None: Минимальная цена.
+            price_max (float) = None: Максимальная цена.
+        """
+        if self.price_value is None:
+            return True
+        return ((price_min is None or self.price_value >= price_min)
+                and (price_max is None or self.price_value <= price_max))
+
+    def distance_sort_key(self) -> Tuple[bool, float]:
+        """
+        Ключ сортировки по расстоянию до центра: ближние первыми,
+        отели с неизвестным расстоянием - в конце.
+        """
+        if self.distance_value is None:
+            return True, 0.0
+        return False, self.distance_value
+
+    def __repr__(self) -> str:
+        return 'HotelSummary(id={0!r}, name={1!r}, price={2!r})'.format(
+            self.id, self.name, self.price)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HotelSummary):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field)
+                   for field in self.__slots__)
@@ -0,0 +1,251 @@
+"""
+Общий HTTP-клиент для запросов к API.
+
+Один пул соединений на процесс: соединения с API переиспользуются
+(keep-alive), вместо нового TCP+TLS рукопожатия на каждый запрос.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config_bot import HTTP_POOL_SIZE
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .deadline import check_deadline
+from .metrics import HTTP_REQUEST_DURATION
+from .rate_limiter import RateLimiter, get_api_rate_limiter
+from .retry_policy import RetryPolicy, get_retry_policy
+
+
+Timeout = Union[float, Tuple[float, float]]
+
+# (таймаут соединения, таймаут чтения) для каждого эндпоинта
+DEFAULT_TIMEOUT: Timeout = (3.05, 10)
+ENDPOINT_TIMEOUTS: Dict[str, Timeout] = {
+    'locations/v2/search': (3.05, 10),
+    'properties/list': (3.05, 10),
+    'properties/get-hotel-photos': (3.05, 10),
+    'translate/v2': (3.05, 5),
+    'translate/v2/languages': (3.05, 5),
+}
+
+# ошибки соединения, после которых запрос повторяется
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+
+def limit_timeout(timeout: Optional[Timeout],
+                  remaining: Optional[float]) -> Optional[Timeout]:
+    """
+    Сократить таймаут до времени, оставшегося до срока запроса.
+
+    Args:
+        timeout (Optional[Timeout]): Таймаут или пара
+            (таймаут соединения, таймаут чтения). None - без таймаута.
+        remaining (Optional[float]): Время до срока в секундах.
+            None - срок не задан.
+    """
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+class HTTPClient:
+    """
+    HTTP-клиент с пулом keep-alive соединений.
+
+    Методы:
+        - get: Выполнить GET-запрос.
+        - post: Выполнить POST-запрос.
+        - timeout_for: Получить таймаут для эндпоинта.
+        - set_timeout: Установить таймаут для эндпоинта.
+        - close: Закрыть все соединения пула.
+    """
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE,
+                 endpoint_timeouts: Dict[str, Timeout] = None,
+                 default_timeout: Timeout = DEFAULT_TIMEOUT,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None):
+        """
+        Args:
+            pool_size (int): Количество соединений, удерживаемых
+                в пуле для одного хоста.
+            endpoint_timeouts (Dict[str, Timeout]) = None: Таймауты
+                по эндпоинтам, дополняют ENDPOINT_TIMEOUTS.
+            default_timeout (Timeout): Таймаут для неизвестных эндпоинтов.
+            rate_limiter (RateLimiter) = None: Лимит частоты запросов
+                (ключ - хост). По умолчанию - общий лимит запросов к API.
+            retry_policy (RetryPolicy) = None: Политика повторов
+                запроса. По умолчанию - общая для процесса.
+            circuit_breaker (CircuitBreaker) = None: Выключатели
+                эндпоинтов. По умолчанию - общие для процесса.
+        """
+        if pool_size < 1:
+            raise ValueError('Размер пула соединений должен быть больше 0.')
+
+        self.__pool_size = pool_size
+        self.__rate_limiter = rate_limiter if rate_limiter is not None \
+            else get_api_rate_limiter()
+        self.__retry_policy = retry_policy if retry_policy is not None \
+            else get_retry_policy()
+        self.__circuit_breaker = circuit_breaker \
+            if circuit_breaker is not None else get_circuit_breaker()
+        self.__default_timeout = default_timeout
+        self.__timeouts = dict(ENDPOINT_TIMEOUTS)
+        if endpoint_timeouts:
+            self.__timeouts.update(endpoint_timeouts)
+
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.__session.mount('https://', adapter)
+        self.__session.mount('http://', adapter)
+
+    def get(self, url: str, endpoint: str = None,
+            **kwargs) -> 'requests.Response':
+        """
+        Выполнить GET-запрос.
+
+        Args:
+            url (str): Адрес запроса.
+            endpoint (str) = None: Имя эндпоинта для выбора таймаута.
+            **kwargs: Параметры requests (headers, params, timeout ...).
+        """
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url: str, endpoint: str = None,
+             **kwargs) -> 'requests.Response':
+        """
+        Выполнить POST-запрос.
+
+        Args:
+            url (str): Адрес запроса.
+            endpoint (str) = None: Имя эндпоинта для выбора таймаута.
+            **kwargs: Параметры requests (headers, data, timeout ...).
+        """
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def request(self, method: str, url: str, endpoint: str = None,
+                **kwargs) -> 'requests.Response':
+        """
+        Выполнить запрос через общий пул соединений.
+
+        Если timeout не передан явно - используется таймаут эндпоинта.
+        Таймаут сокращается до времени, оставшегося до срока запроса
+        пользователя (deadline).
+        Запрос ждет своей очереди в лимите частоты запросов к хосту.
+        Ответы 429, 5xx и ошибки соединения повторяются по политике
+        повторов (RetryPolicy); после 429 запросы к хосту
+        приостанавливаются на паузу перед повтором.
+        Результат запроса к эндпоинту записывается в его выключатель
+        (CircuitBreaker); пока выключатель разомкнут, запрос
+        не выполняется.
+
+        Args:
+            method (str): HTTP-метод.
+            url (str): Адрес запроса.
+            endpoint (str) = None: Имя эндпоинта для выбора таймаута.
+
+        Raises:
+            CircuitOpenError: Если выключатель эндпоинта разомкнут.
+            DeadlineExceeded: Если срок запроса пользователя истек.
+            requests.RequestException: Если не удалось выполнить запрос.
+        """
+        timeout = kwargs.pop('timeout') if 'timeout' in kwargs \
+            else self.timeout_for(endpoint)
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if endpoint is not None:
+                self.__circuit_breaker.check(endpoint)
+            self.__rate_limiter.acquire(host)
+            kwargs['timeout'] = limit_timeout(timeout, check_deadline())
+            started = time.perf_counter()
+            status = 'error'
+            error: Optional[Exception] = None
+            try:
+                response = self.__session.request(method, url, **kwargs)
+                status = str(response.status_code)
+            except RETRY_ERRORS as request_error:
+                error = request_error
+            finally:
+                duration = time.perf_counter() - started
+                HTTP_REQUEST_DURATION.observe(duration, endpoint or 'other',
+                                              status)
+                # 429 - лимит частоты, а не отказ API
+                if endpoint is not None and status != '429':
+                    self.__circuit_breaker.record(
+                        endpoint, status.isdigit() and int(status) < 500,
+                        duration)
+
+            if error is None and not self.__retry_policy.should_retry(
+                    response.status_code):
+                return response
+            delay = self.__retry_policy.next_delay(
+                attempt, None if error is not None
+                else response.headers.get('Retry-After'))
+            if delay is None:
+                if error is not None:
+                    # таймаут, сокращенный до срока, - DeadlineExceeded
+                    check_deadline()
+                    raise error
+                return response
+
+            if error is None:
+                response.close()
+            if status == '429':
+                self.__rate_limiter.pause(delay, host)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def timeout_for(self, endpoint: Optional[str]) -> Timeout:
+        """
+        Получить таймаут для эндпоинта.
+
+        Args:
+            endpoint (Optional[str]): Имя эндпоинта.
+        """
+        return self.__timeouts.get(endpoint, self.__default_timeout)
+
+    def set_timeout(self, endpoint: str, timeout: Timeout) -> None:
+        """
+        Установить таймаут для эндпоинта.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            timeout (Timeout): Таймаут в секундах или пара
+                (таймаут соединения, таймаут чтения).
+        """
+        self.__timeouts[endpoint] = timeout
+
+    @property
+    def pool_size(self) -> int:
+        """Получить размер пула соединений."""
+        return self.__pool_size
+
+    def close(self) -> None:
+        """Закрыть все соединения пула."""
+        self.__session.close()
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Получить общий для процесса HTTP-клиент."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HTTPClient()
+    return _http_client
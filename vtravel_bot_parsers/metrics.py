@@ -0,0 +1,354 @@
+"""
+Метрики бота в формате Prometheus (text exposition format 0.0.4).
+
+Гистограммы длительности и счетчики ошибок внешних вызовов (API Hotels,
+Deep Translate, Telegram) и обработчиков бота. Запись значения - поиск
+в словаре и сложение под блокировкой метрики, поэтому метрики можно
+не отключать в рабочем режиме.
+
+Метрики отдает MetricsServer (vtravel_bot_services) по адресу /metrics.
+"""
+
+import abc
+import asyncio
+import bisect
+import functools
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# границы корзин гистограмм длительности, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+def _format_value(value: float) -> str:
+    """Записать значение метрики."""
+    if value == math.inf:
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Записать метки метрики: {name="value",...}."""
+    if not names:
+        return ''
+    return '{' + ','.join(
+        '{0}="{1}"'.format(name, str(value).replace('\\', '\\\\')
+                           .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)) + '}'
+
+
+class _Metric(abc.ABC):
+    """Базовая метрика: имя, описание, метки."""
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _check_labels(self, values: Tuple[str, ...]) -> None:
+        if len(values) != len(self.labelnames):
+            raise ValueError('Метрика {0}: ожидаются метки {1}'.format(
+                self.name, self.labelnames))
+
+    @abc.abstractmethod
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...],
+                                    float]]:
+        """Получить значения: (имя, имена меток, метки, значение)."""
+
+    def render(self) -> str:
+        """Записать метрику в формате Prometheus."""
+        lines = ['# HELP {0} {1}'.format(self.name, self.documentation),
+                 '# TYPE {0} {1}'.format(self.name, self.kind)]
+        for name, labelnames, values, value in self.samples():
+            lines.append('{0}{1} {2}'.format(
+                name, _format_labels(labelnames, values),
+                _format_value(value)))
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """
+    Счетчик - только растет.
+
+    Методы:
+        - inc: Увеличить значение.
+        - value: Получить значение.
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.__values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        """
+        Увеличить значение.
+
+        Args:
+            *label_values (str): Значения меток в порядке labelnames.
+            amount (float): Приращение.
+        """
+        self._check_labels(label_values)
+        with self._lock:
+            self.__values[label_values] = self.__values.get(
+                label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        """Получить значение счетчика с заданными метками."""
+        with self._lock:
+            return self.__values.get(label_values, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self.__values.items())
+        return [(self.name, self.labelnames, labels, value)
+                for labels, value in values]
+
+
+class Histogram(_Metric):
+    """
+    Гистограмма - количество значений по корзинам, сумма и количество.
+
+    Методы:
+        - observe: Учесть значение.
+        - count: Получить количество значений.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.__buckets = tuple(sorted(buckets))
+        # [количество по корзинам (последняя - +Inf), сумма]
+        self.__values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Учесть значение.
+
+        Args:
+            value (float): Значение (например, длительность в секундах).
+            *label_values (str): Значения меток в порядке labelnames.
+        """
+        self._check_labels(label_values)
+        index = bisect.bisect_left(self.__buckets, value)
+        with self._lock:
+            series = self.__values.get(label_values)
+            if series is None:
+                series = self.__values[label_values] = [
+                    [0] * (len(self.__buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *label_values: str) -> int:
+        """Получить количество значений с заданными метками."""
+        with self._lock:
+            series = self.__values.get(label_values)
+            return sum(series[0]) if series is not None else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, (list(series[0]), series[1]))
+                            for labels, series in self.__values.items())
+        bucket_labelnames = self.labelnames + ('le',)
+        samples = []
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.__buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', bucket_labelnames,
+                                labels + (_format_value(bound),),
+                                cumulative))
+            samples.append((self.name + '_sum', self.labelnames, labels,
+                            total))
+            samples.append((self.name + '_count', self.labelnames, labels,
+                            cumulative))
+        return samples
+
+
+class Gauge(_Metric):
+    """
+    Текущее значение, которое вычисляется функцией при чтении метрик.
+
+    Методы:
+        - set_function: Установить функцию значения.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str,
+                 function: Callable[[], float] = None):
+        super().__init__(name, documentation)
+        self.__function = function
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """
+        Установить функцию значения. None - метрика без значения.
+
+        Args:
+            function (Callable[[], float]): Функция без аргументов.
+        """
+        self.__function = function
+
+    def samples(self):
+        if self.__function is None:
+            return []
+        return [(self.name, (), (), float(self.__function()))]
+
+
+class MetricsRegistry:
+    """
+    Набор метрик процесса.
+
+    Методы:
+        - counter: Создать счетчик.
+        - histogram: Создать гистограмму.
+        - gauge: Создать метрику текущего значения.
+        - render: Записать все метрики в формате Prometheus.
+    """
+    def __init__(self):
+        self.__metrics: Dict[str, _Metric] = {}
+        self.__lock = threading.Lock()
+
+    def __register(self, metric: _Metric) -> Any:
+        with self.__lock:
+            if metric.name in self.__metrics:
+                raise ValueError('Метрика {0} уже создана'.format(
+                    metric.name))
+            self.__metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> Counter:
+        """Создать счетчик."""
+        return self.__register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Создать гистограмму."""
+        return self.__register(Histogram(name, documentation, labelnames,
+                                         buckets))
+
+    def gauge(self, name: str, documentation: str,
+              function: Callable[[], float] = None) -> Gauge:
+        """Создать метрику текущего значения."""
+        return self.__register(Gauge(name, documentation, function))
+
+    def render(self) -> str:
+        """Записать все метрики в формате Prometheus."""
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        rendered = []
+        for metric in metrics:
+            try:
+                rendered.append(metric.render())
+            except Exception as error_message:
+                rendered.append('# {0}: {1}'.format(metric.name,
+                                                    error_message))
+        return '\n'.join(rendered) + '\n'
+
+
+def timed(histogram: Histogram, errors: Counter = None,
+          label: str = None) -> Callable[[Callable[..., Any]],
+                                         Callable[..., Any]]:
+    """
+    Декоратор: учитывать длительность вызова функции (или корутины)
+    в гистограмме, а исключения - в счетчике ошибок.
+
+    Args:
+        histogram (Histogram): Гистограмма с одной меткой.
+        errors (Counter) = None: Счетчик ошибок с метками
+            (имя вызова, класс исключения).
+        label (str) = None: Имя вызова. По умолчанию - __qualname__.
+    """
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        name = label or function.__qualname__
+
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                except BaseException as error:
+                    if errors is not None:
+                        errors.inc(name, type(error).__name__)
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - started, name)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except BaseException as error:
+                if errors is not None:
+                    errors.inc(name, type(error).__name__)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, name)
+
+        return wrapper
+
+    return decorator
+
+
+_metrics_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Получить общий для процесса набор метрик."""
+    return _metrics_registry
+
+
+API_CALL_DURATION = _metrics_registry.histogram(
+    'vtravel_api_call_duration_seconds',
+    'Длительность вызова методов ParseHotels и TextTranslator '
+    '(с кэшем и повторами).', ('call',))
+API_CALL_ERRORS = _metrics_registry.counter(
+    'vtravel_api_call_errors_total',
+    'Исключения методов ParseHotels и TextTranslator.', ('call', 'error'))
+HTTP_REQUEST_DURATION = _metrics_registry.histogram(
+    'vtravel_http_request_duration_seconds',
+    'Длительность HTTP-запроса к API (одна попытка).',
+    ('endpoint', 'status'))
+TELEGRAM_REQUEST_DURATION = _metrics_registry.histogram(
+    'vtravel_telegram_request_duration_seconds',
+    'Длительность запроса к Telegram (без ожидания лимита частоты).',
+    ('method',))
+TELEGRAM_REQUEST_ERRORS = _metrics_registry.counter(
+    'vtravel_telegram_request_errors_total',
+    'Ошибки запросов к Telegram.', ('method', 'error_code'))
+HANDLER_DURATION = _metrics_registry.histogram(
+    'vtravel_handler_duration_seconds',
+    'Длительность обработчиков обновлений бота.', ('handler',))
+CONVERSATIONS_IN_FLIGHT = _metrics_registry.gauge(
+    'vtravel_conversations_in_flight',
+    'Количество незавершенных диалогов.')
+UPDATE_QUEUE_DEPTH = _metrics_registry.gauge(
+    'vtravel_update_queue_depth',
+    'Количество обновлений, ожидающих обработки.')
+CIRCUIT_STATE_CHANGES = _metrics_registry.counter(
+    'vtravel_circuit_state_changes_total',
+    'Переключения выключателей эндпоинтов API.', ('endpoint', 'state'))
+STALE_RESPONSES = _metrics_registry.counter(
+    'vtravel_stale_responses_total',
+    'Ответы из кэша после TTL, пока API недоступно.', ('endpoint',))
+GAZETTEER_LOOKUPS = _metrics_registry.counter(
+    'vtravel_gazetteer_lookups_total',
+    'Поиск города в справочнике направлений (exact, fuzzy, miss).',
+    ('result',))
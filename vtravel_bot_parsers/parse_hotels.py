@@ -3,11 +3,82 @@ API: Hotels
 https://rapidapi.com/apidojo/api/hotels4/
 """
 
-from typing import Dict, Any, List
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (Dict, Any, Callable, Iterator, List, Optional, Tuple,
+                    Union)
 
-import requests
+from config_bot import (CACHE_TTL_NEGATIVE, HEADERS_BOT, HOTELS_API_URL,
+                        PHOTO_FETCH_CONCURRENCY)
+from .circuit_breaker import (CLOSED, CircuitBreaker, Revalidator,
+                              get_circuit_breaker, get_revalidator)
+from .hotel_summary import HotelSummary
+from .http_client import HTTPClient, get_http_client
+from .metrics import (API_CALL_DURATION, API_CALL_ERRORS, STALE_RESPONSES,
+                      timed)
+from .response_cache import ResponseCache, get_response_cache, mark_stale
+from .single_flight import SingleFlight, get_single_flight
+from .tracing import current_span, propagate_context, traced
 
-from config_bot import HEADERS_BOT
+
+def has_search_suggestions(response_json: Any) -> bool:
+    """
+    Проверить, найдено ли хотя бы одно месторасположение
+    в ответе locations/v2/search.
+
+    Args:
+        response_json (Any): Ответ API.
+    """
+    try:
+        return any(group.get('entities')
+                   for group in response_json.get('suggestions'))
+    except (AttributeError, TypeError):
+        return False
+
+
+# максимальный размер страницы properties/list
+MAX_PAGE_SIZE = 25
+
+
+def get_hotels_page(response_json: Any,
+                    page_size: int) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Получить отели из ответа properties/list и признак того,
+    что есть следующая страница.
+
+    Args:
+        response_json (Any): Ответ API.
+        page_size (int): Запрошенный размер страницы.
+
+    Raises:
+        ValueError: Если не удалось получить отели по ключам.
+    """
+    try:
+        search_results = response_json['data']['body']['searchResults']
+        hotels = search_results['results']
+    except (KeyError, TypeError) as error_message:
+        raise ValueError(
+            'Ошибка поиска отелей по ключу {0}'.format(error_message))
+
+    if not hotels:
+        return [], False
+    pagination = search_results.get('pagination')
+    if pagination:
+        return hotels, bool(pagination.get('nextPageNumber'))
+    return hotels, len(hotels) >= page_size
+
+
+def has_hotels(response_json: Any) -> bool:
+    """
+    Проверить, найден ли хотя бы один отель в ответе properties/list.
+
+    Args:
+        response_json (Any): Ответ API.
+    """
+    try:
+        return bool(response_json['data']['body']['searchResults']['results'])
+    except (KeyError, TypeError):
+        return False
 
 
 class ParseHotels:
@@ -19,19 +90,58 @@ class ParseHotels:
         - get_search_results_by_city: Получить результаты поиска по городу.
         - get_list_of_hotels_with_parameters: Получить список отелей
             с параметрами.
+        - iterate_hotels: Получать отели с параметрами постранично
+            по мере перебора.
         - get_hotel_photo: Получить фото отеля.
+        - get_photos_of_hotels: Получить фото нескольких отелей параллельно.
         - collect_brief_information_about_hotels: Составить краткую информацию
             из полученных данных отелей.
     """
-    def __init__(self):
+    def __init__(self, client: HTTPClient = None,
+                 cache: ResponseCache = None,
+                 flights: SingleFlight = None,
+                 base_url: str = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 revalidator: Revalidator = None):
+        """
+        Args:
+            client (HTTPClient) = None: HTTP-клиент для запросов к API.
+                По умолчанию - общий для процесса пул соединений.
+            cache (ResponseCache) = None: Кэш ответов API.
+                По умолчанию - общий для процесса кэш.
+            flights (SingleFlight) = None: Объединение одинаковых
+                одновременных запросов. По умолчанию - общее для процесса.
+            base_url (str) = None: Базовый URL API.
+                По умолчанию - HOTELS_API_URL.
+            circuit_breaker (CircuitBreaker) = None: Выключатели
+                эндпоинтов API (те же, что у HTTP-клиента).
+                По умолчанию - общие для процесса.
+            revalidator (Revalidator) = None: Фоновое обновление
+                устаревших ответов. По умолчанию - общее для процесса.
+        """
+        self.__client = client or get_http_client()
+        self.__cache = cache if cache is not None else get_response_cache()
+        self.__flights = flights if flights is not None \
+            else get_single_flight()
+        self.__circuit_breaker = circuit_breaker \
+            if circuit_breaker is not None else get_circuit_breaker()
+        self.__revalidator = revalidator if revalidator is not None \
+            else get_revalidator()
+        self.__base_url = (base_url or HOTELS_API_URL).rstrip('/')
         self.__headers = eval(HEADERS_BOT)
         self.__currency = 'RUB'
         self.__locale = 'ru_RU'
 
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
     def get_search_results_by_city(
                     self, city_to_search: str,) -> Dict[str, Any]:
         """
         Получить результаты поиска по городу.
+        Успешный ответ сохраняется в кэш ответов API (пустой - на
+        CACHE_TTL_NEGATIVE секунд). Одинаковые одновременные запросы
+        выполняются один раз. Если API недоступно - возвращается
+        последний успешный ответ, отмеченный mark_stale.
 
         Args:
             city_to_search (str): Город для поиска.
@@ -39,34 +149,115 @@ class ParseHotels:
         if city_to_search.isdigit():
             raise ValueError('Введенные данные состоят из цифр.')
 
-        url = 'https://hotels4.p.rapidapi.com/locations/v2/search'
+        cache_key = self.__cache.make_key(city_to_search, self.__locale,
+                                          self.__currency)
+        response_json = self.__cache.get('locations/v2/search', cache_key)
+        if response_json is not None:
+            return response_json
+
+        return self.__fetch(
+            'locations/v2/search', cache_key,
+            lambda: self.__request_search_results(city_to_search, cache_key))
+
+    def __fetch(self, endpoint: str, cache_key: Tuple[str, ...],
+                request: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Запросить ответ у API (одинаковые одновременные запросы -
+        один раз). Если API недоступно - вернуть последний успешный
+        ответ из кэша (mark_stale): пока выключатель эндпоинта
+        не замкнут - не обращаясь к API, с обновлением ответа в фоне.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            cache_key (Tuple[str, ...]): Ключ запроса в кэше.
+            request (Callable[[], Dict[str, Any]]): Запрос к API.
+
+        Raises:
+            ConnectionError: Если API недоступно и ответа в кэше нет.
+        """
+        flight_key = (endpoint, cache_key)
+        if self.__circuit_breaker.state(endpoint) != CLOSED:
+            response_json = self.__get_stale(endpoint, cache_key)
+            if response_json is not None:
+                self.__revalidator.submit(
+                    flight_key,
+                    lambda: self.__flights.do(flight_key, request))
+                return response_json
+
+        try:
+            return self.__flights.do(flight_key, request)
+        except ConnectionError:
+            response_json = self.__get_stale(endpoint, cache_key)
+            if response_json is None:
+                raise
+            return response_json
+
+    def __get_stale(self, endpoint: str,
+                    cache_key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """Получить из кэша последний ответ, отмеченный mark_stale."""
+        response_json = self.__cache.get_stale(endpoint, cache_key)
+        if response_json is None:
+            return None
+        STALE_RESPONSES.inc(endpoint)
+        span = current_span()
+        if span is not None:
+            span.attributes['stale'] = True
+        return mark_stale(response_json)
+
+    def __request_search_results(
+            self, city_to_search: str,
+            cache_key: Tuple[str, ...]) -> Dict[str, Any]:
+        """Запросить результаты поиска по городу у API."""
+        # ответ мог появиться в кэше, пока ждали предыдущий запрос
+        response_json = self.__cache.get('locations/v2/search', cache_key)
+        if response_json is not None:
+            return response_json
+
+        url = '{0}/locations/v2/search'.format(self.__base_url)
         querystring = {'query': f'{city_to_search}',
                        'locale': f'{self.__locale}',
                        'currency': f'{self.__currency}'}
         try:
-            response = requests.get(url=url,
-                                    headers=self.__headers,
-                                    params=querystring,
-                                    timeout=10)
+            response = self.__client.get(url=url,
+                                         endpoint='locations/v2/search',
+                                         headers=self.__headers,
+                                         params=querystring)
             response_json = response.json()
         except Exception:
             raise ConnectionError(
                 'Не удалось получить результаты поиска по городу - {0}'.format(
                     city_to_search))
+
+        if not response.ok:
+            raise ConnectionError(
+                'API поиска по городу вернуло ошибку {0}'.format(
+                    response.status_code))
+        negative = not has_search_suggestions(response_json)
+        self.__cache.put('locations/v2/search', cache_key, response_json,
+                         ttl=CACHE_TTL_NEGATIVE if negative else None,
+                         negative=negative)
         return response_json
 
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
     def get_list_of_hotels_with_parameters(
                             self, destination_id: str,
                             sort_mode: str,
                             price_min: str = None,
                             price_max: str = None,
-                            distance_label: str = None) -> Dict[str, Any]:
+                            distance_label: str = None,
+                            page_number: int = 1,
+                            page_size: int = MAX_PAGE_SIZE) -> Dict[str, Any]:
         """
-        Получить список отелей с параметрами.
+        Получить список отелей с параметрами (одну страницу).
         Если заданы: min price, max price - получить выборку отелей
             с заданным прайсом.
         Если задан параметр distance_to_center - получить выборку отелей
             с заданной дистанцией до центра.
+        Успешный ответ сохраняется в кэш ответов API (пустой - на
+        CACHE_TTL_NEGATIVE секунд). Одинаковые одновременные запросы
+        выполняются один раз. Если API недоступно - возвращается
+        последний успешный ответ, отмеченный mark_stale.
 
         Args:
             destination_id (str): id месторасположения отелей для поиска.
@@ -78,6 +269,8 @@ class ParseHotels:
             price_min (str) = None: Минимальная цена для выборки отелей.
             price_max (str) = None: Максимальная цена для выборки отелей.
             distance_label (str) = None: Метка выбора локации.
+            page_number (int): Номер страницы (с 1).
+            page_size (int): Размер страницы (не больше MAX_PAGE_SIZE).
         """
         correct_modes_for_sorting = ('PRICE', 'PRICE_HIGHEST_FIRST',
                                      'DISTANCE_FROM_LANDMARK')
@@ -86,9 +279,122 @@ class ParseHotels:
                 'Некорректный режим для сортировки отелей.'
             )
 
-        url = "https://hotels4.p.rapidapi.com/properties/list"
-        querystring = {f"destinationId": {destination_id}, "pageNumber": "1",
-                       "pageSize": "25", "checkIn": "2020-01-08",
+        if not 1 <= page_size <= MAX_PAGE_SIZE or page_number < 1:
+            raise ValueError(
+                'Некорректная страница списка отелей.'
+            )
+
+        cache_key = self.__cache.make_key(destination_id, sort_mode,
+                                          price_min, price_max,
+                                          distance_label, self.__locale,
+                                          self.__currency, page_number,
+                                          page_size)
+        response_json = self.__cache.get('properties/list', cache_key)
+        if response_json is not None:
+            return response_json
+
+        return self.__fetch(
+            'properties/list', cache_key,
+            lambda: self.__request_list_of_hotels(
+                destination_id, sort_mode, price_min, price_max,
+                distance_label, page_number, page_size, cache_key))
+
+    def iterate_hotels(self, destination_id: str, sort_mode: str,
+                       price_min: str = None, price_max: str = None,
+                       distance_label: str = None, limit: int = None,
+                       prefetch_threshold: int = 5, page_size: int = None
+                       ) -> Iterator[Dict[str, Any]]:
+        """
+        Получать отели с параметрами постранично по мере перебора.
+
+        Размер страницы по умолчанию - limit (не больше MAX_PAGE_SIZE),
+        поэтому для небольшой подборки запрашивается ровно нужное
+        количество отелей. Размер страницы входит в ключ кэша ответов:
+        перебор с разными limit по одним параметрам поиска берет
+        из кэша один ответ, только если page_size задан одинаковым.
+        Когда до конца страницы остается prefetch_threshold отелей,
+        а limit еще не набран, следующая страница запрашивается в фоне.
+
+        Args:
+            destination_id (str): id месторасположения отелей для поиска.
+            sort_mode (str): Сортировка отелей (см.
+                get_list_of_hotels_with_parameters).
+            price_min (str) = None: Минимальная цена для выборки отелей.
+            price_max (str) = None: Максимальная цена для выборки отелей.
+            distance_label (str) = None: Метка выбора локации.
+            limit (int) = None: Максимальное количество отелей.
+                По умолчанию - все найденные.
+            prefetch_threshold (int): За сколько отелей до конца страницы
+                запрашивать следующую.
+            page_size (int) = None: Размер страницы (не больше
+                MAX_PAGE_SIZE). По умолчанию - limit.
+
+        Raises:
+            ConnectionError: Если не удалось получить данные от API.
+            ValueError: Если ответ API некорректен.
+        """
+        if limit is not None and limit < 1:
+            return
+        if page_size is None:
+            page_size = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+
+        def get_page(number: int) -> Tuple[List[Dict[str, Any]], bool]:
+            response_json = self.get_list_of_hotels_with_parameters(
+                destination_id=destination_id, sort_mode=sort_mode,
+                price_min=price_min, price_max=price_max,
+                distance_label=distance_label, page_number=number,
+                page_size=page_size)
+            return get_hotels_page(response_json, page_size)
+
+        executor = None
+        next_page: Optional['Future'] = None
+        try:
+            page_number = 1
+            returned = 0
+            hotels, has_next_page = get_page(page_number)
+            while True:
+                need_next_page = has_next_page and (
+                    limit is None or returned + len(hotels) < limit)
+                next_page = None
+                for index, hotel in enumerate(hotels):
+                    if returned == limit:
+                        return
+                    if (need_next_page and next_page is None
+                            and len(hotels) - index <= prefetch_threshold):
+                        if executor is None:
+                            executor = ThreadPoolExecutor(
+                                max_workers=1,
+                                thread_name_prefix='hotel-pages')
+                        next_page = executor.submit(
+                            propagate_context(get_page), page_number + 1)
+                    yield hotel
+                    returned += 1
+
+                if next_page is None:
+                    return
+                page_number += 1
+                hotels, has_next_page = next_page.result()
+        finally:
+            # перебор остановлен раньше - ненужная страница не запрашивается
+            if next_page is not None:
+                next_page.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def __request_list_of_hotels(
+            self, destination_id: str, sort_mode: str, price_min: str,
+            price_max: str, distance_label: str, page_number: int,
+            page_size: int, cache_key: Tuple[str, ...]) -> Dict[str, Any]:
+        """Запросить список отелей с параметрами у API."""
+        # ответ мог появиться в кэше, пока ждали предыдущий запрос
+        response_json = self.__cache.get('properties/list', cache_key)
+        if response_json is not None:
+            return response_json
+
+        url = '{0}/properties/list'.format(self.__base_url)
+        querystring = {f"destinationId": {destination_id},
+                       "pageNumber": str(page_number),
+                       "pageSize": str(page_size), "checkIn": "2020-01-08",
                        "checkOut": "2020-01-15", "adults1": "1",
                        f"sortOrder": {sort_mode},
                        f"locale": {self.__locale},
@@ -101,16 +407,27 @@ class ParseHotels:
             querystring['landmarkIds'] = f'{distance_label}'
 
         try:
-            response = requests.get(url=url,
-                                    headers=self.__headers,
-                                    params=querystring,
-                                    timeout=10)
+            response = self.__client.get(url=url,
+                                         endpoint='properties/list',
+                                         headers=self.__headers,
+                                         params=querystring)
             response_json = response.json()
         except Exception:
             raise ConnectionError(
                 'Не удалось получить результаты поиска по заданным параметрам')
+
+        if not response.ok:
+            raise ConnectionError(
+                'API списка отелей вернуло ошибку {0}'.format(
+                    response.status_code))
+        negative = not has_hotels(response_json)
+        self.__cache.put('properties/list', cache_key, response_json,
+                         ttl=CACHE_TTL_NEGATIVE if negative else None,
+                         negative=negative)
         return response_json
 
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
     def get_hotel_photo(self, hotel_id: str,
                         number_of_photos: int) -> Dict[str, Any]:
         """
@@ -120,15 +437,16 @@ class ParseHotels:
             hotel_id (int): Id отеля.
             number_of_photos (int): Необходимое количество фотографий.
         """
-        url = "https://hotels4.p.rapidapi.com/properties/get-hotel-photos"
+        url = '{0}/properties/get-hotel-photos'.format(self.__base_url)
         querystring = {'id': f'{hotel_id}'}
         # querystring = {'id': '1505932768'}
 
         try:
-            response = requests.get(url=url,
+            response = self.__client.get(
+                                    url=url,
+                                    endpoint='properties/get-hotel-photos',
                                     headers=self.__headers,
-                                    params=querystring,
-                                    timeout=10)
+                                    params=querystring)
         except Exception:
             raise ConnectionError('Не удалось получить фото отеля')
 
@@ -139,35 +457,78 @@ class ParseHotels:
             raise ValueError('Ошибка поиска фотографий по ключу "hotelImages"')
         return result
 
+    def get_photos_of_hotels(
+            self, hotel_ids: List[str], number_of_photos: int,
+            max_workers: int = PHOTO_FETCH_CONCURRENCY
+    ) -> Iterator[Union[List[Dict[str, Any]], Exception]]:
+        """
+        Получить фото нескольких отелей параллельно.
+
+        Запросы запускаются сразу при вызове (не более max_workers
+        одновременно), результаты возвращаются по мере готовности
+        в порядке hotel_ids. Если фото отеля получить не удалось -
+        вместо списка фото возвращается исключение
+        (ConnectionError или ValueError).
+
+        Args:
+            hotel_ids (List[str]): Id отелей.
+            number_of_photos (int): Необходимое количество фотографий.
+            max_workers (int): Максимальное количество одновременных
+                запросов к API.
+        """
+        def get_photo_or_error(
+                hotel_id: str) -> Union[List[Dict[str, Any]], Exception]:
+            try:
+                return self.get_hotel_photo(hotel_id=hotel_id,
+                                            number_of_photos=number_of_photos)
+            except (ConnectionError, ValueError) as error_message:
+                return error_message
+
+        if not hotel_ids:
+            return iter(())
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(hotel_ids))),
+            thread_name_prefix='hotel-photos')
+        hotels_photos = executor.map(propagate_context(get_photo_or_error),
+                                     hotel_ids)
+        executor.shutdown(wait=False)
+        return hotels_photos
+
     @classmethod
     def collect_brief_information_about_hotels(
                         cls, number_of_hotels: int,
-                        hotels: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+                        hotels: List[Dict[str, Any]],
+                        price_min: float = None,
+                        price_max: float = None) -> List[HotelSummary]:
         """
         Составить краткую информацию из полученных данных отелей.
+        Если задан диапазон цен (bestdeal) - отели, цена которых вне
+        диапазона, в подборку не попадают, а подборка сортируется
+        по расстоянию до центра (числовые поля HotelSummary).
 
         Args:
             number_of_hotels (int): Количество отелей для подборки результатов.
             hotels (List[Dict[str, Any]]): Список отелей с информацией о них.
+            price_min (float) = None: Минимальная цена отеля.
+            price_max (float) = None: Максимальная цена отеля.
         """
         maximum_sample_result = 20
         if number_of_hotels < maximum_sample_result:
             maximum_sample_result = number_of_hotels
 
-        selection_with_required_number_of_hotels = hotels[:maximum_sample_result]
-        short_description_of_hotels = [
-            {'name': hotel_info.get('name', 'no name'),
-             'address': hotel_info.get('address', 'no address').get(
-                                        'streetAddress', 'no address'),
-             'id': hotel_info.get('id', 'no id'),
-             'landmarks': hotel_info.get('landmarks')[0].get(
-                 'distance', 'no distance'),
-             'price': hotel_info.get('ratePlan', 'no price').get(
-                 'price', 'no price').get('current', 'no price')
-             }
-            for hotel_info in selection_with_required_number_of_hotels
-        ]
-        return short_description_of_hotels
+        short_description_of_hotels = (HotelSummary.from_api(hotel_info)
+                                       for hotel_info in hotels)
+        if price_min is None and price_max is None:
+            return list(itertools.islice(short_description_of_hotels,
+                                         maximum_sample_result))
+
+        selection_of_hotels = list(itertools.islice(
+            (hotel for hotel in short_description_of_hotels
+             if hotel.is_price_in_range(price_min, price_max)),
+            maximum_sample_result))
+        selection_of_hotels.sort(key=HotelSummary.distance_sort_key)
+        return selection_of_hotels
 
     @property
     def currency(self) -> str:
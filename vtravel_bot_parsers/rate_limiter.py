@@ -0,0 +1,262 @@
+"""
+Ограничение частоты исходящих запросов (token bucket).
+
+Общая корзина ограничивает суммарную частоту, корзины по ключам
+(id чата, хост API) - частоту для каждого ключа. Запрос сверх лимита
+не отклоняется, а ждет своей очереди. После ответа 429 корзина
+приостанавливается на retry_after секунд.
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Hashable, Iterator, Optional
+
+from config_bot import API_BURST, API_RATE
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """
+    Получить паузу в секундах из заголовка Retry-After
+    (число секунд или HTTP-дата).
+
+    Args:
+        value (Optional[str]): Значение заголовка.
+        default (float): Пауза, если заголовка нет или он некорректен.
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return default
+
+
+class TokenBucket:
+    """
+    Корзина токенов с очередью (GCRA).
+
+    Вместо количества токенов хранится момент, когда корзина снова
+    будет полной. Запрос разрешен, если в корзине есть хотя бы один
+    токен; его стоимость списывается сразу (в долг), поэтому следующие
+    запросы ждут дольше.
+
+    Методы:
+        - reserve: Занять место в очереди, получить время отправки.
+        - take: Взять токены без ожидания (или отказ).
+        - pause: Не разрешать запросы заданное время.
+    """
+    __slots__ = ('rate', 'burst', 'full_at')
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate (float): Запросов в секунду.
+            burst (int): Размер корзины (запросов подряд без ожидания).
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError('Лимит запросов должен быть больше 0.')
+        self.rate = rate
+        self.burst = burst
+        self.full_at = 0.0
+
+    def reserve(self, now: float, cost: int = 1) -> float:
+        """
+        Занять место в очереди. Вернуть время, когда запрос можно
+        отправить (не раньше now).
+
+        Args:
+            now (float): Текущее время (time.monotonic) или время,
+                раньше которого запрос все равно не будет отправлен.
+            cost (int): Стоимость запроса в токенах.
+        """
+        full_at = max(self.full_at, now)
+        send_at = max(now, full_at - (self.burst - 1) / self.rate)
+        self.full_at = full_at + cost / self.rate
+        return send_at
+
+    def take(self, now: float, cost: int = 1) -> bool:
+        """
+        Взять токены без ожидания: False (и ничего не списывается),
+        если в корзине сейчас нет токена.
+
+        Args:
+            now (float): Текущее время (time.monotonic).
+            cost (int): Стоимость запроса в токенах.
+        """
+        full_at = max(self.full_at, now)
+        if full_at - (self.burst - 1) / self.rate > now:
+            return False
+        self.full_at = full_at + cost / self.rate
+        return True
+
+    def pause(self, now: float, seconds: float) -> None:
+        """
+        Не разрешать запросы seconds секунд, затем - без всплеска.
+
+        Args:
+            now (float): Текущее время (time.monotonic).
+            seconds (float): Длительность паузы.
+        """
+        self.full_at = max(self.full_at,
+                           now + seconds + (self.burst - 1) / self.rate)
+
+
+class RateLimiter:
+    """
+    Ограничение частоты запросов: общая корзина и корзины по ключам.
+    Лимит, заданный как None, не ограничивается.
+
+    Методы:
+        - acquire: Дождаться разрешения на запрос.
+        - acquire_async: Дождаться разрешения на запрос (корутина).
+        - pause: Приостановить запросы (ответ 429, retry_after).
+    """
+    def __init__(self, rate: Optional[float] = None, burst: int = 1,
+                 key_rate: Optional[float] = None, key_burst: int = 1):
+        """
+        Args:
+            rate (Optional[float]) = None: Общий лимит запросов в секунду.
+            burst (int): Размер общей корзины.
+            key_rate (Optional[float]) = None: Лимит запросов в секунду
+                для одного ключа.
+            key_burst (int): Размер корзины одного ключа.
+        """
+        if key_rate is not None and (key_rate <= 0 or key_burst < 1):
+            raise ValueError('Лимит запросов должен быть больше 0.')
+
+        self.__bucket = TokenBucket(rate, burst) if rate is not None \
+            else None
+        self.__key_rate = key_rate
+        self.__key_burst = key_burst
+        self.__key_buckets: Dict[Hashable, TokenBucket] = {}
+        self.__lock = threading.Lock()
+        self.__reservations = 0
+        self.__delayed = 0
+
+    def acquire(self, key: Hashable = None, cost: int = 1,
+                key_cost: int = None) -> float:
+        """
+        Дождаться разрешения на запрос. Вернуть время ожидания.
+
+        Args:
+            key (Hashable) = None: Ключ (id чата, хост API).
+            cost (int): Стоимость запроса в токенах.
+            key_cost (int) = None: Стоимость запроса в корзине ключа.
+                По умолчанию - cost.
+        """
+        waited = 0.0
+        for delay in self.__schedule(key, cost, key_cost):
+            if delay > 0:
+                time.sleep(delay)
+                waited += delay
+        self.__count(waited)
+        return waited
+
+    async def acquire_async(self, key: Hashable = None, cost: int = 1,
+                            key_cost: int = None) -> float:
+        """
+        Дождаться разрешения на запрос, не блокируя событийный цикл.
+        Вернуть время ожидания.
+
+        Args:
+            key (Hashable) = None: Ключ (id чата, хост API).
+            cost (int): Стоимость запроса в токенах.
+            key_cost (int) = None: Стоимость запроса в корзине ключа.
+                По умолчанию - cost.
+        """
+        waited = 0.0
+        for delay in self.__schedule(key, cost, key_cost):
+            if delay > 0:
+                await asyncio.sleep(delay)
+                waited += delay
+        self.__count(waited)
+        return waited
+
+    def pause(self, seconds: float, key: Hashable = None) -> None:
+        """
+        Приостановить запросы после ответа 429.
+        Если задан ключ с лимитом - только для ключа, иначе - все.
+
+        Args:
+            seconds (float): Длительность паузы (retry_after).
+            key (Hashable) = None: Ключ (id чата, хост API).
+        """
+        key_bucket = self.__get_key_bucket(key)
+        with self.__lock:
+            now = time.monotonic()
+            if key_bucket is not None:
+                key_bucket.pause(now, seconds)
+            elif self.__bucket is not None:
+                self.__bucket.pause(now, seconds)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Получить счетчики запросов и ожиданий."""
+        with self.__lock:
+            return {'reservations': self.__reservations,
+                    'delayed': self.__delayed,
+                    'keys': len(self.__key_buckets)}
+
+    def __schedule(self, key: Hashable, cost: int,
+                   key_cost: Optional[int]) -> Iterator[float]:
+        """
+        Задержки перед запросом: сначала - очередь ключа, затем - общая.
+        Место в общей очереди занимается, только когда подошла очередь
+        ключа, иначе ожидание одного чата задерживало бы все остальные.
+        """
+        for bucket, bucket_cost in (
+                (self.__get_key_bucket(key),
+                 cost if key_cost is None else key_cost),
+                (self.__bucket, cost)):
+            if bucket is None:
+                continue
+            with self.__lock:
+                now = time.monotonic()
+                delay = bucket.reserve(now, bucket_cost) - now
+            yield delay
+
+    def __count(self, waited: float) -> None:
+        with self.__lock:
+            self.__reservations += 1
+            if waited > 0:
+                self.__delayed += 1
+            if self.__reservations % 1000 == 0:
+                self.__drop_full_buckets(time.monotonic())
+
+    def __get_key_bucket(self, key: Hashable) -> Optional[TokenBucket]:
+        if key is None or self.__key_rate is None:
+            return None
+        with self.__lock:
+            bucket = self.__key_buckets.get(key)
+            if bucket is None:
+                bucket = self.__key_buckets[key] = TokenBucket(
+                    self.__key_rate, self.__key_burst)
+            return bucket
+
+    def __drop_full_buckets(self, now: float) -> None:
+        """Удалить полные корзины ключей - новая корзина не отличается."""
+        full = [key for key, bucket in self.__key_buckets.items()
+                if bucket.full_at <= now]
+        for key in full:
+            del self.__key_buckets[key]
+
+
+_api_rate_limiter = None
+_api_rate_limiter_lock = threading.Lock()
+
+
+def get_api_rate_limiter() -> RateLimiter:
+    """Получить общий лимит запросов к API (корзина на каждый хост)."""
+    global _api_rate_limiter
+    if _api_rate_limiter is None:
+        with _api_rate_limiter_lock:
+            if _api_rate_limiter is None:
+                _api_rate_limiter = RateLimiter(key_rate=API_RATE,
+                                                key_burst=API_BURST)
+    return _api_rate_limiter
@@ -0,0 +1,277 @@
+"""
+Кэш ответов API в памяти процесса.
+
+Записи хранятся с TTL, заданным для каждого эндпоинта, и вытесняются
+по LRU при превышении количества записей или суммарного размера.
+Устаревшая запись еще CACHE_MAX_STALE секунд доступна через get_stale -
+последний успешный ответ, пока эндпоинт API недоступен. Отрицательные
+ответы (ничего не найдено) через get_stale не отдаются: пользователь
+получит ошибку сервиса, а не ложное "ничего не найдено".
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from config_bot import (CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, CACHE_MAX_STALE,
+                        CACHE_TTL_HOTELS, CACHE_TTL_SEARCH)
+
+
+DEFAULT_TTLS: Dict[str, float] = {
+    'locations/v2/search': CACHE_TTL_SEARCH,
+    'properties/list': CACHE_TTL_HOTELS,
+}
+
+# признак ответа из кэша, который мог устареть (см. mark_stale)
+STALE_KEY = '_stale'
+
+
+def mark_stale(response_json: Any) -> Any:
+    """
+    Отметить ответ API из кэша как возможно устаревший.
+    Возвращается копия словаря с ключом STALE_KEY - запись кэша
+    не изменяется.
+
+    Args:
+        response_json (Any): Ответ API.
+    """
+    if isinstance(response_json, dict):
+        return {**response_json, STALE_KEY: True}
+    return response_json
+
+
+def is_stale(response_json: Any) -> bool:
+    """
+    Проверить, отмечен ли ответ API как возможно устаревший.
+
+    Args:
+        response_json (Any): Ответ API.
+    """
+    return isinstance(response_json, dict) \
+        and bool(response_json.get(STALE_KEY))
+
+
+class _Entry:
+    """
+    Запись кэша: значение, время устаревания, время, до которого
+    запись доступна через get_stale, размер в байтах и признак, что
+    устаревание записи уже учтено в счетчике expirations.
+    """
+    __slots__ = ('value', 'expires_at', 'stale_until', 'size', 'expired')
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float,
+                 size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.expired = False
+
+
+class ResponseCache:
+    """
+    Ограниченный TTL + LRU кэш ответов API.
+
+    Методы:
+        - make_key: Составить нормализованный ключ запроса.
+        - get: Получить ответ из кэша.
+        - get_stale: Получить ответ из кэша, в том числе устаревший.
+        - put: Сохранить ответ в кэш.
+        - set_ttl: Установить TTL для эндпоинта.
+        - clear: Очистить кэш.
+        - stats: Счетчики попаданий, промахов и вытеснений.
+    """
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES,
+                 ttls: Dict[str, float] = None,
+                 default_ttl: float = 300,
+                 max_stale: float = CACHE_MAX_STALE):
+        """
+        Args:
+            max_entries (int): Максимальное количество записей.
+            max_bytes (int): Максимальный суммарный размер записей (байт).
+            ttls (Dict[str, float]) = None: TTL в секундах по эндпоинтам,
+                дополняют DEFAULT_TTLS.
+            default_ttl (float): TTL для эндпоинтов без настройки.
+            max_stale (float): Сколько секунд после TTL запись
+                доступна через get_stale.
+        """
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError('Размер кэша должен быть больше 0.')
+
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__default_ttl = default_ttl
+        self.__max_stale = max_stale
+        self.__ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.__ttls.update(ttls)
+
+        self.__entries: 'OrderedDict[Tuple[str, Hashable], _Entry]' = \
+            OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+        self.__stale_hits = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> Tuple[str, ...]:
+        """
+        Составить нормализованный ключ запроса.
+
+        Строки приводятся к нижнему регистру, лишние пробелы удаляются,
+        None и пустые значения не различаются.
+
+        Args:
+            *parts: Значения параметров запроса.
+        """
+        key = []
+        for part in parts:
+            if part is None:
+                part = ''
+            key.append(' '.join(str(part).split()).casefold())
+        return tuple(key)
+
+    def get(self, endpoint: str, key: Hashable) -> Optional[Any]:
+        """
+        Получить ответ из кэша.
+        Возвращает None, если записи нет или она устарела.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            key (Hashable): Ключ запроса.
+        """
+        with self.__lock:
+            entry = self.__entries.get((endpoint, key))
+            if entry is None:
+                self.__misses += 1
+                return None
+            now = time.monotonic()
+            if entry.expires_at <= now:
+                if entry.stale_until <= now:
+                    self.__remove((endpoint, key))
+                # устаревшая запись остается для get_stale - считать
+                # ее устаревание один раз, а не при каждом чтении
+                if not entry.expired:
+                    entry.expired = True
+                    self.__expirations += 1
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end((endpoint, key))
+            self.__hits += 1
+            return entry.value
+
+    def get_stale(self, endpoint: str, key: Hashable) -> Optional[Any]:
+        """
+        Получить ответ из кэша, в том числе устаревший не более
+        max_stale секунд назад. Возвращает None, если записи нет
+        или запись отрицательная и устарела.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            key (Hashable): Ключ запроса.
+        """
+        with self.__lock:
+            entry = self.__entries.get((endpoint, key))
+            if entry is None or entry.stale_until <= time.monotonic():
+                return None
+            self.__stale_hits += 1
+            return entry.value
+
+    def put(self, endpoint: str, key: Hashable, value: Any,
+            ttl: float = None, negative: bool = False) -> None:
+        """
+        Сохранить ответ в кэш.
+        Ответ больше max_bytes не сохраняется.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            key (Hashable): Ключ запроса.
+            value (Any): Ответ API (JSON-совместимый объект).
+            ttl (float) = None: TTL записи в секундах.
+                По умолчанию - TTL эндпоинта.
+            negative (bool): Отрицательный ответ (ничего не найдено) -
+                после TTL не отдается через get_stale.
+        """
+        size = self.size_of(value)
+        if size > self.__max_bytes:
+            return
+
+        if ttl is None:
+            ttl = self.__ttls.get(endpoint, self.__default_ttl)
+        with self.__lock:
+            if (endpoint, key) in self.__entries:
+                self.__remove((endpoint, key))
+            expires_at = time.monotonic() + ttl
+            self.__entries[(endpoint, key)] = _Entry(
+                value, expires_at,
+                expires_at + (0 if negative else self.__max_stale), size)
+            self.__size += size
+
+            while (len(self.__entries) > self.__max_entries
+                   or self.__size > self.__max_bytes):
+                oldest_key = next(iter(self.__entries))
+                self.__remove(oldest_key)
+                self.__evictions += 1
+
+    def set_ttl(self, endpoint: str, ttl: float) -> None:
+        """
+        Установить TTL для эндпоинта.
+
+        Args:
+            endpoint (str): Имя эндпоинта.
+            ttl (float): Время жизни записи в секундах.
+        """
+        self.__ttls[endpoint] = ttl
+
+    def clear(self) -> None:
+        """Очистить кэш (счетчики сохраняются)."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    @staticmethod
+    def size_of(value: Any) -> int:
+        """Оценить размер ответа в байтах по его JSON-представлению."""
+        try:
+            return len(json.dumps(value, ensure_ascii=False).encode())
+        except (TypeError, ValueError):
+            return len(repr(value).encode())
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Получить счетчики кэша."""
+        with self.__lock:
+            return {'hits': self.__hits,
+                    'misses': self.__misses,
+                    'evictions': self.__evictions,
+                    'expirations': self.__expirations,
+                    'stale_hits': self.__stale_hits,
+                    'entries': len(self.__entries),
+                    'bytes': self.__size}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __remove(self, full_key: Tuple[str, Hashable]) -> None:
+        entry = self.__entries.pop(full_key)
+        self.__size -= entry.size
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Получить общий для процесса кэш ответов API."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache()
+    return _response_cache
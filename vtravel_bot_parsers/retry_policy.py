@@ -0,0 +1,105 @@
+"""
+Политика повторов запросов к API.
+
+Повторяются ответы 429 и 5xx и ошибки соединения (сброс, таймаут).
+Пауза перед повтором - Retry-After из ответа, если он есть, иначе
+экспоненциальная пауза со случайным разбросом (full jitter):
+случайное значение от 0 до min(max_delay, base_delay * 2 ** attempt),
+чтобы повторы многих обработчиков не приходили к API одновременно.
+Повтор, пауза перед которым не успевает до срока запроса
+пользователя (deadline), не выполняется.
+"""
+
+import random
+import threading
+from typing import Iterable, Optional
+
+from config_bot import API_RETRIES, API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY
+from .deadline import remaining_time
+from .rate_limiter import parse_retry_after
+
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class RetryPolicy:
+    """
+    Политика повторов запросов к API.
+
+    Методы:
+        - should_retry: Проверить, повторять ли запрос с таким ответом.
+        - next_delay: Получить паузу перед следующим повтором.
+    """
+    def __init__(self, max_retries: int = API_RETRIES,
+                 base_delay: float = API_RETRY_BASE_DELAY,
+                 max_delay: float = API_RETRY_MAX_DELAY,
+                 retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 seed: int = None):
+        """
+        Args:
+            max_retries (int): Количество повторов запроса.
+            base_delay (float): Пауза перед первым повтором (верхняя
+                граница разброса) в секундах.
+            max_delay (float): Максимальная пауза в секундах
+                (кроме Retry-After).
+            retry_statuses (Iterable[int]): Повторяемые коды ответа.
+            seed (int) = None: Начальное значение генератора разброса.
+        """
+        if max_retries < 0 or base_delay < 0 or max_delay < 0:
+            raise ValueError('Параметры повторов не могут быть '
+                             'отрицательными.')
+
+        self.__max_retries = max_retries
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__retry_statuses = frozenset(retry_statuses)
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+
+    def should_retry(self, status_code: int) -> bool:
+        """
+        Проверить, повторять ли запрос с таким кодом ответа.
+
+        Args:
+            status_code (int): Код ответа.
+        """
+        return status_code in self.__retry_statuses
+
+    def next_delay(self, attempt: int,
+                   retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Получить паузу в секундах перед повтором запроса.
+        None - не повторять: повторы закончились или пауза
+        не успевает до срока запроса.
+
+        Args:
+            attempt (int): Номер выполненной попытки (с 0).
+            retry_after (Optional[str]) = None: Заголовок Retry-After.
+        """
+        if attempt >= self.__max_retries:
+            return None
+
+        if retry_after:
+            delay = parse_retry_after(retry_after)
+        else:
+            with self.__lock:
+                delay = self.__random.uniform(0, min(
+                    self.__max_delay, self.__base_delay * 2 ** attempt))
+
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    @property
+    def max_retries(self) -> int:
+        """Получить количество повторов запроса."""
+        return self.__max_retries
+
+
+_retry_policy = RetryPolicy()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Получить общую для процесса политику повторов запросов к API."""
+    return _retry_policy
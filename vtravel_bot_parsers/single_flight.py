@@ -0,0 +1,166 @@
+"""
+Объединение одинаковых одновременных запросов к API (single-flight).
+
+Пока запрос с заданным ключом выполняется, повторные вызовы с тем же
+ключом не обращаются к API, а ждут и получают его результат
+(или его исключение).
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """Выполняющийся запрос: событие завершения, результат и ошибка."""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных запросов (потоки).
+
+    Методы:
+        - do: Выполнить функцию или дождаться результата такого же вызова.
+        - stats: Счетчики выполненных и объединенных вызовов.
+    """
+    def __init__(self):
+        self.__calls: Dict[Hashable, _Call] = {}
+        self.__lock = threading.Lock()
+        self.__executed = 0
+        self.__shared = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Выполнить функцию, если вызов с таким ключом сейчас не выполняется.
+        Иначе - дождаться его и вернуть тот же результат.
+
+        Args:
+            key (Hashable): Ключ запроса.
+            function (Callable[[], Any]): Запрос к API.
+
+        Raises:
+            Исключение функции - всем ожидающим вызовам.
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            if call is None:
+                call = self.__calls[key] = _Call()
+                self.__executed += 1
+                is_leader = True
+            else:
+                self.__shared += 1
+                is_leader = False
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error_message:
+            call.error = error_message
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+        return call.result
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Получить счетчики выполненных и объединенных вызовов."""
+        with self.__lock:
+            return {'executed': self.__executed,
+                    'shared': self.__shared,
+                    'in_flight': len(self.__calls)}
+
+
+class AsyncSingleFlight:
+    """
+    Объединение одинаковых одновременных запросов (корутины).
+    Интерфейс совпадает с SingleFlight, do - корутина.
+
+    Методы:
+        - do: Выполнить корутину или дождаться результата такого же вызова.
+        - stats: Счетчики выполненных и объединенных вызовов.
+    """
+    def __init__(self):
+        self.__calls: Dict[Hashable, 'asyncio.Future[Any]'] = {}
+        self.__executed = 0
+        self.__shared = 0
+
+    async def do(self, key: Hashable,
+                 function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнить корутину, если вызов с таким ключом сейчас
+        не выполняется. Иначе - дождаться его и вернуть тот же результат.
+
+        Args:
+            key (Hashable): Ключ запроса.
+            function (Callable[[], Awaitable[Any]]): Запрос к API.
+
+        Raises:
+            Исключение корутины - всем ожидающим вызовам.
+        """
+        call = self.__calls.get(key)
+        if call is not None:
+            self.__shared += 1
+            # отмена ожидающего не должна отменять общий запрос
+            return await asyncio.shield(call)
+
+        call = asyncio.get_running_loop().create_future()
+        self.__calls[key] = call
+        self.__executed += 1
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as error_message:
+            call.set_exception(error_message)
+            # исключение передано вызывающему, ожидающих может не быть
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self.__calls[key]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Получить счетчики выполненных и объединенных вызовов."""
+        return {'executed': self.__executed,
+                'shared': self.__shared,
+                'in_flight': len(self.__calls)}
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+_async_single_flight = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Получить общее для процесса объединение запросов."""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
+
+
+def get_async_single_flight() -> AsyncSingleFlight:
+    """Получить общее объединение запросов асинхронного движка."""
+    global _async_single_flight
+    if _async_single_flight is None:
+        _async_single_flight = AsyncSingleFlight()
+    return _async_single_flight
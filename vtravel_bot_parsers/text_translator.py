@@ -4,10 +4,77 @@ https://rapidapi.com/gatzuma/api/deep-translate1/
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List
 
 import requests
 
-from config_bot import HEADERS_TRANSLATOR
+from config_bot import (HEADERS_TRANSLATOR, TRANSLATE_BATCH_MAX_CHARS,
+                        TRANSLATE_BATCH_MAX_TEXTS, TRANSLATE_CONCURRENCY,
+                        TRANSLATOR_API_URL)
+from .http_client import HTTPClient, get_http_client
+from .metrics import API_CALL_DURATION, API_CALL_ERRORS, timed
+from .tracing import propagate_context, traced
+from .translation_memory import TranslationMemory, get_translation_memory
+
+
+def split_into_batches(
+        texts: List[str], max_chars: int = TRANSLATE_BATCH_MAX_CHARS,
+        max_texts: int = TRANSLATE_BATCH_MAX_TEXTS) -> List[List[str]]:
+    """
+    Разбить тексты на пакеты для перевода одним запросом: не больше
+    max_chars символов и max_texts текстов в пакете. Текст длиннее
+    max_chars - отдельный пакет. Порядок текстов сохраняется.
+
+    Args:
+        texts (List[str]): Тексты для перевода.
+        max_chars (int): Максимальная длина текстов пакета.
+        max_texts (int): Максимальное количество текстов пакета.
+    """
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    batch_chars = 0
+    for text in texts:
+        if batch and (batch_chars + len(text) > max_chars
+                      or len(batch) >= max_texts):
+            batches.append(batch)
+            batch = []
+            batch_chars = 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def get_translated_texts(response_json: Any, count: int) -> List[str]:
+    """
+    Получить переводы из ответа translate/v2: для одного текста
+    translations - словарь, для нескольких - список.
+
+    Args:
+        response_json (Any): Ответ API.
+        count (int): Количество переведенных текстов.
+
+    Raises:
+        ValueError: Если не удалось получить переводимый текст по ключам.
+    """
+    try:
+        translations = response_json['data']['translations']
+        if isinstance(translations, dict):
+            translations = [translations]
+        translated_texts = [translation['translatedText']
+                            for translation in translations]
+    except Exception as error_message:
+        raise ValueError(
+            'Не удалось получить переводимый текст по ключам\n{0}'.format(
+                error_message
+            ))
+
+    if len(translated_texts) != count:
+        raise ValueError('Получено переводов: {0}, ожидалось: {1}'.format(
+            len(translated_texts), count))
+    return translated_texts
 
 
 class TextTranslator:
@@ -17,18 +84,38 @@ class TextTranslator:
     Методы:
         - supported_languages: Получить поддерживаемые языки.
         - translate: Перевести заданный текст.
+        - translate_many: Перевести несколько текстов пакетами.
     """
-    def __init__(self):
+    def __init__(self, client: HTTPClient = None,
+                 memory: TranslationMemory = None,
+                 base_url: str = None):
+        """
+        Args:
+            client (HTTPClient) = None: HTTP-клиент для запросов к API.
+                По умолчанию - общий для процесса пул соединений.
+            memory (TranslationMemory) = None: Память переводов.
+                По умолчанию - общая для процесса память на диске.
+            base_url (str) = None: Базовый URL API.
+                По умолчанию - TRANSLATOR_API_URL.
+        """
+        self.__client = client or get_http_client()
+        self.__memory = memory if memory is not None else get_translation_memory()
+        self.__base_url = (base_url or TRANSLATOR_API_URL).rstrip('/')
         self.__headers = eval(HEADERS_TRANSLATOR)
         self.__text_language = 'ru'
         self.__target_language = 'en'
 
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
     def supported_languages(self) -> 'requests.Response.json':
         """Узнать о поддерживаемых языках."""
-        url = "https://deep-translate1.p.rapidapi.com/language/translate/v2/languages"
+        url = '{0}/language/translate/v2/languages'.format(self.__base_url)
 
         try:
-            response = requests.get(url, headers=self.__headers)
+            response = self.__client.get(
+                                url,
+                                endpoint='translate/v2/languages',
+                                headers=self.__headers)
             response_json = response.json()
         except Exception as error_message:
             raise ConnectionError('Не удалось получить данные.\n{0}'.format(
@@ -36,13 +123,16 @@ class TextTranslator:
             ))
         return response_json
 
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
     def translate(self, text: str) -> str:
         """
         Перевести текст.
 
-        Сделать запрос POST и предоставить JSON в теле запроса,
+        Сначала искать перевод в памяти переводов. Если его нет -
+        сделать запрос POST и предоставить JSON в теле запроса,
         который определяет язык для перевода (target)
-        и текст для перевода (q).
+        и текст для перевода (q), и сохранить полученный перевод.
 
         Args:
             text (str): Текст для перевода.
@@ -51,29 +141,90 @@ class TextTranslator:
             ConnectionError: Если не удалось получить данные от API.
             ValueError: Если не удалось получить переводимый текст по ключам.
         """
-        url = "https://deep-translate1.p.rapidapi.com/language/translate/v2"
+        translated_text = self.__memory.get(self.__text_language,
+                                            self.__target_language, text)
+        if translated_text is not None:
+            return translated_text
+
+        translated_text = self.__request_translations([text])[0]
+        self.__memory.put(self.__text_language, self.__target_language,
+                          text, translated_text)
+        return translated_text
+
+    @timed(API_CALL_DURATION, API_CALL_ERRORS)
+    @traced()
+    def translate_many(self, texts: Iterable[str],
+                       max_workers: int = TRANSLATE_CONCURRENCY) -> List[str]:
+        """
+        Перевести несколько текстов.
+
+        Одинаковые тексты (без учета регистра и лишних пробелов)
+        переводятся один раз, найденные в памяти переводов - без
+        запроса к API. Остальные отправляются пакетами (q - список,
+        split_into_batches), не более max_workers запросов одновременно;
+        переводы каждого пакета сохраняются в память переводов.
+        Переводы возвращаются в порядке texts.
+
+        Args:
+            texts (Iterable[str]): Тексты для перевода.
+            max_workers (int): Максимальное количество одновременных
+                запросов к API.
+
+        Raises:
+            ConnectionError: Если не удалось получить данные от API.
+            ValueError: Если не удалось получить переводимый текст по ключам.
+        """
+        texts = list(texts)
+        translations: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        for text in texts:
+            key = self.__memory.normalize(text)
+            if key in translations or key in missing:
+                continue
+            translated_text = self.__memory.get(
+                self.__text_language, self.__target_language, text)
+            if translated_text is not None:
+                translations[key] = translated_text
+            else:
+                missing[key] = text
+
+        batches = split_into_batches(list(missing.values()))
+        if batches:
+            with ThreadPoolExecutor(
+                    max_workers=max(1, min(max_workers, len(batches))),
+                    thread_name_prefix='translate') as executor:
+                for batch, translated_texts in zip(batches, executor.map(
+                        propagate_context(self.__request_translations),
+                        batches)):
+                    self.__memory.put_many(
+                        self.__text_language, self.__target_language,
+                        zip(batch, translated_texts))
+                    translations.update(zip(
+                        map(self.__memory.normalize, batch),
+                        translated_texts))
+
+        return [translations[self.__memory.normalize(text)]
+                for text in texts]
+
+    def __request_translations(self, texts: List[str]) -> List[str]:
+        """Запросить переводы текстов у API одним запросом."""
+        url = '{0}/language/translate/v2'.format(self.__base_url)
         payload = json.dumps({
-            'q': text,
+            'q': texts[0] if len(texts) == 1 else texts,
             'source': self.__text_language,
             'target': self.__target_language
         })
         try:
-            response = requests.post(url, data=payload, headers=self.__headers)
+            response = self.__client.post(url,
+                                          endpoint='translate/v2',
+                                          data=payload,
+                                          headers=self.__headers)
             response_json = response.json()
         except Exception as error_message:
             raise ConnectionError('Не удалось получить данные.\n{0}'.format(
                 error_message
             ))
-
-        try:
-            translated_text = response_json[
-                                    'data']['translations']['translatedText']
-        except Exception as error_message:
-            raise ValueError(
-                'Не удалось получить переводимый текст по ключам\n{0}'.format(
-                    error_message
-                ))
-        return translated_text
+        return get_translated_texts(response_json, len(texts))
 
     @property
     def text_language(self) -> str:
@@ -0,0 +1,376 @@
+"""
+Трассировка диалогов: id диалога и интервалы (spans) обработчиков.
+
+Диалог поиска отелей проходит через несколько обновлений
+(команда -> город -> месторасположение -> количество отелей -> фото).
+Id диалога (conversation_id) назначается на первом шаге, хранится
+в состоянии диалога и становится id трассы: каждый шаг открывает
+корневой интервал трассы, вложенные вызовы (в том числе методы
+ParseHotels и TextTranslator) - дочерние интервалы.
+
+Текущий интервал хранится в contextvars, поэтому вложенность
+сохраняется в потоке обработчика и в задачах asyncio. Для пула потоков
+контекст передается явно (propagate_context).
+
+Завершенная трасса записывается одной строкой JSON в TRACE_EXPORT_PATH.
+Обработчик только ставит трассу в очередь: преобразование в JSON
+и запись файла выполняются в фоновом потоке.
+"""
+
+import asyncio
+import atexit
+import collections
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config_bot import TRACE_EXPORT_PATH, TRACE_MAX_TRACES
+
+
+# ограничение количества интервалов одной трассы
+MAX_SPANS_PER_TRACE = 500
+
+# сигнал остановки фонового потока записи трасс
+_STOP = object()
+
+_current_span: contextvars.ContextVar[Optional['Span']] = \
+    contextvars.ContextVar('vtravel_current_span', default=None)
+
+
+class Span:
+    """Интервал трассы: имя, время начала, длительность, атрибуты."""
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'started_at',
+                 'duration', 'attributes', 'error', '_started')
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None,
+                 attributes: Dict[str, Any] = None):
+        """
+        Args:
+            name (str): Имя интервала (обработчик, метод API).
+            trace_id (str): Id трассы (id диалога).
+            parent_id (str) = None: Id родительского интервала.
+            attributes (Dict[str, Any]) = None: Атрибуты интервала.
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(4)
+        self.parent_id = parent_id
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def end(self) -> None:
+        """Завершить интервал."""
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Получить интервал в виде словаря (для JSON)."""
+        return {'name': self.name, 'span_id': self.span_id,
+                'parent_id': self.parent_id, 'started_at': self.started_at,
+                'duration': self.duration, 'attributes': self.attributes,
+                'error': self.error}
+
+
+def current_span() -> Optional[Span]:
+    """Получить текущий интервал (None - вне трассы)."""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Получить id текущей трассы (None - вне трассы)."""
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+class Tracer:
+    """
+    Сбор интервалов трасс диалогов.
+
+    Методы:
+        - new_trace_id: Получить новый id трассы (id диалога).
+        - span: Открыть интервал (контекстный менеджер).
+        - finish: Завершить трассу и записать ее в файл.
+        - export: Получить трассу в виде словаря.
+        - flush: Дождаться записи завершенных трасс в файл.
+        - close: Записать очередь трасс и остановить поток записи.
+    """
+    def __init__(self, export_path: str = TRACE_EXPORT_PATH,
+                 max_traces: int = TRACE_MAX_TRACES):
+        """
+        Args:
+            export_path (str): Файл JSON Lines для завершенных трасс.
+                Пустая строка - трассы не записываются.
+            max_traces (int): Сколько незавершенных трасс хранить.
+                Самая старая трасса при переполнении записывается
+                в файл как незавершенная.
+        """
+        self.__export_path = export_path
+        self.__max_traces = max_traces
+        self.__traces: 'collections.OrderedDict[str, List[Span]]' = \
+            collections.OrderedDict()
+        self.__finished = set()
+        self.__lock = threading.Lock()
+        # трассы для записи в файл: (trace_id, интервалы, complete)
+        self.__queue: 'queue.SimpleQueue[Any]' = queue.SimpleQueue()
+        self.__thread: Optional[threading.Thread] = None
+        self.__thread_lock = threading.Lock()
+
+    @staticmethod
+    def new_trace_id() -> str:
+        """Получить новый id трассы (id диалога)."""
+        return secrets.token_hex(8)
+
+    @contextlib.contextmanager
+    def span(self, name: str, trace_id: str = None,
+             **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Открыть интервал. Вне трассы (нет trace_id и текущего
+        интервала) интервал не записывается - возвращается None.
+
+        Args:
+            name (str): Имя интервала.
+            trace_id (str) = None: Id трассы. По умолчанию - трасса
+                текущего интервала.
+            **attributes (Any): Атрибуты интервала.
+        """
+        parent = _current_span.get()
+        if trace_id is None:
+            if parent is None:
+                yield None
+                return
+            trace_id = parent.trace_id
+        parent_id = parent.span_id \
+            if parent is not None and parent.trace_id == trace_id else None
+
+        span = Span(name, trace_id, parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = type(error).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self.__record(span)
+
+    def finish(self, trace_id: Optional[str]) -> None:
+        """
+        Завершить трассу (диалог завершен) и записать ее в файл.
+        Если трасса завершается внутри своего интервала - она будет
+        записана, когда закроется корневой интервал.
+
+        Args:
+            trace_id (Optional[str]): Id трассы.
+        """
+        if trace_id is None:
+            return
+        span = _current_span.get()
+        if span is not None and span.trace_id == trace_id:
+            with self.__lock:
+                self.__finished.add(trace_id)
+            return
+        with self.__lock:
+            spans = self.__traces.pop(trace_id, None)
+        if spans is not None:
+            self.__write(trace_id, spans, complete=True)
+
+    def export(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Получить незавершенную трассу в виде словаря.
+
+        Args:
+            trace_id (str): Id трассы.
+        """
+        with self.__lock:
+            spans = list(self.__traces.get(trace_id, ()))
+        return self.__to_dict(trace_id, spans, complete=False) \
+            if spans else None
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Дождаться записи в файл трасс, завершенных до вызова.
+        Вернуть False, если не дождались за timeout секунд.
+
+        Args:
+            timeout (float) = None: Максимальное время ожидания.
+                По умолчанию - без ограничения.
+        """
+        thread = self.__thread
+        if thread is None or not thread.is_alive():
+            return True
+        written = threading.Event()
+        self.__queue.put(written)
+        return written.wait(timeout)
+
+    def close(self) -> None:
+        """Записать очередь трасс и остановить поток записи."""
+        with self.__thread_lock:
+            thread, self.__thread = self.__thread, None
+        if thread is not None and thread.is_alive():
+            self.__queue.put(_STOP)
+            thread.join()
+
+    def __len__(self) -> int:
+        return len(self.__traces)
+
+    def __record(self, span: Span) -> None:
+        """Сохранить закрытый интервал в трассе."""
+        evicted = finished = None
+        with self.__lock:
+            spans = self.__traces.get(span.trace_id)
+            if spans is None:
+                spans = self.__traces[span.trace_id] = []
+                if len(self.__traces) > self.__max_traces:
+                    evicted = self.__traces.popitem(last=False)
+            if len(spans) < MAX_SPANS_PER_TRACE:
+                spans.append(span)
+            if span.parent_id is None and span.trace_id in self.__finished:
+                self.__finished.discard(span.trace_id)
+                finished = self.__traces.pop(span.trace_id)
+        if evicted is not None:
+            self.__write(*evicted, complete=False)
+        if finished is not None:
+            self.__write(span.trace_id, finished, complete=True)
+
+    @staticmethod
+    def __to_dict(trace_id: str, spans: List[Span],
+                  complete: bool) -> Dict[str, Any]:
+        spans = sorted(spans, key=lambda span: span.started_at)
+        started_at = spans[0].started_at
+        ended_at = max(span.started_at + span.duration for span in spans)
+        return {'conversation_id': trace_id, 'complete': complete,
+                'started_at': started_at,
+                'duration': ended_at - started_at,
+                'spans': [span.to_dict() for span in spans]}
+
+    def __write(self, trace_id: str, spans: List[Span],
+                complete: bool) -> None:
+        """Поставить трассу в очередь записи в файл трасс."""
+        if not self.__export_path or not spans:
+            return
+        if self.__thread is None:
+            with self.__thread_lock:
+                if self.__thread is None:
+                    self.__thread = threading.Thread(
+                        target=self.__run, name='trace-writer', daemon=True)
+                    self.__thread.start()
+                    atexit.register(self.close)
+        self.__queue.put((trace_id, spans, complete))
+
+    def __run(self) -> None:
+        """Записывать очередь трасс в файл пачками строк JSON."""
+        stopped = False
+        while not stopped:
+            batch = [self.__queue.get()]
+            while True:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: List[str] = []
+            waiters: List[threading.Event] = []
+            for item in batch:
+                if item is _STOP:
+                    stopped = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    lines.append(self.__to_json(*item))
+            if lines:
+                self.__append(lines)
+            for waiter in waiters:
+                waiter.set()
+
+    def __to_json(self, trace_id: str, spans: List[Span],
+                  complete: bool) -> str:
+        return json.dumps(self.__to_dict(trace_id, spans, complete),
+                          ensure_ascii=False, default=str)
+
+    def __append(self, lines: List[str]) -> None:
+        """Дописать строки в файл трасс."""
+        try:
+            directory = os.path.dirname(self.__export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.__export_path, 'a',
+                      encoding='utf-8') as export_file:
+                export_file.write(''.join(line + '\n' for line in lines))
+        except OSError:
+            # трассы - диагностика: ошибка файла не останавливает поток
+            pass
+
+
+def traced(name: str = None, tracer: Tracer = None
+           ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Декоратор: записывать вызов функции (или корутины) дочерним
+    интервалом текущей трассы. Вне трассы функция просто вызывается.
+
+    Args:
+        name (str) = None: Имя интервала. По умолчанию - __qualname__.
+        tracer (Tracer) = None: Сбор трасс. По умолчанию - общий
+            для процесса.
+    """
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or function.__qualname__
+
+        def get_span_tracer() -> Tracer:
+            return tracer if tracer is not None else get_tracer()
+
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await function(*args, **kwargs)
+                with get_span_tracer().span(span_name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return function(*args, **kwargs)
+            with get_span_tracer().span(span_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate_context(function: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Выполнять функцию в контексте (трассе) вызывающего потока -
+    для передачи функции в пул потоков.
+
+    Args:
+        function (Callable): Функция.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # один контекст нельзя войти из нескольких потоков одновременно
+        return context.copy().run(function, *args, **kwargs)
+
+    return wrapper
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Получить общий для процесса сбор трасс."""
+    return _tracer
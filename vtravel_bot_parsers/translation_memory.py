@@ -0,0 +1,136 @@
+"""
+Память переводов на диске (SQLite).
+
+Переводы хранятся по ключу (язык текста, язык перевода, нормализованный
+текст) и загружаются в словарь при старте, поэтому повторный перевод -
+это поиск в словаре без обращения к API.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from config_bot import TRANSLATION_MEMORY_PATH
+
+
+class TranslationMemory:
+    """
+    Память переводов.
+
+    Методы:
+        - normalize: Нормализовать текст для ключа.
+        - get: Получить сохраненный перевод.
+        - put: Сохранить перевод.
+        - put_many: Сохранить несколько переводов одной транзакцией.
+        - close: Закрыть базу данных.
+    """
+    def __init__(self, path: str = TRANSLATION_MEMORY_PATH):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite.
+                ':memory:' - хранить только в памяти процесса.
+        """
+        directory = os.path.dirname(path)
+        if directory and path != ':memory:':
+            os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            ' source TEXT NOT NULL,'
+            ' target TEXT NOT NULL,'
+            ' text TEXT NOT NULL,'
+            ' translation TEXT NOT NULL,'
+            ' PRIMARY KEY (source, target, text))')
+        self.__connection.commit()
+
+        self.__index: Dict[Tuple[str, str, str], str] = {
+            (source, target, text): translation
+            for source, target, text, translation in
+            self.__connection.execute(
+                'SELECT source, target, text, translation FROM translations')
+        }
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Нормализовать текст: убрать лишние пробелы, привести к нижнему
+        регистру.
+        """
+        return ' '.join(text.split()).casefold()
+
+    def get(self, source: str, target: str, text: str) -> Optional[str]:
+        """
+        Получить сохраненный перевод.
+        Возвращает None, если перевода нет.
+
+        Args:
+            source (str): Язык переводимого текста.
+            target (str): Язык перевода.
+            text (str): Переводимый текст.
+        """
+        return self.__index.get((source, target, self.normalize(text)))
+
+    def put(self, source: str, target: str, text: str,
+            translation: str) -> None:
+        """
+        Сохранить перевод в памяти и на диске.
+
+        Args:
+            source (str): Язык переводимого текста.
+            target (str): Язык перевода.
+            text (str): Переводимый текст.
+            translation (str): Перевод.
+        """
+        self.put_many(source, target, [(text, translation)])
+
+    def put_many(self, source: str, target: str,
+                 translations: Iterable[Tuple[str, str]]) -> None:
+        """
+        Сохранить переводы в памяти и на диске одной транзакцией.
+
+        Args:
+            source (str): Язык переводимого текста.
+            target (str): Язык перевода.
+            translations (Iterable[Tuple[str, str]]): Пары
+                (переводимый текст, перевод).
+        """
+        rows = {}
+        for text, translation in translations:
+            key = (source, target, self.normalize(text))
+            if self.__index.get(key) != translation:
+                rows[key] = translation
+        if not rows:
+            return
+
+        with self.__lock:
+            self.__index.update(rows)
+            self.__connection.executemany(
+                'INSERT OR REPLACE INTO translations'
+                ' (source, target, text, translation) VALUES (?, ?, ?, ?)',
+                [(*key, translation) for key, translation in rows.items()])
+            self.__connection.commit()
+
+    def close(self) -> None:
+        """Закрыть базу данных."""
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+
+_translation_memory = None
+_translation_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    """Получить общую для процесса память переводов."""
+    global _translation_memory
+    if _translation_memory is None:
+        with _translation_memory_lock:
+            if _translation_memory is None:
+                _translation_memory = TranslationMemory()
+    return _translation_memory
@@ -0,0 +1,115 @@
+"""
+Транслитерация названий городов с кириллицы на латиницу.
+
+Поиск locations/v2/search находит города по транслитерации, поэтому
+название кириллицей сначала ищется без переводчика (запроса к API):
+известные города - по словарю исключений (принятые английские названия),
+остальные - по таблице ГОСТ 7.79-2000 (ISO 9), система Б. Для поиска
+таблица упрощена: ь и ъ опускаются, ы - y, э - e, х - kh, ц - ts,
+й - y, щ - shch (без апострофов и диграфов cz/x системы Б).
+"""
+
+import re
+from typing import Dict
+
+
+TRANSLITERATION: Dict[str, str] = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e',
+    'ё': 'yo', 'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k',
+    'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '',
+    'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+
+# принятые английские названия известных городов
+# (ключ - название в нижнем регистре, ё - е)
+CITY_EXCEPTIONS: Dict[str, str] = {
+    'москва': 'Moscow',
+    'санкт петербург': 'Saint Petersburg',
+    'питер': 'Saint Petersburg',
+    'нижний новгород': 'Nizhny Novgorod',
+    'великий новгород': 'Veliky Novgorod',
+    'екатеринбург': 'Yekaterinburg',
+    'ростов на дону': 'Rostov-on-Don',
+    'йошкар ола': 'Yoshkar-Ola',
+    'набережные челны': 'Naberezhnye Chelny',
+    'минеральные воды': 'Mineralnye Vody',
+    'петропавловск камчатский': 'Petropavlovsk-Kamchatsky',
+    'южно сахалинск': 'Yuzhno-Sakhalinsk',
+    'киев': 'Kyiv',
+    'минск': 'Minsk',
+    'ереван': 'Yerevan',
+    'тбилиси': 'Tbilisi',
+    'баку': 'Baku',
+    'стамбул': 'Istanbul',
+    'анталия': 'Antalya',
+    'париж': 'Paris',
+    'лондон': 'London',
+    'рим': 'Rome',
+    'милан': 'Milan',
+    'венеция': 'Venice',
+    'флоренция': 'Florence',
+    'неаполь': 'Naples',
+    'прага': 'Prague',
+    'вена': 'Vienna',
+    'варшава': 'Warsaw',
+    'берлин': 'Berlin',
+    'мюнхен': 'Munich',
+    'афины': 'Athens',
+    'барселона': 'Barcelona',
+    'мадрид': 'Madrid',
+    'лиссабон': 'Lisbon',
+    'брюссель': 'Brussels',
+    'женева': 'Geneva',
+    'копенгаген': 'Copenhagen',
+    'хельсинки': 'Helsinki',
+    'дубай': 'Dubai',
+    'каир': 'Cairo',
+    'пекин': 'Beijing',
+    'токио': 'Tokyo',
+    'нью йорк': 'New York',
+    'лос анджелес': 'Los Angeles',
+}
+
+_CYRILLIC = re.compile('[а-яё]', re.IGNORECASE)
+
+
+def has_cyrillic(text: str) -> bool:
+    """
+    Проверить, есть ли в тексте буквы кириллицы
+    (пробелы, дефисы и цифры не в счет).
+
+    Args:
+        text (str): Текст.
+    """
+    return _CYRILLIC.search(text) is not None
+
+
+def transliterate(text: str) -> str:
+    """
+    Транслитерировать название города на латиницу: известный город -
+    по словарю исключений, остальные - по таблице TRANSLITERATION.
+    Символы не кириллицы не меняются, регистр первой буквы
+    сохраняется.
+
+    Args:
+        text (str): Название города.
+    """
+    text = ' '.join(text.split())
+    key = re.sub(r'[\s-]+', ' ', text.casefold().replace('ё', 'е'))
+    exception = CITY_EXCEPTIONS.get(key)
+    if exception is not None:
+        return exception
+
+    letters = []
+    for letter in text:
+        latin = TRANSLITERATION.get(letter.lower())
+        if latin is None:
+            letters.append(letter)
+        elif letter.isupper():
+            letters.append(latin.upper() if text.isupper()
+                           else latin.capitalize())
+        else:
+            letters.append(latin)
+    return ''.join(letters)
@@ -0,0 +1,16 @@
+"""
+Инфраструктура бота: прием обновлений, состояние диалогов и т.п.
+"""
+
+from .webhook import WebhookServer, check_webhook_settings
+from .conversation_state import (ConversationState, StateStore,
+                                 InMemoryStateStore, SQLiteStateStore,
+                                 create_state_store)
+from .rate_limited_bot import (RateLimitedTeleBot, AsyncRateLimitedTeleBot,
+                               get_telegram_rate_limiter)
+from .metrics_server import MetricsServer
+from .logging_setup import (LogSampler, configure_logging,
+                            get_log_sampler)
+from .file_id_cache import FileIdCache, get_file_id_cache
+from .search_history import (SearchRecord, SearchHistory,
+                             get_search_history)
@@ -0,0 +1,302 @@
+"""
+Хранилище состояния диалогов.
+
+Для каждого чата хранится только компактная запись: шаг диалога, режим
+сортировки, город, месторасположение и его id, диапазон цен, количество
+отелей и id диалога (id трассы - vtravel_bot_parsers.tracing).
+Сами результаты поиска не хранятся - параметры
+(destination_id, mode, price_min, price_max) служат ссылкой на ответ
+properties/list в кэше ответов API.
+
+Незавершенные диалоги удаляются по TTL.
+"""
+
+import abc
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config_bot import STATE_STORE, STATE_STORE_PATH, STATE_TTL
+
+
+class ConversationState:
+    """Состояние диалога с пользователем в одном чате."""
+    __slots__ = ('chat_id', 'step', 'mode', 'city', 'destination',
+                 'destination_id', 'price_min', 'price_max',
+                 'number_of_hotels', 'conversation_id', 'updated_at')
+
+    def __init__(self, chat_id: int, step: str, mode: str = None,
+                 city: str = None, destination: str = None,
+                 destination_id: str = None, price_min: int = None,
+                 price_max: int = None, number_of_hotels: int = None,
+                 conversation_id: str = None, updated_at: float = None):
+        """
+        Args:
+            chat_id (int): Id чата.
+            step (str): Шаг диалога, на котором ожидается ответ.
+            mode (str) = None: Режим сортировки поиска отелей.
+            city (str) = None: Город для поиска.
+            destination (str) = None: Выбранное месторасположение
+                (для истории поиска).
+            destination_id (str) = None: Id выбранного месторасположения.
+            price_min (int) = None: Минимальная цена отеля.
+            price_max (int) = None: Максимальная цена отеля.
+            number_of_hotels (int) = None: Количество отелей в подборке.
+            conversation_id (str) = None: Id диалога - общий для всех
+                шагов диалога id трассы.
+            updated_at (float) = None: Время последнего изменения (epoch).
+        """
+        self.chat_id = chat_id
+        self.step = step
+        self.mode = mode
+        self.city = city
+        self.destination = destination
+        self.destination_id = destination_id
+        self.price_min = price_min
+        self.price_max = price_max
+        self.number_of_hotels = number_of_hotels
+        self.conversation_id = conversation_id
+        self.updated_at = updated_at if updated_at is not None \
+            else time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Получить состояние в виде словаря."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return 'ConversationState({0})'.format(', '.join(
+            '{0}={1!r}'.format(field, getattr(self, field))
+            for field in self.__slots__ if getattr(self, field) is not None))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConversationState):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+
+class StateStore(abc.ABC):
+    """
+    Базовое хранилище состояния диалогов.
+
+    Методы:
+        - get: Получить состояние диалога чата.
+        - save: Сохранить состояние диалога.
+        - delete: Удалить состояние диалога (диалог завершен).
+        - purge_expired: Удалить устаревшие диалоги.
+    """
+    def __init__(self, ttl: float = STATE_TTL):
+        """
+        Args:
+            ttl (float): Время жизни незавершенного диалога в секундах.
+        """
+        if ttl <= 0:
+            raise ValueError('TTL диалога должен быть больше 0.')
+        self._ttl = ttl
+        self._next_purge = time.time() + ttl / 10
+
+    @property
+    def ttl(self) -> float:
+        """Получить время жизни незавершенного диалога."""
+        return self._ttl
+
+    @abc.abstractmethod
+    def get(self, chat_id: int) -> Optional[ConversationState]:
+        """
+        Получить состояние диалога чата.
+        Возвращает None, если диалога нет или он устарел.
+
+        Args:
+            chat_id (int): Id чата.
+        """
+
+    @abc.abstractmethod
+    def save(self, state: ConversationState) -> None:
+        """
+        Сохранить состояние диалога (время изменения обновляется).
+
+        Args:
+            state (ConversationState): Состояние диалога.
+        """
+
+    @abc.abstractmethod
+    def delete(self, chat_id: int) -> None:
+        """
+        Удалить состояние диалога.
+
+        Args:
+            chat_id (int): Id чата.
+        """
+
+    @abc.abstractmethod
+    def purge_expired(self) -> int:
+        """Удалить устаревшие диалоги. Вернуть количество удаленных."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Получить количество хранимых диалогов."""
+
+    def _is_expired(self, state: ConversationState, now: float) -> bool:
+        return state.updated_at + self._ttl <= now
+
+    def _purge_if_due(self, now: float) -> None:
+        """Периодически удалять устаревшие диалоги (раз в ttl / 10)."""
+        if now >= self._next_purge:
+            self._next_purge = now + self._ttl / 10
+            self.purge_expired()
+
+
+class InMemoryStateStore(StateStore):
+    """
+    Хранилище состояния диалогов в памяти процесса.
+    Устаревшие диалоги удаляются при обращении и периодической очисткой.
+    """
+    def __init__(self, ttl: float = STATE_TTL):
+        super().__init__(ttl)
+        self.__states: Dict[int, ConversationState] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, chat_id: int) -> Optional[ConversationState]:
+        now = time.time()
+        with self.__lock:
+            state = self.__states.get(chat_id)
+            if state is not None and self._is_expired(state, now):
+                del self.__states[chat_id]
+                state = None
+        return state
+
+    def save(self, state: ConversationState) -> None:
+        state.updated_at = time.time()
+        with self.__lock:
+            self.__states[state.chat_id] = state
+        self._purge_if_due(state.updated_at)
+
+    def delete(self, chat_id: int) -> None:
+        with self.__lock:
+            self.__states.pop(chat_id, None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self.__lock:
+            expired = [chat_id for chat_id, state in self.__states.items()
+                       if self._is_expired(state, now)]
+            for chat_id in expired:
+                del self.__states[chat_id]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self.__states)
+
+
+class SQLiteStateStore(StateStore):
+    """
+    Хранилище состояния диалогов в SQLite.
+    Незавершенные диалоги переживают перезапуск бота.
+    """
+    __fields = ConversationState.__slots__
+
+    def __init__(self, path: str = STATE_STORE_PATH, ttl: float = STATE_TTL):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite.
+            ttl (float): Время жизни незавершенного диалога в секундах.
+        """
+        super().__init__(ttl)
+        directory = os.path.dirname(path)
+        if directory and path != ':memory:':
+            os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS conversation_state ('
+            ' chat_id INTEGER PRIMARY KEY,'
+            ' step TEXT NOT NULL,'
+            ' mode TEXT,'
+            ' city TEXT,'
+            ' destination TEXT,'
+            ' destination_id TEXT,'
+            ' price_min INTEGER,'
+            ' price_max INTEGER,'
+            ' number_of_hotels INTEGER,'
+            ' conversation_id TEXT,'
+            ' updated_at REAL NOT NULL)')
+        columns = {row[1] for row in self.__connection.execute(
+            'PRAGMA table_info(conversation_state)')}
+        for column in ('conversation_id', 'destination'):
+            if column not in columns:
+                # база, созданная до появления столбца
+                self.__connection.execute(
+                    'ALTER TABLE conversation_state ADD COLUMN {0}'
+                    ' TEXT'.format(column))
+        self.__connection.execute(
+            'CREATE INDEX IF NOT EXISTS conversation_state_updated_at'
+            ' ON conversation_state (updated_at)')
+        self.__connection.commit()
+        self.purge_expired()
+
+    def get(self, chat_id: int) -> Optional[ConversationState]:
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT {0} FROM conversation_state WHERE chat_id = ?'.format(
+                    ', '.join(self.__fields)), (chat_id,)).fetchone()
+        if row is None:
+            return None
+
+        state = ConversationState(**dict(zip(self.__fields, row)))
+        if self._is_expired(state, time.time()):
+            self.delete(chat_id)
+            return None
+        return state
+
+    def save(self, state: ConversationState) -> None:
+        state.updated_at = time.time()
+        with self.__lock:
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO conversation_state ({0})'
+                ' VALUES ({1})'.format(', '.join(self.__fields),
+                                       ', '.join('?' * len(self.__fields))),
+                tuple(getattr(state, field) for field in self.__fields))
+            self.__connection.commit()
+        self._purge_if_due(state.updated_at)
+
+    def delete(self, chat_id: int) -> None:
+        with self.__lock:
+            self.__connection.execute(
+                'DELETE FROM conversation_state WHERE chat_id = ?', (chat_id,))
+            self.__connection.commit()
+
+    def purge_expired(self) -> int:
+        with self.__lock:
+            cursor = self.__connection.execute(
+                'DELETE FROM conversation_state WHERE updated_at <= ?',
+                (time.time() - self._ttl,))
+            self.__connection.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Закрыть базу данных."""
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute(
+                'SELECT COUNT(*) FROM conversation_state').fetchone()[0]
+
+
+def create_state_store(kind: str = STATE_STORE) -> StateStore:
+    """
+    Создать хранилище состояния диалогов.
+
+    Args:
+        kind (str): memory - в памяти процесса, sqlite - в базе SQLite.
+    """
+    if kind == 'memory':
+        return InMemoryStateStore()
+    if kind == 'sqlite':
+        return SQLiteStateStore()
+    raise ValueError(
+        'Неизвестное хранилище состояния диалогов - {0}.\n'
+        'Доступно - (memory, sqlite)'.format(kind))
@@ -0,0 +1,144 @@
+"""
+Кэш file_id Telegram на диске (SQLite).
+
+Файл, отправленный боту один раз (стикер из static, фото отеля
+по URL), Telegram хранит у себя и возвращает его file_id. Повторная
+отправка по file_id не загружает файл заново и не заставляет Telegram
+снова скачивать URL.
+
+Ключ локального файла - путь, время изменения и размер (file_key),
+поэтому измененный файл загружается заново. Ключ фото - его URL.
+file_id действителен только для бота, который его получил: если
+Telegram отклонил file_id, он удаляется из кэша (discard), и файл
+отправляется как в первый раз.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from config_bot import FILE_ID_CACHE_PATH
+
+
+class FileIdCache:
+    """
+    Кэш file_id Telegram.
+
+    Методы:
+        - file_key: Получить ключ локального файла.
+        - get: Получить file_id.
+        - put: Сохранить file_id.
+        - put_many: Сохранить несколько file_id.
+        - discard: Удалить недействительный file_id.
+        - close: Закрыть базу данных.
+    """
+    def __init__(self, path: str = FILE_ID_CACHE_PATH):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite.
+                ':memory:' - хранить только в памяти процесса.
+        """
+        directory = os.path.dirname(path)
+        if directory and path != ':memory:':
+            os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS file_ids ('
+            ' source TEXT PRIMARY KEY,'
+            ' file_id TEXT NOT NULL)')
+        self.__connection.commit()
+
+        self.__index: Dict[str, str] = dict(self.__connection.execute(
+            'SELECT source, file_id FROM file_ids'))
+
+    @staticmethod
+    def file_key(path: str) -> str:
+        """
+        Получить ключ локального файла: путь, время изменения, размер.
+
+        Args:
+            path (str): Путь к файлу.
+
+        Raises:
+            FileNotFoundError: Если файла нет.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        return '{0}:{1}:{2}'.format(path, stat.st_mtime_ns, stat.st_size)
+
+    def get(self, source: str) -> Optional[str]:
+        """
+        Получить file_id. Возвращает None, если файл еще не отправлялся.
+
+        Args:
+            source (str): Ключ файла (file_key) или URL.
+        """
+        return self.__index.get(source)
+
+    def put(self, source: str, file_id: str) -> None:
+        """
+        Сохранить file_id в памяти и на диске.
+
+        Args:
+            source (str): Ключ файла (file_key) или URL.
+            file_id (str): file_id из ответа Telegram.
+        """
+        self.put_many([(source, file_id)])
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Сохранить несколько file_id (альбом фото) одной транзакцией.
+
+        Args:
+            items (Iterable[Tuple[str, str]]): Пары (ключ или URL, file_id).
+        """
+        changed = [(source, file_id) for source, file_id in items
+                   if self.__index.get(source) != file_id]
+        if not changed:
+            return
+
+        with self.__lock:
+            self.__index.update(changed)
+            self.__connection.executemany(
+                'INSERT OR REPLACE INTO file_ids (source, file_id)'
+                ' VALUES (?, ?)', changed)
+            self.__connection.commit()
+
+    def discard(self, source: str) -> None:
+        """
+        Удалить file_id, отклоненный Telegram.
+
+        Args:
+            source (str): Ключ файла (file_key) или URL.
+        """
+        with self.__lock:
+            if self.__index.pop(source, None) is None:
+                return
+            self.__connection.execute(
+                'DELETE FROM file_ids WHERE source = ?', (source,))
+            self.__connection.commit()
+
+    def close(self) -> None:
+        """Закрыть базу данных."""
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+
+_file_id_cache = None
+_file_id_cache_lock = threading.Lock()
+
+
+def get_file_id_cache() -> FileIdCache:
+    """Получить общий для процесса кэш file_id."""
+    global _file_id_cache
+    if _file_id_cache is None:
+        with _file_id_cache_lock:
+            if _file_id_cache is None:
+                _file_id_cache = FileIdCache()
+    return _file_id_cache
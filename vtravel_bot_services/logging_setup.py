@@ -0,0 +1,239 @@
+"""
+Журнал бота (loguru): файл с ротацией, текст или JSON, фоновая запись.
+
+Запись файла, ротация и сжатие архива выполняются в фоновом потоке
+BackgroundLogWriter: обработчик бота только кладет готовую строку
+в очередь процесса. Очередь loguru (enqueue=True) не используется -
+она рассчитана на несколько процессов и сериализует (pickle) каждую
+запись в канал, что медленнее записи в файл (benchmarks/bench_logging).
+Форматирование записи остается в потоке обработчика, поэтому формат
+JSON - короткий словарь полей, а не полная запись loguru
+(serialize=True).
+
+Частые однотипные события (фото каждого отеля, 429 Telegram, ввод
+вне диалога) записываются через LogSampler - не чаще лимита
+для каждого события; количество пропущенных записей добавляется
+к следующей записи события.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import traceback
+import zipfile
+from typing import Any, Dict
+
+from loguru import logger
+
+from config_bot import (LOG_ENQUEUE, LOG_FORMAT, LOG_LEVEL, LOG_PATH,
+                        LOG_SAMPLE_BURST, LOG_SAMPLE_RATE)
+from vtravel_bot_parsers import TokenBucket, current_trace_id
+
+
+TEXT_FORMAT = '{time:YYYY-MM-DD at HH:mm:ss} {file} (line -{line})  ' \
+              '{level}  [{extra[conversation_id]}]  {message} <- {function}'
+
+
+def add_conversation_id(record: Dict[str, Any]) -> None:
+    """Добавить в запись журнала id диалога ('-' - вне диалога)."""
+    record['extra'].setdefault('conversation_id', current_trace_id() or '-')
+
+
+def format_json(record: Dict[str, Any]) -> str:
+    """
+    Формат записи журнала - строка JSON: время, уровень, сообщение,
+    место вызова, поля extra (id диалога и т.п.) и исключение.
+    """
+    entry = {'time': record['time'].isoformat(),
+             'level': record['level'].name,
+             'message': record['message'],
+             'file': record['file'].name,
+             'line': record['line'],
+             'function': record['function']}
+    entry.update(item for item in record['extra'].items()
+                 if not item[0].startswith('_'))
+    if record['exception'] is not None:
+        entry['exception'] = ''.join(traceback.format_exception(
+            *record['exception']))
+    record['extra']['_json'] = json.dumps(entry, ensure_ascii=False,
+                                          default=str)
+    return '{extra[_json]}\n'
+
+
+# сколько записей очереди записывается в файл за один раз
+WRITER_BATCH_SIZE = 512
+
+_STOP = object()
+
+
+def _zip_rotator(source: str, destination: str) -> None:
+    """Сжать архив журнала (bot.log -> bot.log.ГГГГ-ММ-ДД.zip)."""
+    with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.write(source, os.path.splitext(
+            os.path.basename(destination))[0])
+    os.remove(source)
+
+
+class BackgroundLogWriter:
+    """
+    Приемник loguru: запись журнала в файл в фоновом потоке.
+    Ротация раз в неделю, хранятся 4 архива zip.
+
+    Методы:
+        - write: Поставить запись в очередь (вызывает loguru).
+        - stop: Записать очередь и остановить поток (вызывает loguru
+          при удалении приемника и при выходе из процесса).
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Файл журнала.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__file_handler = logging.handlers.TimedRotatingFileHandler(
+            path, when='D', interval=7, backupCount=4, encoding='utf-8',
+            delay=True)
+        self.__file_handler.terminator = ''
+        self.__file_handler.namer = lambda name: name + '.zip'
+        self.__file_handler.rotator = _zip_rotator
+        self.__queue: 'queue.SimpleQueue[Any]' = queue.SimpleQueue()
+        self.__thread = threading.Thread(target=self.__run,
+                                         name='log-writer', daemon=True)
+        self.__thread.start()
+
+    def write(self, message: str) -> None:
+        """Поставить запись в очередь."""
+        self.__queue.put(message)
+
+    def stop(self) -> None:
+        """Записать очередь и остановить поток."""
+        self.__queue.put(_STOP)
+        self.__thread.join()
+        self.__file_handler.close()
+
+    def __run(self) -> None:
+        """Записывать очередь в файл пачками."""
+        stopped = False
+        while not stopped:
+            batch = [self.__queue.get()]
+            while len(batch) < WRITER_BATCH_SIZE:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                batch.pop()
+                stopped = True
+            if batch:
+                self.__file_handler.handle(logging.makeLogRecord(
+                    {'msg': ''.join(batch), 'levelno': logging.INFO}))
+
+
+def configure_logging(path: str = LOG_PATH, level: str = LOG_LEVEL,
+                      log_format: str = LOG_FORMAT,
+                      enqueue: bool = LOG_ENQUEUE) -> int:
+    """
+    Настроить журнал бота. Вернуть id обработчика loguru.
+
+    Args:
+        path (str): Файл журнала (ротация раз в неделю, 4 архива zip).
+        level (str): Минимальный уровень записей.
+        log_format (str): text - строка текста, json - строка JSON.
+        enqueue (bool): Записывать файл в фоновом потоке
+            (BackgroundLogWriter).
+
+    Raises:
+        ValueError: Если формат журнала неизвестен.
+    """
+    if log_format == 'text':
+        record_format = TEXT_FORMAT
+    elif log_format == 'json':
+        record_format = format_json
+    else:
+        raise ValueError('Неизвестный формат журнала - {0}.\n'
+                         'Доступно - (text, json)'.format(log_format))
+
+    logger.configure(patcher=add_conversation_id)
+    if enqueue:
+        return logger.add(BackgroundLogWriter(path), format=record_format,
+                          level=level)
+    return logger.add(path, format=record_format, level=level,
+                      rotation='1 week', retention=4, compression='zip')
+
+
+class LogSampler:
+    """
+    Ограничение частоты однотипных записей журнала.
+
+    Методы:
+        - allow: Проверить, можно ли записать событие.
+        - log: Записать событие, если лимит позволяет.
+    """
+    def __init__(self, rate: float = LOG_SAMPLE_RATE,
+                 burst: int = LOG_SAMPLE_BURST):
+        """
+        Args:
+            rate (float): Записей события в секунду.
+            burst (int): Записей события подряд без ограничения.
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError('Лимит записей должен быть больше 0.')
+        self.__rate = rate
+        self.__burst = burst
+        self.__buckets: Dict[str, TokenBucket] = {}
+        self.__suppressed: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    def allow(self, event: str) -> bool:
+        """
+        Проверить, можно ли записать событие (и занять место в лимите).
+
+        Args:
+            event (str): Имя события.
+        """
+        with self.__lock:
+            bucket = self.__buckets.get(event)
+            if bucket is None:
+                bucket = self.__buckets[event] = TokenBucket(self.__rate,
+                                                             self.__burst)
+            if bucket.take(time.monotonic()):
+                return True
+            self.__suppressed[event] = self.__suppressed.get(event, 0) + 1
+            return False
+
+    def log(self, event: str, level: str, message: str, *args: Any) -> None:
+        """
+        Записать событие, если лимит позволяет. Сообщение форматируется
+        (message.format(*args)) только для записанных событий.
+
+        Args:
+            event (str): Имя события.
+            level (str): Уровень записи (INFO, WARNING, ...).
+            message (str): Сообщение.
+            *args (Any): Аргументы сообщения.
+        """
+        if not self.allow(event):
+            return
+        with self.__lock:
+            suppressed = self.__suppressed.pop(event, 0)
+        if args:
+            message = message.format(*args)
+        if suppressed:
+            message = '{0} (пропущено похожих записей: {1})'.format(
+                message, suppressed)
+        logger.opt(depth=1).bind(event=event, suppressed=suppressed).log(
+            level, message)
+
+
+_log_sampler = LogSampler()
+
+
+def get_log_sampler() -> LogSampler:
+    """Получить общее для процесса ограничение частоты записей."""
+    return _log_sampler
@@ -0,0 +1,83 @@
+"""
+Локальный HTTP-сервер метрик бота: GET /metrics в формате Prometheus.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from loguru import logger
+
+from vtravel_bot_parsers import MetricsRegistry, get_metrics_registry
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """
+    HTTP-сервер, отдающий метрики по адресу /metrics.
+
+    Методы:
+        - start: Запустить сервер в фоновом потоке.
+        - stop: Остановить сервер.
+    """
+    def __init__(self, host: str, port: int,
+                 registry: MetricsRegistry = None):
+        """
+        Args:
+            host (str): Адрес для прослушивания (по умолчанию в
+                настройках - только локальный 127.0.0.1).
+            port (int): Порт для прослушивания. 0 - свободный порт.
+            registry (MetricsRegistry) = None: Набор метрик.
+                По умолчанию - общий для процесса.
+        """
+        self.__registry = registry if registry is not None \
+            else get_metrics_registry()
+        self.__server = ThreadingHTTPServer((host, port),
+                                            self.__create_request_handler())
+        self.__server.daemon_threads = True
+        self.__server_thread: Optional[threading.Thread] = None
+
+    @property
+    def server_address(self):
+        """Получить адрес, на котором слушает сервер (host, port)."""
+        return self.__server.server_address
+
+    def start(self) -> 'MetricsServer':
+        """Запустить сервер в фоновом потоке."""
+        self.__server_thread = threading.Thread(
+            target=self.__server.serve_forever, name='metrics-server',
+            daemon=True)
+        self.__server_thread.start()
+        logger.info('Метрики: http://{0}:{1}/metrics'.format(
+            *self.server_address[:2]))
+        return self
+
+    def stop(self) -> None:
+        """Остановить сервер."""
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __create_request_handler(self):
+        """Создать обработчик HTTP-запросов, связанный с набором метрик."""
+        registry = self.__registry
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self) -> None:
+                if self.path.split('?', 1)[0] != '/metrics':
+                    body, status = b'', 404
+                else:
+                    body, status = registry.render().encode('utf-8'), 200
+                self.send_response(status)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return MetricsRequestHandler
@@ -0,0 +1,229 @@
+"""
+Боты Telegram с ограничением частоты исходящих сообщений.
+
+Лимиты Telegram - около 30 сообщений в секунду на бота и около одного
+сообщения в секунду в одном чате. Каждый вызов send_* и edit_message_*
+ждет своей очереди в общей корзине и в корзине чата. Альбом
+(send_media_group) в общей корзине стоит столько сообщений, сколько
+в нем файлов, а в корзине чата - одну отправку: иначе альбомы подборки
+отелей надолго занимали бы поток обработчика ожиданием одного чата.
+После ответа 429 корзина чата приостанавливается на retry_after секунд,
+и сообщение отправляется повторно.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import telebot
+from telebot import apihelper, asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from config_bot import (RATE_LIMIT_RETRIES, TELEGRAM_BURST,
+                        TELEGRAM_CHAT_BURST, TELEGRAM_CHAT_RATE,
+                        TELEGRAM_RATE)
+from vtravel_bot_parsers import RateLimiter
+from vtravel_bot_parsers.metrics import (TELEGRAM_REQUEST_DURATION,
+                                         TELEGRAM_REQUEST_ERRORS)
+from .logging_setup import get_log_sampler
+
+
+RATE_LIMITED_METHODS = (
+    'send_message', 'send_photo', 'send_media_group', 'send_sticker',
+    'send_document', 'send_video', 'send_animation', 'send_audio',
+    'send_voice', 'send_location', 'forward_message', 'copy_message',
+    'edit_message_text', 'edit_message_caption', 'edit_message_media',
+    'edit_message_reply_markup',
+)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Получить паузу из ответа Telegram 429 (parameters.retry_after).
+    Возвращает None для остальных ошибок.
+
+    Args:
+        error (Exception): Ошибка запроса к Telegram.
+    """
+    if getattr(error, 'error_code', None) != 429:
+        return None
+    parameters = (getattr(error, 'result_json', None) or {}).get(
+        'parameters') or {}
+    return float(parameters.get('retry_after', 1))
+
+
+def get_message_cost(arguments: Dict[str, Any]) -> int:
+    """
+    Получить количество сообщений запроса для общей корзины бота:
+    альбом - по сообщению на файл, остальные - одно. В корзине чата
+    любой запрос - одна отправка.
+
+    Args:
+        arguments (Dict[str, Any]): Аргументы метода send_* / edit_*.
+    """
+    media = arguments.get('media')
+    if isinstance(media, (list, tuple)):
+        return max(1, len(media))
+    return 1
+
+
+def _rate_limited(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Обернуть метод TeleBot ожиданием очереди и повтором после 429."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(bot: 'RateLimitedTeleBot', *args, **kwargs) -> Any:
+        arguments = signature.bind_partial(bot, *args, **kwargs).arguments
+        chat_id = arguments.get('chat_id')
+        cost = get_message_cost(arguments)
+        for attempt in range(bot.rate_limit_retries + 1):
+            bot.rate_limiter.acquire(chat_id, cost=cost, key_cost=1)
+            started = time.perf_counter()
+            try:
+                return method(bot, *args, **kwargs)
+            except apihelper.ApiTelegramException as error_message:
+                TELEGRAM_REQUEST_ERRORS.inc(method.__name__,
+                                            str(error_message.error_code))
+                retry_after = get_retry_after(error_message)
+                if retry_after is None or attempt == bot.rate_limit_retries:
+                    raise
+                get_log_sampler().log(
+                    'telegram_429', 'WARNING',
+                    '{0}: 429 в чате {1}, повтор через {2} с',
+                    method.__name__, chat_id, retry_after)
+                bot.rate_limiter.pause(retry_after, chat_id)
+            except Exception:
+                TELEGRAM_REQUEST_ERRORS.inc(method.__name__, 'error')
+                raise
+            finally:
+                TELEGRAM_REQUEST_DURATION.observe(
+                    time.perf_counter() - started, method.__name__)
+
+    return wrapper
+
+
+def _async_rate_limited(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Обернуть корутину AsyncTeleBot ожиданием очереди и повтором."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(bot: 'AsyncRateLimitedTeleBot', *args,
+                      **kwargs) -> Any:
+        arguments = signature.bind_partial(bot, *args, **kwargs).arguments
+        chat_id = arguments.get('chat_id')
+        cost = get_message_cost(arguments)
+        for attempt in range(bot.rate_limit_retries + 1):
+            await bot.rate_limiter.acquire_async(chat_id, cost=cost,
+                                                 key_cost=1)
+            started = time.perf_counter()
+            try:
+                return await method(bot, *args, **kwargs)
+            except asyncio_helper.ApiTelegramException as error_message:
+                TELEGRAM_REQUEST_ERRORS.inc(method.__name__,
+                                            str(error_message.error_code))
+                retry_after = get_retry_after(error_message)
+                if retry_after is None or attempt == bot.rate_limit_retries:
+                    raise
+                get_log_sampler().log(
+                    'telegram_429', 'WARNING',
+                    '{0}: 429 в чате {1}, повтор через {2} с',
+                    method.__name__, chat_id, retry_after)
+                bot.rate_limiter.pause(retry_after, chat_id)
+            except Exception:
+                TELEGRAM_REQUEST_ERRORS.inc(method.__name__, 'error')
+                raise
+            finally:
+                TELEGRAM_REQUEST_DURATION.observe(
+                    time.perf_counter() - started, method.__name__)
+
+    return wrapper
+
+
+class RateLimitedTeleBot(telebot.TeleBot):
+    """
+    TeleBot, отправляющий сообщения не чаще лимитов Telegram.
+
+    Методы send_* и edit_message_* ждут своей очереди вместо ошибки 429.
+    """
+    def __init__(self, token: str, *args,
+                 rate_limiter: RateLimiter = None,
+                 rate_limit_retries: int = RATE_LIMIT_RETRIES, **kwargs):
+        """
+        Args:
+            token (str): Токен бота.
+            rate_limiter (RateLimiter) = None: Лимит частоты сообщений
+                (ключ - id чата). По умолчанию - общий лимит Telegram.
+            rate_limit_retries (int): Количество повторов после 429.
+            *args, **kwargs: Параметры telebot.TeleBot.
+        """
+        super().__init__(token, *args, **kwargs)
+        self.__rate_limiter = rate_limiter if rate_limiter is not None \
+            else get_telegram_rate_limiter()
+        self.__rate_limit_retries = rate_limit_retries
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Получить лимит частоты сообщений."""
+        return self.__rate_limiter
+
+    @property
+    def rate_limit_retries(self) -> int:
+        """Получить количество повторов после 429."""
+        return self.__rate_limit_retries
+
+
+class AsyncRateLimitedTeleBot(AsyncTeleBot):
+    """
+    AsyncTeleBot, отправляющий сообщения не чаще лимитов Telegram.
+    Ожидание очереди не блокирует событийный цикл.
+    """
+    def __init__(self, token: str, *args,
+                 rate_limiter: RateLimiter = None,
+                 rate_limit_retries: int = RATE_LIMIT_RETRIES, **kwargs):
+        """
+        Args:
+            token (str): Токен бота.
+            rate_limiter (RateLimiter) = None: Лимит частоты сообщений
+                (ключ - id чата). По умолчанию - общий лимит Telegram.
+            rate_limit_retries (int): Количество повторов после 429.
+            *args, **kwargs: Параметры AsyncTeleBot.
+        """
+        super().__init__(token, *args, **kwargs)
+        self.__rate_limiter = rate_limiter if rate_limiter is not None \
+            else get_telegram_rate_limiter()
+        self.__rate_limit_retries = rate_limit_retries
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Получить лимит частоты сообщений."""
+        return self.__rate_limiter
+
+    @property
+    def rate_limit_retries(self) -> int:
+        """Получить количество повторов после 429."""
+        return self.__rate_limit_retries
+
+
+for _method_name in RATE_LIMITED_METHODS:
+    setattr(RateLimitedTeleBot, _method_name,
+            _rate_limited(getattr(telebot.TeleBot, _method_name)))
+    setattr(AsyncRateLimitedTeleBot, _method_name,
+            _async_rate_limited(getattr(AsyncTeleBot, _method_name)))
+
+
+_telegram_rate_limiter = None
+_telegram_rate_limiter_lock = threading.Lock()
+
+
+def get_telegram_rate_limiter() -> RateLimiter:
+    """Получить общий лимит частоты сообщений Telegram."""
+    global _telegram_rate_limiter
+    if _telegram_rate_limiter is None:
+        with _telegram_rate_limiter_lock:
+            if _telegram_rate_limiter is None:
+                _telegram_rate_limiter = RateLimiter(
+                    rate=TELEGRAM_RATE, burst=TELEGRAM_BURST,
+                    key_rate=TELEGRAM_CHAT_RATE, key_burst=TELEGRAM_CHAT_BURST)
+    return _telegram_rate_limiter
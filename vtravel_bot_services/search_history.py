@@ -0,0 +1,316 @@
+"""
+История поиска отелей (команда /history) в SQLite.
+
+Каждый завершенный поиск записывается в историю: чат, команда, город,
+выбранное направление, диапазон цен и названия отелей подборки.
+Обработчики не ждут диска: record только добавляет запись в очередь
+в памяти, а фоновый поток пишет очередь пачками (до HISTORY_BATCH_SIZE
+записей одной транзакцией, не дольше HISTORY_FLUSH_INTERVAL секунд
+ожидания). Чтение тоже не ждет записи: еще не записанные записи
+чата берутся из очереди и объединяются с записями из базы.
+
+Id записи назначается при record (счетчик продолжает наибольший id
+в базе), поэтому у записи в очереди и на диске один и тот же id,
+и запись, которую поток успел записать во время чтения, не попадет
+на страницу дважды. Историю пишет один процесс.
+
+База в режиме WAL: чтение истории не ждет записи и наоборот.
+История читается страницами по индексу (chat_id, created_at, id) -
+следующая страница начинается после (created_at, id) последней записи
+предыдущей (без OFFSET), поэтому длинная история читается так же
+быстро, как короткая, а записи с одинаковым временем не теряются.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from config_bot import (HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL,
+                        HISTORY_PAGE_SIZE, HISTORY_PATH)
+
+# ссылка на страницу истории: (created_at, record_id) последней записи
+# предыдущей страницы
+HistoryCursor = Tuple[float, int]
+
+
+class SearchRecord:
+    """Запись истории поиска - один завершенный поиск отелей."""
+    __slots__ = ('record_id', 'chat_id', 'command', 'city', 'destination',
+                 'destination_id', 'price_min', 'price_max', 'hotels',
+                 'created_at')
+
+    def __init__(self, chat_id: int, command: str, city: str = None,
+                 destination: str = None, destination_id: str = None,
+                 price_min: int = None, price_max: int = None,
+                 hotels: Sequence[str] = (), created_at: float = None,
+                 record_id: int = None):
+        """
+        Args:
+            chat_id (int): Id чата.
+            command (str): Команда поиска (/lowprice, /highprice,
+                /bestdeal).
+            city (str) = None: Город, который ввел пользователь.
+            destination (str) = None: Выбранное месторасположение.
+            destination_id (str) = None: Id месторасположения.
+            price_min (int) = None: Минимальная цена отеля.
+            price_max (int) = None: Максимальная цена отеля.
+            hotels (Sequence[str]) = (): Названия отелей подборки.
+            created_at (float) = None: Время поиска (epoch), округляется
+                до миллисекунд - ссылка на страницу истории.
+            record_id (int) = None: Id записи в истории. Назначается
+                историей при record.
+        """
+        self.record_id = record_id
+        self.chat_id = chat_id
+        self.command = command
+        self.city = city
+        self.destination = destination
+        self.destination_id = destination_id
+        self.price_min = price_min
+        self.price_max = price_max
+        self.hotels = tuple(hotels)
+        self.created_at = round(created_at if created_at is not None
+                                else time.time(), 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Получить запись в виде словаря."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return 'SearchRecord({0})'.format(', '.join(
+            '{0}={1!r}'.format(field, getattr(self, field))
+            for field in self.__slots__ if getattr(self, field) is not None))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SearchRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+
+class SearchHistory:
+    """
+    История поиска отелей.
+
+    Методы:
+        - record: Добавить запись в очередь на запись (без ожидания).
+        - flush: Дождаться записи очереди на диск.
+        - page: Получить страницу истории чата (новые записи первыми).
+        - close: Записать очередь, остановить поток и закрыть базу.
+    """
+    __fields = SearchRecord.__slots__
+
+    def __init__(self, path: str = HISTORY_PATH,
+                 batch_size: int = HISTORY_BATCH_SIZE,
+                 flush_interval: float = HISTORY_FLUSH_INTERVAL):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite.
+            batch_size (int): Максимальное количество записей
+                в одной транзакции.
+            flush_interval (float): Сколько секунд ждать следующих
+                записей, прежде чем записать пачку.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.__batch_size = max(1, batch_size)
+        self.__flush_interval = flush_interval
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('PRAGMA synchronous=NORMAL')
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS search_history ('
+            ' record_id INTEGER PRIMARY KEY,'
+            ' chat_id INTEGER NOT NULL,'
+            ' command TEXT NOT NULL,'
+            ' city TEXT,'
+            ' destination TEXT,'
+            ' destination_id TEXT,'
+            ' price_min INTEGER,'
+            ' price_max INTEGER,'
+            ' hotels TEXT NOT NULL,'
+            ' created_at REAL NOT NULL)')
+        self.__connection.execute(
+            'CREATE INDEX IF NOT EXISTS search_history_chat_id_created_at'
+            ' ON search_history (chat_id, created_at)')
+        self.__connection.commit()
+        last_id = self.__connection.execute(
+            'SELECT MAX(record_id) FROM search_history').fetchone()[0] or 0
+
+        # чтение - отдельным соединением: в режиме WAL не ждет записи
+        self.__read_lock = threading.Lock()
+        self.__read_connection = sqlite3.connect(path,
+                                                 check_same_thread=False)
+        # очередь еще не записанных записей (по возрастанию id)
+        self.__condition = threading.Condition()
+        self.__pending: List[SearchRecord] = []
+        self.__next_id = last_id + 1
+        self.__written_id = last_id
+        self.__flush_waiters = 0
+        self.__stopped = False
+        self.__thread = threading.Thread(target=self.__run,
+                                         name='history-writer', daemon=True)
+        self.__thread.start()
+
+    def record(self, search_record: SearchRecord) -> None:
+        """
+        Добавить запись в очередь на запись и назначить ей id.
+
+        Args:
+            search_record (SearchRecord): Завершенный поиск.
+        """
+        with self.__condition:
+            search_record.record_id = self.__next_id
+            self.__next_id += 1
+            self.__pending.append(search_record)
+            self.__condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Дождаться записи на диск всех записей, добавленных в очередь
+        до вызова. Вернуть False, если не дождались за timeout секунд.
+
+        Args:
+            timeout (float) = None: Максимальное время ожидания.
+                По умолчанию - без ограничения.
+        """
+        with self.__condition:
+            last_id = self.__next_id - 1
+            self.__flush_waiters += 1
+            self.__condition.notify_all()
+            try:
+                return self.__condition.wait_for(
+                    lambda: self.__written_id >= last_id
+                    or not self.__thread.is_alive(), timeout)
+            finally:
+                self.__flush_waiters -= 1
+
+    def page(self, chat_id: int, before: HistoryCursor = None,
+             page_size: int = HISTORY_PAGE_SIZE
+             ) -> Tuple[List[SearchRecord], Optional[HistoryCursor]]:
+        """
+        Получить страницу истории чата - записи, новые первыми,
+        и ссылку на следующую страницу ((created_at, record_id)
+        последней записи, None - страница последняя). Еще не записанные
+        записи берутся из очереди - чтение не ждет записи на диск.
+
+        Args:
+            chat_id (int): Id чата.
+            before (HistoryCursor) = None: Записи раньше этой ссылки
+                на страницу. По умолчанию - с последней записи.
+            page_size (int): Количество записей на странице.
+        """
+        # очередь - до базы: запись, которую поток запишет между
+        # чтениями, найдется хотя бы в одном из них
+        with self.__condition:
+            pending = [record for record in self.__pending
+                       if record.chat_id == chat_id and (
+                           before is None or
+                           (record.created_at, record.record_id) < before)]
+
+        query = 'SELECT {0} FROM search_history WHERE chat_id = ?'.format(
+            ', '.join(self.__fields))
+        parameters: List[Any] = [chat_id]
+        if before is not None:
+            query += ' AND (created_at, record_id) < (?, ?)'
+            parameters.extend(before)
+        query += ' ORDER BY created_at DESC, record_id DESC LIMIT ?'
+        parameters.append(page_size + 1)
+        with self.__read_lock:
+            rows = self.__read_connection.execute(query,
+                                                  parameters).fetchall()
+
+        records = {record.record_id: record for record in pending}
+        for row in rows:
+            fields = dict(zip(self.__fields, row))
+            fields['hotels'] = json.loads(fields['hotels'])
+            records.setdefault(fields['record_id'], SearchRecord(**fields))
+        records = sorted(records.values(), reverse=True,
+                         key=lambda record: (record.created_at,
+                                             record.record_id))
+        next_page = None
+        if len(records) > page_size:
+            records = records[:page_size]
+            next_page = records[-1].created_at, records[-1].record_id
+        return records, next_page
+
+    def close(self) -> None:
+        """Записать очередь, остановить поток и закрыть базу."""
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__thread.join()
+        with self.__read_lock:
+            self.__read_connection.close()
+        self.__connection.close()
+
+    def __run(self) -> None:
+        """
+        Записывать очередь пачками: пачка записывается, когда набралось
+        batch_size записей, прошло flush_interval секунд с первой записи
+        пачки или кто-то ждет записи (flush, close). Записанная пачка
+        убирается из очереди только после записи - до тех пор ее
+        записи читаются из памяти.
+        """
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(
+                    lambda: self.__pending or self.__stopped)
+                if not self.__pending:
+                    return
+                deadline = time.monotonic() + self.__flush_interval
+                while (len(self.__pending) < self.__batch_size
+                       and not self.__stopped
+                       and not self.__flush_waiters):
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.__condition.wait(timeout)
+                batch = self.__pending[:self.__batch_size]
+
+            self.__write(batch)
+            with self.__condition:
+                del self.__pending[:len(batch)]
+                self.__written_id = batch[-1].record_id
+                self.__condition.notify_all()
+
+    def __write(self, batch: List[SearchRecord]) -> None:
+        """Записать пачку записей одной транзакцией."""
+        try:
+            with self.__connection:
+                self.__connection.executemany(
+                    'INSERT INTO search_history ({0}) VALUES ({1})'.format(
+                        ', '.join(self.__fields),
+                        ', '.join('?' * len(self.__fields))),
+                    [tuple(json.dumps(record.hotels, ensure_ascii=False)
+                           if field == 'hotels' else getattr(record, field)
+                           for field in self.__fields)
+                     for record in batch])
+        except sqlite3.Error as error_message:
+            logger.error('Не удалось записать историю поиска ({0} зап.)\n'
+                         '{1}'.format(len(batch), error_message))
+
+
+_search_history = None
+_search_history_lock = threading.Lock()
+
+
+def get_search_history() -> SearchHistory:
+    """
+    Получить общую для процесса историю поиска.
+    При выходе из процесса очередь записывается на диск.
+    """
+    global _search_history
+    if _search_history is None:
+        with _search_history_lock:
+            if _search_history is None:
+                _search_history = SearchHistory()
+                atexit.register(_search_history.close)
+    return _search_history
@@ -0,0 +1,250 @@
+"""
+Прием обновлений Telegram через webhook.
+
+Встроенный HTTP-сервер принимает обновления, проверяет секретный токен
+(заголовок X-Telegram-Bot-Api-Secret-Token; без токена сервер
+не запускается) и кладет их в ограниченные
+очереди, которые разбирает пул обработчиков. Обновления одного чата
+всегда попадают к одному обработчику, поэтому шаги диалога
+обрабатываются по порядку.
+"""
+
+import hmac
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from telebot import types
+from loguru import logger
+
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+# обновления Telegram - единицы килобайт, тело больше - отклоняется (413)
+MAX_UPDATE_BYTES = 1024 * 1024
+
+
+def check_webhook_settings(url: Optional[str],
+                           secret_token: Optional[str]) -> None:
+    """
+    Проверить настройки webhook до запуска бота.
+
+    Args:
+        url (Optional[str]): Внешний адрес бота (WEBHOOK_URL).
+        secret_token (Optional[str]): Секретный токен (WEBHOOK_SECRET).
+
+    Raises:
+        ValueError: Если адрес или секретный токен не заданы.
+    """
+    missing = [name for name, value in (('WEBHOOK_URL', url),
+                                        ('WEBHOOK_SECRET', secret_token))
+               if not value]
+    if missing:
+        raise ValueError(
+            'Режим webhook не запущен - не заданы переменные окружения: '
+            '{0}.\nБез WEBHOOK_SECRET сервер принял бы запрос любого '
+            'отправителя как обновление Telegram.'.format(
+                ', '.join(missing)))
+
+
+def get_chat_id(update_json: Dict[str, Any]) -> Optional[int]:
+    """
+    Получить id чата (или пользователя) из обновления Telegram.
+
+    Args:
+        update_json (Dict[str, Any]): Обновление в виде JSON.
+    """
+    for key in ('message', 'edited_message', 'callback_query',
+                'inline_query', 'my_chat_member', 'chat_member'):
+        event = update_json.get(key)
+        if not event:
+            continue
+        chat = event.get('chat') or event.get('message', {}).get('chat')
+        if chat:
+            return chat.get('id')
+        return event.get('from', {}).get('id')
+    return None
+
+
+class WebhookServer:
+    """
+    HTTP-сервер для webhook Telegram с пулом обработчиков.
+
+    Методы:
+        - start: Запустить сервер и обработчики.
+        - stop: Остановить сервер и дождаться обработки очередей.
+        - submit: Поставить обновление в очередь.
+        - queue_depth: Количество обновлений, ожидающих обработки.
+    """
+    def __init__(self, process_update: Callable[['types.Update'], None],
+                 host: str, port: int, path: str, secret_token: str,
+                 workers: int = 4, queue_size: int = 1000):
+        """
+        Args:
+            process_update (Callable[[types.Update], None]): Обработка
+                одного обновления (например, bot.process_new_updates).
+            host (str): Адрес для прослушивания.
+            port (int): Порт для прослушивания.
+            path (str): Путь webhook, например '/telegram-webhook'.
+            secret_token (str): Секретный токен, переданный
+                в set_webhook.
+            workers (int): Количество обработчиков.
+            queue_size (int): Общий размер очередей обновлений.
+
+        Raises:
+            ValueError: Если секретный токен не задан или размер пула
+                обработчиков или очереди некорректен.
+        """
+        if not secret_token:
+            raise ValueError('Не задан секретный токен webhook.')
+        if workers < 1 or queue_size < workers:
+            raise ValueError('Некорректный размер пула обработчиков '
+                             'или очереди обновлений.')
+
+        self.__process_update = process_update
+        self.__path = path
+        self.__secret_token = secret_token
+        self.__queues: List['queue.Queue[Optional[types.Update]]'] = [
+            queue.Queue(maxsize=queue_size // workers) for _ in range(workers)
+        ]
+        self.__workers: List[threading.Thread] = []
+        self.__server = ThreadingHTTPServer((host, port),
+                                            self.__create_request_handler())
+        self.__server.daemon_threads = True
+        self.__server_thread: Optional[threading.Thread] = None
+
+    @property
+    def server_address(self):
+        """Получить адрес, на котором слушает сервер (host, port)."""
+        return self.__server.server_address
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество обновлений, ожидающих обработки."""
+        return sum(updates.qsize() for updates in self.__queues)
+
+    def start(self) -> None:
+        """Запустить сервер и обработчики в фоновых потоках."""
+        for number, updates in enumerate(self.__queues):
+            worker = threading.Thread(target=self.__work, args=(updates,),
+                                      name='webhook-worker-{0}'.format(number),
+                                      daemon=True)
+            worker.start()
+            self.__workers.append(worker)
+
+        self.__server_thread = threading.Thread(
+            target=self.__server.serve_forever, name='webhook-server',
+            daemon=True)
+        self.__server_thread.start()
+        logger.info('Webhook сервер запущен {0}:{1}{2}'.format(
+            *self.server_address[:2], self.__path))
+
+    def serve_forever(self) -> None:
+        """Запустить обработчики и обслуживать запросы в текущем потоке."""
+        self.start()
+        self.__server_thread.join()
+
+    def stop(self) -> None:
+        """Остановить сервер и дождаться обработки очередей."""
+        self.__server.shutdown()
+        self.__server.server_close()
+        for updates in self.__queues:
+            updates.put(None)
+        for worker in self.__workers:
+            worker.join()
+
+    def submit(self, update_json: Dict[str, Any]) -> bool:
+        """
+        Поставить обновление в очередь обработчика его чата.
+        Возвращает False, если очередь заполнена.
+
+        Args:
+            update_json (Dict[str, Any]): Обновление в виде JSON.
+
+        Raises:
+            ValueError: Если обновление некорректно.
+        """
+        try:
+            update = types.Update.de_json(update_json)
+            chat_id = get_chat_id(update_json) or update.update_id
+        except Exception as error_message:
+            raise ValueError('Некорректное обновление Telegram.\n{0}'.format(
+                error_message))
+        updates = self.__queues[hash(chat_id) % len(self.__queues)]
+        try:
+            updates.put_nowait(update)
+        except queue.Full:
+            return False
+        return True
+
+    def __work(self, updates: 'queue.Queue[Optional[types.Update]]') -> None:
+        """Разбирать очередь обновлений до получения None."""
+        while True:
+            update = updates.get()
+            if update is None:
+                return
+            try:
+                self.__process_update(update)
+            except Exception as error_message:
+                logger.exception(error_message)
+
+    def __is_authorized(self, token: Optional[str]) -> bool:
+        """Проверить секретный токен запроса."""
+        return token is not None and hmac.compare_digest(
+            token.encode(), self.__secret_token.encode())
+
+    def __create_request_handler(self):
+        """Создать обработчик HTTP-запросов, связанный с сервером."""
+        path = self.__path
+        is_authorized = self.__is_authorized
+        submit = self.submit
+
+        class WebhookRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                # тело читается только после проверки пути, токена
+                # и размера; непрочитанное тело - соединение закрывается
+                if self.path != path:
+                    return self.__reject(404)
+                if not is_authorized(self.headers.get(SECRET_TOKEN_HEADER)):
+                    return self.__reject(403)
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                except ValueError:
+                    return self.__reject(400)
+                if length < 0:
+                    return self.__reject(400)
+                if length > MAX_UPDATE_BYTES:
+                    return self.__reject(413)
+                body = self.rfile.read(length)
+
+                try:
+                    update_json = json.loads(body)
+                    if not isinstance(update_json, dict):
+                        raise ValueError(
+                            'Обновление Telegram - не объект JSON.')
+                    submitted = submit(update_json)
+                except ValueError as error_message:
+                    logger.warning(error_message)
+                    return self.__reply(400)
+
+                # 503 - Telegram повторит доставку обновления позже
+                self.__reply(200 if submitted else 503)
+
+            def __reject(self, status: int) -> None:
+                """Ответить без чтения тела запроса."""
+                self.close_connection = True
+                self.__reply(status)
+
+            def __reply(self, status: int) -> None:
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return WebhookRequestHandler
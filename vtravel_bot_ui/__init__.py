@@ -0,0 +1,24 @@
+"""
+Общие для движков бота (telebot.TeleBot и AsyncTeleBot) кнопки,
+тексты сообщений, режимы поиска отелей и шаги диалога (dialog).
+"""
+
+from . import dialog
+
+from .callbacks import (CallbackRouter, HELP_CALLBACK, MODE_CALLBACK,
+                        HOTEL_SEARCH_CALLBACK, HISTORY_CALLBACK,
+                        CALLBACK_DATA_MAX_BYTES,
+                        mode_callback_data, parse_mode_callback,
+                        hotel_search_callback_data,
+                        parse_hotel_search_callback,
+                        history_callback_data, parse_history_callback)
+from .keyboards import (create_command_buttons,
+                        create_buttons_to_select_destination,
+                        create_history_buttons, find_button_text)
+from .messages import (command_all_description, collect_found_destinations,
+                       hotel_short_description, pack_messages,
+                       collect_hotel_selection_messages,
+                       search_record_description, collect_history_messages,
+                       MESSAGE_MAX_LENGTH)
+from .modes import (COMMANDS_AND_MODES, MODES_AND_COMMANDS, MODES_AND_CODES,
+                    CODES_AND_MODES)
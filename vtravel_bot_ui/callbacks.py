@@ -0,0 +1,268 @@
+"""
+Данные кнопок (callback_data) и выбор обработчика нажатой кнопки.
+
+callback_data - код операции (первый символ) и данные операции:
+    - 'h': помощь по командам;
+    - 'm{mode}': выбор режима поиска отелей;
+    - 'd{mode}{destination_id}[.{min price}.{max price}]': выбор
+      месторасположения;
+    - 'y[{created_at}.{record_id}]': страница истории поиска - записи
+      раньше записи record_id со временем created_at (миллисекунды
+      epoch), без ссылки - первая страница.
+
+Числа - в системе счисления по основанию 36.
+
+{mode} - код режима сортировки (MODES_AND_CODES). Например, кнопка
+месторасположения 10873622 в режиме bestdeal с ценами 1000 - 5000:
+'db6h252.rs.3uw' (14 байт вместо 55 в прежнем формате
+'destinationId-10873622-DISTANCE_FROM_LANDMARK-1000-5000').
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .modes import CODES_AND_MODES, MODES_AND_CODES
+
+
+HELP_CALLBACK = 'h'
+MODE_CALLBACK = 'm'
+HOTEL_SEARCH_CALLBACK = 'd'
+HISTORY_CALLBACK = 'y'
+
+# ограничение Telegram на размер callback_data
+CALLBACK_DATA_MAX_BYTES = 64
+
+_BASE36_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+_BASE36_MAX_LENGTH = 13
+_BASE36_CHARACTERS = frozenset(_BASE36_DIGITS)
+
+
+def to_base36(number: int) -> str:
+    """
+    Записать неотрицательное число в системе счисления по основанию 36.
+
+    Args:
+        number (int): Число.
+
+    Raises:
+        ValueError: Если число отрицательное или слишком большое.
+    """
+    if number < 0:
+        raise ValueError('Число не может быть отрицательным: {0}'.format(
+            number))
+    digits = []
+    while True:
+        number, digit = divmod(number, 36)
+        digits.append(_BASE36_DIGITS[digit])
+        if not number:
+            break
+    if len(digits) > _BASE36_MAX_LENGTH:
+        raise ValueError('Слишком большое число для callback_data.')
+    return ''.join(reversed(digits))
+
+
+def from_base36(text: str) -> int:
+    """
+    Прочитать число, записанное функцией to_base36.
+
+    Args:
+        text (str): Число по основанию 36.
+
+    Raises:
+        ValueError: Если text - не число по основанию 36.
+    """
+    # int(text, 36) допускает пробелы, знак, '_' и заглавные буквы
+    if not (0 < len(text) <= _BASE36_MAX_LENGTH
+            and _BASE36_CHARACTERS.issuperset(text)):
+        raise ValueError('Некорректное число в callback_data: {0!r}'.format(
+            text))
+    return int(text, 36)
+
+
+def _checked(callback_data: str) -> str:
+    """Проверить размер callback_data."""
+    if len(callback_data.encode()) > CALLBACK_DATA_MAX_BYTES:
+        raise ValueError('callback_data длиннее {0} байт: {1}'.format(
+            CALLBACK_DATA_MAX_BYTES, callback_data))
+    return callback_data
+
+
+def mode_callback_data(mode_for_sorting: str) -> str:
+    """
+    Составить callback_data кнопки режима поиска отелей.
+
+    Args:
+        mode_for_sorting (str): Режим сортировки поиска отелей.
+    """
+    return MODE_CALLBACK + MODES_AND_CODES[mode_for_sorting]
+
+
+def parse_mode_callback(payload: str) -> str:
+    """
+    Получить режим сортировки из данных кнопки режима.
+
+    Args:
+        payload (str): callback_data без кода операции.
+
+    Raises:
+        ValueError: Если код режима неизвестен.
+    """
+    try:
+        return CODES_AND_MODES[payload]
+    except KeyError:
+        raise ValueError('Неизвестный режим в callback_data: {0!r}'.format(
+            payload))
+
+
+def hotel_search_callback_data(destination_id: str, mode_for_sorting: str,
+                               bestdeal_mode: List[int] = None) -> str:
+    """
+    Составить callback_data кнопки месторасположения.
+
+    Args:
+        destination_id (str): Id месторасположения (число).
+        mode_for_sorting (str): Режим сортировки поиска отелей.
+        bestdeal_mode (List[int]) = None: [минимальная цена отеля,
+            максимальная цена отеля].
+
+    Raises:
+        ValueError: Если id или цены - не неотрицательные числа.
+    """
+    callback_data = HOTEL_SEARCH_CALLBACK + MODES_AND_CODES[
+        mode_for_sorting] + to_base36(int(destination_id))
+    if bestdeal_mode:
+        callback_data = '{0}.{1}.{2}'.format(
+            callback_data, to_base36(bestdeal_mode[0]),
+            to_base36(bestdeal_mode[1]))
+    return _checked(callback_data)
+
+
+def parse_hotel_search_callback(payload: str) -> Dict[str, Any]:
+    """
+    Получить параметры поиска отелей из данных кнопки месторасположения:
+    destination_id, mode, price_min, price_max.
+
+    Args:
+        payload (str): callback_data без кода операции.
+
+    Raises:
+        ValueError: Если данные кнопки некорректны.
+    """
+    mode = parse_mode_callback(payload[:1])
+    fields = payload[1:].split('.')
+    if len(fields) not in (1, 3):
+        raise ValueError(
+            'Некорректные данные кнопки поиска отелей: {0!r}'.format(payload))
+
+    parameters = {'destination_id': str(from_base36(fields[0])),
+                  'mode': mode, 'price_min': None, 'price_max': None}
+    if len(fields) == 3:
+        parameters['price_min'] = from_base36(fields[1])
+        parameters['price_max'] = from_base36(fields[2])
+        if parameters['price_min'] > parameters['price_max']:
+            raise ValueError('Минимальная цена больше максимальной: '
+                             '{0!r}'.format(payload))
+    return parameters
+
+
+def history_callback_data(before: Tuple[float, int] = None) -> str:
+    """
+    Составить callback_data кнопки страницы истории поиска.
+
+    Args:
+        before (Tuple[float, int]) = None: Ссылка на страницу - время
+            (epoch, с точностью до миллисекунд) и id записи, раньше
+            которой показываются записи. По умолчанию - первая страница.
+    """
+    if before is None:
+        return HISTORY_CALLBACK
+    created_at, record_id = before
+    return _checked('{0}{1}.{2}'.format(HISTORY_CALLBACK,
+                                        to_base36(round(created_at * 1000)),
+                                        to_base36(record_id)))
+
+
+def parse_history_callback(payload: str) -> Optional[Tuple[float, int]]:
+    """
+    Получить ссылку на страницу истории поиска из данных кнопки
+    (None - первая страница).
+
+    Args:
+        payload (str): callback_data без кода операции.
+
+    Raises:
+        ValueError: Если данные кнопки некорректны.
+    """
+    if not payload:
+        return None
+    fields = payload.split('.')
+    if len(fields) != 2:
+        raise ValueError(
+            'Некорректные данные кнопки истории поиска: {0!r}'.format(
+                payload))
+    return from_base36(fields[0]) / 1000, from_base36(fields[1])
+
+
+class CallbackRouter:
+    """
+    Выбор обработчика нажатой кнопки по коду операции - первому
+    символу callback_data (поиск в словаре вместо проверки фильтров
+    всех обработчиков по очереди).
+
+    Методы:
+        - register: Зарегистрировать обработчик кода операции.
+        - resolve: Получить обработчик и данные нажатой кнопки.
+    """
+    def __init__(self):
+        self.__routes: Dict[str, Tuple[Callable[..., Any],
+                                       Optional[Callable[[str], Any]]]] = {}
+
+    def register(self, opcode: str,
+                 decoder: Callable[[str], Any] = None
+                 ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Зарегистрировать обработчик кода операции (декоратор).
+        Обработчик вызывается с нажатой кнопкой и данными операции
+        (движки бота передают также состояние диалога чата).
+
+        Args:
+            opcode (str): Код операции - один символ.
+            decoder (Callable) = None: Функция, разбирающая данные
+                операции. По умолчанию данные передаются строкой.
+
+        Raises:
+            ValueError: Если код операции некорректен или уже занят.
+        """
+        if len(opcode) != 1:
+            raise ValueError('Код операции - один символ: {0!r}'.format(
+                opcode))
+        if opcode in self.__routes:
+            raise ValueError('Код операции уже занят: {0!r}'.format(opcode))
+
+        def decorator(handler: Callable[..., Any]) -> Callable[..., Any]:
+            self.__routes[opcode] = (handler, decoder)
+            return handler
+
+        return decorator
+
+    def resolve(self, data: Optional[str]
+                ) -> Optional[Tuple[Callable[..., Any], Any]]:
+        """
+        Получить обработчик и разобранные данные нажатой кнопки.
+        Возвращает None, если код операции неизвестен.
+
+        Args:
+            data (str): callback_data нажатой кнопки.
+
+        Raises:
+            ValueError: Если данные операции некорректны.
+        """
+        route = self.__routes.get(data[:1]) if data else None
+        if route is None:
+            return None
+        handler, decoder = route
+        payload = data[1:]
+        return handler, decoder(payload) if decoder is not None else payload
+
+    def __contains__(self, data: str) -> bool:
+        """Проверить, есть ли обработчик кода операции callback_data."""
+        return bool(data) and data[:1] in self.__routes
@@ -0,0 +1,448 @@
+"""
+Шаги диалога поиска отелей, общие для движков бота (main.py
+и async_main.py):
+    город -> [цены] -> месторасположение -> количество отелей -> фото.
+
+Функции диалога не отправляют сообщений и не обращаются к API:
+они проверяют ответ пользователя, меняют состояние диалога
+и возвращают ответ бота (Reply) - текст, кнопки и действие,
+которое выполняет движок (сохранить состояние, найти город,
+отправить подборку). Движок отвечает только за ввод-вывод.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from telebot import types
+from loguru import logger
+
+from vtravel_bot_parsers import HotelSummary, ParseHotels
+from vtravel_bot_services import ConversationState, SearchRecord
+
+from .keyboards import (create_buttons_to_select_destination,
+                        create_history_buttons, find_button_text)
+from .messages import collect_found_destinations, collect_history_messages
+from .modes import MODES_AND_COMMANDS
+
+
+# действия движка после ответа бота
+ASK_AGAIN = 'ask_again'            # состояние диалога не меняется
+SAVE_STATE = 'save_state'          # сохранить состояние диалога
+END_DIALOG = 'end_dialog'          # завершить диалог
+SEARCH_CITY = 'search_city'        # найти месторасположения state.city
+SEND_SELECTION = 'send_selection'  # отправить подборку отелей
+
+HELLO_MESSAGE = 'Привет!\nЯ бот турагенства.\n' \
+                'Помогу подобрать самые лучшие отели для вас!\n\n'
+CHOOSE_COMMAND = 'Нажмите на более предпочтительный выбор'
+WAIT_MESSAGE = 'Ожидайте загрузки...'
+SEARCH_ERROR = 'Ошибка поиска, попробуйте пожалуйста еще раз'
+PHOTOS_ERROR = 'Не удалось загрузить фото отеля'
+NOTHING_FOUND = 'Отели по заданным параметрам не найдены'
+CHOOSE_DESTINATION = 'Выберите месторасположение для поиска отелей'
+UNKNOWN_INPUT = 'Введите символ - "/" или "/help" для просмотра всех команд.'
+
+
+class Reply:
+    """
+    Ответ бота на шаг диалога.
+
+    Атрибуты:
+        - text: Текст сообщения (None - без сообщения).
+        - action: Действие движка после отправки сообщения.
+        - markup: Кнопки сообщения.
+        - number_of_photos: Количество фото отеля (SEND_SELECTION).
+    """
+    __slots__ = ('text', 'action', 'markup', 'number_of_photos')
+
+    def __init__(self, text: Optional[str], action: str = ASK_AGAIN,
+                 markup: Optional['types.InlineKeyboardMarkup'] = None,
+                 number_of_photos: int = None):
+        """
+        Args:
+            text (Optional[str]): Текст сообщения.
+            action (str) = ASK_AGAIN: Действие движка.
+            markup (types.InlineKeyboardMarkup) = None: Кнопки сообщения.
+            number_of_photos (int) = None: Количество фото отеля.
+        """
+        self.text = text
+        self.action = action
+        self.markup = markup
+        self.number_of_photos = number_of_photos
+
+    def __repr__(self) -> str:
+        return 'Reply({0!r}, {1!r})'.format(self.text, self.action)
+
+
+def ask_city(chat_id: int, mode_for_sorting: str,
+             conversation_id: str) -> Tuple[ConversationState, Reply]:
+    """
+    Начать новый диалог - запросить у пользователя город для поиска.
+
+    Args:
+        chat_id (int): Id чата.
+        mode_for_sorting (str): Режим сортировки поиска отелей.
+        conversation_id (str): Id нового диалога.
+    """
+    state = ConversationState(chat_id=chat_id, step='city',
+                              mode=mode_for_sorting,
+                              conversation_id=conversation_id)
+    return state, Reply('Введите город для поиска:', SAVE_STATE)
+
+
+def receive_city(state: ConversationState, text: str) -> Reply:
+    """
+    Получить от пользователя город для поиска.
+    В режиме bestdeal - сначала запросить диапазон цен.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        text (str): Ответ пользователя - город для поиска.
+    """
+    state.city = text
+    if state.mode == 'DISTANCE_FROM_LANDMARK':
+        state.step = 'price_min'
+        return Reply('Введите цифрами минимальную цену отеля:', SAVE_STATE)
+    return Reply(None, SEARCH_CITY)
+
+
+def receive_price_min(state: ConversationState, text: str) -> Reply:
+    """
+    Получить от пользователя минимальную цену за отель.
+    Отрицательная цена не принимается - цена запрашивается заново.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        text (str): Ответ пользователя - минимальная цена.
+    """
+    logger.info(
+        'Минимальная цена за отель, выбранная пользователем {0}'.format(text))
+    try:
+        price_min = int(text)
+    except ValueError as error_message:
+        logger.warning(
+            'Ошибка ввода пользователем: {0}'
+            'Введенная пользователем минимальная цена: {1}'.format(
+                                                        error_message, text))
+        return Reply('Введите минимальную цену - цифрами:')
+    if price_min < 0:
+        logger.warning('Пользователь ввел отрицательную минимальную '
+                       'цену {0}'.format(price_min))
+        return Reply('Цена не может быть отрицательной.\n'
+                     'Введите минимальную цену - цифрами:')
+
+    state.price_min = price_min
+    state.step = 'price_max'
+    return Reply('Введите цифрами максимальную цену отеля:', SAVE_STATE)
+
+
+def receive_price_max(state: ConversationState, text: str) -> Reply:
+    """
+    Получить от пользователя максимальную цену за отель
+    и найти месторасположения города (режим bestdeal).
+    Цена меньше минимальной не принимается - цена запрашивается заново.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        text (str): Ответ пользователя - максимальная цена.
+    """
+    logger.info(
+        'Максимальная цена за отель, выбранная пользователем {0}'.format(text))
+    try:
+        price_max = int(text)
+    except ValueError as error_message:
+        logger.warning(
+            'Ошибка ввода пользователем: {0}'
+            'Введенная пользователем максимальная цена: {1}'.format(
+                                                        error_message, text))
+        return Reply('Введите максимальную цену - цифрами:')
+    price_min = state.price_min or 0
+    if price_max < price_min:
+        logger.warning('Пользователь ввел максимальную цену {0} меньше '
+                       'минимальной {1}'.format(price_max, price_min))
+        return Reply('Максимальная цена не может быть меньше минимальной '
+                     '({0}).\nВведите максимальную цену - цифрами:'.format(
+                                                                price_min))
+
+    state.price_max = price_max
+    return Reply(None, SEARCH_CITY)
+
+
+def city_not_found(state: ConversationState) -> Reply:
+    """
+    Ответить на город, который нельзя найти (например, из цифр) -
+    запросить город заново.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+    """
+    state.step = 'city'
+    return Reply('Введите город буквами', SAVE_STATE)
+
+
+def search_failed() -> Reply:
+    """Ответить на ошибку поиска города - диалог завершается."""
+    return Reply(SEARCH_ERROR, END_DIALOG)
+
+
+def destinations_found(state: ConversationState,
+                       search_results: Optional[Dict[str, Any]],
+                       found_destinations: Dict[str, str] = None,
+                       stale: bool = False) -> Reply:
+    """
+    Предложить месторасположения найденного города (state.city) кнопками.
+    Если месторасположения не удалось составить - сообщить об ошибке
+    поиска, состояние диалога не меняется. Если не удалось составить
+    ни одной кнопки - диалог завершается с ошибкой поиска.
+
+    Args:
+        state (ConversationState): Состояние диалога. Если заданы
+            state.price_min и state.price_max - поиск в режиме bestdeal.
+        search_results (Optional[Dict[str, Any]]): Ответ API на поиск
+            по городу.
+        found_destinations (Dict[str, str]) = None: Месторасположения
+            из справочника направлений (вместо ответа API).
+        stale (bool) = False: Ответ API - сохраненный, сервис поиска
+            недоступен.
+    """
+    try:
+        if found_destinations is None:
+            found_destinations = collect_found_destinations(search_results)
+        bestdeal_mode = None
+        if state.price_min is not None and state.price_max is not None:
+            bestdeal_mode = [state.price_min, state.price_max]
+        markup = create_buttons_to_select_destination(found_destinations,
+                                                      state.mode,
+                                                      bestdeal_mode)
+    except Exception as error_message:
+        logger.exception(error_message)
+        return Reply(SEARCH_ERROR)
+    if markup is None:
+        logger.error('Нет кнопок месторасположений города {0}'.format(
+                                                                state.city))
+        return Reply(SEARCH_ERROR, END_DIALOG)
+
+    text = CHOOSE_DESTINATION
+    if stale:
+        text += '\n(сервис поиска недоступен - ' \
+                'показаны сохраненные результаты)'
+    state.step = 'destination'
+    return Reply(text, SAVE_STATE, markup=markup)
+
+
+def start_hotel_search(call: 'types.CallbackQuery',
+                       parameters: Dict[str, Any],
+                       previous_state: Optional[ConversationState],
+                       conversation_id: str
+                       ) -> Tuple[ConversationState, Reply]:
+    """
+    Составить состояние диалога по нажатой кнопке месторасположения
+    и запросить у пользователя количество отелей.
+    В состоянии сохраняются только параметры поиска.
+
+    Отели по кнопке не запрашиваются: до ответа пользователя
+    неизвестно, сколько отелей нужно, а проверочный запрос одного отеля
+    - это второй запрос properties/list с другим размером страницы.
+    Подборка запрашивается одной страницей ровно нужного размера
+    (hotel_search_parameters); цена этого - об отсутствии отелей
+    пользователь узнает после ответов на вопросы диалога (NOTHING_FOUND).
+
+    Args:
+        call (types.CallbackQuery): Нажатая кнопка месторасположения.
+        parameters (Dict[str, Any]): Параметры поиска из callback_data -
+            destination_id, mode, price_min, price_max.
+        previous_state (Optional[ConversationState]): Состояние диалога
+            до нажатия кнопки (город - для истории поиска).
+        conversation_id (str): Id диалога.
+    """
+    state = ConversationState(chat_id=call.message.chat.id,
+                              step='hotels_count',
+                              city=(previous_state.city
+                                    if previous_state is not None else None),
+                              destination=find_button_text(
+                                  call.message.reply_markup, call.data),
+                              conversation_id=conversation_id,
+                              **parameters)
+    return state, Reply('Введите количество отелей для вывода результатов\n'
+                        'От 1 до 20 (включительно)', SAVE_STATE)
+
+
+def hotel_search_parameters(state: ConversationState,
+                            number_of_hotels: int) -> Dict[str, Any]:
+    """
+    Составить параметры перебора отелей (iterate_hotels) по состоянию
+    диалога. Размер страницы не задается - первая страница размера
+    number_of_hotels (не больше MAX_PAGE_SIZE).
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        number_of_hotels (int): Количество отелей.
+    """
+    parameters = {'destination_id': state.destination_id,
+                  'sort_mode': state.mode,
+                  'limit': number_of_hotels}
+    if state.price_min is not None and state.price_max is not None:
+        parameters.update(price_min=state.price_min,
+                          price_max=state.price_max,
+                          distance_label='City center')
+    return parameters
+
+
+def hotels_unavailable() -> Reply:
+    """Ответить на ошибку API при поиске отелей."""
+    return Reply('Не удалось получить результаты поиска по заданным '
+                 'параметрам\nПопробуйте пожалуйста еще раз')
+
+
+def receive_number_of_hotels(state: ConversationState, text: str) -> Reply:
+    """
+    Получить от пользователя количество отелей.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        text (str): Ответ пользователя - количество отелей.
+    """
+    logger.info(
+        'Введенное количество отелей от пользователя = {0}'.format(text))
+    try:
+        number_of_hotels = int(text)
+    except ValueError as error_message:
+        logger.warning(
+            'Ошибка ввода от пользователя - {0}'.format(error_message))
+        return Reply('Введите пожалуйста цифрами.')
+
+    if number_of_hotels < 1:
+        logger.warning('Пользователь ввел количество ожидаемых'
+                       ' результатов {0} < 1'.format(number_of_hotels))
+        return Reply('Введите количество от 1 до 20 (включительно)')
+
+    state.number_of_hotels = number_of_hotels
+    state.step = 'photos_answer'
+    return Reply('Необходимо ли загрузить фотографии отеля (да/нет) ?',
+                 SAVE_STATE)
+
+
+def receive_photos_answer(state: ConversationState, text: str) -> Reply:
+    """
+    Получить от пользователя ответ - необходимо ли загружать фото отеля.
+        Если да - запросить количество фотографий.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        text (str): Ответ пользователя - да/нет.
+    """
+    if text.lower() == 'да':
+        state.step = 'photos_count'
+        return Reply('Введите цифрами количество фотографий '
+                     'от 1 до 5 (включительно)', SAVE_STATE)
+
+    logger.info('Выбрана загрузка отелей без фото')
+    return Reply(None, SEND_SELECTION)
+
+
+def receive_number_of_photos(state: ConversationState, text: str) -> Reply:
+    """
+    Получить от пользователя количество фотографий отеля.
+    Если введено не число от 1 до 5 - загрузить 5 фотографий.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        text (str): Ответ пользователя - количество фотографий.
+    """
+    try:
+        number_of_photos = int(text)
+    except ValueError:
+        logger.warning('Необходимое количество фотографий '
+                       'от пользователя = {0}'.format(text))
+        number_of_photos = 5
+    if number_of_photos not in range(1, 6):
+        number_of_photos = 5
+    logger.info('Количество фото от пользователя для загрузки = {0}'.format(
+                                                            number_of_photos))
+    return Reply(None, SEND_SELECTION, number_of_photos=number_of_photos)
+
+
+def collect_selection(state: ConversationState,
+                      hotels: List[Dict[str, Any]]) -> List[HotelSummary]:
+    """
+    Составить подборку отелей по состоянию диалога
+    (в режиме bestdeal - в диапазоне цен, по расстоянию до центра).
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        hotels (List[Dict[str, Any]]): Найденные отели.
+    """
+    return ParseHotels.collect_brief_information_about_hotels(
+        number_of_hotels=state.number_of_hotels, hotels=hotels,
+        price_min=state.price_min, price_max=state.price_max)
+
+
+def search_record(state: ConversationState,
+                  selection_of_hotels: List[HotelSummary]) -> SearchRecord:
+    """
+    Составить запись истории поиска по завершенному диалогу.
+
+    Args:
+        state (ConversationState): Состояние диалога.
+        selection_of_hotels (List[HotelSummary]): Подборка отелей.
+    """
+    return SearchRecord(
+        chat_id=state.chat_id,
+        command=MODES_AND_COMMANDS.get(state.mode, state.mode),
+        city=state.city, destination=state.destination,
+        destination_id=state.destination_id,
+        price_min=state.price_min, price_max=state.price_max,
+        hotels=[hotel.name for hotel in selection_of_hotels])
+
+
+def history_page(search_records: List[Any],
+                 next_page: Optional[Tuple[float, int]],
+                 first_page: bool) -> List[Reply]:
+    """
+    Составить сообщения страницы истории поиска (разметка HTML).
+    Если есть следующая страница - под последним сообщением
+    кнопка "Показать еще".
+
+    Args:
+        search_records (List[SearchRecord]): Записи страницы.
+        next_page (Optional[Tuple[float, int]]): Ссылка на следующую
+            страницу (SearchHistory.page).
+        first_page (bool): Первая страница - с заголовком.
+    """
+    texts = collect_history_messages(search_records, header=first_page)
+    markup = create_history_buttons(next_page)
+    return [Reply(text, markup=markup if number == len(texts) else None)
+            for number, text in enumerate(texts, 1)]
+
+
+def hotel_photo_urls(hotel: HotelSummary,
+                     hotel_photos: Union[List[Dict[str, Any]], Exception]
+                     ) -> List[str]:
+    """
+    Получить URL фото отеля для отправки альбомом.
+
+    Args:
+        hotel (HotelSummary): Информация об отеле.
+        hotel_photos (Union[List[Dict[str, Any]], Exception]): Фото отеля
+            или ошибка их получения.
+
+    Raises:
+        ConnectionError: Если фото не удалось получить от API.
+        ValueError: Если фото у отеля нет.
+        AttributeError: Если ответ API некорректен.
+    """
+    if isinstance(hotel_photos, Exception):
+        raise hotel_photos
+    if not hotel_photos:
+        raise ValueError('Нет фото отеля - {0}'.format(hotel.name))
+    return [photo.get('baseUrl').format(size='y') for photo in hotel_photos]
+
+
+# шаг диалога -> обработка ответа пользователя на этом шаге
+CONVERSATION_STEPS: Dict[str, Callable[[ConversationState, str], Reply]] = {
+    'city': receive_city,
+    'price_min': receive_price_min,
+    'price_max': receive_price_max,
+    'hotels_count': receive_number_of_hotels,
+    'photos_answer': receive_photos_answer,
+    'photos_count': receive_number_of_photos,
+}
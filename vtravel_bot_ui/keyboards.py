@@ -0,0 +1,127 @@
+"""
+Кнопки бота.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from telebot import types
+from loguru import logger
+
+from .callbacks import (HELP_CALLBACK, history_callback_data,
+                        hotel_search_callback_data, mode_callback_data)
+
+
+@logger.catch
+def create_command_buttons() -> 'types.InlineKeyboardMarkup':
+    """
+    Создать кнопки для команд:
+        [lowprice, highprice, bestdeal, history, help]
+    """
+    markup = types.InlineKeyboardMarkup(row_width=1)
+
+    lowprice_button = types.InlineKeyboardButton(
+                                            'Топ дешёвых отелей',
+                                            callback_data=mode_callback_data(
+                                                'PRICE'))
+    high_button = types.InlineKeyboardButton('Топ дорогих отелей',
+                                             callback_data=mode_callback_data(
+                                                 'PRICE_HIGHEST_FIRST'))
+    bestdeal_button = types.InlineKeyboardButton(
+                                            'Топ отелей, подходящих по цене',
+                                            callback_data=mode_callback_data(
+                                                'DISTANCE_FROM_LANDMARK'))
+    history_button = types.InlineKeyboardButton(
+                                            'История поиска отелей',
+                                            callback_data=(
+                                                history_callback_data()))
+    help_button = types.InlineKeyboardButton(
+                                            'Помощь по командам',
+                                            callback_data=HELP_CALLBACK)
+
+    markup.add(lowprice_button, high_button, bestdeal_button, history_button,
+               help_button)
+    return markup
+
+
+@logger.catch
+def create_buttons_to_select_destination(
+        destinations: Dict[str, str],
+        mode_for_sorting: str,
+        bestdeal_mode: List[int] = None
+) -> Optional['types.InlineKeyboardMarkup']:
+    """
+    Создать кнопки для выбора пункта назначения поиска отелей.
+    Месторасположение, для которого не удалось составить данные кнопки,
+    пропускается. Возвращает None, если не осталось ни одной кнопки.
+
+    callback_data (hotel_search_callback_data) - код операции 'd',
+    код режима сортировки (MODES_AND_CODES) и id месторасположения
+    по основанию 36; в режиме bestdeal через точку добавляются
+    минимальная и максимальная цена (тоже по основанию 36), например
+    'db6h252.rs.3uw'. Данные не длиннее CALLBACK_DATA_MAX_BYTES
+    (64 байта - ограничение Telegram).
+
+    Args:
+       destinations (Dict[str, str]): Найденные направления.
+       mode_for_sorting (str): Режим сортировки поиска отелей.
+       bestdeal_mode (List[int]) = None: Если задан данный параметр
+            в списке передается [минимальная цена отеля,
+                                максимальная цена отеля]
+    """
+    markup = types.InlineKeyboardMarkup()
+
+    for destination_name, destination_id in destinations.items():
+        try:
+            callback_data = hotel_search_callback_data(
+                destination_id, mode_for_sorting, bestdeal_mode)
+        except (ValueError, TypeError) as error_message:
+            logger.warning('Месторасположение {0!r} (id {1!r}) пропущено: '
+                           '{2}'.format(destination_name, destination_id,
+                                        error_message))
+            continue
+        markup.add(types.InlineKeyboardButton(destination_name,
+                                              callback_data=callback_data))
+
+    if not markup.keyboard:
+        return None
+    return markup
+
+
+@logger.catch
+def create_history_buttons(
+        next_page: Optional[Tuple[float, int]]
+) -> Optional['types.InlineKeyboardMarkup']:
+    """
+    Создать кнопку следующей страницы истории поиска.
+    Возвращает None, если страница последняя.
+
+    Args:
+        next_page (Optional[Tuple[float, int]]): Ссылка на следующую
+            страницу (SearchHistory.page).
+    """
+    if next_page is None:
+        return None
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton(
+        'Показать еще', callback_data=history_callback_data(next_page)))
+    return markup
+
+
+def find_button_text(markup: Optional['types.InlineKeyboardMarkup'],
+                     callback_data: str) -> Optional[str]:
+    """
+    Найти текст нажатой кнопки по callback_data
+    (например, название выбранного месторасположения).
+    Возвращает None, если кнопки нет.
+
+    Args:
+        markup (types.InlineKeyboardMarkup): Кнопки сообщения.
+        callback_data (str): Данные нажатой кнопки.
+    """
+    if markup is None:
+        return None
+    for row in markup.keyboard:
+        for button in row:
+            if button.callback_data == callback_data:
+                return button.text
+    return None
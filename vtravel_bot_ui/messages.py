@@ -0,0 +1,165 @@
+"""
+Тексты сообщений бота.
+"""
+
+import time
+from html import escape
+from typing import Any, Dict, List
+
+from vtravel_bot_parsers import HotelSummary
+
+
+# максимальная длина текста сообщения Telegram
+MESSAGE_MAX_LENGTH = 4096
+SELECTION_HEADER = '<b>Подборка отелей:</b>'
+HISTORY_HEADER = '<b>История поиска отелей:</b>'
+HISTORY_EMPTY = 'История поиска пуста'
+
+
+def command_all_description() -> str:
+    """
+    Отправить описание команд:
+        [lowprice, highprice, bestdeal, history]
+    """
+    command_description = (
+        "/lowprice - Узнать топ самых дешёвых отелей в городе\n"
+        "/highprice - Узнать топ самых дорогих отелей в городе\n"
+        "/bestdeal - Узнать топ отелей, наиболее подходящих по цене"
+        " и расположению от центра\n"
+        "/history - Узнать историю поиска отелей\n"
+    )
+    return command_description
+
+
+def collect_found_destinations(
+                        search_results: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Составить найденные направления {название: destinationId}
+    из результатов поиска по городу.
+
+    Args:
+        search_results (Dict[str, Any]): Ответ API на поиск по городу.
+    """
+    destinations = search_results.get('suggestions')[0].get('entities')
+    found_destinations = {
+        destination.get('caption'): destination.get('destinationId')
+        for destination in destinations
+        }
+    return found_destinations
+
+
+def hotel_short_description(hotel: HotelSummary) -> str:
+    """
+    Составить краткое описание отеля для отправки пользователю
+    (разметка HTML, parse_mode='HTML').
+
+    Args:
+        hotel (HotelSummary): Краткая информация об отеле.
+    """
+    short_description = (
+        '🏨 <b>{name}</b>\n'
+        'Адрес отеля: {address}\n'
+        'Расположение от центра: {landmarks}\n'
+        'Цена: {price}'.format(
+            name=escape(str(hotel.name), quote=False),
+            address=escape(str(hotel.address), quote=False),
+            landmarks=escape(str(hotel.landmarks), quote=False),
+            price=escape(str(hotel.price), quote=False)
+        )
+    )
+    return short_description
+
+
+def pack_messages(parts: List[str],
+                  max_length: int = MESSAGE_MAX_LENGTH,
+                  separator: str = '\n\n') -> List[str]:
+    """
+    Упаковать части текста в как можно меньшее число сообщений
+    не длиннее max_length. Части не разрываются; часть длиннее
+    max_length отправляется отдельными кусками.
+
+    Args:
+        parts (List[str]): Части текста по порядку.
+        max_length (int): Максимальная длина сообщения.
+        separator (str): Разделитель частей в сообщении.
+    """
+    messages = []
+    current = ''
+    for part in parts:
+        if current and (len(current) + len(separator)
+                        + len(part) <= max_length):
+            current += separator + part
+            continue
+        if current:
+            messages.append(current)
+        while len(part) > max_length:
+            messages.append(part[:max_length])
+            part = part[max_length:]
+        current = part
+    if current:
+        messages.append(current)
+    return messages
+
+
+def collect_hotel_selection_messages(hotels: List[HotelSummary],
+                                     packed: bool = True) -> List[str]:
+    """
+    Составить сообщения с подборкой отелей (разметка HTML).
+
+    Args:
+        hotels (List[HotelSummary]): Подборка отелей.
+        packed (bool): True - описания упаковываются в как можно меньшее
+            число сообщений. False - по сообщению на отель (между ними
+            отправляются фото), заголовок - в первом сообщении.
+    """
+    descriptions = [hotel_short_description(hotel) for hotel in hotels]
+    if packed:
+        return pack_messages([SELECTION_HEADER] + descriptions)
+    if descriptions:
+        descriptions[0] = '\n\n'.join((SELECTION_HEADER, descriptions[0]))
+    return descriptions
+
+
+def search_record_description(search_record: Any) -> str:
+    """
+    Составить описание записи истории поиска (разметка HTML).
+
+    Args:
+        search_record (SearchRecord): Запись истории поиска
+            (vtravel_bot_services.SearchRecord).
+    """
+    lines = ['🔎 <b>{0}</b> - {1}'.format(
+        escape(search_record.command, quote=False),
+        time.strftime('%d.%m.%Y %H:%M',
+                      time.localtime(search_record.created_at)))]
+    if search_record.city:
+        lines.append('Город: {0}'.format(
+            escape(search_record.city, quote=False)))
+    if search_record.destination:
+        lines.append('Месторасположение: {0}'.format(
+            escape(search_record.destination, quote=False)))
+    if search_record.price_min is not None \
+            and search_record.price_max is not None:
+        lines.append('Цена: от {0} до {1}'.format(search_record.price_min,
+                                                  search_record.price_max))
+    lines.append('Отели: {0}'.format(
+        escape(', '.join(search_record.hotels), quote=False) or '-'))
+    return '\n'.join(lines)
+
+
+def collect_history_messages(search_records: List[Any],
+                             header: bool = True) -> List[str]:
+    """
+    Составить сообщения со страницей истории поиска (разметка HTML).
+
+    Args:
+        search_records (List[SearchRecord]): Записи страницы истории.
+        header (bool): True - первая страница, с заголовком.
+    """
+    if not search_records:
+        return [HISTORY_EMPTY] if header else []
+    descriptions = [search_record_description(search_record)
+                    for search_record in search_records]
+    if header:
+        descriptions.insert(0, HISTORY_HEADER)
+    return pack_messages(descriptions)
@@ -0,0 +1,25 @@
+"""
+Режимы сортировки отелей для команд и кнопок бота.
+"""
+
+from typing import Dict
+
+
+COMMANDS_AND_MODES: Dict[str, str] = {
+    '/lowprice': 'PRICE',
+    '/highprice': 'PRICE_HIGHEST_FIRST',
+    '/bestdeal': 'DISTANCE_FROM_LANDMARK'
+}
+
+MODES_AND_COMMANDS: Dict[str, str] = {
+    mode: command for command, mode in COMMANDS_AND_MODES.items()}
+
+# коды режимов в callback_data кнопок
+MODES_AND_CODES: Dict[str, str] = {
+    'PRICE': 'l',
+    'PRICE_HIGHEST_FIRST': 'h',
+    'DISTANCE_FROM_LANDMARK': 'b'
+}
+
+CODES_AND_MODES: Dict[str, str] = {
+    code: mode for mode, code in MODES_AND_CODES.items()}